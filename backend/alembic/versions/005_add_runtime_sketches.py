@@ -0,0 +1,34 @@
+"""Add runtime quantile sketches to hourly execution rollups
+
+Revision ID: 005_runtime_sketches
+Revises: 004_export_tables
+Create Date: 2025-01-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005_runtime_sketches'
+down_revision = '004_export_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add runtime_sketch column to execution_metrics_hourly."""
+
+    # Serialized DDSketch (bucket index -> count); merged in Python to answer
+    # day/week/30-day percentiles without rescanning execution_logs.
+    op.add_column(
+        'execution_metrics_hourly',
+        sa.Column('runtime_sketch', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        schema='analytics'
+    )
+
+
+def downgrade():
+    """Drop runtime_sketch column."""
+
+    op.drop_column('execution_metrics_hourly', 'runtime_sketch', schema='analytics')
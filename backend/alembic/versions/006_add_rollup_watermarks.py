@@ -0,0 +1,72 @@
+"""Add high-water marks for incremental rollups
+
+Revision ID: 006_rollup_watermarks
+Revises: 005_runtime_sketches
+Create Date: 2025-01-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_rollup_watermarks'
+down_revision = '005_runtime_sketches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create aggregation_watermarks and track when execution logs change."""
+
+    # One row per incremental rollup source: rows ingested before high_water
+    # have been merged into the hourly tables.
+    op.create_table(
+        'aggregation_watermarks',
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('high_water', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('name'),
+        schema='analytics'
+    )
+
+    # Incremental runs find changed execution logs by write time. Logs are
+    # inserted when a run starts and updated when it finishes, so created_at
+    # would miss the update. Existing rows keep NULL: they are covered by the
+    # full rollups.
+    op.add_column('execution_logs', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.alter_column('execution_logs', 'updated_at', server_default=sa.text('now()'))
+    op.execute("""
+        CREATE OR REPLACE FUNCTION public.execution_logs_set_updated_at()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            NEW.updated_at = NOW();
+            RETURN NEW;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER execution_logs_updated_at
+            BEFORE UPDATE ON execution_logs
+            FOR EACH ROW
+            EXECUTE FUNCTION public.execution_logs_set_updated_at()
+    """)
+    # (analytics.user_activity is append-only and already has
+    # ix_user_activity_created_at)
+    op.create_index(
+        'idx_execution_logs_updated_at',
+        'execution_logs',
+        ['updated_at'],
+        unique=False
+    )
+
+
+def downgrade():
+    """Drop aggregation_watermarks and the execution_logs write time."""
+
+    op.drop_index('idx_execution_logs_updated_at', table_name='execution_logs')
+    op.execute('DROP TRIGGER IF EXISTS execution_logs_updated_at ON execution_logs')
+    op.execute('DROP FUNCTION IF EXISTS public.execution_logs_set_updated_at()')
+    op.drop_column('execution_logs', 'updated_at')
+    op.drop_table('aggregation_watermarks', schema='analytics')
@@ -6,18 +6,22 @@ and response caching for the analytics service.
 
 from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable
 import logging
+import math
 import time
 import hashlib
-import json
 from datetime import datetime
+from functools import partial
 
 from ..core.config import settings
+from ..core.rate_limit_engine import RateLimit, get_rate_limit_engine
 from ..core.redis import get_redis_client
 from ..core.security import verify_token
+from ..services.cache.single_flight import CoalescingLoader, COALESCED
+from ..services.cache.tags import user_tag, workspace_tag
 
 logger = logging.getLogger(__name__)
 
@@ -54,8 +58,8 @@ RATE_LIMITS = {
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """Rate limiting middleware per workspace/user.
 
-    Uses Redis for distributed counting across multiple instances.
-    Implements sliding window algorithm for accurate rate limiting.
+    Uses the shared GCRA engine (core/rate_limit_engine.py): one atomic
+    Redis round trip per request, with a local fast path for denials.
     """
 
     def __init__(self, app):
@@ -123,71 +127,23 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     ) -> Dict[str, Any]:
         """Check if rate limit is exceeded."""
         limit = self.rate_limits[limit_type]
-        redis = await get_redis_client()
-
-        if not redis:
-            logger.warning("Redis unavailable, rate limiting disabled")
-            return {
-                "limit": limit["requests"],
-                "remaining": limit["requests"],
-                "reset": int(time.time() + limit["window"])
-            }
-
-        key = f"ratelimit:{limit_type}:{identifier}"
-        now = int(time.time())
-        window_start = now - limit["window"]
+        result = await get_rate_limit_engine().hit(
+            f"ratelimit:{limit_type}:{identifier}",
+            [RateLimit(limit["requests"], limit["window"])],
+        )
 
-        try:
-            # Use Redis sorted set for sliding window
-            # Remove old entries
-            await redis.redis.zremrangebyscore(key, 0, window_start)
-
-            # Count requests in current window
-            current_count = await redis.redis.zcard(key)
-
-            if current_count >= limit["requests"]:
-                # Get oldest request to calculate reset time
-                oldest = await redis.redis.zrange(key, 0, 0, withscores=True)
-                if oldest:
-                    reset_time = int(oldest[0][1] + limit["window"])
-                else:
-                    reset_time = now + limit["window"]
-
-                retry_after = reset_time - now
-
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail=f"Rate limit exceeded. Maximum {limit['requests']} requests per {limit['window']} seconds.",
-                    headers={"Retry-After": str(retry_after)}
-                )
-
-            # Add current request
-            await redis.redis.zadd(key, {str(now): now})
-            await redis.redis.expire(key, limit["window"])
-
-            # Calculate reset time
-            oldest = await redis.redis.zrange(key, 0, 0, withscores=True)
-            if oldest:
-                reset_time = int(oldest[0][1] + limit["window"])
-            else:
-                reset_time = now + limit["window"]
-
-            return {
-                "limit": limit["requests"],
-                "remaining": limit["requests"] - current_count - 1,
-                "reset": reset_time
-            }
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded. Maximum {limit['requests']} requests per {limit['window']} seconds.",
+                headers={"Retry-After": str(math.ceil(result.retry_after))}
+            )
 
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Rate limit check error: {e}")
-            # Fail open
-            return {
-                "limit": limit["requests"],
-                "remaining": limit["requests"],
-                "reset": now + limit["window"]
-            }
+        return {
+            "limit": limit["requests"],
+            "remaining": result.remaining,
+            "reset": math.ceil(time.time() + result.reset_after)
+        }
 
 
 class AuthenticationMiddleware(BaseHTTPMiddleware):
@@ -263,21 +219,40 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class _UncacheableResponse(Exception):
+    """Raised from a coalesced fill when the response must not be cached.
+
+    Carries the response back to the request that produced it; requests that
+    were waiting on the same fill re-run the handler themselves.
+    """
+
+    def __init__(self, request: Request, response):
+        super().__init__(f"Uncacheable response (status {response.status_code})")
+        self.request = request
+        self.response = response
+
+
 class CacheMiddleware(BaseHTTPMiddleware):
     """Response caching middleware for GET requests.
 
     Cache key is based on URL + query params + user context.
-    Only caches successful GET requests (status 200).
+    Only caches successful JSON GET responses (status 200).
+
+    Concurrent identical requests are coalesced into one handler run, and
+    expired responses are served (``X-Cache: STALE``) for up to ``stale_ttl``
+    seconds while the first request to see them refreshes the entry.
     """
 
     def __init__(
         self,
         app,
         default_ttl: int = 300,  # 5 minutes default
-        cache_patterns: Optional[Dict[str, int]] = None
+        cache_patterns: Optional[Dict[str, int]] = None,
+        stale_ttl: Optional[int] = None,  # Defaults to the endpoint TTL
     ):
         super().__init__(app)
         self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
         self.cache_patterns = cache_patterns or {
             "/api/v1/dashboard/": 60,      # 1 minute
             "/api/v1/analytics/": 300,     # 5 minutes
@@ -296,62 +271,91 @@ class CacheMiddleware(BaseHTTPMiddleware):
         if any(request.url.path.startswith(path) for path in skip_paths):
             return await call_next(request)
 
+        redis = await get_redis_client()
+        if not redis:
+            return await call_next(request)
+
         # Generate cache key
         cache_key = await self._generate_cache_key(request)
+        ttl = self._get_ttl(request.url.path)
+        stale_ttl = ttl if self.stale_ttl is None else self.stale_ttl
 
-        # Try to get from cache
-        redis = await get_redis_client()
-        if redis:
-            try:
-                cached = await redis.get(cache_key)
-                if cached:
-                    logger.debug(f"Cache hit: {cache_key}")
-                    # Return cached response
-                    return JSONResponse(
-                        content=cached["content"],
-                        status_code=cached["status_code"],
-                        headers={"X-Cache": "HIT"}
-                    )
-            except Exception as e:
-                logger.error(f"Cache retrieval error: {e}")
-
-        # Cache miss - proceed with request
-        response = await call_next(request)
+        try:
+            # Refresh inline: the handler needs this request's ASGI scope
+            cached, outcome = await CoalescingLoader(redis).get_or_compute(
+                cache_key,
+                partial(self._render_response, request, call_next),
+                ttl,
+                stale_ttl=stale_ttl,
+                background_refresh=False,
+                tags=self._get_tags(request),
+            )
+        except _UncacheableResponse as e:
+            if e.request is request:
+                return e.response
+            return await call_next(request)
 
-        # Cache successful responses
-        if redis and response.status_code == 200:
-            try:
-                # Read response body
-                body = b""
-                async for chunk in response.body_iterator:
-                    body += chunk
+        logger.debug(f"Cache {outcome}: {cache_key} (TTL: {ttl}s)")
+        headers = {"X-Cache": "HIT" if outcome == COALESCED else outcome.upper()}
+        if "body" not in cached:
+            # Entry written before bodies were cached pre-rendered
+            return JSONResponse(
+                content=cached["content"],
+                status_code=cached["status_code"],
+                headers=headers,
+            )
+        return Response(
+            content=cached["body"],
+            status_code=cached["status_code"],
+            headers=headers,
+            media_type="application/json",
+        )
 
-                # Parse response content
-                content = json.loads(body.decode())
+    async def _render_response(self, request: Request, call_next) -> Dict[str, Any]:
+        """Run the handler and return its cacheable representation.
 
-                # Determine TTL based on endpoint
-                ttl = self._get_ttl(request.url.path)
+        The rendered JSON body is cached as-is, so hits skip parsing and
+        re-serializing it.
+        """
+        response = await call_next(request)
 
-                # Store in cache
-                cache_data = {
-                    "content": content,
-                    "status_code": response.status_code
-                }
-                await redis.set(cache_key, cache_data, expire=ttl)
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or not content_type.startswith("application/json"):
+            raise _UncacheableResponse(request, response)
 
-                logger.debug(f"Cache miss - stored: {cache_key} (TTL: {ttl}s)")
+        # Read response body
+        body = b""
+        async for chunk in response.body_iterator:
+            body += chunk
 
-                # Return response with cache header
-                return JSONResponse(
-                    content=content,
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError as e:
+            logger.error(f"Cache storage error: {e}")
+            raise _UncacheableResponse(
+                request,
+                Response(
+                    content=body,
                     status_code=response.status_code,
-                    headers={"X-Cache": "MISS"}
-                )
+                    headers=dict(response.headers),
+                ),
+            )
 
-            except Exception as e:
-                logger.error(f"Cache storage error: {e}")
+        return {
+            "body": text,
+            "status_code": response.status_code
+        }
 
-        return response
+    @staticmethod
+    def _get_tags(request: Request) -> List[str]:
+        """Invalidation tags for a cached response (its workspace and user)."""
+        user = getattr(request.state, "user", {})
+        tags = []
+        if user.get("workspace_id"):
+            tags.append(workspace_tag(user["workspace_id"]))
+        if user.get("user_id"):
+            tags.append(user_tag(user["user_id"]))
+        return tags
 
     async def _generate_cache_key(self, request: Request) -> str:
         """Generate cache key from request."""
@@ -5,7 +5,7 @@ from fastapi.openapi.utils import get_openapi
 import logging
 
 from ..core.config import settings
-from ..core.database import engine, Base
+from ..core.database import engine, ws_engine, Base
 from .gateway import APIGateway
 from .routes import (
     auth_router,
@@ -251,16 +251,26 @@ async def startup_event():
     # async with engine.begin() as conn:
     #     await conn.run_sync(Base.metadata.create_all)
 
-    # Initialize Redis pub/sub for WebSocket scaling
+    # Start the Redis event log that fans events out to WebSocket and SSE clients
     if settings.ENABLE_REALTIME:
         try:
             from .websocket import init_redis_pubsub
             await init_redis_pubsub(settings.REDIS_URL)
-            logger.info("Redis pub/sub initialized for WebSocket scaling")
+            logger.info("Redis event log initialized for realtime events")
         except Exception as e:
             logger.warning(f"Failed to initialize Redis pub/sub: {e}")
             logger.warning("WebSocket will work but won't scale across instances")
 
+    # Keep in-process caches coherent across instances
+    if settings.CACHE_L1_ENABLED:
+        try:
+            from ..services.cache.local_cache import init_cache_invalidation
+            await init_cache_invalidation(settings.REDIS_URL)
+            logger.info("Cache invalidation listener started")
+        except Exception as e:
+            logger.warning(f"Failed to start cache invalidation listener: {e}")
+            logger.warning("In-process cache entries will only expire by TTL")
+
     logger.info("Shadow Analytics API started successfully")
 
 
@@ -278,5 +288,19 @@ async def shutdown_event():
         except Exception as e:
             logger.error(f"Error shutting down Redis pub/sub: {e}")
 
+    if settings.CACHE_L1_ENABLED:
+        try:
+            from ..services.cache.local_cache import shutdown_cache_invalidation
+            await shutdown_cache_invalidation()
+        except Exception as e:
+            logger.error(f"Error stopping cache invalidation listener: {e}")
+
+    try:
+        from ..services.analytics.model_execution import shutdown_model_executor
+        shutdown_model_executor()
+    except Exception as e:
+        logger.error(f"Error stopping model process pool: {e}")
+
     await engine.dispose()
+    await ws_engine.dispose()
     logger.info("Shadow Analytics API shut down successfully")
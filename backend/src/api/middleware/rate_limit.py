@@ -2,14 +2,14 @@
 
 from typing import Optional, Callable
 from fastapi import Request, HTTPException, status
-from datetime import datetime
 import logging
+import math
 import time
 from functools import wraps
 from collections import defaultdict
 
-from ...core.redis import get_redis_client
 from ...core.config import settings
+from ...core.rate_limit_engine import RateLimit, get_rate_limit_engine
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +18,8 @@ class RateLimiter:
     """
     Rate limiter using Redis for distributed rate limiting.
 
-    Uses a sliding window algorithm for accurate rate limiting.
+    Per-minute and per-hour limits are enforced by the shared GCRA engine
+    (core/rate_limit_engine.py) in a single atomic check.
     """
 
     def __init__(
@@ -51,88 +52,26 @@ class RateLimiter:
         Returns:
             Tuple of (is_allowed, error_message)
         """
-        redis = await get_redis_client()
-        if not redis:
-            # If Redis is unavailable, allow the request
-            logger.warning("Redis unavailable, rate limiting disabled")
+        limits = []
+        if self.requests_per_minute:
+            limits.append(RateLimit(self.requests_per_minute, 60))
+        if self.requests_per_hour:
+            limits.append(RateLimit(self.requests_per_hour, 3600))
+        if not limits:
             return True, None
 
-        try:
-            # Check per-minute limit
-            if self.requests_per_minute:
-                allowed, msg = await self._check_window(
-                    redis,
-                    identifier,
-                    endpoint,
-                    window_seconds=60,
-                    max_requests=self.requests_per_minute,
-                    window_name="minute",
-                )
-                if not allowed:
-                    return False, msg
-
-            # Check per-hour limit
-            if self.requests_per_hour:
-                allowed, msg = await self._check_window(
-                    redis,
-                    identifier,
-                    endpoint,
-                    window_seconds=3600,
-                    max_requests=self.requests_per_hour,
-                    window_name="hour",
-                )
-                if not allowed:
-                    return False, msg
-
+        # Both windows are checked and updated in one atomic round trip
+        result = await get_rate_limit_engine().hit(f"ratelimit:{endpoint}:{identifier}", limits)
+        if result.allowed:
             return True, None
 
-        except Exception as e:
-            logger.error(f"Rate limit check failed: {e}")
-            # Fail open - allow request if rate limiting fails
-            return True, None
-
-    async def _check_window(
-        self,
-        redis,
-        identifier: str,
-        endpoint: str,
-        window_seconds: int,
-        max_requests: int,
-        window_name: str,
-    ) -> tuple[bool, Optional[str]]:
-        """
-        Check rate limit for a specific time window.
-
-        Uses Redis sorted sets with timestamps for sliding window.
-        """
-        key = f"ratelimit:{endpoint}:{identifier}:{window_name}"
-        now = datetime.now().timestamp()
-        window_start = now - window_seconds
-
-        # Remove old entries outside the window
-        await redis.zremrangebyscore(key, 0, window_start)
-
-        # Count requests in current window
-        request_count = await redis.zcard(key)
-
-        if request_count >= max_requests:
-            # Get oldest request time to calculate retry-after
-            oldest = await redis.zrange(key, 0, 0, withscores=True)
-            if oldest:
-                retry_after = int(window_seconds - (now - oldest[0][1]))
-                msg = (
-                    f"Rate limit exceeded. Maximum {max_requests} requests per {window_name}. "
-                    f"Retry after {retry_after} seconds."
-                )
-                return False, msg
-
-        # Add current request
-        await redis.zadd(key, {str(now): now})
-
-        # Set expiration on the key
-        await redis.expire(key, window_seconds)
-
-        return True, None
+        window_name = "minute" if result.period == 60 else "hour"
+        retry_after = math.ceil(result.retry_after)
+        msg = (
+            f"Rate limit exceeded. Maximum {result.limit} requests per {window_name}. "
+            f"Retry after {retry_after} seconds."
+        )
+        return False, msg
 
 
 # Pre-configured rate limiters for different endpoint types
@@ -1,7 +1,7 @@
 """Dashboard API endpoints - unified dashboard interface."""
 
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, Query, Path, HTTPException, Request, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import APIRouter, Depends, Header, Query, Path, HTTPException, Request, WebSocket, WebSocketDisconnect, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from sse_starlette.sse import EventSourceResponse
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -33,6 +33,7 @@ from ...models.schemas.dashboard import (
 from ..dependencies.auth import get_current_user, require_owner_or_admin
 from ..middleware.workspace import WorkspaceAccess
 from ..middleware.rate_limit import RateLimiter
+from ..websocket.pubsub import get_event_log, parse_stream_id
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/dashboard", tags=["dashboard"])
@@ -681,12 +682,15 @@ async def realtime_metrics_websocket(
 async def realtime_events_stream(
     workspace_id: str = Query(..., description="Workspace ID"),
     event_types: Optional[str] = Query(None, description="Comma-separated event types"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
     current_user: Dict[str, Any] = Depends(get_current_user),
 ):
     """
     Server-sent events for real-time updates.
 
-    Streams events as they occur in the workspace.
+    Streams events as they are appended to the workspace event log. Clients
+    reconnecting with a Last-Event-ID header first receive the events they
+    missed, then continue with live events.
     """
     try:
         # Validate workspace access
@@ -697,32 +701,57 @@ async def realtime_events_stream(
         if event_types:
             event_type_list = [et.strip() for et in event_types.split(",")]
 
+        if last_event_id:
+            try:
+                parse_stream_id(last_event_id)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+        event_log = get_event_log()
+        if event_log is None:
+            raise HTTPException(status_code=503, detail="Event stream unavailable")
+
+        # Register before reading the backlog so no event falls in between
+        queue = await event_log.listen(workspace_id)
+
+        def to_sse(entry_id: str, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            name = event.get("event") or event.get("type") or "message"
+            if event_type_list and name not in event_type_list:
+                return None
+            return {"id": entry_id, "event": name, "data": json.dumps(event, default=str)}
+
         async def event_generator():
             """Generate server-sent events."""
+            last_id = last_event_id
             try:
-                while True:
-                    # TODO: Implement actual event fetching from queue/stream
-                    # For now, send mock events
-                    event = {
-                        "type": "execution_completed",
-                        "data": {
-                            "agent_id": "agent_123",
-                            "status": "success",
-                            "duration": 2.3,
-                            "timestamp": datetime.now(timezone.utc).isoformat()
-                        }
-                    }
+                if last_event_id:
+                    for entry_id, event in await event_log.read_since(
+                        workspace_id, last_event_id
+                    ):
+                        last_id = entry_id
+                        sse = to_sse(entry_id, event)
+                        if sse:
+                            yield sse
 
-                    yield {
-                        "event": event["type"],
-                        "data": json.dumps(event["data"])
-                    }
-
-                    await asyncio.sleep(1)
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        # Fell behind; the client resumes with Last-Event-ID
+                        break
+
+                    entry_id, event = item
+                    if last_id and parse_stream_id(entry_id) <= parse_stream_id(last_id):
+                        continue  # Already sent from the backlog
+                    last_id = entry_id
+                    sse = to_sse(entry_id, event)
+                    if sse:
+                        yield sse
 
             except asyncio.CancelledError:
                 logger.info(f"SSE stream cancelled for workspace {workspace_id}")
                 raise
+            finally:
+                event_log.unlisten(workspace_id, queue)
 
         return EventSourceResponse(event_generator())
 
@@ -276,6 +276,9 @@ async def analyze_funnel(
     start_date: Optional[str] = Query(None, description="Analysis start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="Analysis end date (ISO format)"),
     segment_name: Optional[str] = Query(None, description="Optional segment filter"),
+    conversion_window_hours: Optional[int] = Query(
+        None, ge=1, le=2160, description="Max hours from funnel entry to each later step"
+    ),
     db=Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_user),
     workspace_access=Depends(validate_workspace_access),
@@ -292,6 +295,8 @@ async def analyze_funnel(
     - **start_date**: Optional start date for analysis
     - **end_date**: Optional end date for analysis
     - **segment_name**: Optional segment to analyze
+    - **conversion_window_hours**: Optional conversion window; steps completed
+      later than this after funnel entry do not count
 
     **Returns:**
     - Funnel analysis results including:
@@ -338,6 +343,7 @@ async def analyze_funnel(
             start_date=start_dt,
             end_date=end_dt,
             segment_name=segment_name,
+            conversion_window_hours=conversion_window_hours,
         )
 
         return analysis
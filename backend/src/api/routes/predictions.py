@@ -20,6 +20,7 @@ import logging
 PREDICTION_TIMEOUT_SECONDS = 60
 
 from ...core.database import get_db
+from ...services.analytics.model_execution import ModelQueueFullError
 from ...services.analytics.predictive_analytics import PredictiveAnalytics
 from ...utils.validators import validate_workspace_id
 from ..dependencies.auth import get_current_user
@@ -98,6 +99,11 @@ async def predict_credit_consumption(
 
     except HTTPException:
         raise
+    except ModelQueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction capacity exhausted. Try again later."
+        )
     except Exception as e:
         logger.error(f"Credit consumption prediction failed: {e}", exc_info=True)
         raise HTTPException(
@@ -111,6 +117,7 @@ async def predict_user_churn(
     workspace_id: str,
     risk_threshold: float = Query(0.7, ge=0.0, le=1.0, description="Risk threshold for high-risk classification"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of users to return"),
+    offset: int = Query(0, ge=0, description="Number of highest-risk users to skip"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -124,9 +131,10 @@ async def predict_user_churn(
         workspace_id: Workspace identifier
         risk_threshold: Threshold for high-risk classification (0-1)
         limit: Maximum number of users to return
+        offset: Number of highest-risk users to skip, for paging
 
     Returns:
-        - predictions: User-level churn predictions with risk scores
+        - predictions: User-level churn predictions with risk scores, highest risk first
         - risk_analysis: Distribution of risk levels
         - high_risk_users: Count of high-risk users
     """
@@ -145,20 +153,13 @@ async def predict_user_churn(
                 service.predict_user_churn(
                     workspace_id=workspace_id,
                     users=None,  # Predict for all users
-                    risk_threshold=risk_threshold
+                    risk_threshold=risk_threshold,
+                    limit=limit,
+                    offset=offset
                 ),
                 timeout=PREDICTION_TIMEOUT_SECONDS
             )
 
-            # Limit results
-            if 'predictions' in result and len(result['predictions']) > limit:
-                # Sort by risk score descending and take top N
-                result['predictions'] = sorted(
-                    result['predictions'],
-                    key=lambda x: x['risk_score'],
-                    reverse=True
-                )[:limit]
-
             return result
         except asyncio.TimeoutError:
             logger.warning(f"Churn prediction timed out for workspace {workspace_id}")
@@ -231,6 +232,11 @@ async def predict_growth_metrics(
 
     except HTTPException:
         raise
+    except ModelQueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction capacity exhausted. Try again later."
+        )
     except Exception as e:
         logger.error(f"Growth prediction failed: {e}", exc_info=True)
         raise HTTPException(
@@ -293,6 +299,11 @@ async def predict_peak_usage(
 
     except HTTPException:
         raise
+    except ModelQueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction capacity exhausted. Try again later."
+        )
     except Exception as e:
         logger.error(f"Peak usage prediction failed: {e}", exc_info=True)
         raise HTTPException(
@@ -356,6 +367,11 @@ async def predict_error_rates(
 
     except HTTPException:
         raise
+    except ModelQueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction capacity exhausted. Try again later."
+        )
     except Exception as e:
         logger.error(f"Error rate prediction failed: {e}", exc_info=True)
         raise HTTPException(
@@ -437,6 +453,11 @@ async def generate_prediction(
 
     except HTTPException:
         raise
+    except ModelQueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction capacity exhausted. Try again later."
+        )
     except Exception as e:
         logger.error(f"Prediction generation failed: {e}", exc_info=True)
         raise HTTPException(
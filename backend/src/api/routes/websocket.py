@@ -2,21 +2,26 @@
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException, Depends
 from typing import Optional, Dict, Any
-from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 import logging
 from datetime import datetime
 
 from ..websocket.manager import manager
+from ..websocket.streams import FULL, STREAM_MODES
 from ..websocket.errors import WebSocketErrorCode, handle_ws_error, send_error_message
 from ..websocket.rate_limit import rate_limiter
 from ..websocket.realtime_metrics import RealtimeMetricsService
+from ..websocket.pubsub import get_event_log, parse_stream_id
 from ..middleware.auth import jwt_auth
-from ...core.database import get_db
+from ...core.config import settings
+from ...core.database import ws_session_maker
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["websocket"])
 
+# Events queued per replay chunk (capped at half the send queue)
+REPLAY_CHUNK_SIZE = 100
+
 
 @router.websocket("/ws")
 async def websocket_endpoint(
@@ -37,7 +42,6 @@ async def websocket_endpoint(
     connection_id = str(uuid.uuid4())
     user_info = None
     workspace = None
-    db = None
 
     try:
         # Verify JWT token
@@ -70,11 +74,6 @@ async def websocket_endpoint(
             )
             return
 
-        # Get database session
-        async for session in get_db():
-            db = session
-            break
-
         # Connect
         await manager.connect(websocket, connection_id, workspace, user_info)
 
@@ -83,7 +82,7 @@ async def websocket_endpoint(
             try:
                 data = await websocket.receive_json()
                 await handle_websocket_message(
-                    connection_id, workspace, data, user_info, db
+                    connection_id, workspace, data, user_info
                 )
             except ValueError as e:
                 # Invalid JSON
@@ -109,11 +108,6 @@ async def websocket_endpoint(
         except:
             pass
 
-    finally:
-        # Clean up database session
-        if db:
-            await db.close()
-
 
 async def verify_token_ws(token: str) -> Dict[str, Any]:
     """
@@ -162,17 +156,18 @@ async def handle_websocket_message(
     workspace_id: str,
     message: Dict[str, Any],
     user_info: Dict[str, Any],
-    db: AsyncSession,
 ):
     """
     Handle incoming WebSocket messages.
 
+    Messages that need the database borrow a session from the WebSocket
+    pool for the duration of the operation only.
+
     Args:
         connection_id: Unique connection identifier
         workspace_id: Workspace the connection belongs to
         message: Message data from client
         user_info: Authenticated user information
-        db: Database session
     """
     msg_type = message.get("type")
     user_id = user_info.get("user_id")
@@ -240,6 +235,18 @@ async def handle_websocket_message(
         stream_type = message.get("stream_type")
         interval = message.get("interval", 5000)  # Default 5 seconds
         filters = message.get("filters", {})
+        mode = message.get("mode", FULL)  # "delta": snapshot, then changes only
+
+        if mode not in STREAM_MODES:
+            await manager.send_personal_message(
+                connection_id,
+                {
+                    "type": "error",
+                    "message": f"Unknown stream mode: {mode}",
+                    "timestamp": datetime.utcnow().isoformat(),
+                },
+            )
+            return
 
         if not stream_type:
             await manager.send_personal_message(
@@ -253,11 +260,11 @@ async def handle_websocket_message(
             return
 
         # Get the appropriate stream function
-        stream_func = get_stream_function(stream_type, db, workspace_id, filters)
+        stream_func = get_stream_function(stream_type, workspace_id, filters)
 
         if stream_func:
             await manager.start_stream(
-                connection_id, stream_type, stream_func, interval
+                connection_id, stream_type, stream_func, interval, filters, mode
             )
         else:
             await manager.send_personal_message(
@@ -284,11 +291,39 @@ async def handle_websocket_message(
                 },
             )
 
+    elif msg_type == "resync_stream":
+        # Delta-mode client lost track of the sequence; resend a snapshot
+        stream_type = message.get("stream_type")
+        if not stream_type or not await manager.resync_stream(connection_id, stream_type):
+            await manager.send_personal_message(
+                connection_id,
+                {
+                    "type": "error",
+                    "message": f"No active stream: {stream_type}",
+                    "timestamp": datetime.utcnow().isoformat(),
+                },
+            )
+
+    elif msg_type == "resume":
+        # Replay events missed since the client's last event id
+        last_event_id = message.get("last_event_id")
+        if last_event_id:
+            await send_event_replay(connection_id, workspace_id, last_event_id)
+        else:
+            await manager.send_personal_message(
+                connection_id,
+                {
+                    "type": "error",
+                    "message": "last_event_id required",
+                    "timestamp": datetime.utcnow().isoformat(),
+                },
+            )
+
     elif msg_type == "get_metrics":
         # Get one-time metrics snapshot
         metrics = message.get("metrics", [])
         timeframe = message.get("timeframe", "1h")
-        await send_metrics_snapshot(connection_id, workspace_id, metrics, db)
+        await send_metrics_snapshot(connection_id, workspace_id, metrics)
 
     elif msg_type == "ping":
         # Heartbeat response
@@ -342,14 +377,17 @@ async def handle_websocket_message(
 
 
 def get_stream_function(
-    stream_type: str, db: AsyncSession, workspace_id: str, filters: Dict[str, Any]
+    stream_type: str, workspace_id: str, filters: Dict[str, Any]
 ):
     """
     Get the appropriate stream function based on stream type.
 
+    The function is shared by every connection streaming the same
+    (workspace, stream_type, filters), so it opens its own database session
+    on each call instead of using one connection's session.
+
     Args:
         stream_type: Type of stream to create
-        db: Database session
         workspace_id: Workspace ID
         filters: Additional filters
 
@@ -360,34 +398,43 @@ def get_stream_function(
 
     # Map stream types to service methods
     stream_map = {
-        "active_users": lambda: metrics_service.get_active_users_count(
+        "active_users": lambda db: metrics_service.get_active_users_count(
             db, workspace_id, filters
         ),
-        "credits_consumed": lambda: metrics_service.get_credits_consumed(
+        "credits_consumed": lambda db: metrics_service.get_credits_consumed(
             db, workspace_id, filters
         ),
-        "error_rate": lambda: metrics_service.get_error_rate(
+        "error_rate": lambda db: metrics_service.get_error_rate(
             db, workspace_id, filters
         ),
-        "dashboard_summary": lambda: metrics_service.get_dashboard_summary(
+        "dashboard_summary": lambda db: metrics_service.get_dashboard_summary(
             db, workspace_id
         ),
-        "queue_status": lambda: metrics_service.get_execution_queue_status(
+        "queue_status": lambda db: metrics_service.get_execution_queue_status(
             db, workspace_id
         ),
     }
 
     # Agent-specific stream
     if stream_type == "agent_performance" and filters.get("agent_id"):
-        return lambda: metrics_service.get_agent_performance(
+        fetch = lambda db: metrics_service.get_agent_performance(
             db, workspace_id, filters["agent_id"]
         )
+    else:
+        fetch = stream_map.get(stream_type)
+
+    if fetch is None:
+        return None
 
-    return stream_map.get(stream_type)
+    async def stream_func():
+        async with ws_session_maker() as db:
+            return await fetch(db)
+
+    return stream_func
 
 
 async def send_metrics_snapshot(
-    connection_id: str, workspace_id: str, metrics: list, db: AsyncSession
+    connection_id: str, workspace_id: str, metrics: list
 ):
     """
     Send one-time metrics snapshot.
@@ -396,24 +443,24 @@ async def send_metrics_snapshot(
         connection_id: Connection to send to
         workspace_id: Workspace ID
         metrics: List of metrics to fetch
-        db: Database session
     """
     try:
         metrics_service = RealtimeMetricsService()
         results = {}
 
-        # Fetch requested metrics
-        for metric in metrics:
-            if metric == "active_users":
-                results[metric] = await metrics_service.get_active_users_count(
-                    db, workspace_id
-                )
-            elif metric == "credits_consumed":
-                results[metric] = await metrics_service.get_credits_consumed(
-                    db, workspace_id
-                )
-            elif metric == "error_rate":
-                results[metric] = await metrics_service.get_error_rate(db, workspace_id)
+        # Fetch requested metrics, releasing the session before sending
+        async with ws_session_maker() as db:
+            for metric in metrics:
+                if metric == "active_users":
+                    results[metric] = await metrics_service.get_active_users_count(
+                        db, workspace_id
+                    )
+                elif metric == "credits_consumed":
+                    results[metric] = await metrics_service.get_credits_consumed(
+                        db, workspace_id
+                    )
+                elif metric == "error_rate":
+                    results[metric] = await metrics_service.get_error_rate(db, workspace_id)
 
         await manager.send_personal_message(
             connection_id,
@@ -434,3 +481,77 @@ async def send_metrics_snapshot(
                 "timestamp": datetime.utcnow().isoformat(),
             },
         )
+
+
+async def send_event_replay(connection_id: str, workspace_id: str, last_event_id: str):
+    """
+    Replay workspace events stored after ``last_event_id``.
+
+    Only events the connection is subscribed to are sent, as with live
+    broadcasts. Events carry their ``event_id`` so the client can resume
+    again from the last one it processed.
+
+    Events are read and queued in chunks of at most half the send queue,
+    waiting for each chunk to be sent before the next, so a replay never
+    overflows the queue. At most EVENT_STREAM_REPLAY_LIMIT events are
+    replayed; ``truncated`` in the final ``resumed`` message tells the client
+    to resume again from its ``last_event_id``.
+
+    Args:
+        connection_id: Connection to send to
+        workspace_id: Workspace ID
+        last_event_id: Last event id the client received
+    """
+    event_log = get_event_log()
+    subscriptions = manager.subscriptions.get(connection_id, set())
+    chunk_size = max(1, min(REPLAY_CHUNK_SIZE, settings.WS_SEND_QUEUE_SIZE // 2))
+    limit = settings.EVENT_STREAM_REPLAY_LIMIT
+    cursor = last_event_id
+    replayed = 0
+    truncated = False
+
+    try:
+        parse_stream_id(last_event_id)
+        if event_log is None:
+            raise RuntimeError("event log unavailable")
+
+        while replayed < limit:
+            count = min(chunk_size, limit - replayed)
+            entries = await event_log.read_since(workspace_id, cursor, count=count)
+            for _, event in entries:
+                event_type = event.get("event")
+                if event_type and event_type not in subscriptions:
+                    continue
+                await manager.send_personal_message(connection_id, event)
+
+            replayed += len(entries)
+            if entries:
+                cursor = entries[-1][0]
+            if len(entries) < count:
+                break
+            if not await manager.drain(connection_id):
+                return
+        else:
+            truncated = bool(await event_log.read_since(workspace_id, cursor, count=1))
+    except Exception as e:
+        logger.error(f"Error replaying events for {connection_id}: {e}")
+        await manager.send_personal_message(
+            connection_id,
+            {
+                "type": "error",
+                "message": "Failed to replay events",
+                "timestamp": datetime.utcnow().isoformat(),
+            },
+        )
+        return
+
+    await manager.send_personal_message(
+        connection_id,
+        {
+            "type": "resumed",
+            "replayed": replayed,
+            "truncated": truncated,
+            "last_event_id": cursor,
+            "timestamp": datetime.utcnow().isoformat(),
+        },
+    )
@@ -1,8 +1,15 @@
 """WebSocket module for real-time updates."""
 
 from .manager import manager, ConnectionManager
+from .streams import StreamMultiplexer, stream_key
 from .events import broadcaster, EventBroadcaster
-from .pubsub import redis_pubsub, RedisPubSub, init_redis_pubsub, shutdown_redis_pubsub
+from .pubsub import (
+    redis_pubsub,
+    RedisPubSub,
+    get_event_log,
+    init_redis_pubsub,
+    shutdown_redis_pubsub,
+)
 from .errors import WebSocketErrorCode, handle_ws_error, send_error_message
 from .rate_limit import rate_limiter, WebSocketRateLimiter
 from .realtime_metrics import RealtimeMetricsService
@@ -10,10 +17,13 @@ from .realtime_metrics import RealtimeMetricsService
 __all__ = [
     "manager",
     "ConnectionManager",
+    "StreamMultiplexer",
+    "stream_key",
     "broadcaster",
     "EventBroadcaster",
     "redis_pubsub",
     "RedisPubSub",
+    "get_event_log",
     "init_redis_pubsub",
     "shutdown_redis_pubsub",
     "WebSocketErrorCode",
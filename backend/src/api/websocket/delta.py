@@ -0,0 +1,32 @@
+"""JSON Patch (RFC 6902) diffs for delta-encoded metric streams."""
+
+from typing import Any, Dict, List
+
+
+def _escape(key: Any) -> str:
+    """Escape an object key for use in a JSON Pointer."""
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def json_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Operations turning ``old`` into ``new``.
+
+    Objects are diffed key by key; any other changed value (lists included)
+    is replaced whole. An empty list means nothing changed.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Dict[str, Any]] = []
+        for key, value in old.items():
+            pointer = f"{path}/{_escape(key)}"
+            if key not in new:
+                ops.append({"op": "remove", "path": pointer})
+            else:
+                ops.extend(json_patch(value, new[key], pointer))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+        return ops
+
+    if type(old) is type(new) and old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
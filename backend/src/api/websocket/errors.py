@@ -31,6 +31,9 @@ class WebSocketErrorCode:
     INTERNAL_ERROR = (4000, "Internal server error")
     INVALID_PARAMETER = (4009, "Invalid parameter")
 
+    # Delivery errors (4010)
+    SLOW_CONSUMER = (4010, "Client too slow to receive messages")
+
 
 async def handle_ws_error(
     websocket: WebSocket,
@@ -5,10 +5,25 @@ from datetime import datetime
 import logging
 
 from .manager import manager
+from .pubsub import get_event_log
+from ...services.events.handlers import EventHandlers
 
 logger = logging.getLogger(__name__)
 
 
+async def publish_event(workspace_id: str, message: Dict[str, Any]):
+    """Publish an event to the workspace.
+
+    With the Redis event log running, the event is appended to the workspace
+    stream and every instance (this one included) delivers it from there;
+    otherwise it is broadcast to local connections only.
+    """
+    event_log = get_event_log()
+    if event_log is not None and await event_log.publish(workspace_id, message):
+        return
+    await manager.broadcast_to_workspace(workspace_id, message)
+
+
 class EventBroadcaster:
     """Broadcast events to WebSocket clients."""
 
@@ -16,7 +31,7 @@ class EventBroadcaster:
     async def broadcast_execution_started(
         workspace_id: str, agent_id: str, run_id: str, user_id: str
     ):
-        """Broadcast when agent execution starts."""
+        """Broadcast when agent execution starts and record it in the realtime counters."""
         message = {
             "event": "execution_started",
             "data": {
@@ -28,7 +43,10 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
+        await EventHandlers.on_agent_run_started(
+            {"workspace_id": workspace_id, "agent_id": agent_id, "user_id": user_id}
+        )
         logger.debug(
             f"Broadcasted execution_started for run {run_id} to workspace {workspace_id}"
         )
@@ -42,7 +60,7 @@ class EventBroadcaster:
         runtime_seconds: float,
         credits_consumed: float,
     ):
-        """Broadcast when agent execution completes."""
+        """Broadcast when agent execution completes and record it in the realtime counters."""
         message = {
             "event": "execution_completed",
             "data": {
@@ -56,7 +74,13 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
+        await EventHandlers.on_agent_run_completed(
+            {"workspace_id": workspace_id, "agent_id": agent_id, "success": success}
+        )
+        await EventHandlers.on_credit_transaction(
+            {"workspace_id": workspace_id, "credits_consumed": credits_consumed}
+        )
         logger.debug(
             f"Broadcasted execution_completed for run {run_id} to workspace {workspace_id}"
         )
@@ -72,7 +96,7 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.debug(f"Broadcasted metrics_update to workspace {workspace_id}")
 
     @staticmethod
@@ -91,7 +115,7 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.debug(f"Broadcasted execution_update to workspace {workspace_id}")
 
     @staticmethod
@@ -106,7 +130,7 @@ class EventBroadcaster:
             "priority": alert_data.get("priority", "medium"),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.info(
             f"Broadcasted {alert_type} alert to workspace {workspace_id} with priority {message['priority']}"
         )
@@ -132,7 +156,7 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.debug(
             f"Broadcasted agent_status_change for agent {agent_id} to workspace {workspace_id}"
         )
@@ -148,7 +172,7 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.debug(
             f"Broadcasted workspace_update ({update_type}) to workspace {workspace_id}"
         )
@@ -172,7 +196,7 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.debug(
             f"Broadcasted dashboard_update ({section}) to workspace {workspace_id}"
         )
@@ -213,7 +237,7 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, alert_message)
+        await publish_event(workspace_id, alert_message)
         logger.info(
             f"Broadcasted alert ({severity}) to workspace {workspace_id}: {title}"
         )
@@ -252,7 +276,7 @@ class EventBroadcaster:
         if metadata:
             message["metadata"] = metadata
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.debug(f"Broadcasted user_event ({event}) to workspace {workspace_id}")
 
     @staticmethod
@@ -274,7 +298,7 @@ class EventBroadcaster:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        await manager.broadcast_to_workspace(workspace_id, message)
+        await publish_event(workspace_id, message)
         logger.debug(
             f"Broadcasted agent_update for agent {agent_id} to workspace {workspace_id}"
         )
@@ -1,37 +1,118 @@
 """WebSocket connection manager for real-time updates."""
 
-from typing import Dict, Set, List, Optional, Any
+from typing import Dict, Set, List, Optional, Any, Iterator, Mapping
 from fastapi import WebSocket
 import json
 import asyncio
 from datetime import datetime
 import logging
 
+from .errors import WebSocketErrorCode
+from .outbound import OutboundQueue, SlowConsumerError, coalesce_key, encode_message
+from .streams import FULL, StreamMultiplexer, StreamKey, stream_key
+from ...core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
+class Connection:
+    """State of one WebSocket connection."""
+
+    __slots__ = (
+        "connection_id",
+        "workspace_id",
+        "websocket",
+        "user_info",
+        "subscriptions",
+        "streams",
+        "rooms",
+        "outbound",
+        "heartbeat",
+    )
+
+    def __init__(
+        self,
+        connection_id: str,
+        workspace_id: str,
+        websocket: WebSocket,
+        user_info: Dict,
+    ):
+        self.connection_id = connection_id
+        self.workspace_id = workspace_id
+        self.websocket = websocket
+        self.user_info = user_info
+        # Subscribed event types
+        self.subscriptions: Set[str] = set()
+        # {stream_type: shared stream key}
+        self.streams: Dict[str, StreamKey] = {}
+        # Joined room keys
+        self.rooms: Set[str] = set()
+        self.outbound: Optional[OutboundQueue] = None
+        self.heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.user_info.get("user_id")
+
+
+class _ConnectionFieldView(Mapping):
+    """Read-only {connection_id: field} view over the connection records."""
+
+    def __init__(self, connections: Dict[str, Connection], field: str):
+        self._connections = connections
+        self._field = field
+
+    def __getitem__(self, connection_id: str) -> Any:
+        return getattr(self._connections[connection_id], self._field)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._connections)
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+
 class ConnectionManager:
-    """Manages WebSocket connections with workspace isolation and subscriptions."""
+    """Manages WebSocket connections with workspace isolation and subscriptions.
 
-    def __init__(self):
-        # Active connections: {workspace_id: {connection_id: WebSocket}}
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+    Every lookup used on the hot path (connection, user, event type, room)
+    is indexed, so sends and broadcasts never scan unrelated connections.
+    """
 
-        # User mapping: {connection_id: user_info}
-        self.connection_users: Dict[str, Dict] = {}
+    def __init__(
+        self,
+        send_queue_size: Optional[int] = None,
+        overflow_policy: Optional[str] = None,
+    ):
+        self.send_queue_size = send_queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.overflow_policy = overflow_policy or settings.WS_OVERFLOW_POLICY
+
+        # Connection records: {connection_id: Connection}
+        self.connections: Dict[str, Connection] = {}
 
-        # Subscription mapping: {connection_id: set(event_types)}
-        self.subscriptions: Dict[str, Set[str]] = {}
+        # Active connections: {workspace_id: {connection_id: WebSocket}}
+        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
 
-        # Active streams: {connection_id: {stream_type: task}}
-        self.active_streams: Dict[str, Dict[str, asyncio.Task]] = {}
+        # User index: {user_id: set(connection_ids)}
+        self.user_connections: Dict[str, Set[str]] = {}
 
-        # Heartbeat tasks: {connection_id: task}
-        self.heartbeat_tasks: Dict[str, asyncio.Task] = {}
+        # Event index: {workspace_id: {event_type: set(connection_ids)}}
+        self.event_subscribers: Dict[str, Dict[str, Set[str]]] = {}
 
         # Room subscriptions: {room_key: set(connection_ids)}
         self.room_subscriptions: Dict[str, Set[str]] = {}
 
+        # Per-connection views: {connection_id: user_info / set(event_types) /
+        # {stream_type: stream key} / OutboundQueue / heartbeat task}
+        self.connection_users = _ConnectionFieldView(self.connections, "user_info")
+        self.subscriptions = _ConnectionFieldView(self.connections, "subscriptions")
+        self.active_streams = _ConnectionFieldView(self.connections, "streams")
+        self.outbound = _ConnectionFieldView(self.connections, "outbound")
+        self.heartbeat_tasks = _ConnectionFieldView(self.connections, "heartbeat")
+
+        # Shared stream computations, one per (workspace, stream_type, filters)
+        self.streams = StreamMultiplexer()
+
     async def connect(
         self,
         websocket: WebSocket,
@@ -42,20 +123,22 @@ class ConnectionManager:
         """Accept new WebSocket connection."""
         await websocket.accept()
 
-        # Initialize workspace group if needed
-        if workspace_id not in self.active_connections:
-            self.active_connections[workspace_id] = {}
+        conn = Connection(connection_id, workspace_id, websocket, user_info)
+        conn.outbound = OutboundQueue(
+            websocket,
+            max_size=self.send_queue_size,
+            policy=self.overflow_policy,
+            on_close=lambda error: self._on_send_closed(conn, error),
+        )
 
-        # Store connection
-        self.active_connections[workspace_id][connection_id] = websocket
-        self.connection_users[connection_id] = user_info
-        self.subscriptions[connection_id] = set()
-        self.active_streams[connection_id] = {}
+        # Store connection and index it
+        self.connections[connection_id] = conn
+        self.active_connections.setdefault(workspace_id, {})[connection_id] = websocket
+        if conn.user_id is not None:
+            self.user_connections.setdefault(conn.user_id, set()).add(connection_id)
 
         # Start heartbeat
-        self.heartbeat_tasks[connection_id] = asyncio.create_task(
-            self._heartbeat(connection_id, websocket)
-        )
+        conn.heartbeat = asyncio.create_task(self._heartbeat(conn))
 
         # Send connection confirmation
         await self.send_personal_message(
@@ -73,51 +156,91 @@ class ConnectionManager:
             f"WebSocket connected: {connection_id} to workspace {workspace_id}"
         )
 
-    def disconnect(self, connection_id: str, workspace_id: str):
+    def disconnect(self, connection_id: str, workspace_id: Optional[str] = None):
         """Remove WebSocket connection."""
-        if workspace_id in self.active_connections:
-            self.active_connections[workspace_id].pop(connection_id, None)
+        conn = self.connections.pop(connection_id, None)
+        if conn is None:
+            return
+        workspace_id = conn.workspace_id
+
+        workspace_connections = self.active_connections.get(workspace_id)
+        if workspace_connections is not None:
+            workspace_connections.pop(connection_id, None)
 
             # Clean up empty workspace
-            if not self.active_connections[workspace_id]:
+            if not workspace_connections:
                 del self.active_connections[workspace_id]
 
-        # Stop all active streams
-        if connection_id in self.active_streams:
-            for stream_task in self.active_streams[connection_id].values():
-                if not stream_task.done():
-                    stream_task.cancel()
-            del self.active_streams[connection_id]
+        if conn.user_id is not None:
+            _discard_indexed(self.user_connections, conn.user_id, connection_id)
+
+        event_index = self.event_subscribers.get(workspace_id)
+        if event_index is not None:
+            for event_type in conn.subscriptions:
+                _discard_indexed(event_index, event_type, connection_id)
+            if not event_index:
+                del self.event_subscribers[workspace_id]
+
+        # Leave all shared streams
+        for key in conn.streams.values():
+            self.streams.unsubscribe(key, connection_id)
+
+        # Stop the writer
+        if conn.outbound is not None:
+            conn.outbound.close()
 
         # Stop heartbeat
-        if connection_id in self.heartbeat_tasks:
-            if not self.heartbeat_tasks[connection_id].done():
-                self.heartbeat_tasks[connection_id].cancel()
-            del self.heartbeat_tasks[connection_id]
+        if conn.heartbeat is not None and not conn.heartbeat.done():
+            conn.heartbeat.cancel()
 
         # Remove from rooms
-        for room_key, connections in list(self.room_subscriptions.items()):
-            connections.discard(connection_id)
-            if not connections:
-                del self.room_subscriptions[room_key]
-
-        # Clean up user info and subscriptions
-        self.connection_users.pop(connection_id, None)
-        self.subscriptions.pop(connection_id, None)
+        for room_key in conn.rooms:
+            _discard_indexed(self.room_subscriptions, room_key, connection_id)
 
         logger.info(f"WebSocket disconnected: {connection_id}")
 
+    def _on_send_closed(self, conn: Connection, error: Optional[Exception]):
+        """Drop a connection whose writer stopped because of a failure."""
+        if error is None:
+            return
+
+        if isinstance(error, SlowConsumerError):
+            logger.warning(f"Disconnecting slow consumer {conn.connection_id}: {error}")
+            code, reason = WebSocketErrorCode.SLOW_CONSUMER
+            asyncio.create_task(self._close_quietly(conn.websocket, code, reason))
+
+        self.disconnect(conn.connection_id)
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def _enqueue(
+        self, connection_id: str, payload: str, key: Optional[str] = None
+    ) -> bool:
+        """Queue an encoded message for a connection."""
+        conn = self.connections.get(connection_id)
+        if conn is None:
+            return False
+        return conn.outbound.put(payload, key)
+
     async def send_personal_message(self, connection_id: str, message: Dict):
         """Send message to specific connection."""
-        for workspace_connections in self.active_connections.values():
-            if connection_id in workspace_connections:
-                websocket = workspace_connections[connection_id]
+        self._enqueue(connection_id, encode_message(message), coalesce_key(message))
+
+    async def drain(self, connection_id: str) -> bool:
+        """Wait until a connection's queued messages have been sent.
 
-                try:
-                    await websocket.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending to {connection_id}: {e}")
-                break
+        Returns:
+            False if the connection is gone or its send queue was closed
+        """
+        conn = self.connections.get(connection_id)
+        if conn is None or conn.outbound is None:
+            return False
+        return await conn.outbound.drain()
 
     async def broadcast_to_workspace(
         self,
@@ -125,52 +248,55 @@ class ConnectionManager:
         message: Dict,
         exclude_connection: Optional[str] = None,
     ):
-        """Broadcast message to all connections in workspace."""
-        if workspace_id not in self.active_connections:
+        """Broadcast message to all connections in workspace.
+
+        The message is serialized once and queued on each connection, so a
+        slow client does not delay the others.
+        """
+        event_type = message.get("event")
+        if event_type:
+            # Only connections subscribed to the event type
+            recipients = self.event_subscribers.get(workspace_id, {}).get(event_type)
+        else:
+            recipients = self.active_connections.get(workspace_id)
+        if not recipients:
             return
 
-        disconnected = []
-
-        for conn_id, websocket in self.active_connections[workspace_id].items():
-            if conn_id == exclude_connection:
-                continue
-
-            try:
-                # Check subscription
-                event_type = message.get("event")
-                if event_type and event_type not in self.subscriptions.get(
-                    conn_id, set()
-                ):
-                    continue
-
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to {conn_id}: {e}")
-                disconnected.append(conn_id)
+        payload = encode_message(message)
+        key = coalesce_key(message)
 
-        # Clean up disconnected clients
-        for conn_id in disconnected:
-            self.disconnect(conn_id, workspace_id)
+        for conn_id in list(recipients):
+            if conn_id != exclude_connection:
+                self._enqueue(conn_id, payload, key)
 
     async def subscribe(self, connection_id: str, event_types: List[str]):
         """Subscribe connection to event types."""
-        if connection_id in self.subscriptions:
-            self.subscriptions[connection_id].update(event_types)
+        conn = self.connections.get(connection_id)
+        if conn is not None:
+            conn.subscriptions.update(event_types)
+            event_index = self.event_subscribers.setdefault(conn.workspace_id, {})
+            for event_type in event_types:
+                event_index.setdefault(event_type, set()).add(connection_id)
 
             await self.send_personal_message(
                 connection_id,
                 {
                     "event": "subscribed",
-                    "event_types": list(self.subscriptions[connection_id]),
+                    "event_types": list(conn.subscriptions),
                     "timestamp": datetime.utcnow().isoformat(),
                 },
             )
 
     async def unsubscribe(self, connection_id: str, event_types: List[str]):
         """Unsubscribe connection from event types."""
-        if connection_id in self.subscriptions:
+        conn = self.connections.get(connection_id)
+        if conn is not None:
+            event_index = self.event_subscribers.get(conn.workspace_id, {})
             for event_type in event_types:
-                self.subscriptions[connection_id].discard(event_type)
+                conn.subscriptions.discard(event_type)
+                _discard_indexed(event_index, event_type, connection_id)
+            if not event_index:
+                self.event_subscribers.pop(conn.workspace_id, None)
 
             await self.send_personal_message(
                 connection_id,
@@ -189,20 +315,23 @@ class ConnectionManager:
         """Get count of active connections."""
         if workspace_id:
             return len(self.active_connections.get(workspace_id, {}))
+        return len(self.connections)
 
-        total = 0
-        for connections in self.active_connections.values():
-            total += len(connections)
-        return total
+    def get_connection_workspace(self, connection_id: str) -> Optional[str]:
+        """Get the workspace a connection belongs to."""
+        conn = self.connections.get(connection_id)
+        return conn.workspace_id if conn else None
 
     async def join_room(
         self, connection_id: str, room_name: str, workspace_id: str
     ):
         """Add connection to a specific room."""
         room_key = f"{workspace_id}:{room_name}"
-        if room_key not in self.room_subscriptions:
-            self.room_subscriptions[room_key] = set()
-        self.room_subscriptions[room_key].add(connection_id)
+        conn = self.connections.get(connection_id)
+        if conn is None:
+            return
+        self.room_subscriptions.setdefault(room_key, set()).add(connection_id)
+        conn.rooms.add(room_key)
 
         await self.send_personal_message(
             connection_id,
@@ -219,10 +348,10 @@ class ConnectionManager:
     ):
         """Remove connection from a room."""
         room_key = f"{workspace_id}:{room_name}"
-        if room_key in self.room_subscriptions:
-            self.room_subscriptions[room_key].discard(connection_id)
-            if not self.room_subscriptions[room_key]:
-                del self.room_subscriptions[room_key]
+        _discard_indexed(self.room_subscriptions, room_key, connection_id)
+        conn = self.connections.get(connection_id)
+        if conn is not None:
+            conn.rooms.discard(room_key)
 
         await self.send_personal_message(
             connection_id,
@@ -241,29 +370,24 @@ class ConnectionManager:
         if room_key not in self.room_subscriptions:
             return
 
-        disconnected = []
-
-        for conn_id in self.room_subscriptions[room_key]:
-            if conn_id == exclude_connection:
-                continue
-
-            try:
-                await self.send_personal_message(conn_id, message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to {conn_id} in room {room_key}: {e}")
-                disconnected.append(conn_id)
+        payload = encode_message(message)
+        key = coalesce_key(message)
 
-        # Clean up disconnected clients
-        for conn_id in disconnected:
-            self.room_subscriptions[room_key].discard(conn_id)
+        for conn_id in list(self.room_subscriptions[room_key]):
+            if conn_id != exclude_connection:
+                self._enqueue(conn_id, payload, key)
 
     async def send_to_user(self, user_id: str, message: Dict):
-        """Send message to specific user by user_id."""
-        for conn_id, user_info in self.connection_users.items():
-            if user_info.get("user_id") == user_id:
-                await self.send_personal_message(conn_id, message)
-                return True
-        return False
+        """Send message to every connection of a user."""
+        connection_ids = self.user_connections.get(user_id)
+        if not connection_ids:
+            return False
+
+        payload = encode_message(message)
+        key = coalesce_key(message)
+        for conn_id in list(connection_ids):
+            self._enqueue(conn_id, payload, key)
+        return True
 
     async def start_stream(
         self,
@@ -271,36 +395,30 @@ class ConnectionManager:
         stream_type: str,
         stream_func,
         interval: int = 1000,
-        **kwargs,
+        filters: Optional[Dict[str, Any]] = None,
+        mode: str = FULL,
     ):
-        """Start a data stream for a connection."""
-        # Stop existing stream of same type
-        if connection_id in self.active_streams:
-            if stream_type in self.active_streams[connection_id]:
-                await self.stop_stream(connection_id, stream_type)
-
-        # Get websocket
-        websocket = None
-        for workspace_connections in self.active_connections.values():
-            if connection_id in workspace_connections:
-                websocket = workspace_connections[connection_id]
-                break
-
-        if not websocket:
+        """Start a data stream for a connection.
+
+        Connections asking for the same stream type and filters in a
+        workspace share one computation; ``stream_func`` only runs if no
+        such stream is active yet. ``mode`` selects full updates or a
+        snapshot followed by deltas (see streams.py).
+        """
+        conn = self.connections.get(connection_id)
+        if conn is None:
             logger.error(f"WebSocket not found for connection {connection_id}")
             return
 
-        # Create and start stream task
-        stream_task = asyncio.create_task(
-            self._stream_data(
-                connection_id, websocket, stream_type, stream_func, interval, **kwargs
-            )
-        )
-
-        if connection_id not in self.active_streams:
-            self.active_streams[connection_id] = {}
+        # Stop existing stream of same type
+        if stream_type in conn.streams:
+            await self.stop_stream(connection_id, stream_type)
 
-        self.active_streams[connection_id][stream_type] = stream_task
+        key = stream_key(conn.workspace_id, stream_type, filters)
+        self.streams.subscribe(
+            key, connection_id, conn.outbound.put, stream_func, interval, mode
+        )
+        conn.streams[stream_type] = key
 
         await self.send_personal_message(
             connection_id,
@@ -308,29 +426,23 @@ class ConnectionManager:
                 "type": "stream_started",
                 "stream_type": stream_type,
                 "interval": interval,
+                "mode": mode,
+                "subscribers": self.streams.get_subscriber_count(key),
                 "timestamp": datetime.utcnow().isoformat(),
             },
         )
 
         logger.info(
-            f"Started stream {stream_type} for connection {connection_id} with interval {interval}ms"
+            f"Started stream {stream_type} for connection {connection_id} with interval {interval}ms "
+            f"({self.streams.get_subscriber_count(key)} subscribers)"
         )
 
     async def stop_stream(self, connection_id: str, stream_type: str):
         """Stop a data stream for a connection."""
-        if (
-            connection_id in self.active_streams
-            and stream_type in self.active_streams[connection_id]
-        ):
-            stream_task = self.active_streams[connection_id][stream_type]
-            if not stream_task.done():
-                stream_task.cancel()
-                try:
-                    await stream_task
-                except asyncio.CancelledError:
-                    pass
-
-            del self.active_streams[connection_id][stream_type]
+        conn = self.connections.get(connection_id)
+        if conn is not None and stream_type in conn.streams:
+            key = conn.streams.pop(stream_type)
+            self.streams.unsubscribe(key, connection_id)
 
             await self.send_personal_message(
                 connection_id,
@@ -343,64 +455,33 @@ class ConnectionManager:
 
             logger.info(f"Stopped stream {stream_type} for connection {connection_id}")
 
-    async def _stream_data(
-        self,
-        connection_id: str,
-        websocket: WebSocket,
-        stream_type: str,
-        stream_func,
-        interval: int,
-        **kwargs,
-    ):
-        """Stream data at specified interval."""
-        try:
-            while True:
-                try:
-                    # Call the stream function to get data
-                    data = await stream_func(**kwargs)
+    async def resync_stream(self, connection_id: str, stream_type: str) -> bool:
+        """Send a fresh snapshot of a delta-mode stream on its next tick."""
+        conn = self.connections.get(connection_id)
+        if conn is None or stream_type not in conn.streams:
+            return False
+        return self.streams.resync(conn.streams[stream_type], connection_id)
 
-                    await websocket.send_json(
-                        {
-                            "type": "metrics_update",
-                            "stream_type": stream_type,
-                            "data": data,
-                            "timestamp": datetime.utcnow().isoformat(),
-                        }
-                    )
+    def get_stream_stats(self) -> List[Dict[str, Any]]:
+        """Get subscriber counts of the shared streams."""
+        return self.streams.get_stats()
 
-                    await asyncio.sleep(interval / 1000)
-
-                except asyncio.CancelledError:
-                    break
-                except Exception as e:
-                    logger.error(f"Error in stream {stream_type}: {e}")
-                    await websocket.send_json(
-                        {
-                            "type": "stream_error",
-                            "stream_type": stream_type,
-                            "error": str(e),
-                            "timestamp": datetime.utcnow().isoformat(),
-                        }
-                    )
-                    break
-
-        except Exception as e:
-            logger.error(f"Fatal error in stream {stream_type}: {e}")
-
-    async def _heartbeat(self, connection_id: str, websocket: WebSocket):
+    async def _heartbeat(self, conn: Connection):
         """Send periodic heartbeat to keep connection alive."""
+        connection_id = conn.connection_id
         try:
             while True:
                 await asyncio.sleep(30)  # Send heartbeat every 30 seconds
-                try:
-                    await websocket.send_json(
+                sent = conn.outbound.put(
+                    encode_message(
                         {
                             "type": "heartbeat",
                             "timestamp": datetime.utcnow().isoformat(),
                         }
-                    )
-                except Exception as e:
-                    logger.error(f"Heartbeat failed for {connection_id}: {e}")
+                    ),
+                )
+                if not sent:
+                    logger.error(f"Heartbeat failed for {connection_id}: connection closed")
                     break
         except asyncio.CancelledError:
             logger.debug(f"Heartbeat cancelled for {connection_id}")
@@ -408,5 +489,14 @@ class ConnectionManager:
             logger.error(f"Heartbeat error for {connection_id}: {e}")
 
 
+def _discard_indexed(index: Dict[str, Set[str]], key: str, connection_id: str):
+    """Remove a connection from an index entry, dropping the entry when empty."""
+    connection_ids = index.get(key)
+    if connection_ids is not None:
+        connection_ids.discard(connection_id)
+        if not connection_ids:
+            del index[key]
+
+
 # Global instance
 manager = ConnectionManager()
@@ -0,0 +1,147 @@
+"""Per-connection outbound queues for WebSocket messages.
+
+Messages are serialized once by the sender and queued on every recipient;
+a writer task per connection drains its queue, so a slow client only
+delays itself. When a client cannot keep up, its bounded queue applies an
+overflow policy instead of growing without limit.
+"""
+
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from collections import deque
+from fastapi import WebSocket
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+
+OVERFLOW_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+
+class SlowConsumerError(Exception):
+    """Raised when a connection's queue overflows under the disconnect policy."""
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serialize a message the way WebSocket.send_json does."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def coalesce_key(message: Dict[str, Any]) -> Optional[str]:
+    """Key under which a newer message supersedes a queued older one.
+
+    Only stream updates qualify: a client that fell behind needs the latest
+    value of each stream, not every intermediate one.
+    """
+    if message.get("type") == "metrics_update":
+        return message.get("stream_type")
+    return None
+
+
+class OutboundQueue:
+    """Bounded send queue drained by a dedicated writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_size: int = 256,
+        policy: str = COALESCE,
+        on_close: Optional[Callable[[Optional[Exception]], Any]] = None,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {policy}")
+
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._queue: Deque[Tuple[Optional[str], str]] = deque()
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._on_close = on_close
+        self._task = asyncio.create_task(self._writer())
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, payload: str, key: Optional[str] = None) -> bool:
+        """Queue an encoded message without waiting for the client.
+
+        Args:
+            payload: Serialized message
+            key: Coalesce key (see coalesce_key)
+
+        Returns:
+            False if the message was not queued because the queue is closed
+            or overflowed under the disconnect policy
+        """
+        if self.closed:
+            return False
+
+        if key is not None and self.policy == COALESCE:
+            for index, (queued_key, _) in enumerate(self._queue):
+                if queued_key == key:
+                    self._queue[index] = (key, payload)
+                    self.dropped += 1
+                    return True
+
+        if len(self._queue) >= self.max_size:
+            if self.policy == DISCONNECT:
+                self.close(SlowConsumerError(
+                    f"Send queue overflowed ({self.max_size} messages)"
+                ))
+                return False
+            self._queue.popleft()
+            self.dropped += 1
+
+        self._queue.append((key, payload))
+        self._idle.clear()
+        self._ready.set()
+        return True
+
+    async def drain(self) -> bool:
+        """Wait until every queued message has been sent.
+
+        Senders of bursts larger than the queue bound (e.g. event replay)
+        wait here between chunks instead of overflowing the queue.
+
+        Returns:
+            False if the queue was closed instead
+        """
+        await self._idle.wait()
+        return not self.closed
+
+    def close(self, error: Optional[Exception] = None):
+        """Stop the writer and discard queued messages."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self._idle.set()
+        if not self._task.done() and self._task is not asyncio.current_task():
+            self._task.cancel()
+        if self._on_close is not None:
+            self._on_close(error)
+
+    async def _writer(self):
+        """Send queued messages in order until closed or a send fails."""
+        try:
+            while True:
+                await self._ready.wait()
+                while self._queue:
+                    _, payload = self._queue.popleft()
+                    await self.websocket.send_text(payload)
+                self._ready.clear()
+                self._idle.set()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"WebSocket send failed: {e}")
+            self.close(e)
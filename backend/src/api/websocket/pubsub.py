@@ -1,29 +1,75 @@
-"""Redis pub/sub for multi-instance WebSocket scaling."""
+"""Redis Streams event log for multi-instance WebSocket scaling.
+
+Events are appended to a per-workspace stream (XADD, trimmed to about
+EVENT_STREAM_MAXLEN entries) instead of being published fire-and-forget.
+Each instance tails the streams of the workspaces it has local subscribers
+for with one blocking, batched XREAD and fans the entries out to its
+WebSocket connections and SSE listeners. Consumers that reconnect resume
+from their last event id instead of losing what was published meanwhile.
+"""
 
 import redis.asyncio as redis
 import json
 import asyncio
 import logging
-from typing import Dict, Set, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from .manager import manager
+from ...core.config import settings
 
 logger = logging.getLogger(__name__)
 
+EVENT_STREAM_PREFIX = "events:"
+
+# Entry delivered to SSE listeners: (stream entry id, event message)
+StreamEntry = Tuple[str, Dict[str, Any]]
+
+
+def event_stream_key(workspace_id: str) -> str:
+    """Redis key of a workspace's event stream."""
+    return f"{EVENT_STREAM_PREFIX}{workspace_id}"
 
-class RedisPubSub:
-    """Redis pub/sub for multi-instance WebSocket scaling."""
 
-    def __init__(self, redis_url: str):
+def parse_stream_id(entry_id: str) -> Tuple[int, int]:
+    """Split a stream entry id ("<ms>-<seq>") into comparable parts.
+
+    Raises:
+        ValueError: If the id is malformed
+    """
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class RedisPubSub:
+    """Per-workspace event log on Redis Streams shared by all instances."""
+
+    def __init__(
+        self,
+        redis_url: str,
+        maxlen: Optional[int] = None,
+        block_ms: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
         self.redis_url = redis_url
         self.redis: Optional[redis.Redis] = None
-        self.pubsub = None
-        self.subscriptions: Dict[str, str] = {}
+        self.maxlen = maxlen or settings.EVENT_STREAM_MAXLEN
+        self.block_ms = block_ms or settings.EVENT_STREAM_BLOCK_MS
+        self.batch_size = batch_size or settings.EVENT_STREAM_BATCH_SIZE
+
+        # Last entry id read per tailed stream: {stream_key: entry_id}
+        self.cursors: Dict[str, str] = {}
+
+        # Workspaces tailed regardless of local connections
+        self.subscriptions: Set[str] = set()
+
+        # SSE listener queues: {workspace_id: set(queues)}
+        self.listeners: Dict[str, Set[asyncio.Queue]] = {}
+
         self.running = False
         self._listen_task: Optional[asyncio.Task] = None
 
     async def start(self):
-        """Start listening to Redis pub/sub."""
+        """Connect and start tailing workspace streams."""
         if self.running:
             logger.warning("RedisPubSub already running")
             return
@@ -32,7 +78,6 @@ class RedisPubSub:
             self.redis = redis.from_url(
                 self.redis_url, decode_responses=True, encoding="utf-8"
             )
-            self.pubsub = self.redis.pubsub()
             self.running = True
 
             # Start listening task
@@ -45,7 +90,7 @@ class RedisPubSub:
             raise
 
     async def stop(self):
-        """Stop listening."""
+        """Stop tailing."""
         if not self.running:
             return
 
@@ -59,13 +104,10 @@ class RedisPubSub:
             except asyncio.CancelledError:
                 pass
 
-        # Unsubscribe and close
-        if self.pubsub:
-            try:
-                await self.pubsub.unsubscribe()
-                await self.pubsub.close()
-            except Exception as e:
-                logger.error(f"Error closing pubsub: {e}")
+        # End SSE streams; clients resume elsewhere with Last-Event-ID
+        for workspace_id in list(self.listeners):
+            for queue in list(self.listeners[workspace_id]):
+                self._close_listener(workspace_id, queue)
 
         if self.redis:
             try:
@@ -75,95 +117,173 @@ class RedisPubSub:
 
         logger.info("RedisPubSub stopped")
 
-    async def publish(self, channel: str, message: Dict):
-        """Publish message to Redis channel."""
+    async def publish(self, workspace_id: str, message: Dict) -> Optional[str]:
+        """Append an event to the workspace stream.
+
+        Returns:
+            The entry id, or None if the event could not be stored
+        """
         if not self.redis:
             logger.error("Redis not initialized")
-            return
+            return None
 
         try:
-            await self.redis.publish(channel, json.dumps(message))
-            logger.debug(f"Published message to channel {channel}")
+            entry_id = await self.redis.xadd(
+                event_stream_key(workspace_id),
+                {"data": json.dumps(message, default=str)},
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+            logger.debug(f"Appended event {entry_id} to workspace {workspace_id}")
+            return entry_id
         except Exception as e:
-            logger.error(f"Error publishing to Redis: {e}")
+            logger.error(f"Error appending event to Redis: {e}")
+            return None
 
-    async def subscribe_workspace(self, workspace_id: str):
-        """Subscribe to workspace channel."""
-        if not self.pubsub:
-            logger.error("PubSub not initialized")
-            return
+    async def read_since(
+        self, workspace_id: str, last_id: str, count: Optional[int] = None
+    ) -> List[StreamEntry]:
+        """Read the events stored after ``last_id``, oldest first."""
+        if not self.redis:
+            return []
 
-        channel = f"workspace:{workspace_id}"
-        try:
-            await self.pubsub.subscribe(channel)
-            self.subscriptions[channel] = workspace_id
-            logger.info(f"Subscribed to {channel}")
-        except Exception as e:
-            logger.error(f"Error subscribing to {channel}: {e}")
+        entries = await self.redis.xrange(
+            event_stream_key(workspace_id),
+            min=f"({last_id}",
+            max="+",
+            count=count or settings.EVENT_STREAM_REPLAY_LIMIT,
+        )
+        return [(entry_id, self._decode(entry_id, fields)) for entry_id, fields in entries]
+
+    async def subscribe_workspace(self, workspace_id: str):
+        """Tail a workspace stream even without local connections."""
+        self.subscriptions.add(workspace_id)
+        await self._track(workspace_id)
+        logger.info(f"Subscribed to {event_stream_key(workspace_id)}")
 
     async def unsubscribe_workspace(self, workspace_id: str):
-        """Unsubscribe from workspace channel."""
-        if not self.pubsub:
+        """Stop tailing a workspace stream unless it still has local consumers."""
+        self.subscriptions.discard(workspace_id)
+        logger.info(f"Unsubscribed from {event_stream_key(workspace_id)}")
+
+    async def listen(self, workspace_id: str) -> asyncio.Queue:
+        """Register an SSE listener for new workspace events.
+
+        The queue receives ``(entry_id, message)`` tuples for every event
+        appended after this call, or None once the listener fell too far
+        behind and was dropped.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.listeners.setdefault(workspace_id, set()).add(queue)
+        try:
+            await self._track(workspace_id)
+        except Exception:
+            self.unlisten(workspace_id, queue)
+            raise
+        return queue
+
+    def unlisten(self, workspace_id: str, queue: asyncio.Queue):
+        """Remove an SSE listener."""
+        queues = self.listeners.get(workspace_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.listeners[workspace_id]
+
+    def _close_listener(self, workspace_id: str, queue: asyncio.Queue):
+        """Drop a listener, telling its consumer to end the stream."""
+        self.unlisten(workspace_id, queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def _track(self, workspace_id: str):
+        """Start tailing a stream from its current last entry."""
+        key = event_stream_key(workspace_id)
+        if key in self.cursors or not self.redis:
             return
 
-        channel = f"workspace:{workspace_id}"
-        try:
-            await self.pubsub.unsubscribe(channel)
-            self.subscriptions.pop(channel, None)
-            logger.info(f"Unsubscribed from {channel}")
-        except Exception as e:
-            logger.error(f"Error unsubscribing from {channel}: {e}")
+        last = await self.redis.xrevrange(key, count=1)
+        self.cursors[key] = last[0][0] if last else "0-0"
 
-    async def _listen(self):
-        """Listen for Redis pub/sub messages."""
-        if not self.pubsub:
-            logger.error("PubSub not initialized")
-            return
+    def _wanted_workspaces(self) -> Set[str]:
+        """Workspaces with local consumers."""
+        return set(manager.active_connections) | self.subscriptions | set(self.listeners)
 
-        logger.info("Starting to listen for Redis pub/sub messages")
+    async def _listen(self):
+        """Tail the wanted workspace streams with blocking batched reads."""
+        logger.info("Starting to tail workspace event streams")
 
         while self.running:
             try:
-                message = await self.pubsub.get_message(
-                    ignore_subscribe_messages=True, timeout=1.0
+                wanted = self._wanted_workspaces()
+                for workspace_id in wanted:
+                    await self._track(workspace_id)
+                wanted_keys = {event_stream_key(w) for w in wanted}
+                for key in list(self.cursors):
+                    if key not in wanted_keys:
+                        del self.cursors[key]
+
+                if not self.cursors:
+                    await asyncio.sleep(self.block_ms / 1000)
+                    continue
+
+                response = await self.redis.xread(
+                    dict(self.cursors), count=self.batch_size, block=self.block_ms
                 )
-
-                if message and message["type"] == "message":
-                    await self._handle_message(message)
+                for key, entries in response or []:
+                    workspace_id = key[len(EVENT_STREAM_PREFIX):]
+                    for entry_id, fields in entries:
+                        if key in self.cursors:
+                            self.cursors[key] = entry_id
+                        await self._dispatch(
+                            workspace_id, entry_id, self._decode(entry_id, fields)
+                        )
 
             except asyncio.CancelledError:
                 logger.info("Listen task cancelled")
                 break
             except Exception as e:
-                logger.error(f"Redis pub/sub error: {e}")
+                logger.error(f"Redis stream read error: {e}")
                 await asyncio.sleep(5)
 
-    async def _handle_message(self, message: Dict):
-        """Handle pub/sub message."""
+    async def _dispatch(self, workspace_id: str, entry_id: str, message: Dict):
+        """Deliver one event to local WebSocket connections and SSE listeners."""
         try:
-            channel = message["channel"]
-            data = json.loads(message["data"])
-
-            # Extract workspace_id from channel
-            if channel.startswith("workspace:"):
-                workspace_id = channel.split(":", 1)[1]
+            await manager.broadcast_to_workspace(workspace_id, message)
+        except Exception as e:
+            logger.error(f"Error relaying event {entry_id}: {e}")
 
-                # Broadcast to local WebSocket connections
-                await manager.broadcast_to_workspace(workspace_id, data)
-                logger.debug(
-                    f"Relayed message from Redis to workspace {workspace_id}"
+        for queue in list(self.listeners.get(workspace_id, ())):
+            try:
+                queue.put_nowait((entry_id, message))
+            except asyncio.QueueFull:
+                logger.warning(
+                    f"Dropping lagging event listener on workspace {workspace_id}"
                 )
+                self._close_listener(workspace_id, queue)
 
-        except Exception as e:
-            logger.error(f"Error handling pub/sub message: {e}")
+    @staticmethod
+    def _decode(entry_id: str, fields: Dict[str, str]) -> Dict[str, Any]:
+        """Decode a stream entry, tagging it with its id for resumption."""
+        message = json.loads(fields["data"])
+        message["event_id"] = entry_id
+        return message
 
 
 # Global instance - will be initialized in main.py
 redis_pubsub: Optional[RedisPubSub] = None
 
 
+def get_event_log() -> Optional[RedisPubSub]:
+    """Get the running event log, if any."""
+    if redis_pubsub is not None and redis_pubsub.running:
+        return redis_pubsub
+    return None
+
+
 async def init_redis_pubsub(redis_url: str):
-    """Initialize Redis pub/sub."""
+    """Initialize the Redis event log."""
     global redis_pubsub
     redis_pubsub = RedisPubSub(redis_url)
     await redis_pubsub.start()
@@ -171,7 +291,7 @@ async def init_redis_pubsub(redis_url: str):
 
 
 async def shutdown_redis_pubsub():
-    """Shutdown Redis pub/sub."""
+    """Shutdown the Redis event log."""
     global redis_pubsub
     if redis_pubsub:
         await redis_pubsub.stop()
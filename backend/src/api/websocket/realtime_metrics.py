@@ -6,11 +6,24 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, select, func
 import logging
 
+from ...services.metrics.realtime_counters import (
+    CREDITS,
+    RUNS_COMPLETED,
+    RUNS_FAILED,
+    RUNS_STARTED,
+    get_realtime_counters,
+)
+
 logger = logging.getLogger(__name__)
 
 
 class RealtimeMetricsService:
-    """Service for fetching real-time metrics for WebSocket streaming."""
+    """Service for fetching real-time metrics for WebSocket streaming.
+
+    Active users, credits consumed and error rate are served from the
+    event-fed realtime counters when they are enabled, and queried from
+    execution_logs otherwise.
+    """
 
     @staticmethod
     async def get_active_users_count(
@@ -28,6 +41,17 @@ class RealtimeMetricsService:
             Dictionary with active users metrics
         """
         try:
+            counters = await get_realtime_counters()
+            if counters:
+                agent_id = filters.get("agent_id") if filters else None
+                return {
+                    "active_users": await counters.active_users(
+                        workspace_id, 5, agent_id
+                    ),
+                    "timeframe": "5m",
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+
             # Get active users in last 5 minutes
             since = datetime.utcnow() - timedelta(minutes=5)
 
@@ -84,6 +108,16 @@ class RealtimeMetricsService:
             Dictionary with credits consumed metrics
         """
         try:
+            counters = await get_realtime_counters()
+            if counters:
+                totals = await counters.totals(workspace_id, 60)
+                return {
+                    "credits_consumed": totals[CREDITS],
+                    "execution_count": int(totals[RUNS_STARTED]),
+                    "timeframe": "1h",
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+
             # Get credits consumed in last hour
             since = datetime.utcnow() - timedelta(hours=1)
 
@@ -130,27 +164,16 @@ class RealtimeMetricsService:
             Dictionary with error rate metrics
         """
         try:
-            # Get error rate in last 15 minutes
-            since = datetime.utcnow() - timedelta(minutes=15)
-
-            query = text(
-                """
-                SELECT
-                    COUNT(*) as total_executions,
-                    COUNT(*) FILTER (WHERE success = false) as failed_executions
-                FROM execution_logs
-                WHERE workspace_id = :workspace_id
-                AND started_at >= :since
-                """
-            )
-
-            result = await db.execute(
-                query, {"workspace_id": workspace_id, "since": since}
-            )
-            row = result.fetchone()
+            counters = await get_realtime_counters()
+            if counters:
+                totals = await counters.totals(workspace_id, 15)
+                total = int(totals[RUNS_COMPLETED])
+                failed = int(totals[RUNS_FAILED])
+            else:
+                total, failed = await RealtimeMetricsService._query_error_counts(
+                    db, workspace_id
+                )
 
-            total = row[0] if row else 0
-            failed = row[1] if row else 0
             error_rate = (failed / total * 100) if total > 0 else 0.0
 
             return {
@@ -165,6 +188,27 @@ class RealtimeMetricsService:
             logger.error(f"Error fetching error rate: {e}")
             return {"error_rate": 0.0, "error": str(e)}
 
+    @staticmethod
+    async def _query_error_counts(db: AsyncSession, workspace_id: str):
+        """Count executions and failures of the last 15 minutes in SQL."""
+        since = datetime.utcnow() - timedelta(minutes=15)
+
+        query = text(
+            """
+            SELECT
+                COUNT(*) as total_executions,
+                COUNT(*) FILTER (WHERE success = false) as failed_executions
+            FROM execution_logs
+            WHERE workspace_id = :workspace_id
+            AND started_at >= :since
+            """
+        )
+
+        result = await db.execute(query, {"workspace_id": workspace_id, "since": since})
+        row = result.fetchone()
+
+        return (row[0] if row else 0), (row[1] if row else 0)
+
     @staticmethod
     async def get_agent_performance(
         db: AsyncSession, workspace_id: str, agent_id: str
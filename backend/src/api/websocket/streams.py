@@ -0,0 +1,310 @@
+"""Shared metric streams for WebSocket connections.
+
+Every connection streaming the same (workspace, stream_type, filters) tuple
+receives the result of a single computation per tick instead of running its
+own polling loop, so database load grows with the number of distinct
+streams rather than the number of open dashboards.
+
+Subscribers choose a stream mode. In "full" mode every tick sends the whole
+result as a ``metrics_update``. In "delta" mode the first tick sends a
+``metrics_snapshot`` and later ticks send only a ``metrics_delta`` holding
+the JSON Patch from the subscriber's last update. Each update carries
+sequence numbers, and a tick that changed nothing sends no message at all.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import json
+import logging
+import time
+
+from .delta import json_patch
+from .outbound import coalesce_key, encode_message
+
+logger = logging.getLogger(__name__)
+
+StreamKey = Tuple[str, str, str]
+# Queues an encoded message with its coalesce key; False if undeliverable
+SendFunc = Callable[[str, Optional[str]], bool]
+
+# Stream modes
+FULL = "full"
+DELTA = "delta"
+
+STREAM_MODES = (FULL, DELTA)
+
+
+def stream_key(
+    workspace_id: str, stream_type: str, filters: Optional[Dict[str, Any]] = None
+) -> StreamKey:
+    """Build the key identifying a shared stream."""
+    return (
+        workspace_id,
+        stream_type,
+        json.dumps(filters or {}, sort_keys=True, default=str),
+    )
+
+
+class _Subscriber:
+    """A connection receiving a shared stream at its own interval."""
+
+    def __init__(self, send: SendFunc, interval: int, mode: str = FULL):
+        self.send = send
+        self.interval = interval
+        self.mode = mode
+        self.next_due = 0.0
+        # Delta mode: sequence number and data of the last update sent
+        self.seq: Optional[int] = None
+        self.data: Any = None
+
+
+class SharedStream:
+    """One polling loop fanned out to every subscribed connection."""
+
+    def __init__(
+        self,
+        key: StreamKey,
+        stream_func: Callable[[], Awaitable[Any]],
+        on_empty: Callable[["SharedStream"], None],
+    ):
+        self.key = key
+        self.stream_func = stream_func
+        self.subscribers: Dict[str, _Subscriber] = {}
+        self.seq = 0
+        self.task: Optional[asyncio.Task] = None
+        self._on_empty = on_empty
+        self._wakeup = asyncio.Event()
+
+    @property
+    def interval(self) -> int:
+        """Tick interval in ms: the shortest interval any subscriber asked for."""
+        return min(sub.interval for sub in self.subscribers.values())
+
+    def add(self, connection_id: str, send: SendFunc, interval: int, mode: str = FULL):
+        """Add or update a subscriber; it receives data on the next tick."""
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Invalid stream mode: {mode}")
+        self.subscribers[connection_id] = _Subscriber(send, interval, mode)
+        self._wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def resync(self, connection_id: str) -> bool:
+        """Send a delta subscriber a fresh snapshot on the next tick."""
+        sub = self.subscribers.get(connection_id)
+        if sub is None:
+            return False
+        sub.seq = None
+        sub.data = None
+        sub.next_due = 0.0
+        self._wakeup.set()
+        return True
+
+    def remove(self, connection_id: str) -> bool:
+        """Remove a subscriber, stopping the loop after the last one."""
+        if self.subscribers.pop(connection_id, None) is None:
+            return False
+        if not self.subscribers:
+            self.stop()
+        return True
+
+    def stop(self):
+        """Cancel the polling loop and drop all subscribers."""
+        self.subscribers.clear()
+        if (
+            self.task
+            and not self.task.done()
+            and self.task is not asyncio.current_task()
+        ):
+            self.task.cancel()
+        self._on_empty(self)
+
+    async def _run(self):
+        """Compute the stream once per tick and send it to due subscribers."""
+        workspace_id, stream_type, _ = self.key
+        try:
+            while self.subscribers:
+                self._wakeup.clear()
+                now = time.monotonic()
+                due = {
+                    conn_id: sub for conn_id, sub in self.subscribers.items()
+                    if sub.next_due <= now
+                }
+
+                if due:
+                    try:
+                        data = await self.stream_func()
+                    except Exception as e:
+                        logger.error(
+                            f"Error in stream {stream_type} for workspace {workspace_id}: {e}"
+                        )
+                        self._fan_out(
+                            dict(self.subscribers),
+                            {
+                                "type": "stream_error",
+                                "stream_type": stream_type,
+                                "error": str(e),
+                                "timestamp": datetime.utcnow().isoformat(),
+                            },
+                        )
+                        self.stop()
+                        return
+
+                    self.seq += 1
+                    for sub in due.values():
+                        sub.next_due = now + sub.interval / 1000
+
+                    full = {c: sub for c, sub in due.items() if sub.mode == FULL}
+                    if full:
+                        self._fan_out(
+                            full,
+                            {
+                                "type": "metrics_update",
+                                "stream_type": stream_type,
+                                "seq": self.seq,
+                                "data": data,
+                                "timestamp": datetime.utcnow().isoformat(),
+                            },
+                        )
+                    self._send_deltas(
+                        {c: sub for c, sub in due.items() if sub.mode == DELTA}, data
+                    )
+
+                if not self.subscribers:
+                    break
+                sleep_for = max(
+                    0.0,
+                    min(sub.next_due for sub in self.subscribers.values())
+                    - time.monotonic(),
+                )
+                try:
+                    # New subscribers wake the loop so they get data right away
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=sleep_for)
+                except asyncio.TimeoutError:
+                    pass
+
+            # Every subscriber failed or left
+            self.stop()
+
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Fatal error in stream {stream_type}: {e}")
+            self.stop()
+
+    def _send_deltas(self, subscribers: Dict[str, _Subscriber], data: Any):
+        """Send delta subscribers what changed since their last update.
+
+        Subscribers that last received the same update share one encoded
+        message.
+        """
+        stream_type = self.key[1]
+        groups: Dict[Optional[int], Dict[str, _Subscriber]] = {}
+        for conn_id, sub in subscribers.items():
+            groups.setdefault(sub.seq, {})[conn_id] = sub
+
+        for base_seq, group in groups.items():
+            if base_seq is None:
+                message = {
+                    "type": "metrics_snapshot",
+                    "stream_type": stream_type,
+                    "seq": self.seq,
+                    "data": data,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+            else:
+                patch = json_patch(next(iter(group.values())).data, data)
+                if not patch:
+                    # Nothing changed; the next delta still applies to base_seq
+                    continue
+                message = {
+                    "type": "metrics_delta",
+                    "stream_type": stream_type,
+                    "seq": self.seq,
+                    "base_seq": base_seq,
+                    "patch": patch,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+
+            for sub in group.values():
+                sub.seq = self.seq
+                sub.data = data
+            self._fan_out(group, message)
+
+    def _fan_out(self, subscribers: Dict[str, _Subscriber], message: Dict):
+        """Encode a message once and queue it for subscribers.
+
+        Subscribers whose connection can no longer receive are dropped.
+        """
+        payload = encode_message(message)
+        key = coalesce_key(message)
+        for conn_id, sub in subscribers.items():
+            if not sub.send(payload, key):
+                logger.warning(f"Dropping stream subscriber {conn_id}: connection closed")
+                self.subscribers.pop(conn_id, None)
+
+
+class StreamMultiplexer:
+    """Registry of shared streams keyed by (workspace, stream_type, filters)."""
+
+    def __init__(self):
+        self.streams: Dict[StreamKey, SharedStream] = {}
+
+    def subscribe(
+        self,
+        key: StreamKey,
+        connection_id: str,
+        send: SendFunc,
+        stream_func: Callable[[], Awaitable[Any]],
+        interval: int = 1000,
+        mode: str = FULL,
+    ) -> SharedStream:
+        """Subscribe a connection, starting the stream if it is not running.
+
+        ``stream_func`` is only used when this subscription starts the
+        stream; later subscribers share the running computation.
+        """
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = SharedStream(key, stream_func, self._remove_stream)
+            self.streams[key] = stream
+        stream.add(connection_id, send, interval, mode)
+        return stream
+
+    def unsubscribe(self, key: StreamKey, connection_id: str) -> bool:
+        """Unsubscribe a connection; returns False if it was not subscribed."""
+        stream = self.streams.get(key)
+        if stream is None:
+            return False
+        return stream.remove(connection_id)
+
+    def resync(self, key: StreamKey, connection_id: str) -> bool:
+        """Resend a snapshot to a delta subscriber that lost its state."""
+        stream = self.streams.get(key)
+        if stream is None:
+            return False
+        return stream.resync(connection_id)
+
+    def _remove_stream(self, stream: SharedStream):
+        if self.streams.get(stream.key) is stream:
+            del self.streams[stream.key]
+
+    def get_subscriber_count(self, key: StreamKey) -> int:
+        """Number of connections subscribed to a stream."""
+        stream = self.streams.get(key)
+        return len(stream.subscribers) if stream else 0
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Subscriber counts and tick intervals of the running streams."""
+        return [
+            {
+                "workspace_id": workspace_id,
+                "stream_type": stream_type,
+                "filters": json.loads(filters),
+                "subscribers": len(stream.subscribers),
+                "interval": stream.interval,
+            }
+            for (workspace_id, stream_type, filters), stream in self.streams.items()
+            if stream.subscribers
+        ]
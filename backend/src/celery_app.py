@@ -14,6 +14,8 @@ celery_app = Celery(
         'src.tasks.maintenance',
         'src.tasks.exports',
         'src.tasks.alerts',
+        'src.tasks.anomalies',
+        'src.tasks.models',
     ]
 )
 
@@ -60,6 +62,11 @@ celery_app.conf.beat_schedule = {
         'schedule': crontab(minute=5),  # Run at 5 minutes past every hour
         'options': {'expires': 3600}  # Task expires after 1 hour
     },
+    'incremental-rollup': {
+        'task': 'tasks.aggregation.incremental_rollup',
+        'schedule': crontab(minute='*'),  # Every minute (no-op unless INCREMENTAL_ROLLUP_ENABLED)
+        'options': {'expires': 60}  # Task expires after 1 minute
+    },
     'daily-rollup': {
         'task': 'tasks.aggregation.daily_rollup',
         'schedule': crontab(hour=1, minute=0),  # Run at 1:00 AM daily
@@ -75,6 +82,11 @@ celery_app.conf.beat_schedule = {
         'schedule': crontab(hour=3, minute=0),  # Run at 3:00 AM daily
         'options': {'expires': 7200}  # Task expires after 2 hours
     },
+    'manage-partitions': {
+        'task': 'tasks.maintenance.manage_partitions',
+        'schedule': crontab(hour=2, minute=30),  # Run at 2:30 AM daily
+        'options': {'expires': 7200}  # Task expires after 2 hours
+    },
     'refresh-materialized-views': {
         'task': 'tasks.aggregation.refresh_materialized_views',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
@@ -106,6 +118,23 @@ celery_app.conf.beat_schedule = {
         'task': 'tasks.alerts.cleanup_old_alerts',
         'schedule': crontab(hour=4, minute=30),  # Run at 4:30 AM daily (30 min after export cleanup)
         'options': {'expires': 7200}  # Task expires after 2 hours
+    },
+    # Anomaly Detection Tasks
+    'scan-anomalies': {
+        'task': 'tasks.anomalies.scan_anomalies',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes (no-op unless ANOMALY_SCAN_ENABLED)
+        'options': {'expires': 300}  # Task expires after 5 minutes
+    },
+    # Model Registry Tasks
+    'refresh-models': {
+        'task': 'tasks.models.refresh_models',
+        'schedule': crontab(minute=20),  # Hourly, after the rollups (no-op unless MODEL_REFRESH_ENABLED)
+        'options': {'expires': 3600}  # Task expires after 1 hour
+    },
+    'batch-forecast': {
+        'task': 'tasks.models.batch_forecast',
+        'schedule': crontab(hour=1, minute=30),  # Nightly, after daily aggregation (no-op unless FORECAST_BATCH_ENABLED)
+        'options': {'expires': 7200}  # Task expires after 2 hours
     }
 }
 
@@ -115,4 +144,6 @@ celery_app.conf.task_routes = {
     'tasks.maintenance.*': {'queue': 'maintenance'},
     'tasks.exports.*': {'queue': 'exports'},
     'tasks.alerts.*': {'queue': 'alerts'},
+    'tasks.anomalies.*': {'queue': 'alerts'},
+    'tasks.models.*': {'queue': 'maintenance'},
 }
@@ -0,0 +1,268 @@
+"""Binary codec for values stored in Redis by RedisClient.
+
+Encoded values start with a two-byte header::
+
+    byte 0: FORMAT_VERSION
+    byte 1: (compression id << 4) | serializer id
+
+followed by the (optionally compressed) payload. Entries written before the
+codec existed are plain JSON or pickle; neither can start with
+``FORMAT_VERSION``, so they are still decoded through the legacy path.
+
+The serializer and compression are chosen by settings and fall back to the
+standard library when the optional packages (orjson, msgpack, zstandard,
+lz4) are not installed.
+"""
+
+import json
+import logging
+import pickle
+from typing import Any, Callable, Dict, Tuple
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 0x01
+
+# Serializer ids (low nibble of the flags byte)
+SERIALIZER_JSON = 0
+SERIALIZER_ORJSON = 1
+SERIALIZER_MSGPACK = 2
+SERIALIZER_PICKLE = 3
+
+# Compression ids (high nibble of the flags byte)
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+COMPRESSION_LZ4 = 2
+
+SERIALIZER_IDS = {
+    "json": SERIALIZER_JSON,
+    "orjson": SERIALIZER_ORJSON,
+    "msgpack": SERIALIZER_MSGPACK,
+}
+
+COMPRESSION_IDS = {
+    "none": COMPRESSION_NONE,
+    "zstd": COMPRESSION_ZSTD,
+    "lz4": COMPRESSION_LZ4,
+}
+
+ZSTD_LEVEL = 3
+
+# Keep types JSON cannot represent (datetime, dataclasses, subclasses) on the
+# pickle path, as before, instead of silently turning them into strings
+_ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_SUBCLASS
+    if orjson
+    else 0
+)
+
+
+class CodecError(ValueError):
+    """Raised when a stored value cannot be decoded."""
+
+    pass
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, option=_ORJSON_OPTIONS)
+
+
+def _orjson_loads(data: bytes) -> Any:
+    return orjson.loads(data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+_DUMPS: Dict[int, Callable[[Any], bytes]] = {
+    SERIALIZER_JSON: _json_dumps,
+    SERIALIZER_ORJSON: _orjson_dumps,
+    SERIALIZER_MSGPACK: _msgpack_dumps,
+    SERIALIZER_PICKLE: pickle.dumps,
+}
+
+_LOADS: Dict[int, Callable[[bytes], Any]] = {
+    SERIALIZER_JSON: json.loads,
+    SERIALIZER_ORJSON: _orjson_loads,
+    SERIALIZER_MSGPACK: _msgpack_loads,
+    SERIALIZER_PICKLE: pickle.loads,
+}
+
+
+def _available_serializer(serializer_id: int) -> bool:
+    if serializer_id == SERIALIZER_ORJSON:
+        return orjson is not None
+    if serializer_id == SERIALIZER_MSGPACK:
+        return msgpack is not None
+    return True
+
+
+def _available_compression(compression_id: int) -> bool:
+    if compression_id == COMPRESSION_ZSTD:
+        return zstandard is not None
+    if compression_id == COMPRESSION_LZ4:
+        return lz4_frame is not None
+    return True
+
+
+def _compress(compression_id: int, data: bytes) -> bytes:
+    if compression_id == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if compression_id == COMPRESSION_LZ4:
+        return lz4_frame.compress(data)
+    return data
+
+
+def _decompress(compression_id: int, data: bytes) -> bytes:
+    if compression_id == COMPRESSION_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression_id == COMPRESSION_LZ4:
+        return lz4_frame.decompress(data)
+    return data
+
+
+class CacheCodec:
+    """Encode and decode cache values with a versioned header."""
+
+    def __init__(
+        self,
+        serializer: str = "orjson",
+        compression: str = "zstd",
+        compression_threshold: int = 4096,
+    ):
+        """
+        Initialize codec.
+
+        Args:
+            serializer: "orjson", "msgpack" or "json"
+            compression: "zstd", "lz4" or "none"
+            compression_threshold: Minimum payload size in bytes to compress
+        """
+        if serializer not in SERIALIZER_IDS:
+            raise ValueError(
+                f"Invalid cache serializer: {serializer}. "
+                f"Must be one of: {', '.join(SERIALIZER_IDS)}"
+            )
+        if compression not in COMPRESSION_IDS:
+            raise ValueError(
+                f"Invalid cache compression: {compression}. "
+                f"Must be one of: {', '.join(COMPRESSION_IDS)}"
+            )
+
+        self.serializer_id = SERIALIZER_IDS[serializer]
+        if not _available_serializer(self.serializer_id):
+            logger.warning(f"Cache serializer {serializer} not installed, using json")
+            self.serializer_id = SERIALIZER_JSON
+
+        self.compression_id = COMPRESSION_IDS[compression]
+        if not _available_compression(self.compression_id):
+            logger.warning(f"Cache compression {compression} not installed, disabled")
+            self.compression_id = COMPRESSION_NONE
+
+        self.compression_threshold = compression_threshold
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize (and compress if large) a value."""
+        serializer_id = self.serializer_id
+        try:
+            payload = _DUMPS[serializer_id](value)
+        except (TypeError, ValueError, OverflowError):
+            # Fall back to pickle for complex objects
+            serializer_id = SERIALIZER_PICKLE
+            payload = pickle.dumps(value)
+
+        compression_id = COMPRESSION_NONE
+        if self.compression_id and len(payload) >= self.compression_threshold:
+            compressed = _compress(self.compression_id, payload)
+            if len(compressed) < len(payload):
+                compression_id = self.compression_id
+                payload = compressed
+
+        header = bytes((FORMAT_VERSION, (compression_id << 4) | serializer_id))
+        return header + payload
+
+    def decode(self, data: bytes) -> Any:
+        """Decode a value written by :meth:`encode` or by the legacy format.
+
+        Raises:
+            CodecError: If the value uses a codec unavailable in this process
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        if len(data) < 2 or data[0] != FORMAT_VERSION:
+            return self._decode_legacy(data)
+
+        serializer_id, compression_id = self.parse_header(data)
+        if not _available_serializer(serializer_id) or not _available_compression(
+            compression_id
+        ):
+            raise CodecError(
+                f"Unsupported cache encoding (serializer={serializer_id}, "
+                f"compression={compression_id})"
+            )
+
+        payload = _decompress(compression_id, data[2:])
+        return _LOADS[serializer_id](payload)
+
+    @staticmethod
+    def parse_header(data: bytes) -> Tuple[int, int]:
+        """Return (serializer id, compression id) of an encoded value."""
+        flags = data[1]
+        return flags & 0x0F, flags >> 4
+
+    @staticmethod
+    def _decode_legacy(data: bytes) -> Any:
+        """Decode a pre-codec entry (plain JSON, or pickle)."""
+        try:
+            return json.loads(data)
+        except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+            return pickle.loads(data)
+
+
+_default_codec = None
+
+
+def get_codec() -> CacheCodec:
+    """Get the process-wide codec configured from settings."""
+    global _default_codec
+    if _default_codec is None:
+        _default_codec = CacheCodec(
+            serializer=settings.CACHE_SERIALIZER,
+            compression=settings.CACHE_COMPRESSION,
+            compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+        )
+    return _default_codec
@@ -23,6 +23,9 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 3600
+    WS_DB_POOL_SIZE: int = 5  # Separate pool for WebSocket streams and messages
+    WS_DB_MAX_OVERFLOW: int = 5
+    WS_DB_POOL_TIMEOUT: int = 10
 
     # Redis
     # IMPORTANT: Set these in environment variables or .env file
@@ -72,6 +75,18 @@ class Settings(BaseSettings):
     ENABLE_EXPORTS: bool = True
     ENABLE_NOTIFICATIONS: bool = True
 
+    # Cache
+    CACHE_L1_ENABLED: bool = False  # In-process cache in front of Redis
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    CACHE_L1_MAX_BYTES: int = 64 * 1024 * 1024  # 64 MB
+    CACHE_L1_TTL: int = 30  # Max seconds an entry is served without Redis
+    CACHE_SERIALIZER: str = "orjson"  # orjson, msgpack or json
+    CACHE_COMPRESSION: str = "zstd"  # zstd, lz4 or none
+    CACHE_COMPRESSION_THRESHOLD: int = 4096  # Compress payloads of at least this many bytes
+
+    # Exports
+    EXPORT_FETCH_SIZE: int = 5000  # Rows per server-side cursor fetch / Parquet row group
+
     # Notification System
     SMTP_HOST: Optional[str] = None
     SMTP_PORT: int = 587
@@ -101,6 +116,54 @@ class Settings(BaseSettings):
     DAILY_ROLLUP_ENABLED: bool = True
     WEEKLY_ROLLUP_ENABLED: bool = True
     MONTHLY_ROLLUP_ENABLED: bool = True
+    INCREMENTAL_ROLLUP_ENABLED: bool = False  # Merge new rows into hourly rollups every minute
+    INCREMENTAL_ROLLUP_OVERLAP_SECONDS: int = 300  # Re-read before the watermark for late commits
+    BACKFILL_CHUNK_HOURS: int = 24  # Hours per hourly backfill chunk
+    BACKFILL_CONCURRENCY: int = 4  # Backfill chunks (and DB sessions) in flight
+
+    # Partitioning
+    PARTITION_PRECREATE_DAYS: int = 7  # Create event table partitions this far ahead
+    PARTITION_DETACH_ONLY: bool = False  # Detach expired partitions instead of dropping them
+
+    # WebSocket
+    WS_SEND_QUEUE_SIZE: int = 256  # Outbound messages buffered per connection
+    WS_OVERFLOW_POLICY: str = "coalesce"  # drop_oldest, coalesce or disconnect
+
+    # Batch anomaly scan
+    ANOMALY_SCAN_ENABLED: bool = False  # Score every workspace's metrics every 5 minutes
+    ANOMALY_SCAN_LOOKBACK_DAYS: int = 7  # Days of hourly history forming the baseline
+    ANOMALY_SCAN_METHOD: str = "mad"  # zscore, zscore_rolling, mad or seasonal
+    ANOMALY_SCAN_SENSITIVITY: float = 3.0
+    STREAMING_BASELINES_ENABLED: bool = False  # Fold closed hourly rollups into running baselines
+
+    # Model execution
+    MODEL_POOL_WORKERS: int = 2  # Processes fitting Prophet/ARIMA/sklearn models; 0 fits on a thread
+    MODEL_POOL_MAX_QUEUE: int = 8  # Jobs waiting for a free worker before new ones are rejected
+    MODEL_JOB_TIMEOUT_SECONDS: int = 45  # Per-fit time limit, below the prediction API timeout
+
+    # Model registry
+    MODEL_ARTIFACT_DIR: str = "/tmp/models"  # Serialized models; use a shared volume across hosts
+    MODEL_CACHE_SIZE: int = 64  # Deserialized models kept per process
+    MODEL_REFRESH_ENABLED: bool = False  # Also refit stale or drifted models hourly, ahead of requests
+    MODEL_MAX_AGE_DAYS: int = 7  # Refit models older than this
+    MODEL_DRIFT_THRESHOLD: float = 3.0  # Refit when new data's mean moves this many training stds
+
+    # Batch forecasting
+    FORECAST_BATCH_ENABLED: bool = False  # Forecast every workspace's credit consumption nightly
+    FORECAST_BATCH_HORIZON_DAYS: int = 180  # Days forecast per workspace; the API serves up to this
+    FORECAST_BATCH_CHUNK_SIZE: int = 50  # Workspaces per batch forecast subtask; chunks run in parallel
+    FORECAST_MAX_AGE_HOURS: int = 36  # Older stored forecasts are recomputed on request
+
+    # Realtime counters
+    # Serve realtime metrics from event-fed Redis counters. Only enable when the
+    # run producer announces every run through EventBroadcaster.broadcast_execution_*
+    REALTIME_COUNTERS_ENABLED: bool = False
+
+    # Realtime event log (Redis Streams)
+    EVENT_STREAM_MAXLEN: int = 10000  # Approximate events kept per workspace stream
+    EVENT_STREAM_BLOCK_MS: int = 1000  # XREAD block time per tail iteration
+    EVENT_STREAM_BATCH_SIZE: int = 100  # Entries read per stream per XREAD
+    EVENT_STREAM_REPLAY_LIMIT: int = 1000  # Max events replayed on resume
 
     @field_validator("REDIS_URL", "CELERY_BROKER_URL", "CELERY_RESULT_BACKEND")
     @classmethod
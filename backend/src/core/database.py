@@ -12,8 +12,11 @@ engine = create_async_engine(
     DATABASE_URL,
     echo=True if settings.APP_ENV == "development" else False,
     future=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
 )
 
 # Create async session maker
@@ -23,6 +26,26 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# WebSocket tier: sessions are borrowed per message or stream tick, never
+# held for the lifetime of a socket. A separate pool keeps live dashboards
+# from starving REST requests (and vice versa).
+ws_engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    future=True,
+    pool_size=settings.WS_DB_POOL_SIZE,
+    max_overflow=settings.WS_DB_MAX_OVERFLOW,
+    pool_timeout=settings.WS_DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+ws_session_maker = async_sessionmaker(
+    ws_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 # Base for declarative models
 Base = declarative_base()
 
@@ -0,0 +1,307 @@
+"""Rate limit engine shared by every limiter.
+
+Limits are enforced with GCRA (the generic cell rate algorithm: a token
+bucket stored as a single "theoretical arrival time" per key), so each
+limited key costs one small string in Redis instead of a sorted set with
+one member per request. All limits of a check are evaluated and updated by
+one Lua script, which makes the check atomic and a single round trip.
+
+Each process also keeps the same GCRA state locally. It is only debited
+for requests Redis allowed, so a key the local state rejects is over its
+limit globally as well and is denied without a round trip. When Redis is
+unavailable the local state enforces the limits per process instead of
+letting every request through.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+import logging
+import math
+import time
+
+from .redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Local state entries kept per process (least recently used are dropped)
+LOCAL_MAX_KEYS = 100_000
+
+# Check every limit (KEYS[i] with ARGV emission/period/limit triples after
+# the cost), and store the new arrival times only if all of them allow it.
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms, binding index}.
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local allowed = 1
+local remaining = -1
+local retry_after = 0
+local reset_after = 0
+local binding = 1
+local new_tats = {}
+
+for i, key in ipairs(KEYS) do
+    local emission = tonumber(ARGV[3 * i - 1])
+    local period = tonumber(ARGV[3 * i])
+    local limit = tonumber(ARGV[3 * i + 1])
+
+    local tat = tonumber(redis.call('GET', key)) or now
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + emission * cost
+    local wait = new_tat - period - now
+
+    if wait > 0 then
+        if allowed == 1 or wait > retry_after then
+            retry_after = wait
+            binding = i
+        end
+        allowed = 0
+        new_tat = tat
+    end
+
+    local left = limit - math.ceil((new_tat - now) / emission - 1e-9)
+    if allowed == 1 and (remaining < 0 or left < remaining) then
+        remaining = left
+        binding = i
+    end
+    if new_tat - now > reset_after then
+        reset_after = new_tat - now
+    end
+    new_tats[i] = new_tat
+end
+
+if allowed == 0 then
+    remaining = 0
+elseif cost > 0 then
+    for i, key in ipairs(KEYS) do
+        redis.call('SET', key, new_tats[i], 'PX', math.ceil(new_tats[i] - now))
+    end
+end
+
+return {allowed, remaining, math.ceil(retry_after), math.ceil(reset_after), binding}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """At most ``limit`` requests per ``period`` seconds, bursts included."""
+
+    limit: int
+    period: float
+
+    @property
+    def emission_interval(self) -> float:
+        """Seconds one request adds to the key's arrival time."""
+        return self.period / self.limit
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check for the most restrictive limit."""
+
+    allowed: bool
+    limit: int
+    period: float
+    remaining: int
+    retry_after: float  # Seconds until a request would be allowed
+    reset_after: float  # Seconds until the full limit is available again
+
+
+def _remaining(rate: RateLimit, tat: float, now: float) -> int:
+    """Requests still allowed before the limit is reached."""
+    return rate.limit - math.ceil(max(tat - now, 0.0) / rate.emission_interval - 1e-9)
+
+
+class LocalRateLimiter:
+    """In-process GCRA state, the engine's fast path and Redis fallback."""
+
+    def __init__(self, max_keys: int = LOCAL_MAX_KEYS):
+        self.max_keys = max_keys
+        # Theoretical arrival times: {storage key: monotonic seconds}
+        self.tats: "OrderedDict[str, float]" = OrderedDict()
+
+    def check(
+        self,
+        keys: Sequence[str],
+        limits: Sequence[RateLimit],
+        cost: int = 1,
+        debit: bool = True,
+    ) -> RateLimitResult:
+        """Check (and with ``debit`` record) a request against every limit."""
+        now = time.monotonic()
+        tats = [max(self.tats.get(key, now), now) for key in keys]
+        new_tats = [tat + rate.emission_interval * cost for tat, rate in zip(tats, limits)]
+        waits = [new_tat - rate.period - now for new_tat, rate in zip(new_tats, limits)]
+
+        worst = max(range(len(limits)), key=waits.__getitem__)
+        if waits[worst] > 0:
+            rate = limits[worst]
+            return RateLimitResult(
+                allowed=False,
+                limit=rate.limit,
+                period=rate.period,
+                remaining=0,
+                retry_after=waits[worst],
+                reset_after=max(tats) - now,
+            )
+
+        if debit and cost > 0:
+            for key, new_tat in zip(keys, new_tats):
+                self._store(key, new_tat)
+            tats = new_tats
+
+        remaining = [_remaining(rate, tat, now) for rate, tat in zip(limits, tats)]
+        binding = min(range(len(limits)), key=remaining.__getitem__)
+        rate = limits[binding]
+        return RateLimitResult(
+            allowed=True,
+            limit=rate.limit,
+            period=rate.period,
+            remaining=remaining[binding],
+            retry_after=0.0,
+            reset_after=max(tats) - now,
+        )
+
+    def block(self, keys: Sequence[str], limits: Sequence[RateLimit], retry_after: float):
+        """Mirror a Redis denial so repeats are rejected locally until it lifts."""
+        now = time.monotonic()
+        for key, rate in zip(keys, limits):
+            blocked_tat = now + retry_after + rate.period - rate.emission_interval
+            if blocked_tat > self.tats.get(key, now):
+                self._store(key, blocked_tat)
+
+    def reset(self, keys: Sequence[str]):
+        """Forget the state of some keys."""
+        for key in keys:
+            self.tats.pop(key, None)
+
+    def reset_prefix(self, prefix: str) -> int:
+        """Forget every key starting with ``prefix``."""
+        keys = [key for key in self.tats if key.startswith(prefix)]
+        self.reset(keys)
+        return len(keys)
+
+    def prune(self) -> int:
+        """Drop keys whose limits are fully replenished."""
+        now = time.monotonic()
+        expired = [key for key, tat in self.tats.items() if tat <= now]
+        self.reset(expired)
+        return len(expired)
+
+    def _store(self, key: str, tat: float):
+        self.tats[key] = tat
+        self.tats.move_to_end(key)
+        while len(self.tats) > self.max_keys:
+            self.tats.popitem(last=False)
+
+
+class RateLimitEngine:
+    """Distributed GCRA rate limiting with a local fast path."""
+
+    def __init__(self, prefix: str = "rl:", local: Optional[LocalRateLimiter] = None):
+        self.prefix = prefix
+        self.local = local or LocalRateLimiter()
+
+    def storage_keys(self, key: str, limits: Sequence[RateLimit]) -> List[str]:
+        """Redis/local keys of ``key`` under each limit."""
+        return [f"{self.prefix}{key}:{rate.limit}/{rate.period:g}" for rate in limits]
+
+    async def hit(
+        self, key: str, limits: Sequence[RateLimit], cost: int = 1
+    ) -> RateLimitResult:
+        """Count a request against every limit and report the outcome."""
+        keys = self.storage_keys(key, limits)
+
+        # Fast path: over the limit locally means over the limit globally
+        local = self.local.check(keys, limits, cost, debit=False)
+        if not local.allowed:
+            return local
+
+        result = await self._eval(keys, limits, cost)
+        if result is None:
+            return self.local.check(keys, limits, cost)
+
+        if result.allowed:
+            self.local.check(keys, limits, cost)
+        else:
+            self.local.block(keys, limits, result.retry_after)
+        return result
+
+    async def peek(self, key: str, limits: Sequence[RateLimit]) -> RateLimitResult:
+        """Report the state of a key without counting a request."""
+        keys = self.storage_keys(key, limits)
+        result = await self._eval(keys, limits, 0)
+        if result is None:
+            return self.local.check(keys, limits, 0, debit=False)
+        return result
+
+    def hit_local(
+        self, key: str, limits: Sequence[RateLimit], cost: int = 1
+    ) -> RateLimitResult:
+        """Count a request against per-process limits only (no I/O)."""
+        return self.local.check(self.storage_keys(key, limits), limits, cost)
+
+    def peek_local(self, key: str, limits: Sequence[RateLimit]) -> RateLimitResult:
+        """Report per-process state without counting a request."""
+        return self.local.check(self.storage_keys(key, limits), limits, 0, debit=False)
+
+    async def reset(self, key: str, limits: Sequence[RateLimit]) -> bool:
+        """Clear a key's state locally and in Redis."""
+        keys = self.storage_keys(key, limits)
+        self.local.reset(keys)
+
+        redis_client = await get_redis_client()
+        if not redis_client:
+            return False
+        try:
+            await redis_client.redis.delete(*keys)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to reset rate limit for {key}: {e}")
+            return False
+
+    async def _eval(
+        self, keys: List[str], limits: Sequence[RateLimit], cost: int
+    ) -> Optional[RateLimitResult]:
+        """Run the GCRA script; None if Redis is unavailable."""
+        redis_client = await get_redis_client()
+        if not redis_client:
+            logger.warning("Redis unavailable, enforcing rate limits per process")
+            return None
+
+        args: List[float] = [cost]
+        for rate in limits:
+            args.extend((rate.emission_interval * 1000, rate.period * 1000, rate.limit))
+
+        try:
+            allowed, remaining, retry_ms, reset_ms, binding = await redis_client.redis.eval(
+                _GCRA_SCRIPT, len(keys), *keys, *args
+            )
+        except Exception as e:
+            logger.error(f"Rate limit check failed, enforcing per process: {e}")
+            return None
+
+        rate = limits[int(binding) - 1]
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=rate.limit,
+            period=rate.period,
+            remaining=int(remaining),
+            retry_after=int(retry_ms) / 1000,
+            reset_after=int(reset_ms) / 1000,
+        )
+
+
+# Global engine instance
+_engine: Optional[RateLimitEngine] = None
+
+
+def get_rate_limit_engine() -> RateLimitEngine:
+    """Get or create the global rate limit engine."""
+    global _engine
+    if _engine is None:
+        _engine = RateLimitEngine()
+    return _engine
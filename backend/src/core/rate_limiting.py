@@ -1,10 +1,10 @@
 """Rate limiting utilities using Redis for API protection."""
 
-import time
+import math
 import logging
 from typing import Dict, Tuple, Any, Optional
 from fastapi import HTTPException, Request
-from .redis import get_redis_client
+from .rate_limit_engine import RateLimit, get_rate_limit_engine
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +23,7 @@ class RateLimitConfig:
 
 class RateLimiter:
     """
-    Rate limiter using Redis and sliding window algorithm.
+    Rate limiter on the shared GCRA engine (see rate_limit_engine.py).
 
     Provides flexible rate limiting for different API endpoints.
     """
@@ -46,7 +46,7 @@ class RateLimiter:
         custom_limit: Optional[Tuple[int, int]] = None,
     ) -> Dict[str, Any]:
         """
-        Check and update rate limit using sliding window algorithm.
+        Check and update rate limit in one atomic Redis round trip.
 
         Args:
             key: Unique identifier (e.g., user_id, ip_address, api_key)
@@ -62,74 +62,28 @@ class RateLimiter:
         # Get limit configuration
         limit, window = custom_limit or self.limits.get(limit_type, self.limits["default"])
 
-        redis = await get_redis_client()
-        if not redis:
-            logger.warning("Redis not available, skipping rate limit check")
-            return {
-                "limit": limit,
-                "remaining": limit,
-                "reset_in": window,
-            }
-
-        # Create Redis key for this rate limit
-        redis_key = f"rate_limit:{limit_type}:{key}"
-
-        try:
-            # Current timestamp
-            now = time.time()
-            window_start = now - window
-
-            # Remove old entries outside the sliding window
-            await redis.zremrangebyscore(redis_key, 0, window_start)
-
-            # Count requests in current window
-            request_count = await redis.zcard(redis_key)
-
-            if request_count >= limit:
-                # Rate limit exceeded
-                # Get the oldest request to calculate reset time
-                oldest = await redis.zrange(redis_key, 0, 0, withscores=True)
-                if oldest:
-                    reset_in = int(oldest[0][1] + window - now)
-                else:
-                    reset_in = window
-
-                raise HTTPException(
-                    status_code=429,
-                    detail={
-                        "error": "Rate limit exceeded",
-                        "limit": limit,
-                        "window": window,
-                        "reset_in": reset_in,
-                    },
-                    headers={"Retry-After": str(reset_in)},
-                )
-
-            # Add current request to the sliding window
-            await redis.zadd(redis_key, {str(now): now})
-
-            # Set expiration on the key (cleanup)
-            await redis.expire(redis_key, window)
-
-            # Calculate remaining requests
-            remaining = limit - request_count - 1
-
-            return {
-                "limit": limit,
-                "remaining": remaining,
-                "reset_in": window,
-            }
-
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Rate limit check failed: {e}")
-            # Fail open - allow request if rate limiting fails
-            return {
-                "limit": limit,
-                "remaining": limit,
-                "reset_in": window,
-            }
+        result = await get_rate_limit_engine().hit(
+            f"rate_limit:{limit_type}:{key}", [RateLimit(limit, window)]
+        )
+
+        if not result.allowed:
+            reset_in = math.ceil(result.retry_after)
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "Rate limit exceeded",
+                    "limit": limit,
+                    "window": window,
+                    "reset_in": reset_in,
+                },
+                headers={"Retry-After": str(reset_in)},
+            )
+
+        return {
+            "limit": limit,
+            "remaining": result.remaining,
+            "reset_in": math.ceil(result.reset_after),
+        }
 
     async def reset_rate_limit(self, key: str, limit_type: str = "default") -> bool:
         """
@@ -142,18 +96,10 @@ class RateLimiter:
         Returns:
             True if reset successful, False otherwise
         """
-        try:
-            redis = await get_redis_client()
-            if not redis:
-                return False
-
-            redis_key = f"rate_limit:{limit_type}:{key}"
-            await redis.delete(redis_key)
-            return True
-
-        except Exception as e:
-            logger.error(f"Failed to reset rate limit: {e}")
-            return False
+        limit, window = self.limits.get(limit_type, self.limits["default"])
+        return await get_rate_limit_engine().reset(
+            f"rate_limit:{limit_type}:{key}", [RateLimit(limit, window)]
+        )
 
     async def get_rate_limit_status(
         self, key: str, limit_type: str = "default"
@@ -170,49 +116,16 @@ class RateLimiter:
         """
         limit, window = self.limits.get(limit_type, self.limits["default"])
 
-        redis = await get_redis_client()
-        if not redis:
-            return {
-                "limit": limit,
-                "remaining": limit,
-                "reset_in": window,
-                "current_count": 0,
-            }
-
-        redis_key = f"rate_limit:{limit_type}:{key}"
-
-        try:
-            now = time.time()
-            window_start = now - window
-
-            # Remove old entries
-            await redis.zremrangebyscore(redis_key, 0, window_start)
-
-            # Count current requests
-            request_count = await redis.zcard(redis_key)
-
-            # Get reset time
-            oldest = await redis.zrange(redis_key, 0, 0, withscores=True)
-            if oldest:
-                reset_in = int(oldest[0][1] + window - now)
-            else:
-                reset_in = window
-
-            return {
-                "limit": limit,
-                "remaining": max(0, limit - request_count),
-                "reset_in": reset_in,
-                "current_count": request_count,
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to get rate limit status: {e}")
-            return {
-                "limit": limit,
-                "remaining": limit,
-                "reset_in": window,
-                "current_count": 0,
-            }
+        result = await get_rate_limit_engine().peek(
+            f"rate_limit:{limit_type}:{key}", [RateLimit(limit, window)]
+        )
+
+        return {
+            "limit": limit,
+            "remaining": result.remaining,
+            "reset_in": math.ceil(result.reset_after),
+            "current_count": limit - result.remaining,
+        }
 
 
 # Global rate limiter instance
@@ -1,21 +1,54 @@
 """Redis connection management and client wrapper."""
 
 import redis.asyncio as redis
-from typing import Optional, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import json
-import pickle
+from .cache_codec import CacheCodec, get_codec
 from .config import settings
 import logging
 import asyncio
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Pub/sub channel carrying cache invalidations to in-process (L1) caches
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Tag sets (services/cache/tags.py) are stored under this prefix and kept for
+# at least this long after their last registration
+TAG_KEY_PREFIX = "tag:"
+TAG_SET_TTL = 86400
+
+# Delete a lock only if it still holds our token (it may have expired and been
+# taken by another holder in the meantime)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def invalidation_message(
+    keys: Optional[List[str]] = None,
+    patterns: Optional[List[str]] = None,
+    origin: Optional[str] = None,
+) -> str:
+    """Encode a message for CACHE_INVALIDATION_CHANNEL."""
+    return json.dumps({"keys": keys or [], "patterns": patterns or [], "origin": origin})
+
 
 class RedisClient:
     """Enhanced Redis client with advanced caching capabilities."""
 
-    def __init__(self, url: str):
-        """Initialize Redis client with connection pooling."""
+    def __init__(self, url: str, codec: Optional[CacheCodec] = None):
+        """Initialize Redis client with connection pooling.
+
+        Args:
+            url: Redis connection URL
+            codec: Value codec (default: configured from settings)
+        """
+        self.codec = codec or get_codec()
         self.redis = redis.from_url(
             url,
             encoding="utf-8",
@@ -34,34 +67,160 @@ class RedisClient:
         try:
             value = await self.redis.get(key)
             if value:
-                try:
-                    # Try JSON first (faster and more common)
-                    return json.loads(value)
-                except (json.JSONDecodeError, TypeError):
-                    # Fall back to pickle for complex objects
-                    return pickle.loads(value)
+                return self.codec.decode(value)
             return None
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
             return None
 
-    async def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
-        """Set value in cache with optional expiration and automatic serialization."""
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        expire: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+    ) -> bool:
+        """Set value in cache with optional expiration and automatic serialization.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            expire: Optional TTL in seconds
+            tags: Invalidation tags to register the key under, written in the
+                same round trip (see services/cache/tags.py)
+        """
         try:
-            # Try JSON serialization first (faster and more portable)
-            try:
-                serialized = json.dumps(value)
-            except (TypeError, ValueError):
-                # Fall back to pickle for complex objects
-                serialized = pickle.dumps(value)
-
-            if expire:
-                return await self.redis.setex(key, expire, serialized)
-            return await self.redis.set(key, serialized)
+            serialized = self.codec.encode(value)
+
+            if not tags:
+                if expire:
+                    return await self.redis.setex(key, expire, serialized)
+                return await self.redis.set(key, serialized)
+
+            pipe = self.redis.pipeline(transaction=False)
+            self._queue_set(pipe, key, serialized, expire, tags)
+            results = await pipe.execute()
+            return bool(results[0])
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {e}")
             return False
 
+    @staticmethod
+    def _queue_set(
+        pipe, key: str, serialized: bytes, expire: Optional[int], tags: Optional[List[str]]
+    ) -> None:
+        """Queue a write and its tag registrations on a pipeline."""
+        if expire:
+            pipe.setex(key, expire, serialized)
+        else:
+            pipe.set(key, serialized)
+
+        for tag in tags or ():
+            tag_key = TAG_KEY_PREFIX + tag
+            pipe.sadd(tag_key, key)
+            # Tag sets outlive their members; idle ones expire on their own
+            pipe.expire(tag_key, max(expire or 0, TAG_SET_TTL))
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get many values in one round trip.
+
+        Returns:
+            Values in key order, None for missing or undecodable entries
+        """
+        if not keys:
+            return []
+        try:
+            raw_values = await self.redis.mget(keys)
+        except Exception as e:
+            logger.error(f"Cache mget error for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+
+        values = []
+        for key, raw in zip(keys, raw_values):
+            try:
+                values.append(self.codec.decode(raw) if raw else None)
+            except Exception as e:
+                logger.error(f"Cache get error for key {key}: {e}")
+                values.append(None)
+        return values
+
+    async def mset(
+        self,
+        mapping: Dict[str, Any],
+        expire: Optional[int] = None,
+        tags: Optional[Dict[str, List[str]]] = None,
+    ) -> bool:
+        """Set many values in one pipelined round trip.
+
+        Args:
+            mapping: Key to value
+            expire: Optional TTL in seconds applied to every key
+            tags: Optional invalidation tags per key
+        """
+        if not mapping:
+            return True
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in mapping.items():
+                serialized = self.codec.encode(value)
+                self._queue_set(pipe, key, serialized, expire, (tags or {}).get(key))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Cache mset error for {len(mapping)} keys: {e}")
+            return False
+
+    async def get_ttls(self, keys: List[str]) -> List[int]:
+        """Get TTLs for many keys in one pipelined round trip.
+
+        Returns:
+            TTL per key in seconds (-1 if no TTL, -2 if the key doesn't exist)
+        """
+        if not keys:
+            return []
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.ttl(key)
+            return await pipe.execute()
+        except Exception as e:
+            logger.error(f"Cache get_ttls error for {len(keys)} keys: {e}")
+            return [-2] * len(keys)
+
+    async def scan_ttls(
+        self, pattern: str, count: int = 1000
+    ) -> AsyncIterator[List[Tuple[bytes, int]]]:
+        """Scan keys matching pattern, yielding each batch with its TTLs.
+
+        One SCAN plus one pipelined TTL round trip per batch. Redis errors
+        are raised to the caller.
+
+        Args:
+            pattern: The key pattern to match
+            count: Keys Redis should try to return per SCAN iteration
+        """
+        cursor = 0
+        while True:
+            cursor, keys = await self.redis.scan(cursor=cursor, match=pattern, count=count)
+            if keys:
+                pipe = self.redis.pipeline(transaction=False)
+                for key in keys:
+                    pipe.ttl(key)
+                ttls = await pipe.execute()
+                yield list(zip(keys, ttls))
+            if cursor == 0:
+                break
+
+    async def delete_many(self, keys: List[Any]) -> int:
+        """Delete many keys with a single DEL. Returns number deleted."""
+        if not keys:
+            return 0
+        try:
+            return await self.redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Cache delete error for {len(keys)} keys: {e}")
+            return 0
+
     async def delete(self, key: str) -> bool:
         """Delete key from cache."""
         try:
@@ -119,11 +278,61 @@ class RedisClient:
                     break
 
             logger.info(f"Deleted {deleted} keys matching pattern: {pattern}")
+            await self.publish_invalidation(patterns=[pattern])
             return deleted
         except Exception as e:
             logger.error(f"Cache flush_pattern error for pattern {pattern}: {e}")
             return 0
 
+    async def publish_invalidation(
+        self,
+        keys: Optional[List[str]] = None,
+        patterns: Optional[List[str]] = None,
+        origin: Optional[str] = None,
+    ) -> int:
+        """Tell every replica to drop keys/patterns from its in-process cache.
+
+        Args:
+            keys: Exact keys to invalidate
+            patterns: Glob patterns to invalidate
+            origin: Publishing process, which has already applied the change
+                locally and skips its own message
+
+        Returns:
+            Number of subscribers that received the message
+        """
+        try:
+            message = invalidation_message(keys, patterns, origin)
+            return await self.redis.publish(CACHE_INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.error(f"Cache invalidation publish error: {e}")
+            return 0
+
+    async def acquire_lock(self, name: str, timeout_ms: int) -> Optional[str]:
+        """Try to take a short-lived mutual exclusion lock (SET NX PX).
+
+        Unlike the cache helpers above, Redis errors are raised so callers can
+        tell "held elsewhere" apart from "Redis unavailable".
+
+        Args:
+            name: Lock key
+            timeout_ms: Lock expiry in milliseconds (bounds a crashed holder)
+
+        Returns:
+            Ownership token to pass to release_lock, or None if already held
+        """
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(name, token, nx=True, px=timeout_ms)
+        return token if acquired else None
+
+    async def release_lock(self, name: str, token: str) -> bool:
+        """Release a lock taken with acquire_lock if we still own it."""
+        try:
+            return bool(await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, name, token))
+        except Exception as e:
+            logger.error(f"Lock release error for key {name}: {e}")
+            return False
+
     async def ping(self) -> bool:
         """Test Redis connection."""
         try:
@@ -65,6 +65,7 @@ class ExecutionLog(Base):
     started_at = Column(DateTime, nullable=False)
     completed_at = Column(DateTime)
     created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
 
 class WorkspaceMetric(Base):
@@ -301,6 +302,9 @@ class ExecutionMetricsHourly(Base):
     total_credits = Column(Integer, default=0)
     avg_credits_per_run = Column(Float, default=0.0)
 
+    # Mergeable runtime quantile sketch (see services/aggregation/sketches.py)
+    runtime_sketch = Column(postgresql.JSONB)
+
     # Timestamps
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -24,6 +24,8 @@ class DetectionMethod(str, Enum):
     ZSCORE = "zscore"
     ZSCORE_ROLLING = "zscore_rolling"
     ZSCORE_GLOBAL = "zscore_global"
+    MAD = "mad"
+    SEASONAL = "seasonal"
     ISOLATION_FOREST = "isolation_forest"
     LSTM = "lstm"
     THRESHOLD = "threshold"
@@ -34,6 +36,7 @@ class ModelType(str, Enum):
     ZSCORE = "zscore"
     ISOLATION_FOREST = "isolation_forest"
     LSTM = "lstm"
+    STREAMING = "streaming"
 
 
 # Request Schemas
@@ -1,5 +1,5 @@
 """Data aggregation services."""
 
-from . import aggregator, rollup, materialized
+from . import aggregator, rollup, materialized, sketches, incremental
 
-__all__ = ["aggregator", "rollup", "materialized"]
+__all__ = ["aggregator", "rollup", "materialized", "sketches", "incremental"]
@@ -1,18 +1,63 @@
 """Time-based rollup aggregations."""
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+from .sketches import merge_sketches, sketch_bins_sql, sketch_params
+
 logger = logging.getLogger(__name__)
 
 
+def touched_buckets_filter(
+    table: str,
+    time_column: str,
+    scope_column: str,
+    changed_column: str
+) -> str:
+    """Build an ``AND`` clause limiting rows to recently touched hourly buckets.
+
+    A bucket is a (scope, hour) pair with at least one row written (by
+    ``changed_column``) in ``[:ingested_since, :ingested_until)``. Whole
+    buckets are recomputed, so rows arriving late for an old hour, or updated
+    after they were first aggregated, are merged with the rest of the hour.
+
+    Args:
+        table: Source table (trusted, not user input)
+        time_column: Event timestamp the rollup buckets by
+        scope_column: Column identifying the bucket scope (e.g. workspace_id)
+        changed_column: Timestamp set when a row is inserted or updated
+            (``created_at`` for append-only tables)
+    """
+    return f"""
+        AND ({scope_column}, DATE_TRUNC('hour', {time_column})) IN (
+            SELECT DISTINCT {scope_column}, DATE_TRUNC('hour', {time_column})
+            FROM {table}
+            WHERE {changed_column} >= :ingested_since AND {changed_column} < :ingested_until
+        )"""
+
+
+def _ingestion_params(
+    ingested_since: Optional[datetime],
+    ingested_until: Optional[datetime]
+) -> Dict[str, datetime]:
+    if ingested_since is None:
+        return {}
+    return {
+        'ingested_since': ingested_since,
+        'ingested_until': ingested_until or datetime.utcnow(),
+    }
+
+
 async def aggregate_execution_metrics(
     db: AsyncSession,
     start_time: datetime,
-    end_time: datetime
+    end_time: datetime,
+    ingested_since: Optional[datetime] = None,
+    ingested_until: Optional[datetime] = None
 ) -> int:
     """Aggregate execution metrics for time period.
 
@@ -20,11 +65,47 @@ async def aggregate_execution_metrics(
         db: Database session
         start_time: Start of aggregation period
         end_time: End of aggregation period
+        ingested_since: Only recompute workspace-hours with rows inserted or
+            updated at or after this time (default: every workspace-hour)
+        ingested_until: End of the ingestion window (default: now)
 
     Returns:
-        Number of workspaces aggregated
+        Number of workspace-hours aggregated
     """
-    query = text("""
+    incremental = ""
+    if ingested_since is not None:
+        incremental = touched_buckets_filter(
+            "execution_logs", "started_at", "workspace_id", "updated_at"
+        )
+
+    # The runtime sketch is computed in the same statement so that window
+    # percentiles can later be answered by merging hourly sketches.
+    sketch_query = sketch_bins_sql(
+        "execution_logs", "duration", "started_at",
+        group_by={"workspace_id": "workspace_id", "hour": "DATE_TRUNC('hour', started_at)"},
+        extra_filter=incremental,
+    )
+
+    query = text(f"""
+        WITH hourly AS (
+            SELECT
+                workspace_id,
+                DATE_TRUNC('hour', started_at) as hour,
+                COUNT(*) as total_executions,
+                COUNT(*) FILTER (WHERE status = 'completed') as successful_executions,
+                COUNT(*) FILTER (WHERE status = 'failed') as failed_executions,
+                AVG(duration) as avg_runtime,
+                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY duration) as p50_runtime,
+                PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY duration) as p95_runtime,
+                PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY duration) as p99_runtime,
+                COALESCE(SUM(credits_used), 0) as total_credits,
+                COALESCE(AVG(credits_used), 0) as avg_credits_per_run
+            FROM execution_logs
+            WHERE started_at >= :start_time AND started_at < :end_time
+                {incremental}
+            GROUP BY workspace_id, DATE_TRUNC('hour', started_at)
+        ),
+        sketches AS ({sketch_query})
         INSERT INTO analytics.execution_metrics_hourly (
             workspace_id,
             hour,
@@ -37,26 +118,27 @@ async def aggregate_execution_metrics(
             p99_runtime,
             total_credits,
             avg_credits_per_run,
+            runtime_sketch,
             created_at,
             updated_at
         )
         SELECT
-            workspace_id,
-            DATE_TRUNC('hour', started_at) as hour,
-            COUNT(*) as total_executions,
-            COUNT(*) FILTER (WHERE status = 'completed') as successful_executions,
-            COUNT(*) FILTER (WHERE status = 'failed') as failed_executions,
-            AVG(duration) as avg_runtime,
-            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY duration) as p50_runtime,
-            PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY duration) as p95_runtime,
-            PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY duration) as p99_runtime,
-            COALESCE(SUM(credits_used), 0) as total_credits,
-            COALESCE(AVG(credits_used), 0) as avg_credits_per_run,
+            h.workspace_id,
+            h.hour,
+            h.total_executions,
+            h.successful_executions,
+            h.failed_executions,
+            h.avg_runtime,
+            h.p50_runtime,
+            h.p95_runtime,
+            h.p99_runtime,
+            h.total_credits,
+            h.avg_credits_per_run,
+            s.runtime_sketch,
             NOW() as created_at,
             NOW() as updated_at
-        FROM execution_logs
-        WHERE started_at >= :start_time AND started_at < :end_time
-        GROUP BY workspace_id, DATE_TRUNC('hour', started_at)
+        FROM hourly h
+        LEFT JOIN sketches s ON s.workspace_id = h.workspace_id AND s.hour = h.hour
         ON CONFLICT (workspace_id, hour)
         DO UPDATE SET
             total_executions = EXCLUDED.total_executions,
@@ -68,11 +150,17 @@ async def aggregate_execution_metrics(
             p99_runtime = EXCLUDED.p99_runtime,
             total_credits = EXCLUDED.total_credits,
             avg_credits_per_run = EXCLUDED.avg_credits_per_run,
+            runtime_sketch = EXCLUDED.runtime_sketch,
             updated_at = NOW()
         RETURNING workspace_id
     """)
 
-    result = await db.execute(query, {'start_time': start_time, 'end_time': end_time})
+    result = await db.execute(query, {
+        'start_time': start_time,
+        'end_time': end_time,
+        **sketch_params(),
+        **_ingestion_params(ingested_since, ingested_until)
+    })
     await db.commit()
 
     workspaces_count = len(result.fetchall())
@@ -83,7 +171,9 @@ async def aggregate_execution_metrics(
 async def aggregate_user_activity(
     db: AsyncSession,
     start_time: datetime,
-    end_time: datetime
+    end_time: datetime,
+    ingested_since: Optional[datetime] = None,
+    ingested_until: Optional[datetime] = None
 ) -> int:
     """Aggregate user activity for time period.
 
@@ -91,11 +181,20 @@ async def aggregate_user_activity(
         db: Database session
         start_time: Start of aggregation period
         end_time: End of aggregation period
+        ingested_since: Only recompute user-hours that received events
+            ingested at or after this time (default: every user-hour)
+        ingested_until: End of the ingestion window (default: now)
 
     Returns:
-        Number of users aggregated
+        Number of user-hours aggregated
     """
-    query = text("""
+    incremental = ""
+    if ingested_since is not None:
+        incremental = touched_buckets_filter(
+            "analytics.user_activity", "created_at", "user_id", "created_at"
+        )
+
+    query = text(f"""
         INSERT INTO analytics.user_activity_hourly (
             workspace_id,
             user_id,
@@ -132,6 +231,7 @@ async def aggregate_user_activity(
                 COUNT(*) as event_count
             FROM analytics.user_activity
             WHERE created_at >= :start_time AND created_at < :end_time
+                {incremental}
             GROUP BY workspace_id, user_id, DATE_TRUNC('hour', created_at), session_id, event_type
         ) subquery
         GROUP BY workspace_id, user_id, hour
@@ -145,7 +245,11 @@ async def aggregate_user_activity(
         RETURNING user_id
     """)
 
-    result = await db.execute(query, {'start_time': start_time, 'end_time': end_time})
+    result = await db.execute(query, {
+        'start_time': start_time,
+        'end_time': end_time,
+        **_ingestion_params(ingested_since, ingested_until)
+    })
     await db.commit()
 
     users_count = len(result.fetchall())
@@ -156,7 +260,9 @@ async def aggregate_user_activity(
 async def aggregate_credit_consumption(
     db: AsyncSession,
     start_time: datetime,
-    end_time: datetime
+    end_time: datetime,
+    ingested_since: Optional[datetime] = None,
+    ingested_until: Optional[datetime] = None
 ) -> int:
     """Aggregate credit consumption for time period.
 
@@ -164,11 +270,20 @@ async def aggregate_credit_consumption(
         db: Database session
         start_time: Start of aggregation period
         end_time: End of aggregation period
+        ingested_since: Only recompute workspace-hours with rows inserted or
+            updated at or after this time (default: every workspace-hour)
+        ingested_until: End of the ingestion window (default: now)
 
     Returns:
         Number of records aggregated
     """
-    query = text("""
+    incremental = ""
+    if ingested_since is not None:
+        incremental = touched_buckets_filter(
+            "execution_logs", "started_at", "workspace_id", "updated_at"
+        )
+
+    query = text(f"""
         INSERT INTO analytics.credit_consumption_hourly (
             workspace_id,
             user_id,
@@ -203,6 +318,7 @@ async def aggregate_credit_consumption(
             NOW() as updated_at
         FROM execution_logs
         WHERE started_at >= :start_time AND started_at < :end_time
+            {incremental}
         GROUP BY workspace_id, COALESCE(user_id, ''), COALESCE(agent_id, ''), DATE_TRUNC('hour', started_at)
         ON CONFLICT (workspace_id, user_id, agent_id, hour)
         DO UPDATE SET
@@ -216,7 +332,11 @@ async def aggregate_credit_consumption(
         RETURNING id
     """)
 
-    result = await db.execute(query, {'start_time': start_time, 'end_time': end_time})
+    result = await db.execute(query, {
+        'start_time': start_time,
+        'end_time': end_time,
+        **_ingestion_params(ingested_since, ingested_until)
+    })
     await db.commit()
 
     records_count = len(result.fetchall())
@@ -306,6 +426,7 @@ async def aggregate_daily_metrics(db: AsyncSession, target_date: datetime) -> in
         'start_of_day': start_of_day,
         'end_of_day': end_of_day
     })
+    await _apply_daily_sketch_percentiles(db, target_date, start_of_day, end_of_day)
     await db.commit()
 
     workspaces_count = len(result.fetchall())
@@ -313,6 +434,97 @@ async def aggregate_daily_metrics(db: AsyncSession, target_date: datetime) -> in
     return workspaces_count
 
 
+async def _apply_daily_sketch_percentiles(
+    db: AsyncSession,
+    target_date: datetime,
+    start_of_day: datetime,
+    end_of_day: datetime
+) -> None:
+    """Overwrite daily percentiles with values from merged hourly sketches.
+
+    Percentiles of hourly percentiles are not daily percentiles; merging the
+    hourly runtime sketches gives the true daily distribution within the
+    sketch's relative error. Hours rolled up before sketches existed are
+    skipped, leaving the SQL approximation in place for those workspaces.
+    """
+    result = await db.execute(
+        text("""
+            SELECT workspace_id, runtime_sketch
+            FROM analytics.execution_metrics_hourly
+            WHERE hour >= :start_of_day AND hour < :end_of_day
+                AND runtime_sketch IS NOT NULL
+        """),
+        {'start_of_day': start_of_day, 'end_of_day': end_of_day}
+    )
+
+    sketches_by_workspace = {}
+    for row in result.fetchall():
+        sketches_by_workspace.setdefault(row.workspace_id, []).append(row.runtime_sketch)
+
+    updates = []
+    for workspace_id, sketches in sketches_by_workspace.items():
+        merged = merge_sketches(sketches)
+        if merged.count == 0:
+            continue
+        p50, p95, p99 = merged.quantiles([0.5, 0.95, 0.99])
+        updates.append({
+            'workspace_id': workspace_id,
+            'target_date': target_date,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99
+        })
+
+    if updates:
+        await db.execute(
+            text("""
+                UPDATE analytics.execution_metrics_daily
+                SET p50_runtime = :p50, p95_runtime = :p95, p99_runtime = :p99
+                WHERE workspace_id = :workspace_id AND date = :target_date
+            """),
+            updates
+        )
+
+
+async def rollup_range(
+    db: AsyncSession,
+    start_time: datetime,
+    end_time: datetime,
+    ingested_since: Optional[datetime] = None,
+    ingested_until: Optional[datetime] = None
+) -> dict:
+    """Roll up every hour in a time range.
+
+    Each aggregation groups by hour, so a multi-hour range is one statement
+    per hourly table rather than one per hour.
+
+    Args:
+        db: Database session
+        start_time: Start of the first hour
+        end_time: End of the last hour
+        ingested_since: Only recompute buckets touched by rows ingested since
+            this time (see :func:`touched_buckets_filter`)
+        ingested_until: End of the ingestion window (default: now)
+
+    Returns:
+        Dictionary with aggregation results
+    """
+    window = {'ingested_since': ingested_since, 'ingested_until': ingested_until}
+    exec_count = await aggregate_execution_metrics(db, start_time, end_time, **window)
+    user_count = await aggregate_user_activity(db, start_time, end_time, **window)
+    credit_count = await aggregate_credit_consumption(db, start_time, end_time, **window)
+
+    return {
+        'success': True,
+        'period': 'hourly',
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'execution_metrics_workspaces': exec_count,
+        'user_activity_users': user_count,
+        'credit_consumption_records': credit_count
+    }
+
+
 async def hourly_rollup(db: AsyncSession, target_hour: Optional[datetime] = None) -> dict:
     """Perform hourly data rollup.
 
@@ -335,19 +547,7 @@ async def hourly_rollup(db: AsyncSession, target_hour: Optional[datetime] = None
 
     try:
         # Run all aggregations
-        exec_count = await aggregate_execution_metrics(db, start_time, end_time)
-        user_count = await aggregate_user_activity(db, start_time, end_time)
-        credit_count = await aggregate_credit_consumption(db, start_time, end_time)
-
-        result = {
-            'success': True,
-            'period': 'hourly',
-            'start_time': start_time.isoformat(),
-            'end_time': end_time.isoformat(),
-            'execution_metrics_workspaces': exec_count,
-            'user_activity_users': user_count,
-            'credit_consumption_records': credit_count
-        }
+        result = await rollup_range(db, start_time, end_time)
 
         logger.info(f"Hourly rollup completed successfully: {result}")
         return result
@@ -358,6 +558,99 @@ async def hourly_rollup(db: AsyncSession, target_hour: Optional[datetime] = None
         raise
 
 
+def backfill_chunks(
+    start_time: datetime,
+    end_time: datetime,
+    chunk: timedelta
+) -> List[Tuple[datetime, datetime]]:
+    """Split a range into consecutive chunks (the last one may be shorter)."""
+    chunks = []
+    current = start_time
+    while current < end_time:
+        chunk_end = min(current + chunk, end_time)
+        chunks.append((current, chunk_end))
+        current = chunk_end
+    return chunks
+
+
+async def backfill_rollups(
+    session_factory: Callable[[], AsyncSession],
+    start_time: datetime,
+    end_time: datetime,
+    granularity: str = 'hourly',
+    chunk_hours: int = 24,
+    max_concurrency: int = 4
+) -> List[dict]:
+    """Backfill rollups for a range as parallel chunks.
+
+    Hourly backfills run one :func:`rollup_range` per chunk of
+    ``chunk_hours``; daily backfills run one :func:`daily_rollup` per day.
+    Each chunk uses its own session, with at most ``max_concurrency``
+    running at once. Rollups are idempotent upserts, so a failed backfill
+    can simply be re-run.
+
+    Args:
+        session_factory: Callable returning a new AsyncSession context manager
+        start_time: Start of the range
+        end_time: End of the range
+        granularity: 'hourly' or 'daily'
+        chunk_hours: Hours per chunk for hourly backfills
+        max_concurrency: Maximum chunks in flight
+
+    Returns:
+        Result of each chunk, in order
+
+    Raises:
+        ValueError: If granularity is invalid
+        Exception: The first chunk failure, after every chunk has finished
+    """
+    if granularity == 'hourly':
+        # Chunks must cover whole hours: a partial hour would overwrite its
+        # bucket with partial totals
+        first_hour = start_time.replace(minute=0, second=0, microsecond=0)
+        end_hour = end_time.replace(minute=0, second=0, microsecond=0)
+        if end_hour < end_time:
+            end_hour += timedelta(hours=1)
+        chunks = backfill_chunks(first_hour, end_hour, timedelta(hours=chunk_hours))
+
+        async def run(db: AsyncSession, chunk_start: datetime, chunk_end: datetime) -> dict:
+            return await rollup_range(db, chunk_start, chunk_end)
+    elif granularity == 'daily':
+        chunks = backfill_chunks(start_time, end_time, timedelta(days=1))
+
+        async def run(db: AsyncSession, chunk_start: datetime, chunk_end: datetime) -> dict:
+            return await daily_rollup(db, chunk_start)
+    else:
+        raise ValueError(f"Invalid granularity: {granularity}")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    completed = 0
+
+    async def run_chunk(chunk_start: datetime, chunk_end: datetime) -> dict:
+        nonlocal completed
+        async with semaphore:
+            async with session_factory() as db:
+                try:
+                    result = await run(db, chunk_start, chunk_end)
+                except Exception:
+                    await db.rollback()
+                    raise
+        completed += 1
+        logger.info(f"Backfill progress: {completed}/{len(chunks)} chunks completed")
+        return result
+
+    results = await asyncio.gather(
+        *(run_chunk(chunk_start, chunk_end) for chunk_start, chunk_end in chunks),
+        return_exceptions=True
+    )
+
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.error(f"Backfill failed for {len(failures)}/{len(chunks)} chunks")
+        raise failures[0]
+    return results
+
+
 async def daily_rollup(db: AsyncSession, target_date: Optional[datetime] = None) -> dict:
     """Perform daily data rollup.
 
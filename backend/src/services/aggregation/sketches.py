@@ -0,0 +1,384 @@
+"""Mergeable quantile sketches for rollup tables.
+
+Hourly rollups store a DDSketch of execution runtimes so that percentiles for
+any window (day, week, 30 days) can be answered by merging a few hundred small
+sketches instead of sorting every raw ``execution_logs`` row.
+
+Error bound: every quantile returned by :class:`DDSketch` is within
+``relative_accuracy`` (1% by default) of the exact value of *some* element at
+that rank, i.e. ``|estimate - true| <= relative_accuracy * true``. Values at or
+below ``MIN_INDEXABLE_VALUE`` are counted in a dedicated zero bucket and
+reported as ``0.0``.
+
+The bucket index for a value ``x`` is ``ceil(ln(x) / ln(gamma))`` with
+``gamma = (1 + alpha) / (1 - alpha)``. The same formula is evaluated in SQL by
+:func:`sketch_bins_sql` so the rollup never has to pull raw rows into Python.
+"""
+
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+SKETCH_VERSION = 1
+DEFAULT_RELATIVE_ACCURACY = 0.01
+MIN_INDEXABLE_VALUE = 1e-6
+
+
+class DDSketch:
+    """Relative-error quantile sketch (DDSketch with logarithmic buckets).
+
+    Sketches built with the same ``relative_accuracy`` can be merged
+    losslessly: merging is a per-bucket sum of counts.
+    """
+
+    __slots__ = (
+        "relative_accuracy", "gamma", "log_gamma", "bins", "zero_count",
+        "count", "sum", "sum_sq", "min", "max",
+    )
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """Initialize an empty sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of quantile estimates (0 < a < 1)
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def key(self, value: float) -> int:
+        """Return the bucket index for a positive value."""
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """Add a value to the sketch.
+
+        Args:
+            value: Observed value (negative values are clamped to zero)
+            weight: Number of occurrences of the value
+        """
+        if value is None or weight <= 0:
+            return
+        value = float(value)
+        if math.isnan(value):
+            return
+
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += weight
+            value = max(value, 0.0)
+        else:
+            k = self.key(value)
+            self.bins[k] = self.bins.get(k, 0) + weight
+
+        self.count += weight
+        self.sum += value * weight
+        self.sum_sq += value * value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "DDSketch") -> "DDSketch":
+        """Merge another sketch into this one in place.
+
+        Raises:
+            ValueError: If the sketches use different relative accuracies
+        """
+        if not math.isclose(self.relative_accuracy, other.relative_accuracy):
+            raise ValueError(
+                f"Cannot merge sketches with relative accuracy "
+                f"{self.relative_accuracy} and {other.relative_accuracy}"
+            )
+        if other.count == 0:
+            return self
+
+        for k, c in other.bins.items():
+            self.bins[k] = self.bins.get(k, 0) + c
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the value at quantile ``q`` (0 <= q <= 1).
+
+        Returns:
+            Estimated value, or None for an empty sketch
+        """
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """Estimate several quantiles with a single pass over the buckets."""
+        qs = list(qs)
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("quantile must be between 0 and 1")
+        if self.count == 0:
+            return [None] * len(qs)
+
+        order = sorted(range(len(qs)), key=lambda i: qs[i])
+        results: List[Optional[float]] = [None] * len(qs)
+        keys = sorted(self.bins)
+        cumulative = self.zero_count
+        pos = 0
+
+        for i in order:
+            rank = qs[i] * (self.count - 1)
+            if rank < self.zero_count:
+                results[i] = 0.0
+                continue
+            while pos < len(keys) and cumulative + self.bins[keys[pos]] <= rank:
+                cumulative += self.bins[keys[pos]]
+                pos += 1
+            if pos == len(keys):
+                results[i] = self.max
+            else:
+                estimate = 2 * self.gamma ** keys[pos] / (self.gamma + 1)
+                results[i] = min(max(estimate, self.min), self.max)
+
+        return results
+
+    def count_below(self, value: float) -> int:
+        """Approximate number of added values strictly below ``value``."""
+        if value <= MIN_INDEXABLE_VALUE:
+            return self.zero_count if value > 0 else 0
+        threshold = self.key(value)
+        return self.zero_count + sum(c for k, c in self.bins.items() if k < threshold)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        """Population standard deviation of the added values."""
+        if self.count == 0:
+            return 0.0
+        variance = self.sum_sq / self.count - self.mean ** 2
+        return math.sqrt(max(variance, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dict (the ``runtime_sketch`` format)."""
+        return {
+            "v": SKETCH_VERSION,
+            "alpha": self.relative_accuracy,
+            "count": self.count,
+            "sum": self.sum,
+            "sum_sq": self.sum_sq,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero": self.zero_count,
+            "bins": {str(k): c for k, c in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        """Deserialize a sketch produced by :meth:`to_dict` or by the rollup SQL."""
+        version = data.get("v", SKETCH_VERSION)
+        if version != SKETCH_VERSION:
+            raise ValueError(f"Unsupported sketch version: {version}")
+
+        sketch = cls(float(data.get("alpha", DEFAULT_RELATIVE_ACCURACY)))
+        sketch.bins = {int(k): int(c) for k, c in (data.get("bins") or {}).items()}
+        sketch.zero_count = int(data.get("zero") or 0)
+        sketch.count = int(data.get("count") or 0)
+        sketch.sum = float(data.get("sum") or 0.0)
+        sketch.sum_sq = float(data.get("sum_sq") or 0.0)
+        if sketch.count:
+            sketch.min = float(data["min"]) if data.get("min") is not None else 0.0
+            sketch.max = float(data["max"]) if data.get("max") is not None else 0.0
+        return sketch
+
+
+def merge_sketches(
+    sketches: Iterable[Optional[Dict[str, Any]]],
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+) -> DDSketch:
+    """Merge serialized sketches into a single :class:`DDSketch`.
+
+    ``None`` entries (rows rolled up before sketches existed) are skipped.
+    """
+    merged = DDSketch(relative_accuracy)
+    for data in sketches:
+        if data:
+            merged.merge(DDSketch.from_dict(data))
+    return merged
+
+
+def sketch_bins_sql(
+    source: str,
+    value_column: str,
+    time_column: str,
+    group_by: Dict[str, str],
+    extra_filter: str = "",
+) -> str:
+    """Build a SELECT that computes serialized sketches per group in SQL.
+
+    The query expects ``:start_time``, ``:end_time``, ``:log_gamma``,
+    ``:min_value`` and ``:alpha`` parameters (see :func:`sketch_params`) and
+    returns the group aliases plus a ``runtime_sketch`` JSONB column.
+
+    Args:
+        source: Table name (trusted, not user input)
+        value_column: Column holding the measured value
+        time_column: Timestamp column used for the window filter
+        group_by: Mapping of output alias to grouping expression
+        extra_filter: Additional trusted ``AND`` clause for the WHERE
+    """
+    group_select = ",\n                ".join(f"{expr} as {alias}" for alias, expr in group_by.items())
+    group_aliases = ", ".join(group_by)
+    return f"""
+        SELECT
+            {group_aliases},
+            jsonb_build_object(
+                'v', {SKETCH_VERSION},
+                'alpha', CAST(:alpha AS float),
+                'count', SUM(cnt),
+                'sum', SUM(total),
+                'sum_sq', SUM(total_sq),
+                'min', MIN(min_value),
+                'max', MAX(max_value),
+                'zero', COALESCE(SUM(cnt) FILTER (WHERE bin IS NULL), 0),
+                'bins', COALESCE(
+                    jsonb_object_agg(bin::text, cnt) FILTER (WHERE bin IS NOT NULL),
+                    '{{}}'::jsonb
+                )
+            ) as runtime_sketch
+        FROM (
+            SELECT
+                {group_select},
+                CASE
+                    WHEN {value_column} > :min_value
+                    THEN CEIL(LN({value_column}) / :log_gamma)::int
+                END as bin,
+                COUNT(*) as cnt,
+                SUM(GREATEST({value_column}, 0)) as total,
+                SUM(GREATEST({value_column}, 0) ^ 2) as total_sq,
+                MIN(GREATEST({value_column}, 0)) as min_value,
+                MAX(GREATEST({value_column}, 0)) as max_value
+            FROM {source}
+            WHERE {time_column} >= :start_time AND {time_column} < :end_time
+                AND {value_column} IS NOT NULL
+                {extra_filter}
+            GROUP BY {group_aliases}, bin
+        ) sketch_bins
+        GROUP BY {group_aliases}
+    """
+
+
+def sketch_params(relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> Dict[str, float]:
+    """Bind parameters for :func:`sketch_bins_sql`."""
+    sketch = DDSketch(relative_accuracy)
+    return {
+        "alpha": relative_accuracy,
+        "log_gamma": sketch.log_gamma,
+        "min_value": MIN_INDEXABLE_VALUE,
+    }
+
+
+async def load_runtime_sketch(
+    db: AsyncSession,
+    workspace_id: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> DDSketch:
+    """Build a runtime sketch for an arbitrary window.
+
+    Complete hours are answered from ``analytics.execution_metrics_hourly``.
+    Everything else is sketched directly from ``execution_logs`` with an
+    index-backed scan: the leading partial hour, the hours after the last
+    rolled-up hour, and any run of hours rolled up before sketches existed
+    (``runtime_sketch IS NULL``).
+
+    Args:
+        db: Database session
+        workspace_id: Workspace identifier
+        start_time: Start of window (inclusive)
+        end_time: End of window (exclusive)
+
+    Returns:
+        Merged sketch of execution durations in the window
+    """
+    first_hour = start_time.replace(minute=0, second=0, microsecond=0)
+    if first_hour < start_time:
+        first_hour += timedelta(hours=1)
+    last_hour = end_time.replace(minute=0, second=0, microsecond=0)
+
+    sketch = DDSketch()
+    if first_hour >= last_hour:
+        raw_ranges = [(start_time, end_time)]
+    else:
+        result = await db.execute(
+            text("""
+                SELECT hour, runtime_sketch
+                FROM analytics.execution_metrics_hourly
+                WHERE workspace_id = :workspace_id
+                    AND hour >= :first_hour
+                    AND hour < :last_hour
+                ORDER BY hour
+            """),
+            {"workspace_id": workspace_id, "first_hour": first_hour, "last_hour": last_hour}
+        )
+
+        # Hours without a rollup row between two sketched hours had no
+        # executions; every other hour without a sketch is read raw
+        raw_ranges = []
+        raw_from: Optional[datetime] = start_time
+        for row in result.fetchall():
+            if row.runtime_sketch is None:
+                if raw_from is None:
+                    raw_from = row.hour
+                continue
+            if raw_from is not None:
+                raw_ranges.append((raw_from, row.hour))
+                raw_from = None
+            sketch.merge(DDSketch.from_dict(row.runtime_sketch))
+            covered_until = row.hour + timedelta(hours=1)
+
+        raw_ranges.append((raw_from if raw_from is not None else covered_until, end_time))
+
+    raw_query = text(sketch_bins_sql(
+        "execution_logs", "duration", "started_at",
+        group_by={"workspace_id": "workspace_id"},
+        extra_filter="AND workspace_id = :workspace_id",
+    ))
+    for range_start, range_end in raw_ranges:
+        if range_start >= range_end:
+            continue
+        result = await db.execute(
+            raw_query,
+            {
+                "workspace_id": workspace_id,
+                "start_time": range_start,
+                "end_time": range_end,
+                **sketch_params(),
+            }
+        )
+        row = result.fetchone()
+        if row and row.runtime_sketch:
+            sketch.merge(DDSketch.from_dict(row.runtime_sketch))
+
+    logger.debug(
+        "Loaded runtime sketch",
+        extra={"workspace_id": workspace_id, "count": sketch.count}
+    )
+    return sketch
@@ -7,8 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 import logging
 
+from ..analytics.streaming_baseline import ROLLUP_COLUMNS, BaselineStore
+
 logger = logging.getLogger(__name__)
 
+# Observations needed before an anomaly baseline is trusted
+MIN_BASELINE_POINTS = 10
+
 
 class ConditionEvaluator:
     """Base class for alert condition evaluators."""
@@ -214,18 +219,11 @@ class AnomalyConditionEvaluator(ConditionEvaluator):
             sensitivity = condition_config.get("sensitivity", 2.5)
             min_deviation_duration = condition_config.get("min_deviation_duration", 10)
 
-            # Get historical data for baseline
-            historical_values = await self._get_historical_values(
-                workspace_id, metric_type, lookback_hours=24
-            )
-
-            if len(historical_values) < 10:  # Need minimum data points
+            # Get statistical baseline
+            baseline = await self._get_baseline(workspace_id, metric_type)
+            if baseline is None:
                 return False, None
-
-            # Calculate statistical baseline
-            values_array = np.array(historical_values)
-            mean = np.mean(values_array)
-            std = np.std(values_array)
+            mean, std = baseline
 
             # Get current value
             if current_data:
@@ -263,6 +261,34 @@ class AnomalyConditionEvaluator(ConditionEvaluator):
             logger.error(f"Error evaluating anomaly condition: {str(e)}")
             return False, None
 
+    async def _get_baseline(
+        self,
+        workspace_id: str,
+        metric_type: str
+    ) -> Optional[tuple[float, float]]:
+        """Get (mean, std) of the metric's normal behaviour.
+
+        A maintained streaming baseline answers in O(1) from the running
+        statistics of the current hour of day; otherwise the baseline is
+        computed from the last 24 hours of values.
+        """
+        if metric_type in ROLLUP_COLUMNS:
+            streaming = await BaselineStore(self.db).load(workspace_id, metric_type)
+            if streaming is not None:
+                stats, _ = streaming.expected(datetime.utcnow())
+                if stats.count >= MIN_BASELINE_POINTS:
+                    return stats.mean, stats.std_dev
+
+        historical_values = await self._get_historical_values(
+            workspace_id, metric_type, lookback_hours=24
+        )
+
+        if len(historical_values) < MIN_BASELINE_POINTS:  # Need minimum data points
+            return None
+
+        values_array = np.array(historical_values)
+        return float(np.mean(values_array)), float(np.std(values_array))
+
     async def _get_historical_values(
         self,
         workspace_id: str,
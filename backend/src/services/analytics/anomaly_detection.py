@@ -1,7 +1,9 @@
 """Anomaly detection for metrics across all dimensions.
 
 This module provides statistical anomaly detection using z-scores, isolation forests,
-and custom thresholds for time-series metrics analysis.
+and custom thresholds for time-series metrics analysis. Z-score variants are
+computed by the vectorized scorers in ``anomaly_scoring``, which also score every
+(workspace, metric) series of a batch scan in one pass.
 
 Security: All database queries enforce workspace isolation through RLS policies
 and explicit access validation. Metric names are validated against a whitelist
@@ -14,13 +16,22 @@ import math
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import logging
 import uuid
 
-from ...models.database.tables import BaselineModel
+from ...models.database.tables import AnomalyDetection, BaselineModel
+from .anomaly_scoring import (
+    mad_scores,
+    rolling_zscore_scores,
+    score_matrix,
+    seasonal_scores,
+    seasonal_slots,
+    zscore_scores,
+)
+from .streaming_baseline import MODEL_TYPE as STREAMING_MODEL_TYPE, BaselineStore
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +41,12 @@ class AnomalyDetectionService:
 
     This service provides:
     - Z-Score Detection - Statistical outlier detection for normally distributed data
+    - Robust Z-Scores - Median/MAD and seasonal (same hour of day) baselines
+    - Batch Detection - Every workspace and metric scored from one bulk query
     - Isolation Forest - Multivariate anomaly detection for complex patterns
     - Custom Thresholds - User-defined business logic rules
     - Baseline Training - Learn normal behavior patterns
+    - Streaming Baselines - Running statistics scored in O(1) per new point
 
     Security:
     - All database methods validate workspace access
@@ -57,6 +71,13 @@ class AnomalyDetectionService:
         'critical': 4.0
     }
 
+    # Z-score variants scored by anomaly_scoring
+    ZSCORE_METHODS = ['zscore', 'zscore_global', 'zscore_rolling', 'mad', 'seasonal']
+
+    # Defaults for hourly series
+    ROLLING_WINDOW = 24  # Hours in the rolling z-score window
+    SEASONAL_PERIOD = 24  # Hours per seasonal cycle (hour of day)
+
     # Performance limits
     MAX_DATA_POINTS = 50000
     MAX_LOOKBACK_DAYS = 365
@@ -121,45 +142,95 @@ class AnomalyDetectionService:
             logger.warning("Insufficient data for z-score detection")
             return []
 
-        anomalies = []
-
         if window:
             # Rolling z-score for local anomalies
-            rolling_mean = data.rolling(window=window, min_periods=3).mean()
-            rolling_std = data.rolling(window=window, min_periods=3).std()
-
-            for idx in data.index:
-                if pd.notna(rolling_mean[idx]) and pd.notna(rolling_std[idx]) and rolling_std[idx] > 0:
-                    z_score = abs((data[idx] - rolling_mean[idx]) / rolling_std[idx])
-                    if z_score > sensitivity:
-                        anomalies.append({
-                            'timestamp': idx,
-                            'value': float(data[idx]),
-                            'score': float(z_score),
-                            'expected_mean': float(rolling_mean[idx]),
-                            'expected_std': float(rolling_std[idx]),
-                            'method': 'zscore_rolling'
-                        })
+            scores = rolling_zscore_scores(data.to_numpy(dtype=float), window)
+            method = 'zscore_rolling'
         else:
-            # Global z-score
-            mean = data.mean()
-            std = data.std()
-
-            if std > 0:
-                z_scores = np.abs((data - mean) / std)
-                anomaly_mask = z_scores > sensitivity
-
-                for idx in data[anomaly_mask].index:
-                    anomalies.append({
-                        'timestamp': idx,
-                        'value': float(data[idx]),
-                        'score': float(z_scores[idx]),
-                        'expected_mean': float(mean),
-                        'expected_std': float(std),
-                        'method': 'zscore_global'
-                    })
+            scores = zscore_scores(data.to_numpy(dtype=float))
+            method = 'zscore_global'
 
-        return anomalies
+        return AnomalyDetectionService._flag_anomalies(data, *scores, sensitivity, method)
+
+    @staticmethod
+    def detect_mad_anomalies(
+        data: pd.Series,
+        sensitivity: float = 2.5
+    ) -> List[Dict[str, Any]]:
+        """Detect anomalies using robust (median/MAD) z-scores.
+
+        Unlike the mean and standard deviation, the median and median absolute
+        deviation are not dragged towards the outliers being looked for, so a
+        burst of spikes cannot mask itself.
+
+        Args:
+            data: Time series data as pandas Series with datetime index
+            sensitivity: Number of scaled MADs for anomaly threshold (default: 2.5)
+
+        Returns:
+            List of anomaly points with timestamps, values, and scores
+        """
+        if len(data) < 3:
+            logger.warning("Insufficient data for MAD detection")
+            return []
+
+        scores = mad_scores(data.to_numpy(dtype=float))
+        return AnomalyDetectionService._flag_anomalies(data, *scores, sensitivity, 'mad')
+
+    @staticmethod
+    def detect_seasonal_anomalies(
+        data: pd.Series,
+        sensitivity: float = 2.5,
+        period: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Detect anomalies against a seasonal baseline.
+
+        Each point is scored against the points in the same position of the
+        cycle (the same hour of day by default), so regular daily peaks are
+        not reported as anomalies.
+
+        Args:
+            data: Hourly time series as pandas Series with datetime index
+            sensitivity: Number of standard deviations for anomaly threshold (default: 2.5)
+            period: Cycle length in hours (24 = daily, 168 = weekly)
+
+        Returns:
+            List of anomaly points with timestamps, values, and scores
+        """
+        if len(data) < 3:
+            logger.warning("Insufficient data for seasonal detection")
+            return []
+
+        scores = seasonal_scores(
+            data.to_numpy(dtype=float),
+            seasonal_slots(data.index, period)
+        )
+        return AnomalyDetectionService._flag_anomalies(data, *scores, sensitivity, 'seasonal')
+
+    @staticmethod
+    def _flag_anomalies(
+        data: pd.Series,
+        scores: np.ndarray,
+        center: np.ndarray,
+        scale: np.ndarray,
+        sensitivity: float,
+        method: str
+    ) -> List[Dict[str, Any]]:
+        """Build anomaly points for the scores above the threshold."""
+        flagged = np.flatnonzero(scores[0] > sensitivity)
+        values = data.to_numpy(dtype=float)
+
+        return [
+            {
+                'timestamp': data.index[i],
+                'value': float(values[i]),
+                'score': float(scores[0, i]),
+                'expected_mean': float(center[0, i]),
+                'expected_std': float(scale[0, i]),
+                'method': method
+            }
+            for i in flagged
+        ]
 
     @staticmethod
     def detect_isolation_forest_anomalies(
@@ -289,7 +360,7 @@ class AnomalyDetectionService:
             workspace_id: Workspace ID for data isolation
             lookback_days: Number of days of historical data to analyze
             sensitivity: Detection sensitivity (higher = fewer anomalies)
-            method: Detection method ('zscore', 'isolation_forest')
+            method: Detection method (one of ZSCORE_METHODS, or 'isolation_forest')
 
         Returns:
             List of detected anomalies with scores and context
@@ -350,11 +421,28 @@ class AnomalyDetectionService:
         df.set_index('timestamp', inplace=True)
 
         # Detect anomalies based on method
-        if method == "zscore":
+        if method in ("zscore", "zscore_global"):
             anomalies = self.detect_zscore_anomalies(
                 df['value'],
                 sensitivity=sensitivity
             )
+        elif method == "zscore_rolling":
+            anomalies = self.detect_zscore_anomalies(
+                df['value'],
+                sensitivity=sensitivity,
+                window=self.ROLLING_WINDOW
+            )
+        elif method == "mad":
+            anomalies = self.detect_mad_anomalies(
+                df['value'],
+                sensitivity=sensitivity
+            )
+        elif method == "seasonal":
+            anomalies = self.detect_seasonal_anomalies(
+                df['value'],
+                sensitivity=sensitivity,
+                period=self.SEASONAL_PERIOD
+            )
         elif method == "isolation_forest":
             anomalies = self.detect_isolation_forest_anomalies(
                 df[['value', 'count']],
@@ -364,29 +452,232 @@ class AnomalyDetectionService:
             raise ValueError(f"Unknown detection method: {method}")
 
         # Enrich anomalies with severity and context
-        enriched_anomalies = []
-        for anomaly in anomalies:
-            score = anomaly.get('score', 0)
-            severity = self.determine_severity(score)
+        return [
+            self._enrich_anomaly(anomaly, metric_type, workspace_id, method, lookback_days, sensitivity)
+            for anomaly in anomalies
+        ]
 
-            enriched_anomalies.append({
-                'metric_type': metric_type,
-                'workspace_id': workspace_id,
-                'detected_at': anomaly['timestamp'].isoformat() if isinstance(anomaly['timestamp'], pd.Timestamp) else anomaly['timestamp'],
-                'anomaly_value': anomaly.get('value'),
-                'anomaly_score': score,
-                'severity': severity,
-                'detection_method': method,
-                'context': {
-                    'expected_mean': anomaly.get('expected_mean'),
-                    'expected_std': anomaly.get('expected_std'),
-                    'lookback_days': lookback_days,
-                    'sensitivity': sensitivity
+    async def detect_all_anomalies(
+        self,
+        metric_types: Optional[List[str]] = None,
+        lookback_days: int = 7,
+        sensitivity: float = 2.5,
+        method: str = "zscore",
+        since: Optional[datetime] = None,
+        workspace_ids: Optional[List[str]] = None,
+        until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Detect anomalies in every (workspace, metric) series at once.
+
+        One query aggregates all metrics of all workspaces per hour; each
+        metric is then pivoted into a workspace-by-hour matrix and scored in
+        a single vectorized pass. Hours without executions are gaps, as in
+        detect_metric_anomalies, so per-series results are the same (rolling
+        windows span hours here rather than observations).
+
+        This reads across workspaces and is meant for background scans; it
+        must not be exposed to workspace users directly.
+
+        Args:
+            metric_types: Metrics to analyze (default: all VALID_METRICS)
+            lookback_days: Days of history forming the baseline
+            sensitivity: Detection sensitivity (higher = fewer anomalies)
+            method: Z-score variant, one of ZSCORE_METHODS
+            since: Only report anomalies in buckets at or after this time
+            workspace_ids: Restrict the scan to these workspaces (optional)
+            until: End of the scanned window, exclusive (default: start of
+                the current hour). The hour still in progress is left out:
+                its partial totals would score as drops.
+
+        Returns:
+            List of detected anomalies in the detect_metric_anomalies format
+
+        Raises:
+            ValueError: If a metric type, method, or parameter is invalid
+        """
+        if not self.db:
+            raise ValueError("Database session required for this operation")
+
+        metric_types = metric_types or list(self.VALID_METRICS)
+        invalid = [m for m in metric_types if m not in self.VALID_METRICS]
+        if invalid:
+            raise ValueError(f"Invalid metric type: {invalid[0]}. Must be one of {self.VALID_METRICS}")
+
+        if method not in self.ZSCORE_METHODS:
+            raise ValueError(f"Unknown detection method: {method}. Must be one of {self.ZSCORE_METHODS}")
+
+        if lookback_days < 1 or lookback_days > self.MAX_LOOKBACK_DAYS:
+            raise ValueError(f"lookback_days must be between 1 and {self.MAX_LOOKBACK_DAYS}")
+
+        end_date = until or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start_date = end_date - timedelta(days=lookback_days)
+        params: Dict[str, Any] = {'start_date': start_date, 'end_date': end_date}
+
+        workspace_filter = ""
+        if workspace_ids is not None:
+            if not workspace_ids:
+                return []
+            workspace_filter = "AND workspace_id = ANY(:workspace_ids)"
+            params['workspace_ids'] = list(workspace_ids)
+
+        query = text(f"""
+            SELECT
+                workspace_id,
+                DATE_TRUNC('hour', started_at) as timestamp,
+                AVG(duration) as runtime_seconds,
+                SUM(credits_used) as credits_consumed,
+                COUNT(*) as executions
+            FROM execution_logs
+            WHERE started_at >= :start_date
+                AND started_at < :end_date
+                {workspace_filter}
+            GROUP BY workspace_id, DATE_TRUNC('hour', started_at)
+        """)
+
+        result = await self.db.execute(query, params)
+        rows = result.fetchall()
+
+        if not rows:
+            return []
+
+        df = pd.DataFrame(
+            rows,
+            columns=['workspace_id', 'timestamp', 'runtime_seconds', 'credits_consumed', 'executions']
+        )
+        df['workspace_id'] = df['workspace_id'].astype(str)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df[metric_types] = df[metric_types].apply(pd.to_numeric, errors='coerce')
+
+        # One column per hour of the window; hours without executions stay NaN
+        buckets = pd.date_range(df['timestamp'].min(), df['timestamp'].max(), freq='h')
+        slots = seasonal_slots(buckets, self.SEASONAL_PERIOD)
+        reported = np.ones(len(buckets), dtype=bool)
+        if since is not None:
+            reported = np.asarray(buckets >= pd.Timestamp(since))
+
+        enriched_anomalies = []
+        for metric_type in metric_types:
+            matrix = df.pivot(index='workspace_id', columns='timestamp', values=metric_type)
+            matrix = matrix.reindex(columns=buckets)
+            values = matrix.to_numpy(dtype=float)
+
+            scores, center, scale = score_matrix(
+                values,
+                method=method,
+                window=self.ROLLING_WINDOW,
+                slots=slots
+            )
+            rows_idx, cols_idx = np.nonzero((scores > sensitivity) & reported)
+
+            for row, col in zip(rows_idx, cols_idx):
+                anomaly = {
+                    'timestamp': buckets[col],
+                    'value': float(values[row, col]),
+                    'score': float(scores[row, col]),
+                    'expected_mean': float(center[row, col]),
+                    'expected_std': float(scale[row, col]),
                 }
-            })
+                enriched_anomalies.append(self._enrich_anomaly(
+                    anomaly, metric_type, matrix.index[row], method, lookback_days, sensitivity
+                ))
 
+        logger.info(
+            f"Batch anomaly detection scored {df['workspace_id'].nunique()} workspaces "
+            f"x {len(metric_types)} metrics, found {len(enriched_anomalies)} anomalies"
+        )
         return enriched_anomalies
 
+    async def save_anomalies(self, anomalies: List[Dict[str, Any]]) -> int:
+        """Store detected anomalies that are not stored yet.
+
+        Anomalies are identified by workspace, metric and bucket, so repeated
+        scans over overlapping windows record each anomaly once.
+
+        Args:
+            anomalies: Anomalies in the detect_metric_anomalies format
+
+        Returns:
+            Number of anomalies stored
+        """
+        if not self.db:
+            raise ValueError("Database session required for this operation")
+
+        if not anomalies:
+            return 0
+
+        detected = [pd.Timestamp(a['detected_at']).to_pydatetime() for a in anomalies]
+        result = await self.db.execute(
+            select(
+                AnomalyDetection.workspace_id,
+                AnomalyDetection.metric_type,
+                AnomalyDetection.detected_at
+            ).where(
+                AnomalyDetection.workspace_id.in_({a['workspace_id'] for a in anomalies}),
+                AnomalyDetection.detected_at >= min(detected),
+                AnomalyDetection.detected_at <= max(detected)
+            )
+        )
+        existing = {
+            (str(workspace_id), metric_type, pd.Timestamp(detected_at))
+            for workspace_id, metric_type, detected_at in result.fetchall()
+        }
+
+        stored = 0
+        for anomaly, detected_at in zip(anomalies, detected):
+            key = (anomaly['workspace_id'], anomaly['metric_type'], pd.Timestamp(detected_at))
+            if key in existing:
+                continue
+            existing.add(key)
+
+            context = anomaly['context']
+            self.db.add(AnomalyDetection(
+                workspace_id=anomaly['workspace_id'],
+                metric_type=anomaly['metric_type'],
+                detected_at=detected_at,
+                anomaly_value=anomaly.get('anomaly_value'),
+                expected_range={
+                    'mean': context.get('expected_mean'),
+                    'std': context.get('expected_std'),
+                },
+                anomaly_score=anomaly['anomaly_score'],
+                severity=anomaly['severity'],
+                detection_method=anomaly['detection_method'],
+                context=context
+            ))
+            stored += 1
+
+        if stored:
+            await self.db.commit()
+        return stored
+
+    @classmethod
+    def _enrich_anomaly(
+        cls,
+        anomaly: Dict[str, Any],
+        metric_type: str,
+        workspace_id: str,
+        method: str,
+        lookback_days: int,
+        sensitivity: float
+    ) -> Dict[str, Any]:
+        """Add metric, severity and context to a detected anomaly point."""
+        score = anomaly.get('score', 0)
+        return {
+            'metric_type': metric_type,
+            'workspace_id': workspace_id,
+            'detected_at': anomaly['timestamp'].isoformat() if isinstance(anomaly['timestamp'], pd.Timestamp) else anomaly['timestamp'],
+            'anomaly_value': anomaly.get('value'),
+            'anomaly_score': score,
+            'severity': cls.determine_severity(score),
+            'detection_method': method,
+            'context': {
+                'expected_mean': anomaly.get('expected_mean'),
+                'expected_std': anomaly.get('expected_std'),
+                'lookback_days': lookback_days,
+                'sensitivity': sensitivity
+            }
+        }
+
     async def detect_usage_spikes(
         self,
         workspace_id: str,
@@ -614,7 +905,7 @@ class AnomalyDetectionService:
             metric_type: Type of metric to model
             workspace_id: Workspace ID for data isolation
             training_days: Days of historical data for training
-            model_type: Model type ('zscore', 'isolation_forest')
+            model_type: Model type ('zscore', 'isolation_forest', 'streaming')
 
         Returns:
             Baseline model statistics and metadata
@@ -625,6 +916,9 @@ class AnomalyDetectionService:
         if metric_type not in self.VALID_METRICS:
             raise ValueError(f"Invalid metric type: {metric_type}")
 
+        if model_type == STREAMING_MODEL_TYPE:
+            return await self._train_streaming_baseline(metric_type, workspace_id, training_days)
+
         # Calculate training period
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=training_days)
@@ -703,3 +997,79 @@ class AnomalyDetectionService:
                 'days': training_days
             }
         }
+
+    async def _train_streaming_baseline(
+        self,
+        metric_type: str,
+        workspace_id: str,
+        training_days: int
+    ) -> Dict[str, Any]:
+        """Seed (or catch up) a streaming baseline from hourly rollups.
+
+        Only hours the baseline has not seen are read, and from the hourly
+        rollups rather than raw execution logs.
+        """
+        model, baseline = await BaselineStore(self.db).seed(
+            workspace_id, metric_type, days=training_days
+        )
+
+        logger.info(f"Updated streaming baseline for {metric_type} in workspace {workspace_id}")
+
+        return {
+            'model_id': model.id,
+            'metric_type': metric_type,
+            'model_type': STREAMING_MODEL_TYPE,
+            'statistics': baseline.summary(),
+            'training_period': {
+                'start': model.training_data_start.isoformat(),
+                'end': model.training_data_end.isoformat(),
+                'days': training_days
+            }
+        }
+
+    async def score_against_baseline(
+        self,
+        metric_type: str,
+        workspace_id: str,
+        value: float,
+        timestamp: Optional[datetime] = None,
+        sensitivity: float = 2.5
+    ) -> Optional[Dict[str, Any]]:
+        """Score one new value against the workspace's streaming baseline.
+
+        Constant time: the stored running statistics of the value's hour of
+        day are used, no history is read.
+
+        Args:
+            metric_type: Type of metric (must be in VALID_METRICS)
+            workspace_id: Workspace ID for data isolation
+            value: Value of the metric's hourly bucket
+            timestamp: Bucket time (default: now)
+            sensitivity: Detection sensitivity (higher = fewer anomalies)
+
+        Returns:
+            Score details with severity and an is_anomaly flag, or None if
+            there is no usable baseline yet
+        """
+        if not self.db:
+            raise ValueError("Database session required for this operation")
+
+        if metric_type not in self.VALID_METRICS:
+            raise ValueError(f"Invalid metric type: {metric_type}")
+
+        baseline = await BaselineStore(self.db).load(workspace_id, metric_type)
+        if baseline is None:
+            return None
+
+        score = baseline.score(timestamp or datetime.utcnow(), value)
+        if score is None:
+            return None
+
+        return {
+            **score,
+            'metric_type': metric_type,
+            'workspace_id': workspace_id,
+            'value': float(value),
+            'severity': self.determine_severity(score['zscore']),
+            'is_anomaly': score['zscore'] > sensitivity,
+        }
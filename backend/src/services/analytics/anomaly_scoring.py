@@ -0,0 +1,163 @@
+"""Vectorized anomaly scoring over many time series at once.
+
+Series are laid out as a 2D array with one row per series and one column
+per time bucket; NaN marks a bucket without data. Every scorer returns
+three arrays of the same shape -- the absolute score and the expected
+center and scale it was measured against -- so callers pick anomalies
+with a single boolean mask instead of visiting points one by one. Points
+without a usable baseline (fewer than ``MIN_POINTS`` observations or zero
+spread) score NaN, which never exceeds a threshold.
+"""
+
+from typing import Any, Optional, Sequence, Tuple
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Observations needed before a baseline is trusted
+MIN_POINTS = 3
+
+# Scales the median absolute deviation to the standard deviation of
+# normally distributed data
+MAD_SCALE = 1.4826
+
+SCORING_METHODS = ("zscore", "zscore_global", "zscore_rolling", "mad", "seasonal")
+
+Scores = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _as_matrix(values: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(values, dtype=float)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    return matrix
+
+
+def _score(values: np.ndarray, center: np.ndarray, scale: np.ndarray) -> Scores:
+    """Absolute deviation in units of scale, NaN where scale is unusable."""
+    usable = np.isfinite(center) & (scale > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(usable, np.abs(values - center) / scale, np.nan)
+    return scores, center, scale
+
+
+def _full(values: np.ndarray, *stats: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Broadcast per-row statistics to the shape of ``values``."""
+    return tuple(np.broadcast_to(stat, values.shape) for stat in stats)
+
+
+def _row_stats(values: np.ndarray, robust: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row center and scale as column vectors (NaN for sparse rows)."""
+    counts = np.sum(~np.isnan(values), axis=1, keepdims=True)
+    with warnings.catch_warnings():
+        # All-NaN rows are expected and masked below
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if robust:
+            center = np.nanmedian(values, axis=1, keepdims=True)
+            scale = MAD_SCALE * np.nanmedian(np.abs(values - center), axis=1, keepdims=True)
+        else:
+            center = np.nanmean(values, axis=1, keepdims=True)
+            scale = np.nanstd(values, axis=1, ddof=1, keepdims=True)
+    sparse = counts < MIN_POINTS
+    center = np.where(sparse, np.nan, center)
+    scale = np.where(sparse, np.nan, scale)
+    return center, scale
+
+
+def zscore_scores(values: np.ndarray) -> Scores:
+    """Z-scores against each series' own mean and standard deviation."""
+    values = _as_matrix(values)
+    center, scale = _row_stats(values, robust=False)
+    return _score(values, *_full(values, center, scale))
+
+
+def mad_scores(values: np.ndarray) -> Scores:
+    """Robust z-scores against each series' median and scaled MAD.
+
+    A few large outliers inflate the standard deviation enough to hide
+    themselves; the median absolute deviation is not moved by them.
+    """
+    values = _as_matrix(values)
+    center, scale = _row_stats(values, robust=True)
+    return _score(values, *_full(values, center, scale))
+
+
+def rolling_zscore_scores(values: np.ndarray, window: int) -> Scores:
+    """Z-scores against a trailing window of ``window`` buckets.
+
+    The window counts buckets, so missing buckets shrink the number of
+    observations it holds rather than reaching further back.
+    """
+    if window < 1:
+        raise ValueError(f"window must be positive, got: {window}")
+    values = _as_matrix(values)
+    # pandas rolls each column in C; transpose so series are columns
+    rolling = pd.DataFrame(values.T).rolling(window=window, min_periods=MIN_POINTS)
+    center = rolling.mean().to_numpy().T
+    scale = rolling.std().to_numpy().T
+    return _score(values, center, scale)
+
+
+def seasonal_slots(index: Sequence[Any], period: int = 24) -> np.ndarray:
+    """Position of each hourly bucket in a cycle of ``period`` hours.
+
+    For a datetime index the slot follows the clock (``period=24`` is the
+    hour of day); any other index is assumed to be consecutive buckets.
+    """
+    if period < 1:
+        raise ValueError(f"period must be positive, got: {period}")
+    if isinstance(index, pd.DatetimeIndex):
+        if len(index) == 0:
+            return np.zeros(0, dtype=int)
+        hours = (index - index[0].floor("D")) // pd.Timedelta(hours=1)
+        return np.asarray(hours, dtype=int) % period
+    return np.arange(len(index)) % period
+
+
+def seasonal_scores(
+    values: np.ndarray,
+    slots: Sequence[int],
+    robust: bool = False,
+) -> Scores:
+    """Z-scores against the baseline of the same seasonal slot.
+
+    ``slots`` gives each column's position in the cycle (hour of day for
+    hourly buckets), so a busy 9am is compared with other 9ams instead of
+    with the quiet night.
+    """
+    values = _as_matrix(values)
+    slots = np.asarray(slots)
+    if slots.shape != (values.shape[1],):
+        raise ValueError("slots must have one entry per column")
+
+    center = np.full_like(values, np.nan)
+    scale = np.full_like(values, np.nan)
+    for slot in np.unique(slots):
+        columns = slots == slot
+        slot_center, slot_scale = _row_stats(values[:, columns], robust)
+        center[:, columns] = slot_center
+        scale[:, columns] = slot_scale
+    return _score(values, center, scale)
+
+
+def score_matrix(
+    values: np.ndarray,
+    method: str = "zscore",
+    window: Optional[int] = None,
+    slots: Optional[Sequence[int]] = None,
+) -> Scores:
+    """Score every point of every series with one of ``SCORING_METHODS``."""
+    if method in ("zscore", "zscore_global"):
+        return zscore_scores(values)
+    if method == "zscore_rolling":
+        if not window:
+            raise ValueError("zscore_rolling requires a window")
+        return rolling_zscore_scores(values, window)
+    if method == "mad":
+        return mad_scores(values)
+    if method == "seasonal":
+        if slots is None:
+            raise ValueError("seasonal scoring requires slots")
+        return seasonal_scores(values, slots)
+    raise ValueError(f"Unknown scoring method: {method}")
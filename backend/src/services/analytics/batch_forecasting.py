@@ -0,0 +1,360 @@
+"""Nightly batch forecasting across all workspaces.
+
+Credit consumption is forecast for every workspace each night. The
+workspaces with enough history are split into chunks, and each chunk is
+forecast by its own Celery task (see ``tasks.models.batch_forecast``), so
+chunks run in parallel across worker processes. Within a chunk the daily
+series are loaded with a single query, fitted on the model pool, and
+written back to ``analytics.predictions`` with a single upsert. Forecast
+requests are then served from the stored rows, and only fit models
+themselves when no fresh batch forecast covers the requested horizon.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.config import settings
+from .credit_consumption_predictor import (
+    ARIMA_ORDER,
+    PROPHET_PARAMS,
+    credit_seasonalities,
+    ensemble_forecasts,
+    prepare_credit_data,
+    simple_forecast,
+)
+from .model_execution import arima_fit, get_model_executor, prophet_forecast
+
+logger = logging.getLogger(__name__)
+
+# Rows written by the batch; live per-workspace forecasts use their own version
+BATCH_MODEL_VERSION = "batch_ensemble_v1.0.0"
+
+PREDICTION_TYPE = "credit_consumption"
+TARGET_METRIC = "credits"
+
+# Workspaces with less history are skipped, as by the live predictor
+MIN_HISTORY_DAYS = 30
+
+
+class BatchForecaster:
+    """
+    Forecasts every workspace's credit consumption and serves stored forecasts.
+
+    Loading reads across workspaces and is meant for background jobs; only
+    load_credit_forecast may serve workspace users.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_workspaces(self) -> List[str]:
+        """
+        List the workspaces with enough daily history to be forecast.
+
+        Returns:
+            Workspace IDs, in order
+        """
+        query = text("""
+            SELECT workspace_id
+            FROM analytics.daily_metrics
+            WHERE date >= CURRENT_DATE - INTERVAL '180 days'
+            GROUP BY workspace_id
+            HAVING COUNT(DISTINCT date) >= :min_days
+            ORDER BY workspace_id
+        """)
+
+        result = await self.db.execute(query, {"min_days": MIN_HISTORY_DAYS})
+        return [str(row[0]) for row in result.fetchall()]
+
+    async def load_credit_series(
+        self,
+        workspace_ids: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Load the daily credit series of all workspaces in one query.
+
+        Returns:
+            Long-format frame with workspace_id, date and credits columns,
+            ordered by workspace and date
+        """
+        params: Dict[str, Any] = {}
+        workspace_filter = ""
+        if workspace_ids is not None:
+            workspace_filter = "AND workspace_id = ANY(:workspace_ids)"
+            params["workspace_ids"] = list(workspace_ids)
+
+        query = text(f"""
+            SELECT
+                workspace_id,
+                date,
+                SUM(credits_consumed) as credits
+            FROM analytics.daily_metrics
+            WHERE date >= CURRENT_DATE - INTERVAL '180 days'
+                {workspace_filter}
+            GROUP BY workspace_id, date
+            ORDER BY workspace_id, date
+        """)
+
+        result = await self.db.execute(query, params)
+        rows = result.fetchall()
+
+        df = pd.DataFrame(rows, columns=['workspace_id', 'date', 'credits'])
+        df['workspace_id'] = df['workspace_id'].astype(str)
+        df['date'] = pd.to_datetime(df['date'])
+        df['credits'] = df['credits'].astype(float)
+        return df
+
+    async def forecast_all(
+        self,
+        days_ahead: int,
+        workspace_ids: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Forecast every workspace with enough history on the model pool.
+
+        At most as many fits as the pool accepts are in flight; a workspace
+        whose fit fails is logged and left out.
+
+        Returns:
+            Tuple of (forecasts by workspace, workspaces that failed)
+        """
+        series = await self.load_credit_series(workspace_ids)
+
+        histories = [
+            (workspace_id, history[['date', 'credits']].reset_index(drop=True))
+            for workspace_id, history in series.groupby('workspace_id', sort=False)
+            if len(history) >= MIN_HISTORY_DAYS
+        ]
+        logger.info(
+            f"Forecasting {len(histories)} of {series['workspace_id'].nunique()} workspaces"
+        )
+
+        executor = get_model_executor()
+        slots = asyncio.Semaphore(executor.capacity)
+
+        async def forecast(history: pd.DataFrame) -> Dict[str, Any]:
+            async with slots:
+                return await executor.run(credit_consumption_forecast, history, days_ahead)
+
+        results = await asyncio.gather(
+            *(forecast(history) for _, history in histories),
+            return_exceptions=True
+        )
+
+        forecasts: Dict[str, Dict[str, Any]] = {}
+        failed: List[str] = []
+        for (workspace_id, _), result in zip(histories, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                logger.error(f"Batch forecast failed for workspace {workspace_id}: {result}")
+                failed.append(workspace_id)
+            else:
+                forecasts[workspace_id] = result
+
+        return forecasts, failed
+
+    async def store_forecasts(self, forecasts: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Store batch forecasts with one bulk upsert.
+
+        Returns:
+            Number of prediction rows written
+        """
+        rows = [
+            (workspace_id, forecast["historical_daily_avg"], pred)
+            for workspace_id, forecast in forecasts.items()
+            for pred in forecast["predictions"]
+        ]
+        if not rows:
+            return 0
+
+        query = text("""
+            INSERT INTO analytics.predictions
+            (workspace_id, prediction_type, target_metric, prediction_date,
+             predicted_value, confidence_lower, confidence_upper, confidence_level,
+             model_version, metadata)
+            SELECT
+                batch.workspace_id, :prediction_type, :target_metric, batch.prediction_date,
+                batch.predicted_value, batch.confidence_lower, batch.confidence_upper,
+                batch.confidence_level, :model_version, batch.metadata
+            FROM unnest(
+                CAST(:workspace_ids AS uuid[]),
+                CAST(:prediction_dates AS date[]),
+                CAST(:predicted_values AS numeric[]),
+                CAST(:confidence_lowers AS numeric[]),
+                CAST(:confidence_uppers AS numeric[]),
+                CAST(:confidence_levels AS numeric[]),
+                CAST(:metadata AS jsonb[])
+            ) AS batch(workspace_id, prediction_date, predicted_value, confidence_lower,
+                       confidence_upper, confidence_level, metadata)
+            ON CONFLICT (workspace_id, prediction_type, target_metric, prediction_date)
+            DO UPDATE SET
+                predicted_value = EXCLUDED.predicted_value,
+                confidence_lower = EXCLUDED.confidence_lower,
+                confidence_upper = EXCLUDED.confidence_upper,
+                confidence_level = EXCLUDED.confidence_level,
+                model_version = EXCLUDED.model_version,
+                metadata = EXCLUDED.metadata,
+                created_at = CURRENT_TIMESTAMP
+        """)
+
+        try:
+            await self.db.execute(query, {
+                "prediction_type": PREDICTION_TYPE,
+                "target_metric": TARGET_METRIC,
+                "model_version": BATCH_MODEL_VERSION,
+                "workspace_ids": [workspace_id for workspace_id, _, _ in rows],
+                "prediction_dates": [
+                    datetime.strptime(pred['date'], '%Y-%m-%d').date() for _, _, pred in rows
+                ],
+                "predicted_values": [pred['predicted_value'] for _, _, pred in rows],
+                "confidence_lowers": [pred['confidence_lower'] for _, _, pred in rows],
+                "confidence_uppers": [pred['confidence_upper'] for _, _, pred in rows],
+                "confidence_levels": [pred.get('confidence_level', 0.95) for _, _, pred in rows],
+                "metadata": [
+                    json.dumps({"model": pred.get('model', 'ensemble'), "historical_daily_avg": avg})
+                    for _, avg, pred in rows
+                ],
+            })
+            await self.db.commit()
+        except Exception as e:
+            logger.error(f"Error storing batch forecasts: {e}", exc_info=True)
+            await self.db.rollback()
+            raise
+
+        logger.info(f"Stored {len(rows)} batch predictions for {len(forecasts)} workspaces")
+        return len(rows)
+
+    async def load_credit_forecast(
+        self,
+        workspace_id: str,
+        days_ahead: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load a workspace's stored batch forecast.
+
+        Returns:
+            Dictionary with predictions, historical_daily_avg,
+            model_version and generated_at, or None if no batch forecast from the last
+            FORECAST_MAX_AGE_HOURS covers ``days_ahead`` days from today
+        """
+        query = text("""
+            SELECT
+                prediction_date,
+                predicted_value,
+                confidence_lower,
+                confidence_upper,
+                confidence_level,
+                metadata,
+                created_at
+            FROM analytics.predictions
+            WHERE workspace_id = :workspace_id
+                AND prediction_type = :prediction_type
+                AND target_metric = :target_metric
+                AND model_version = :model_version
+                AND prediction_date >= CURRENT_DATE
+                AND created_at >= :fresh_after
+            ORDER BY prediction_date
+            LIMIT :days_ahead
+        """)
+
+        result = await self.db.execute(query, {
+            "workspace_id": workspace_id,
+            "prediction_type": PREDICTION_TYPE,
+            "target_metric": TARGET_METRIC,
+            "model_version": BATCH_MODEL_VERSION,
+            "fresh_after": datetime.now() - timedelta(hours=settings.FORECAST_MAX_AGE_HOURS),
+            "days_ahead": days_ahead,
+        })
+        rows = result.fetchall()
+
+        if len(rows) < days_ahead:
+            return None
+
+        metadata = rows[0].metadata or {}
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+
+        return {
+            "predictions": [
+                {
+                    "date": row.prediction_date.strftime('%Y-%m-%d'),
+                    "predicted_value": float(row.predicted_value),
+                    "confidence_lower": float(row.confidence_lower),
+                    "confidence_upper": float(row.confidence_upper),
+                    "confidence_level": float(row.confidence_level),
+                    "model": "ensemble"
+                }
+                for row in rows
+            ],
+            "historical_daily_avg": float(metadata.get("historical_daily_avg", 0.0)),
+            "model_version": BATCH_MODEL_VERSION,
+            "generated_at": min(row.created_at for row in rows).isoformat(),
+        }
+
+
+# Runs on the model pool (see model_execution), so it is a module-level
+# function whose arguments and result are pickled.
+
+def credit_consumption_forecast(history: pd.DataFrame, days_ahead: int) -> Dict[str, Any]:
+    """
+    Fit the credit ensemble to one workspace's history and forecast it.
+
+    ``history`` has ``date``/``credits`` columns as loaded. Prophet and
+    ARIMA are fitted as by CreditConsumptionPredictor, with the same moving
+    average fallback if ARIMA fails.
+
+    Returns:
+        Dictionary with the ensemble predictions and the historical daily
+        average they are compared against
+    """
+    data = prepare_credit_data(history)
+    prophet_history = data.rename(columns={'date': 'ds', 'credits': 'y'})
+
+    forecast = prophet_forecast(
+        prophet_history, PROPHET_PARAMS, days_ahead, 'D',
+        credit_seasonalities(prophet_history)
+    ).tail(days_ahead)
+    prophet_preds = _format_forecast(
+        forecast['ds'], forecast['yhat'], forecast['yhat_lower'], forecast['yhat_upper'], "prophet"
+    )
+
+    try:
+        fitted = arima_fit(data['credits'].to_numpy(dtype=float), ARIMA_ORDER)["model"]
+        arima = fitted.get_forecast(steps=days_ahead)
+        conf_int = np.asarray(arima.conf_int(alpha=0.05))
+        dates = pd.date_range(data['date'].max(), periods=days_ahead + 1, freq='D')[1:]
+        arima_preds = _format_forecast(
+            dates, arima.predicted_mean, conf_int[:, 0], conf_int[:, 1], "arima"
+        )
+    except Exception as e:
+        logger.warning(f"ARIMA failed in batch forecast, using moving average: {e}")
+        arima_preds = simple_forecast(data, days_ahead)
+
+    return {
+        "predictions": ensemble_forecasts(prophet_preds, arima_preds),
+        "historical_daily_avg": float(data['credits'].mean()),
+    }
+
+
+def _format_forecast(dates, values, lower, upper, model: str) -> List[Dict[str, Any]]:
+    # Credits can't be negative
+    return [
+        {
+            "date": pd.Timestamp(date).strftime('%Y-%m-%d'),
+            "predicted_value": float(max(0, value)),
+            "confidence_lower": float(max(0, low)),
+            "confidence_upper": float(max(0, high)),
+            "model": model
+        }
+        for date, value, low, high in zip(dates, np.asarray(values), np.asarray(lower), np.asarray(upper))
+    ]
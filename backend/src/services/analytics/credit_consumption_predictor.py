@@ -9,19 +9,135 @@ Date: 2025-11-12
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 
 import pandas as pd
 import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from prophet import Prophet
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.metrics import mean_absolute_percentage_error
+
+from .model_registry import ModelRegistry, arima_predict, prophet_predict
 
 logger = logging.getLogger(__name__)
 
+# Registry target shared by the Prophet and ARIMA models
+TARGET_METRIC = "credit_consumption"
+
+# Prophet parameters tuned for daily credit usage
+PROPHET_PARAMS = dict(
+    changepoint_prior_scale=0.05,  # Flexibility of trend changes
+    seasonality_prior_scale=10.0,  # Strength of seasonality
+    seasonality_mode='additive',
+    yearly_seasonality=False,      # Not enough data for yearly
+    weekly_seasonality=True,
+    daily_seasonality=False,
+    interval_width=0.95            # 95% confidence interval
+)
+
+# ARIMA order (p, d, q); (1, 1, 1) works well for many usage series
+ARIMA_ORDER = (1, 1, 1)
+
+
+def prepare_credit_data(data: pd.DataFrame) -> pd.DataFrame:
+    """Prepare daily credit history (``date``/``credits``) for modeling."""
+    df = data.copy()
+
+    # Ensure date column is datetime
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+    else:
+        raise ValueError("Data must have 'date' column")
+
+    # Sort by date
+    df = df.sort_values('date').reset_index(drop=True)
+
+    # Fill missing dates with 0
+    date_range = pd.date_range(start=df['date'].min(), end=df['date'].max(), freq='D')
+    df = df.set_index('date').reindex(date_range, fill_value=0).reset_index()
+    df.columns = ['date', 'credits']
+
+    # Handle outliers (cap at 99th percentile)
+    upper_limit = df['credits'].quantile(0.99)
+    df['credits'] = df['credits'].clip(upper=upper_limit)
+
+    return df
+
+
+def credit_seasonalities(history: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Extra Prophet seasonalities for the amount of history."""
+    # Add custom seasonality if we have enough data
+    if len(history) >= 60:
+        return [dict(name='monthly', period=30.5, fourier_order=5)]
+    return []
+
+
+def simple_forecast(data: pd.DataFrame, days_ahead: int) -> List[Dict[str, Any]]:
+    """Forecast prepared credit history with a weighted moving average."""
+    # Calculate 7-day moving average
+    ma_7 = data['credits'].tail(7).mean()
+    # Calculate 30-day moving average
+    ma_30 = data['credits'].tail(30).mean()
+
+    # Use weighted average
+    prediction_value = 0.7 * ma_7 + 0.3 * ma_30
+
+    # Simple confidence interval (±20%)
+    confidence_range = prediction_value * 0.2
+
+    predictions = []
+    last_date = data['date'].max()
+
+    for i in range(days_ahead):
+        pred_date = last_date + timedelta(days=i+1)
+        predictions.append({
+            "date": pred_date.strftime('%Y-%m-%d'),
+            "predicted_value": float(max(0, prediction_value)),
+            "confidence_lower": float(max(0, prediction_value - confidence_range)),
+            "confidence_upper": float(max(0, prediction_value + confidence_range)),
+            "model": "simple_ma"
+        })
+
+    return predictions
+
+
+def ensemble_forecasts(
+    prophet_preds: List[Dict],
+    arima_preds: List[Dict],
+    prophet_weight: float = 0.6,
+    arima_weight: float = 0.4
+) -> List[Dict[str, Any]]:
+    """Combine predictions from multiple models."""
+    ensemble = []
+
+    for p_pred, a_pred in zip(prophet_preds, arima_preds):
+        # Weighted average of predictions
+        predicted_value = (
+            prophet_weight * p_pred['predicted_value'] +
+            arima_weight * a_pred['predicted_value']
+        )
+
+        # Conservative confidence intervals (take wider bounds)
+        confidence_lower = min(
+            p_pred['confidence_lower'],
+            a_pred['confidence_lower']
+        )
+        confidence_upper = max(
+            p_pred['confidence_upper'],
+            a_pred['confidence_upper']
+        )
+
+        ensemble.append({
+            "date": p_pred['date'],
+            "predicted_value": float(predicted_value),
+            "confidence_lower": float(confidence_lower),
+            "confidence_upper": float(confidence_upper),
+            "confidence_level": 0.95,
+            "model": "ensemble"
+        })
+
+    return ensemble
+
 
 class CreditConsumptionPredictor:
     """
@@ -30,8 +146,8 @@ class CreditConsumptionPredictor:
 
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.prophet_model = None
-        self.arima_model = None
+        self.registry = ModelRegistry(db)
+        self.model_versions: Dict[str, str] = {}
 
     async def predict(
         self,
@@ -65,11 +181,9 @@ class CreditConsumptionPredictor:
                     "predictions": []
                 }
 
-            # Train Prophet model
-            prophet_predictions = await self._predict_with_prophet(df, days_ahead)
-
-            # Train ARIMA model
-            arima_predictions = await self._predict_with_arima(df, days_ahead)
+            # Forecast with the registered Prophet and ARIMA models
+            prophet_predictions = await self._predict_with_prophet(workspace_id, df, days_ahead)
+            arima_predictions = await self._predict_with_arima(workspace_id, df, days_ahead)
 
             # Ensemble predictions (weighted average)
             ensemble_predictions = self._ensemble_predictions(
@@ -80,7 +194,7 @@ class CreditConsumptionPredictor:
             )
 
             # Calculate insights
-            insights = self._generate_insights(df, ensemble_predictions)
+            insights = self._generate_insights(df['credits'].mean(), ensemble_predictions)
 
             # Store predictions in database
             await self._store_predictions(
@@ -100,8 +214,8 @@ class CreditConsumptionPredictor:
                 "arima_predictions": arima_predictions,
                 "insights": insights,
                 "model_versions": {
-                    "prophet": "1.0.0",
-                    "arima": "1.0.0",
+                    "prophet": self.model_versions.get('prophet'),
+                    "arima": self.model_versions.get('arima'),
                     "ensemble": "1.0.0"
                 },
                 "generated_at": datetime.now().isoformat()
@@ -111,66 +225,95 @@ class CreditConsumptionPredictor:
             logger.error(f"Error predicting credit consumption: {e}", exc_info=True)
             raise
 
+    def from_stored(
+        self,
+        workspace_id: str,
+        days_ahead: int,
+        stored: Dict[str, Any],
+        granularity: str = "daily"
+    ) -> Dict[str, Any]:
+        """
+        Build a prediction response from a stored batch forecast.
+
+        Args:
+            workspace_id: Workspace identifier
+            days_ahead: Number of days predicted
+            stored: Forecast loaded by BatchForecaster.load_credit_forecast
+            granularity: Prediction granularity
+
+        Returns:
+            Dictionary with predictions and insights, as returned by predict
+        """
+        predictions = stored["predictions"]
+        return {
+            "workspace_id": workspace_id,
+            "prediction_type": "credit_consumption",
+            "granularity": granularity,
+            "days_ahead": days_ahead,
+            "predictions": predictions,
+            "insights": self._generate_insights(stored["historical_daily_avg"], predictions),
+            "model_versions": {
+                "ensemble": stored["model_version"]
+            },
+            "generated_at": stored["generated_at"]
+        }
+
     def _prepare_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """Prepare data for modeling."""
-        df = data.copy()
+        return prepare_credit_data(data)
 
-        # Ensure date column is datetime
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'])
-        else:
-            raise ValueError("Data must have 'date' column")
-
-        # Sort by date
-        df = df.sort_values('date').reset_index(drop=True)
+    def _history(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Prepared data as model training history (``ds``/``y``)."""
+        return data.rename(columns={'date': 'ds', 'credits': 'y'})
 
-        # Fill missing dates with 0
-        date_range = pd.date_range(start=df['date'].min(), end=df['date'].max(), freq='D')
-        df = df.set_index('date').reindex(date_range, fill_value=0).reset_index()
-        df.columns = ['date', 'credits']
+    def _seasonalities(self, history: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Extra Prophet seasonalities for the amount of history."""
+        return credit_seasonalities(history)
 
-        # Handle outliers (cap at 99th percentile)
-        upper_limit = df['credits'].quantile(0.99)
-        df['credits'] = df['credits'].clip(upper=upper_limit)
+    async def refresh(
+        self,
+        workspace_id: str,
+        historical_data: pd.DataFrame,
+        force: bool = False
+    ) -> Dict[str, Optional[str]]:
+        """
+        Refit the registered models if they are stale or have drifted.
 
-        return df
+        Returns:
+            Dictionary mapping model type to the refit reason (None if kept)
+        """
+        history = self._history(self._prepare_data(historical_data))
+        return {
+            "prophet": await self.registry.refresh_prophet(
+                workspace_id, TARGET_METRIC, history,
+                PROPHET_PARAMS, self._seasonalities(history), force=force
+            ),
+            "arima": await self.registry.refresh_arima(
+                workspace_id, TARGET_METRIC, history, ARIMA_ORDER, force=force
+            ),
+        }
 
     async def _predict_with_prophet(
         self,
+        workspace_id: str,
         data: pd.DataFrame,
         days_ahead: int
     ) -> List[Dict[str, Any]]:
         """Generate predictions using Facebook Prophet."""
         try:
             # Prepare data for Prophet (requires 'ds' and 'y' columns)
-            prophet_df = data.copy()
-            prophet_df.columns = ['ds', 'y']
-
-            # Initialize Prophet with optimized parameters
-            model = Prophet(
-                changepoint_prior_scale=0.05,  # Flexibility of trend changes
-                seasonality_prior_scale=10.0,  # Strength of seasonality
-                seasonality_mode='additive',
-                yearly_seasonality=False,      # Not enough data for yearly
-                weekly_seasonality=True,
-                daily_seasonality=False,
-                interval_width=0.95            # 95% confidence interval
-            )
-
-            # Add custom seasonality if we have enough data
-            if len(prophet_df) >= 60:
-                model.add_seasonality(name='monthly', period=30.5, fourier_order=5)
+            history = self._history(data)
 
-            # Fit model
-            model.fit(prophet_df)
-            self.prophet_model = model
-
-            # Make future predictions
-            future = model.make_future_dataframe(periods=days_ahead, freq='D')
-            forecast = model.predict(future)
+            # Serve the registered model, fitting one on first use
+            registered = await self.registry.get_or_fit_prophet(
+                workspace_id, TARGET_METRIC, history,
+                PROPHET_PARAMS, self._seasonalities(history)
+            )
+            self.model_versions['prophet'] = registered.version
 
-            # Extract future predictions only
-            future_forecast = forecast.tail(days_ahead)
+            future_forecast = await prophet_predict(
+                registered.model, history['ds'].max(), days_ahead, freq='D'
+            )
 
             # Format predictions
             predictions = []
@@ -183,13 +326,10 @@ class CreditConsumptionPredictor:
                     "model": "prophet"
                 })
 
-            # Calculate model performance on training data
-            train_predictions = forecast.head(len(prophet_df))
-            mape = mean_absolute_percentage_error(
-                prophet_df['y'],
-                train_predictions['yhat']
+            # Model performance on its training data
+            logger.info(
+                f"Prophet model {registered.version} MAPE: {registered.metrics.get('mape', 0):.4f}"
             )
-            logger.info(f"Prophet model MAPE: {mape:.4f}")
 
             return predictions
 
@@ -199,29 +339,24 @@ class CreditConsumptionPredictor:
 
     async def _predict_with_arima(
         self,
+        workspace_id: str,
         data: pd.DataFrame,
         days_ahead: int
     ) -> List[Dict[str, Any]]:
         """Generate predictions using ARIMA."""
         try:
-            # Prepare data
-            series = data['credits'].values
+            history = self._history(data)
 
-            # Auto-select ARIMA order (p, d, q) based on data characteristics
-            # For simplicity, using (1, 1, 1) which works well for many cases
-            order = (1, 1, 1)
-
-            # Fit ARIMA model
-            model = ARIMA(series, order=order)
-            fitted_model = model.fit()
-            self.arima_model = fitted_model
-
-            # Generate forecast
-            forecast_result = fitted_model.forecast(steps=days_ahead)
+            # Serve the registered model, fitting one on first use
+            registered = await self.registry.get_or_fit_arima(
+                workspace_id, TARGET_METRIC, history, ARIMA_ORDER
+            )
+            self.model_versions['arima'] = registered.version
 
-            # Get confidence intervals
-            forecast_df = fitted_model.get_forecast(steps=days_ahead)
-            confidence_intervals = forecast_df.conf_int(alpha=0.05)  # 95% CI
+            # Forecast from the latest data with a 95% CI
+            result = await arima_predict(
+                registered.model, history['y'].to_numpy(), days_ahead, alpha=0.05
+            )
 
             # Format predictions
             predictions = []
@@ -231,20 +366,17 @@ class CreditConsumptionPredictor:
                 pred_date = last_date + timedelta(days=i+1)
                 predictions.append({
                     "date": pred_date.strftime('%Y-%m-%d'),
-                    "predicted_value": float(max(0, forecast_result.iloc[i])),
-                    "confidence_lower": float(max(0, confidence_intervals.iloc[i, 0])),
-                    "confidence_upper": float(max(0, confidence_intervals.iloc[i, 1])),
+                    "predicted_value": float(max(0, result['forecast'][i])),
+                    "confidence_lower": float(max(0, result['lower'][i])),
+                    "confidence_upper": float(max(0, result['upper'][i])),
                     "model": "arima"
                 })
 
-            # Calculate model performance
-            fitted_values = fitted_model.fittedvalues
-            # Skip first value due to differencing
-            mape = mean_absolute_percentage_error(
-                series[1:],
-                fitted_values[1:]
+            # Model performance on its training data
+            logger.info(
+                f"ARIMA model {registered.version} MAPE: {registered.metrics.get('mape', 0):.4f}, "
+                f"AIC: {registered.metrics.get('aic', 0):.2f}"
             )
-            logger.info(f"ARIMA model MAPE: {mape:.4f}, AIC: {fitted_model.aic:.2f}")
 
             return predictions
 
@@ -260,32 +392,7 @@ class CreditConsumptionPredictor:
     ) -> List[Dict[str, Any]]:
         """Fallback to simple moving average forecast."""
         logger.warning("Using fallback simple forecast method")
-
-        # Calculate 7-day moving average
-        ma_7 = data['credits'].tail(7).mean()
-        # Calculate 30-day moving average
-        ma_30 = data['credits'].tail(30).mean()
-
-        # Use weighted average
-        prediction_value = 0.7 * ma_7 + 0.3 * ma_30
-
-        # Simple confidence interval (±20%)
-        confidence_range = prediction_value * 0.2
-
-        predictions = []
-        last_date = data['date'].max()
-
-        for i in range(days_ahead):
-            pred_date = last_date + timedelta(days=i+1)
-            predictions.append({
-                "date": pred_date.strftime('%Y-%m-%d'),
-                "predicted_value": float(max(0, prediction_value)),
-                "confidence_lower": float(max(0, prediction_value - confidence_range)),
-                "confidence_upper": float(max(0, prediction_value + confidence_range)),
-                "model": "simple_ma"
-            })
-
-        return predictions
+        return simple_forecast(data, days_ahead)
 
     def _ensemble_predictions(
         self,
@@ -295,46 +402,15 @@ class CreditConsumptionPredictor:
         arima_weight: float = 0.4
     ) -> List[Dict[str, Any]]:
         """Combine predictions from multiple models."""
-        ensemble = []
-
-        for p_pred, a_pred in zip(prophet_preds, arima_preds):
-            # Weighted average of predictions
-            predicted_value = (
-                prophet_weight * p_pred['predicted_value'] +
-                arima_weight * a_pred['predicted_value']
-            )
-
-            # Conservative confidence intervals (take wider bounds)
-            confidence_lower = min(
-                p_pred['confidence_lower'],
-                a_pred['confidence_lower']
-            )
-            confidence_upper = max(
-                p_pred['confidence_upper'],
-                a_pred['confidence_upper']
-            )
-
-            ensemble.append({
-                "date": p_pred['date'],
-                "predicted_value": float(predicted_value),
-                "confidence_lower": float(confidence_lower),
-                "confidence_upper": float(confidence_upper),
-                "confidence_level": 0.95,
-                "model": "ensemble"
-            })
-
-        return ensemble
+        return ensemble_forecasts(prophet_preds, arima_preds, prophet_weight, arima_weight)
 
     def _generate_insights(
         self,
-        historical_data: pd.DataFrame,
+        historical_avg: float,
         predictions: List[Dict]
     ) -> Dict[str, Any]:
-        """Generate insights from predictions."""
+        """Generate insights from predictions against the historical daily average."""
         try:
-            # Calculate historical average
-            historical_avg = historical_data['credits'].mean()
-
             # Calculate predicted average
             predicted_avg = np.mean([p['predicted_value'] for p in predictions])
 
@@ -15,10 +15,21 @@ import json
 import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from prophet import Prophet
+
+from .model_registry import ModelRegistry, prophet_predict
 
 logger = logging.getLogger(__name__)
 
+PROPHET_PARAMS = dict(
+    changepoint_prior_scale=0.1,  # More sensitive to changes
+    seasonality_prior_scale=5.0,
+    seasonality_mode='additive',
+    yearly_seasonality=False,
+    weekly_seasonality=True,
+    daily_seasonality=False,
+    interval_width=0.95
+)
+
 
 class ErrorRatePredictor:
     """
@@ -27,6 +38,8 @@ class ErrorRatePredictor:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.registry = ModelRegistry(db)
+        self.model_version: Optional[str] = None
 
     async def predict(
         self,
@@ -61,7 +74,7 @@ class ErrorRatePredictor:
                 }
 
             # Predict error rates
-            predictions = await self._predict_error_rates(df, days_ahead)
+            predictions = await self._predict_error_rates(workspace_id, agent_id, df, days_ahead)
 
             # Detect anomalies and trends
             anomalies = self._detect_error_anomalies(df, predictions)
@@ -95,7 +108,7 @@ class ErrorRatePredictor:
                 "alerts": alerts,
                 "patterns": patterns,
                 "recommendations": recommendations,
-                "model_version": "error_rate_v1.0.0",
+                "model_version": self.model_version,
                 "generated_at": datetime.now().isoformat()
             }
 
@@ -119,37 +132,51 @@ class ErrorRatePredictor:
 
         return df
 
+    def _target_metric(self, agent_id: Optional[str]) -> str:
+        """Registry and prediction target for a workspace or one agent."""
+        return f"error_rate_{agent_id}" if agent_id else "error_rate_all"
+
+    def _history(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Prepared data as model training history (``ds``/``y``)."""
+        history = data[['date', 'error_rate']].copy()
+        history.columns = ['ds', 'y']
+        return history
+
+    async def refresh(
+        self,
+        workspace_id: str,
+        agent_id: Optional[str],
+        historical_data: pd.DataFrame,
+        force: bool = False
+    ) -> Optional[str]:
+        """Refit the registered model if stale or drifted; returns the reason."""
+        history = self._history(self._prepare_data(historical_data))
+        return await self.registry.refresh_prophet(
+            workspace_id, self._target_metric(agent_id), history,
+            PROPHET_PARAMS, force=force
+        )
+
     async def _predict_error_rates(
         self,
+        workspace_id: str,
+        agent_id: Optional[str],
         data: pd.DataFrame,
         days_ahead: int
     ) -> List[Dict[str, Any]]:
         """Predict future error rates."""
         try:
             # Prepare for Prophet
-            prophet_df = data[['date', 'error_rate']].copy()
-            prophet_df.columns = ['ds', 'y']
-
-            # Configure Prophet
-            model = Prophet(
-                changepoint_prior_scale=0.1,  # More sensitive to changes
-                seasonality_prior_scale=5.0,
-                seasonality_mode='additive',
-                yearly_seasonality=False,
-                weekly_seasonality=True,
-                daily_seasonality=False,
-                interval_width=0.95
-            )
+            history = self._history(data)
 
-            # Fit model
-            model.fit(prophet_df)
-
-            # Predict
-            future = model.make_future_dataframe(periods=days_ahead, freq='D')
-            forecast = model.predict(future)
+            # Serve the registered model, fitting one on first use
+            registered = await self.registry.get_or_fit_prophet(
+                workspace_id, self._target_metric(agent_id), history, PROPHET_PARAMS
+            )
+            self.model_version = registered.version
 
-            # Extract predictions
-            future_forecast = forecast.tail(days_ahead)
+            future_forecast = await prophet_predict(
+                registered.model, history['ds'].max(), days_ahead, freq='D'
+            )
 
             predictions = []
             for _, row in future_forecast.iterrows():
@@ -355,7 +382,7 @@ class ErrorRatePredictor:
     ) -> None:
         """Store error rate predictions."""
         try:
-            target_metric = f"error_rate_{agent_id}" if agent_id else "error_rate_all"
+            target_metric = self._target_metric(agent_id)
 
             for pred in predictions:
                 query = text("""
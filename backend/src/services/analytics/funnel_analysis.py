@@ -15,9 +15,9 @@ from ...models.database.tables import (
     FunnelAnalysisResult,
     FunnelStepPerformance,
     UserFunnelJourney,
-    UserActivity,
 )
 from ...utils.datetime import calculate_start_date
+from .funnel_engine import SEGMENT_COLUMNS, SequentialFunnelEngine
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +86,12 @@ class FunnelAnalysisService:
             if not all(k in step for k in ["stepId", "stepName", "event"]):
                 raise ValueError(f"Step {i} missing required fields")
 
+        if segment_by and segment_by not in SEGMENT_COLUMNS:
+            raise ValueError(
+                f"Invalid segment_by: {segment_by}. "
+                f"Must be one of: {', '.join(sorted(SEGMENT_COLUMNS))}"
+            )
+
         # Create funnel definition
         funnel = FunnelDefinition(
             workspace_id=workspace_id,
@@ -242,15 +248,20 @@ class FunnelAnalysisService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         segment_name: Optional[str] = None,
+        conversion_window_hours: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Analyze conversion funnel.
 
+        Steps are counted strictly in order: a user reaches step N only if
+        they completed step N-1 first (see ``funnel_engine``).
+
         Args:
             funnel_id: Funnel definition ID
             workspace_id: Workspace ID
             start_date: Analysis start date (defaults to funnel timeframe)
             end_date: Analysis end date (defaults to now)
-            segment_name: Optional segment filter
+            segment_name: Optional segment filter (value of the funnel's segmentBy field)
+            conversion_window_hours: Max hours from entering the funnel to each later step
 
         Returns:
             Funnel analysis results
@@ -272,37 +283,47 @@ class FunnelAnalysisService:
         if not start_date:
             start_date = calculate_start_date(funnel_def["timeframe"])
 
-        # Analyze each step
+        # Analyze all steps in order with a single pass over the events
         steps = funnel_def["steps"]
-        step_results = []
-        previous_users = None
+        conversion_window = (
+            timedelta(hours=conversion_window_hours) if conversion_window_hours else None
+        )
+        segment_by = funnel_def["segmentBy"]
+        if segment_by and segment_by not in SEGMENT_COLUMNS:
+            logger.warning(f"Funnel {funnel_id} has unsupported segmentBy '{segment_by}', skipping segments")
+            segment_by = None
 
-        for i, step in enumerate(steps):
-            step_metrics = await self._analyze_funnel_step(
-                workspace_id,
-                step,
-                i,
-                start_date,
-                end_date,
-                previous_users,
-                segment_name,
-            )
-            step_results.append(step_metrics)
-            previous_users = step_metrics["uniqueUsers"]
+        engine = SequentialFunnelEngine(self.db)
+        funnel = await engine.analyze(
+            workspace_id,
+            steps,
+            start_date,
+            end_date,
+            conversion_window=conversion_window,
+            segment_by=segment_by,
+            segment_value=segment_name,
+        )
+
+        step_results = []
+        for step, step_metrics in zip(steps, funnel["steps"]):
+            step_results.append({
+                "stepId": step["stepId"],
+                "stepName": step["stepName"],
+                "event": step["event"],
+                "metrics": step_metrics,
+                "dropOffReasons": await self._analyze_drop_off_reasons(
+                    workspace_id,
+                    step,
+                    start_date,
+                    end_date,
+                ),
+            })
 
         # Calculate overall metrics
         overall_metrics = self._calculate_overall_metrics(step_results)
 
-        # Get segment analysis if requested
-        segment_results = None
-        if funnel_def["segmentBy"] and not segment_name:
-            segment_results = await self._analyze_segments(
-                funnel_id,
-                workspace_id,
-                funnel_def,
-                start_date,
-                end_date,
-            )
+        # Segment breakdown comes from the same pass; omitted when filtering to one segment
+        segment_results = funnel["segments"] if not segment_name else None
 
         # Store analysis results
         analysis_result = await self._store_analysis_results(
@@ -327,80 +348,6 @@ class FunnelAnalysisService:
             "calculatedAt": datetime.now(timezone.utc).isoformat(),
         }
 
-    async def _analyze_funnel_step(
-        self,
-        workspace_id: str,
-        step: Dict[str, Any],
-        step_order: int,
-        start_date: datetime,
-        end_date: datetime,
-        previous_step_users: Optional[int],
-        segment_name: Optional[str],
-    ) -> Dict[str, Any]:
-        """Analyze individual funnel step."""
-
-        # Query to get users who completed this step using SQLAlchemy ORM
-        try:
-            # Build ORM query for user activity metrics
-            query = select(
-                func.count(func.distinct(UserActivity.user_id)).label("unique_users"),
-                func.count(UserActivity.id).label("total_events"),
-            ).where(
-                and_(
-                    UserActivity.workspace_id == workspace_id,
-                    UserActivity.event_name == step["event"],
-                    UserActivity.created_at >= start_date,
-                    UserActivity.created_at <= end_date,
-                )
-            )
-
-            result = await self.db.execute(query)
-            row = result.fetchone()
-
-            unique_users = row.unique_users if row else 0
-            total_events = row.total_events if row else 0
-            # Note: Complex time calculations moved to separate method if needed
-            avg_time_from_previous = None
-        except Exception as e:
-            logger.error(f"Error analyzing funnel step '{step['stepName']}': {str(e)}", exc_info=True)
-            # Return zero metrics on error to allow analysis to continue
-            unique_users = 0
-            total_events = 0
-            avg_time_from_previous = None
-
-        # Calculate conversion and drop-off rates
-        if step_order == 0:
-            conversion_rate = 100.0
-            drop_off_rate = 0.0
-        elif previous_step_users and previous_step_users > 0:
-            conversion_rate = round((unique_users / previous_step_users) * 100, 2)
-            drop_off_rate = round(100 - conversion_rate, 2)
-        else:
-            conversion_rate = 0.0
-            drop_off_rate = 100.0
-
-        # Analyze drop-off reasons (placeholder - implement based on your data)
-        drop_off_reasons = await self._analyze_drop_off_reasons(
-            workspace_id,
-            step,
-            start_date,
-            end_date,
-        )
-
-        return {
-            "stepId": step["stepId"],
-            "stepName": step["stepName"],
-            "event": step["event"],
-            "metrics": {
-                "totalUsers": total_events,
-                "uniqueUsers": unique_users,
-                "conversionRate": conversion_rate,
-                "avgTimeToComplete": avg_time_from_previous,
-                "dropOffRate": drop_off_rate,
-            },
-            "dropOffReasons": drop_off_reasons,
-        }
-
     async def _analyze_drop_off_reasons(
         self,
         workspace_id: str,
@@ -471,27 +418,6 @@ class FunnelAnalysisService:
             "improvementPotential": improvement_potential,
         }
 
-    async def _analyze_segments(
-        self,
-        funnel_id: str,
-        workspace_id: str,
-        funnel_def: Dict[str, Any],
-        start_date: datetime,
-        end_date: datetime,
-    ) -> List[Dict[str, Any]]:
-        """Analyze funnel performance across segments."""
-        segment_by = funnel_def.get("segmentBy")
-        if not segment_by:
-            return []
-
-        # This is a placeholder - implement based on your segmentation logic
-        # You would:
-        # 1. Get distinct segment values
-        # 2. Run funnel analysis for each segment
-        # 3. Compare segment performance to average
-
-        return []
-
     async def _store_analysis_results(
         self,
         funnel_id: str,
@@ -0,0 +1,360 @@
+"""Ordered, time-windowed funnel engine.
+
+Computes strict sequential funnel conversion in a single pass over a
+workspace's events: one query streams the events for every funnel step, and a
+vectorized NumPy state machine walks all users through the steps at once.
+
+Semantics (same as the "first occurrence" funnels of most product analytics
+tools):
+
+- A user enters the funnel at their first step-1 event in the analysis range.
+- Step N counts only if it happens after the event that satisfied step N-1
+  and, when a conversion window is set, within that window of the entry event.
+- The earliest qualifying event is taken at every step, which is always the
+  best choice for reaching the furthest step from a fixed entry point.
+- Segments are assigned from the entry event (e.g. the device the user
+  entered the funnel on).
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.database.tables import UserActivity
+
+logger = logging.getLogger(__name__)
+
+# UserActivity columns a funnel may be segmented by (whitelist)
+SEGMENT_COLUMNS = {
+    "device_type": UserActivity.device_type,
+    "browser": UserActivity.browser,
+    "os": UserActivity.os,
+    "country_code": UserActivity.country_code,
+    "event_type": UserActivity.event_type,
+}
+
+STREAM_PARTITION_SIZE = 50_000
+
+
+def compute_sequential_funnel(
+    user_codes: np.ndarray,
+    timestamps: np.ndarray,
+    event_codes: np.ndarray,
+    step_event_codes: List[int],
+    num_users: int,
+    conversion_window_seconds: Optional[float] = None,
+) -> np.ndarray:
+    """Walk every user through the funnel steps.
+
+    Inputs must be sorted by ``(user_codes, timestamps)``.
+
+    Args:
+        user_codes: Dense user index (0..num_users-1) per event
+        timestamps: Event time in epoch seconds per event
+        event_codes: Event name code per event
+        step_event_codes: Event code required by each funnel step, in order
+        num_users: Number of distinct users
+        conversion_window_seconds: Max time from entry to any later step
+
+    Returns:
+        Array of shape ``(num_steps, num_users)`` holding the timestamp at
+        which each user completed each step, NaN where they did not.
+    """
+    num_steps = len(step_event_codes)
+    num_events = len(user_codes)
+    reached_at = np.full((num_steps, num_users), np.nan)
+    if num_events == 0 or num_steps == 0:
+        return reached_at
+
+    positions = np.arange(num_events)
+    window = np.inf if conversion_window_seconds is None else conversion_window_seconds
+
+    # Entry: first step-1 event per user
+    candidates = positions[event_codes == step_event_codes[0]]
+    entered_users, first = np.unique(user_codes[candidates], return_index=True)
+    entry_pos = candidates[first]
+
+    entry_ts = np.full(num_users, np.inf)
+    entry_ts[entered_users] = timestamps[entry_pos]
+    reached_at[0, entered_users] = timestamps[entry_pos]
+
+    # Position of the event that satisfied the previous step; users that
+    # dropped out hold a sentinel no event position can exceed.
+    last_pos = np.full(num_users, num_events)
+    last_pos[entered_users] = entry_pos
+
+    for step in range(1, num_steps):
+        candidates = positions[event_codes == step_event_codes[step]]
+        cand_users = user_codes[candidates]
+        valid = (
+            (candidates > last_pos[cand_users])
+            & (timestamps[candidates] - entry_ts[cand_users] <= window)
+        )
+        candidates = candidates[valid]
+
+        step_users, first = np.unique(user_codes[candidates], return_index=True)
+        step_pos = candidates[first]
+
+        reached_at[step, step_users] = timestamps[step_pos]
+        last_pos = np.full(num_users, num_events)
+        last_pos[step_users] = step_pos
+
+    return reached_at
+
+
+def summarize_funnel(
+    reached_at: np.ndarray,
+    step_event_counts: List[int],
+) -> List[Dict[str, Any]]:
+    """Per-step conversion metrics from :func:`compute_sequential_funnel` output."""
+    reached = ~np.isnan(reached_at)
+    users_per_step = reached.sum(axis=1)
+    summaries = []
+
+    for step in range(reached_at.shape[0]):
+        unique_users = int(users_per_step[step])
+
+        if step == 0:
+            conversion_rate = 100.0
+            drop_off_rate = 0.0
+            avg_time = None
+            median_time = None
+        else:
+            previous_users = int(users_per_step[step - 1])
+            if previous_users > 0:
+                conversion_rate = round(unique_users / previous_users * 100, 2)
+                drop_off_rate = round(100 - conversion_rate, 2)
+            else:
+                conversion_rate = 0.0
+                drop_off_rate = 100.0
+
+            deltas = (reached_at[step] - reached_at[step - 1])[reached[step]]
+            avg_time = round(float(deltas.mean()), 2) if deltas.size else None
+            median_time = round(float(np.median(deltas)), 2) if deltas.size else None
+
+        summaries.append({
+            "totalUsers": int(step_event_counts[step]),
+            "uniqueUsers": unique_users,
+            "conversionRate": conversion_rate,
+            "avgTimeToComplete": avg_time,
+            "medianTimeToConvert": median_time,
+            "dropOffRate": drop_off_rate,
+        })
+
+    return summaries
+
+
+class SequentialFunnelEngine:
+    """Runs ordered funnels for a workspace with one streamed query."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def load_events(
+        self,
+        workspace_id: str,
+        event_names: List[str],
+        start_date: datetime,
+        end_date: datetime,
+        segment_by: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Stream the events relevant to a funnel into a DataFrame.
+
+        Only ``user_id``, ``event_name``, ``created_at`` (and the segment
+        column) are fetched, in partitions, so the raw result set is never
+        buffered as ORM rows.
+        """
+        columns = [UserActivity.user_id, UserActivity.event_name, UserActivity.created_at]
+        if segment_by:
+            columns.append(SEGMENT_COLUMNS[segment_by].label("segment"))
+
+        query = select(*columns).where(
+            and_(
+                UserActivity.workspace_id == workspace_id,
+                UserActivity.event_name.in_(set(event_names)),
+                UserActivity.created_at >= start_date,
+                UserActivity.created_at <= end_date,
+            )
+        )
+
+        names = ["user_id", "event_name", "created_at"] + (["segment"] if segment_by else [])
+        frames = []
+        result = await self.db.stream(query)
+        async for partition in result.partitions(STREAM_PARTITION_SIZE):
+            frames.append(pd.DataFrame.from_records(partition, columns=names))
+
+        if not frames:
+            return pd.DataFrame(columns=names)
+        return pd.concat(frames, ignore_index=True)
+
+    async def analyze(
+        self,
+        workspace_id: str,
+        steps: List[Dict[str, Any]],
+        start_date: datetime,
+        end_date: datetime,
+        conversion_window: Optional[timedelta] = None,
+        segment_by: Optional[str] = None,
+        segment_value: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Compute ordered funnel metrics, optionally broken down by segment.
+
+        Args:
+            workspace_id: Workspace ID
+            steps: Funnel steps (each with an ``event`` name), in order
+            start_date: Analysis start
+            end_date: Analysis end
+            conversion_window: Max time from entry to completing any step
+            segment_by: Optional column to break results down by
+            segment_value: Restrict results to users entering in this segment
+
+        Returns:
+            Dict with ``steps`` (per-step metrics) and ``segments`` (per-segment
+            breakdown, or None when ``segment_by`` is not set)
+        """
+        if segment_by and segment_by not in SEGMENT_COLUMNS:
+            raise ValueError(
+                f"Invalid segment_by: {segment_by}. "
+                f"Must be one of: {', '.join(sorted(SEGMENT_COLUMNS))}"
+            )
+        if segment_value and not segment_by:
+            raise ValueError("segment_value requires segment_by")
+
+        event_names = [step["event"] for step in steps]
+        events = await self.load_events(
+            workspace_id, event_names, start_date, end_date, segment_by
+        )
+
+        event_index = {name: code for code, name in enumerate(dict.fromkeys(event_names))}
+        step_event_codes = [event_index[name] for name in event_names]
+
+        user_codes, users = pd.factorize(events["user_id"])
+        event_codes = events["event_name"].map(event_index).to_numpy(dtype=np.int64)
+        timestamps = (
+            pd.to_datetime(events["created_at"], utc=True).astype("int64").to_numpy() / 1e9
+        )
+
+        order = np.lexsort((timestamps, user_codes))
+        user_codes = user_codes[order]
+        timestamps = timestamps[order]
+        event_codes = event_codes[order]
+
+        window_seconds = conversion_window.total_seconds() if conversion_window else None
+        reached_at = compute_sequential_funnel(
+            user_codes,
+            timestamps,
+            event_codes,
+            step_event_codes,
+            len(users),
+            window_seconds,
+        )
+
+        segment_results = None
+        if segment_by:
+            user_segments = self._entry_segments(
+                events["segment"].to_numpy(dtype=object)[order],
+                user_codes,
+                event_codes,
+                step_event_codes[0],
+                len(users),
+            )
+            segment_results = self._segment_breakdown(
+                reached_at, user_segments, event_codes, user_codes, step_event_codes
+            )
+            if segment_value is not None:
+                in_segment = user_segments == segment_value
+                reached_at = reached_at[:, in_segment]
+                event_mask = in_segment[user_codes]
+                event_codes = event_codes[event_mask]
+
+        step_event_counts = [
+            int(np.count_nonzero(event_codes == code)) for code in step_event_codes
+        ]
+
+        logger.info(
+            "Computed sequential funnel",
+            extra={
+                "workspace_id": workspace_id,
+                "events": len(events),
+                "users": len(users),
+                "steps": len(steps),
+            }
+        )
+
+        return {
+            "steps": summarize_funnel(reached_at, step_event_counts),
+            "segments": segment_results,
+        }
+
+    @staticmethod
+    def _entry_segments(
+        segments: np.ndarray,
+        user_codes: np.ndarray,
+        event_codes: np.ndarray,
+        entry_event_code: int,
+        num_users: int,
+    ) -> np.ndarray:
+        """Segment value of each user's funnel entry event (None if never entered)."""
+        user_segments = np.full(num_users, None, dtype=object)
+        entries = np.flatnonzero(event_codes == entry_event_code)
+        entered_users, first = np.unique(user_codes[entries], return_index=True)
+        user_segments[entered_users] = segments[entries[first]]
+        return user_segments
+
+    @staticmethod
+    def _segment_breakdown(
+        reached_at: np.ndarray,
+        user_segments: np.ndarray,
+        event_codes: np.ndarray,
+        user_codes: np.ndarray,
+        step_event_codes: List[int],
+    ) -> List[Dict[str, Any]]:
+        """Per-segment funnel metrics computed from the shared state matrix."""
+        entered = ~np.isnan(reached_at[0])
+        labels = np.array(
+            ["unknown" if s is None else str(s) for s in user_segments], dtype=object
+        )
+        segment_values, segment_codes = np.unique(labels[entered], return_inverse=True)
+        if len(segment_values) == 0:
+            return []
+
+        overall_entered = int(entered.sum())
+        overall_completed = int((~np.isnan(reached_at[-1])).sum())
+        overall_conversion = (
+            overall_completed / overall_entered * 100 if overall_entered else 0.0
+        )
+
+        results = []
+        entered_idx = np.flatnonzero(entered)
+        for code, value in enumerate(segment_values):
+            members = entered_idx[segment_codes == code]
+            member_mask = np.zeros(len(user_segments), dtype=bool)
+            member_mask[members] = True
+            event_mask = member_mask[user_codes]
+            counts = [
+                int(np.count_nonzero(event_codes[event_mask] == c)) for c in step_event_codes
+            ]
+            step_metrics = summarize_funnel(reached_at[:, members], counts)
+            entered_count = step_metrics[0]["uniqueUsers"]
+            completed_count = step_metrics[-1]["uniqueUsers"]
+            conversion = completed_count / entered_count * 100 if entered_count else 0.0
+
+            results.append({
+                "segmentName": value,
+                "totalEntered": entered_count,
+                "totalCompleted": completed_count,
+                "conversionRate": round(conversion, 2),
+                "vsAverage": round(conversion - overall_conversion, 2),
+                "steps": [
+                    {"uniqueUsers": m["uniqueUsers"], "conversionRate": m["conversionRate"]}
+                    for m in step_metrics
+                ],
+            })
+
+        results.sort(key=lambda r: r["totalEntered"], reverse=True)
+        return results
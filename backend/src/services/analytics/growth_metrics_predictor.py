@@ -9,16 +9,17 @@ Date: 2025-11-12
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import json
 
 import pandas as pd
 import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from prophet import Prophet
 from sklearn.metrics import mean_absolute_percentage_error
 
+from .model_registry import ModelRegistry, prophet_predict
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,6 +30,8 @@ class GrowthMetricsPredictor:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.registry = ModelRegistry(db)
+        self.model_version: Optional[str] = None
 
     async def predict(
         self,
@@ -63,7 +66,7 @@ class GrowthMetricsPredictor:
                 }
 
             # Generate base predictions
-            base_predictions = await self._predict_with_prophet(df, horizon_days, metric)
+            base_predictions = await self._predict_with_prophet(workspace_id, df, horizon_days, metric)
 
             # Generate growth scenarios
             scenarios = self._generate_growth_scenarios(df, base_predictions, horizon_days)
@@ -90,7 +93,7 @@ class GrowthMetricsPredictor:
                 "scenarios": scenarios,
                 "milestones": milestones,
                 "insights": insights,
-                "model_version": "prophet_ensemble_v1.0.0",
+                "model_version": self.model_version,
                 "generated_at": datetime.now().isoformat()
             }
 
@@ -115,8 +118,52 @@ class GrowthMetricsPredictor:
 
         return df
 
+    def _history(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Prepared data as model training history (``ds``/``y``)."""
+        return data.rename(columns={'date': 'ds', 'value': 'y'})
+
+    def _model_config(
+        self,
+        metric: str,
+        history: pd.DataFrame
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Prophet parameters and extra seasonalities for a metric."""
+        # Configure Prophet based on metric type
+        model_params = dict(
+            changepoint_prior_scale=0.05,
+            seasonality_prior_scale=10.0,
+            seasonality_mode='multiplicative' if metric == 'mrr' else 'additive',
+            yearly_seasonality=False,
+            weekly_seasonality=True,
+            daily_seasonality=False,
+            interval_width=0.95
+        )
+
+        # Add monthly seasonality
+        seasonalities = []
+        if len(history) >= 60:
+            seasonalities.append(dict(name='monthly', period=30.5, fourier_order=5))
+
+        return model_params, seasonalities
+
+    async def refresh(
+        self,
+        workspace_id: str,
+        metric: str,
+        historical_data: pd.DataFrame,
+        force: bool = False
+    ) -> Optional[str]:
+        """Refit the registered model if stale or drifted; returns the reason."""
+        history = self._history(self._prepare_data(historical_data))
+        model_params, seasonalities = self._model_config(metric, history)
+        return await self.registry.refresh_prophet(
+            workspace_id, f"growth_{metric}", history,
+            model_params, seasonalities, force=force
+        )
+
     async def _predict_with_prophet(
         self,
+        workspace_id: str,
         data: pd.DataFrame,
         days_ahead: int,
         metric: str
@@ -124,33 +171,18 @@ class GrowthMetricsPredictor:
         """Generate predictions using Prophet."""
         try:
             # Prepare for Prophet
-            prophet_df = data.copy()
-            prophet_df.columns = ['ds', 'y']
-
-            # Configure Prophet based on metric type
-            model = Prophet(
-                changepoint_prior_scale=0.05,
-                seasonality_prior_scale=10.0,
-                seasonality_mode='multiplicative' if metric == 'mrr' else 'additive',
-                yearly_seasonality=False,
-                weekly_seasonality=True,
-                daily_seasonality=False,
-                interval_width=0.95
-            )
-
-            # Add monthly seasonality
-            if len(prophet_df) >= 60:
-                model.add_seasonality(name='monthly', period=30.5, fourier_order=5)
+            history = self._history(data)
+            model_params, seasonalities = self._model_config(metric, history)
 
-            # Fit model
-            model.fit(prophet_df)
-
-            # Make predictions
-            future = model.make_future_dataframe(periods=days_ahead, freq='D')
-            forecast = model.predict(future)
+            # Serve the registered model, fitting one on first use
+            registered = await self.registry.get_or_fit_prophet(
+                workspace_id, f"growth_{metric}", history, model_params, seasonalities
+            )
+            self.model_version = registered.version
 
-            # Extract future predictions
-            future_forecast = forecast.tail(days_ahead)
+            future_forecast = await prophet_predict(
+                registered.model, history['ds'].max(), days_ahead, freq='D'
+            )
 
             predictions = []
             for _, row in future_forecast.iterrows():
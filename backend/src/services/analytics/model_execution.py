@@ -0,0 +1,307 @@
+"""Shared process pool for CPU-bound model fits.
+
+Prophet, ARIMA and scikit-learn fits hold the GIL for seconds at a time;
+run inline in an ``async def`` (or on a thread) they stall every other
+request served by the same worker. Fits are submitted instead to one
+bounded ``ProcessPoolExecutor`` per process, with a per-job timeout and a
+cap on how many jobs may wait for a free worker.
+
+Job functions must be picklable module-level callables, and their
+arguments and results are pickled across the process boundary, so jobs
+return plain data (forecast frames, arrays, fitted estimators) rather
+than live objects with native handles.
+
+A job that times out or whose caller is cancelled is dropped if it is
+still queued. A job that is already running cannot be interrupted without
+breaking the pool, so it is abandoned: its worker finishes the fit and
+discards the result, and it keeps counting against the queue bound until
+it does.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from prometheus_client import Counter, Gauge, Histogram
+
+from ...core.config import settings
+
+logger = logging.getLogger(__name__)
+
+model_jobs = Counter(
+    "model_jobs_total",
+    "Total number of model execution jobs by outcome",
+    ["job", "status"],
+)
+
+model_job_duration = Histogram(
+    "model_job_duration_seconds",
+    "Time from submitting a model job to its result",
+    ["job"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+
+model_jobs_running = Gauge(
+    "model_jobs_running", "Model jobs occupying a pool worker"
+)
+
+model_jobs_queued = Gauge(
+    "model_jobs_queued", "Model jobs waiting for a free pool worker"
+)
+
+
+class ModelExecutionError(Exception):
+    """A model job could not be run."""
+
+
+class ModelQueueFullError(ModelExecutionError):
+    """Too many model jobs are already waiting for a worker."""
+
+
+class ModelJobTimeoutError(ModelExecutionError, asyncio.TimeoutError):
+    """A model job did not finish within its timeout."""
+
+
+class ModelExecutor:
+    """Runs CPU-bound model jobs on a bounded pool of worker processes.
+
+    With ``max_workers=0`` (or inside a daemonic process, such as a Celery
+    prefork worker, which may not start children) jobs run on a single
+    thread instead: the event loop stays responsive but fits share the GIL.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_process(self) -> bool:
+        """Whether jobs run on a thread of this process."""
+        return self.max_workers < 1 or multiprocessing.current_process().daemon
+
+    @property
+    def capacity(self) -> int:
+        """Jobs that may be in flight: one per worker plus the queue."""
+        return max(self.max_workers, 1) + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs submitted to the pool that have not finished."""
+        return self._in_flight
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.in_process:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="model-job"
+                )
+            else:
+                # Forking would copy the event loop, connection pools and
+                # their sockets into every worker
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._pool
+
+    def _update_gauges(self) -> None:
+        workers = max(self.max_workers, 1)
+        model_jobs_running.set(min(self._in_flight, workers))
+        model_jobs_queued.set(max(self._in_flight - workers, 0))
+
+    def _release(self, _future: Future) -> None:
+        # Runs on the pool's management thread once the job has really
+        # finished, so abandoned jobs keep their slot until then
+        with self._lock:
+            self._in_flight -= 1
+            self._update_gauges()
+
+    def _submit(self, fn: Callable[..., Any], args: Tuple, kwargs: Dict) -> Future:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise ModelQueueFullError(
+                    f"{self._in_flight} model jobs already in flight"
+                )
+            try:
+                future = self._get_pool().submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool
+                logger.warning("Model process pool is broken, restarting it")
+                self._pool = None
+                future = self._get_pool().submit(fn, *args, **kwargs)
+            self._in_flight += 1
+            self._update_gauges()
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and return its result.
+
+        Raises:
+            ModelQueueFullError: If the pool and its queue are full
+            ModelJobTimeoutError: If the job does not finish in time
+            ModelExecutionError: If the pool broke while running the job
+        """
+        job = getattr(fn, "__name__", "job")
+        try:
+            future = self._submit(fn, args, kwargs)
+        except ModelQueueFullError:
+            model_jobs.labels(job=job, status="rejected").inc()
+            raise
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            # wait_for cancelled the wrapper, which cancels a queued job
+            model_jobs.labels(job=job, status="timeout").inc()
+            raise ModelJobTimeoutError(
+                f"Model job {job} timed out after {timeout or self.timeout}s"
+            ) from None
+        except asyncio.CancelledError:
+            model_jobs.labels(job=job, status="cancelled").inc()
+            raise
+        except BrokenProcessPool as e:
+            model_jobs.labels(job=job, status="error").inc()
+            with self._lock:
+                self._pool = None
+            raise ModelExecutionError(f"Model worker died running {job}") from e
+        except Exception:
+            model_jobs.labels(job=job, status="error").inc()
+            raise
+        finally:
+            model_job_duration.labels(job=job).observe(time.perf_counter() - start)
+
+        model_jobs.labels(job=job, status="success").inc()
+        return result
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the pool, dropping queued jobs."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Process-wide executor shared by every predictor
+_model_executor: Optional[ModelExecutor] = None
+
+
+def get_model_executor() -> ModelExecutor:
+    """Get the process-wide model executor."""
+    global _model_executor
+
+    if _model_executor is None:
+        _model_executor = ModelExecutor(
+            max_workers=settings.MODEL_POOL_WORKERS,
+            max_queue=settings.MODEL_POOL_MAX_QUEUE,
+            timeout=settings.MODEL_JOB_TIMEOUT_SECONDS,
+        )
+    return _model_executor
+
+
+def shutdown_model_executor() -> None:
+    """Stop the process-wide model executor, if one was started."""
+    global _model_executor
+
+    if _model_executor is not None:
+        _model_executor.shutdown()
+        _model_executor = None
+
+
+# Jobs shared by the predictors. They run in worker processes, so heavy
+# libraries are imported here rather than by the submitting process.
+
+def prophet_forecast(
+    history: pd.DataFrame,
+    model_params: Dict[str, Any],
+    periods: int,
+    freq: str = "D",
+    seasonalities: Sequence[Dict[str, Any]] = (),
+) -> pd.DataFrame:
+    """Fit Prophet to ``history`` (``ds``/``y``) and forecast ``periods`` ahead.
+
+    Returns Prophet's forecast frame covering the history and the future.
+    """
+    from prophet import Prophet
+
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    model = Prophet(**model_params)
+    for seasonality in seasonalities:
+        model.add_seasonality(**seasonality)
+    model.fit(history)
+
+    future = model.make_future_dataframe(periods=periods, freq=freq)
+    return model.predict(future)
+
+
+def prophet_fit(
+    history: pd.DataFrame,
+    model_params: Dict[str, Any],
+    seasonalities: Sequence[Dict[str, Any]] = (),
+) -> Dict[str, Any]:
+    """Fit Prophet to ``history`` (``ds``/``y``) for the model registry.
+
+    Returns the model as Prophet JSON, which unlike a pickle is stable
+    across processes and library versions, with its in-sample MAPE.
+    """
+    from prophet import Prophet
+    from prophet.serialize import model_to_json
+
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    model = Prophet(**model_params)
+    for seasonality in seasonalities:
+        model.add_seasonality(**seasonality)
+    model.fit(history)
+
+    fitted = model.predict(history[["ds"]])
+    return {
+        "model": model_to_json(model),
+        "mape": _mape(history["y"].to_numpy(), fitted["yhat"].to_numpy()),
+    }
+
+
+def arima_fit(series: np.ndarray, order: Tuple[int, int, int]) -> Dict[str, Any]:
+    """Fit ARIMA to ``series`` for the model registry.
+
+    Returns the fitted results with their in-sample MAPE (skipping the
+    first, differenced-away value) and AIC.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    fitted_model = ARIMA(series, order=order).fit()
+    fitted_values = np.asarray(fitted_model.fittedvalues)
+    return {
+        "model": fitted_model,
+        "mape": _mape(series[1:], fitted_values[1:]),
+        "aic": float(fitted_model.aic),
+    }
+
+
+def _mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    from sklearn.metrics import mean_absolute_percentage_error
+
+    return float(mean_absolute_percentage_error(actual, predicted))
@@ -0,0 +1,566 @@
+"""Persisted model registry with warm-start serving.
+
+Fitted models are serialized to a content-addressed artifact store
+(Prophet JSON, joblib for everything else) and registered in
+``analytics.ml_models``, whose ``model_artifacts_path`` names the artifact
+and whose ``version`` is the start of its SHA-256. Predictors look up the
+active model for a workspace and target and forecast from it instead of
+fitting on every request; deserialized models are kept in a per-process
+LRU keyed by artifact, so a warm request costs one indexed query and an
+inference.
+
+A request fits a model when none is registered yet, or when the
+registered one is older than ``MODEL_MAX_AGE_DAYS`` or the data observed
+since training has drifted from the training data (see
+``retrain_reason``). With ``MODEL_REFRESH_ENABLED``, the
+``tasks.models.refresh_models`` Celery task applies the same checks on a
+schedule, so requests rarely pay for the refit.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.config import settings
+from .model_execution import arima_fit, get_model_executor, prophet_fit
+
+logger = logging.getLogger(__name__)
+
+# Hex digits of the artifact hash used as the model version
+VERSION_LENGTH = 12
+
+# Observations since training needed before drift is judged
+MIN_DRIFT_POINTS = 3
+
+
+@dataclass
+class RegisteredModel:
+    """An active registered model, deserialized and ready for inference."""
+
+    id: str
+    version: str
+    model_type: str
+    target_metric: str
+    model: Any
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    params: Dict[str, Any] = field(default_factory=dict)
+    created_at: Optional[datetime] = None
+
+    @property
+    def history_end(self) -> Optional[pd.Timestamp]:
+        """Timestamp of the last observation the model was fitted on."""
+        end = self.metrics.get("history_end")
+        return pd.Timestamp(end) if end else None
+
+
+def serialize_model(model: Any, model_type: str) -> bytes:
+    """Encode a fitted model for the artifact store."""
+    if model_type == "prophet":
+        from prophet.serialize import model_to_json
+
+        return model_to_json(model).encode()
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getvalue()
+
+
+def deserialize_model(payload: bytes, model_type: str) -> Any:
+    """Decode a model written by ``serialize_model``."""
+    if model_type == "prophet":
+        from prophet.serialize import model_from_json
+
+        return model_from_json(payload.decode())
+    return joblib.load(io.BytesIO(payload))
+
+
+class ArtifactStore:
+    """Content-addressed files under a local (or shared) directory.
+
+    An artifact's path is derived from the SHA-256 of its bytes, so writes
+    are idempotent and a read can verify what it got.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.MODEL_ARTIFACT_DIR)
+
+    def write(self, payload: bytes, suffix: str) -> str:
+        """Store ``payload`` and return its path relative to the root."""
+        digest = hashlib.sha256(payload).hexdigest()
+        relative = f"{digest[:2]}/{digest}.{suffix}"
+        path = self.root / relative
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial artifact
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return relative
+
+    def read(self, relative: str) -> bytes:
+        """Read an artifact, checking it against the hash in its name."""
+        payload = (self.root / relative).read_bytes()
+        expected = Path(relative).name.split(".", 1)[0]
+        if hashlib.sha256(payload).hexdigest() != expected:
+            raise ValueError(f"Model artifact {relative} is corrupt")
+        return payload
+
+    @staticmethod
+    def version(relative: str) -> str:
+        """Model version derived from an artifact path."""
+        return Path(relative).name[:VERSION_LENGTH]
+
+
+# Deserialized models by artifact path, least recently used first. Paths
+# are content hashes, so entries never go stale.
+_loaded_models: "OrderedDict[str, Any]" = OrderedDict()
+
+
+def _cache_model(artifact: str, model: Any) -> None:
+    _loaded_models[artifact] = model
+    _loaded_models.move_to_end(artifact)
+    while len(_loaded_models) > settings.MODEL_CACHE_SIZE:
+        _loaded_models.popitem(last=False)
+
+
+def clear_model_cache() -> None:
+    """Drop every deserialized model held by this process."""
+    _loaded_models.clear()
+
+
+def model_name(workspace_id: Optional[str], target_metric: str, model_type: str) -> str:
+    """Registry name shared by every version of one model."""
+    return f"{target_metric}:{model_type}:{workspace_id or 'global'}"
+
+
+def retrain_reason(
+    registered: RegisteredModel,
+    history: pd.DataFrame,
+    now: Optional[datetime] = None,
+) -> Optional[str]:
+    """Why ``registered`` should be refitted on ``history``, or None.
+
+    ``history`` is the model's current training data (``ds``/``y``). The
+    model is stale once older than ``MODEL_MAX_AGE_DAYS``; it has drifted
+    when the mean of the observations since training moved more than
+    ``MODEL_DRIFT_THRESHOLD`` training standard deviations.
+    """
+    now = now or datetime.utcnow()
+    if registered.created_at and now - registered.created_at > timedelta(
+        days=settings.MODEL_MAX_AGE_DAYS
+    ):
+        return "stale"
+
+    history_end = registered.history_end
+    if history_end is None:
+        return "stale"
+    recent = history.loc[pd.to_datetime(history["ds"]) > history_end, "y"]
+    if len(recent) < MIN_DRIFT_POINTS:
+        return None
+
+    mean = registered.metrics.get("target_mean")
+    std = registered.metrics.get("target_std")
+    if mean is None or not std:
+        return None
+    shift = abs(float(recent.mean()) - mean) / std
+    if shift > settings.MODEL_DRIFT_THRESHOLD:
+        return "drift"
+    return None
+
+
+def _history_stats(history: pd.DataFrame) -> Dict[str, Any]:
+    """Training data summary stored with a model for drift checks."""
+    y = history["y"].astype(float)
+    return {
+        "training_samples": int(len(history)),
+        "target_mean": float(y.mean()),
+        "target_std": float(y.std(ddof=1)) if len(y) > 1 else 0.0,
+        "history_end": pd.Timestamp(history["ds"].max()).isoformat(),
+    }
+
+
+class ModelRegistry:
+    """Registers fitted models and serves the active version."""
+
+    def __init__(self, db: AsyncSession, store: Optional[ArtifactStore] = None):
+        self.db = db
+        self.store = store or ArtifactStore()
+
+    async def get(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        model_type: str,
+    ) -> Optional[RegisteredModel]:
+        """Load the active model, or None if none is registered."""
+        query = text("""
+            SELECT id, version, model_artifacts_path, training_params,
+                   performance_metrics, created_at
+            FROM analytics.ml_models
+            WHERE model_name = :model_name
+                AND is_active = TRUE
+                AND model_artifacts_path IS NOT NULL
+            ORDER BY created_at DESC
+            LIMIT 1
+        """)
+        result = await self.db.execute(query, {
+            "model_name": model_name(workspace_id, target_metric, model_type),
+        })
+        row = result.fetchone()
+        if not row:
+            return None
+
+        artifact = row.model_artifacts_path
+        model = _loaded_models.get(artifact)
+        if model is None:
+            try:
+                model = await asyncio.to_thread(self._load, artifact, model_type)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cannot load model artifact {artifact}: {e}")
+                return None
+            _cache_model(artifact, model)
+        else:
+            _loaded_models.move_to_end(artifact)
+
+        return RegisteredModel(
+            id=str(row.id),
+            version=row.version,
+            model_type=model_type,
+            target_metric=target_metric,
+            model=model,
+            metrics=_as_dict(row.performance_metrics),
+            params=_as_dict(row.training_params),
+            created_at=row.created_at,
+        )
+
+    def _load(self, artifact: str, model_type: str) -> Any:
+        return deserialize_model(self.store.read(artifact), model_type)
+
+    async def register(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        model_type: str,
+        model: Any,
+        history: Optional[pd.DataFrame] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        feature_importance: Optional[Dict[str, float]] = None,
+    ) -> RegisteredModel:
+        """Persist a fitted model and make it the active version.
+
+        Args:
+            history: Time series training data (``ds``/``y``), summarized
+                for drift checks; None for models trained on other data
+            metrics: Training metrics such as MAPE or AUC
+            params: Parameters needed to refit the same model
+        """
+        payload = await asyncio.to_thread(serialize_model, model, model_type)
+        suffix = "json" if model_type == "prophet" else "joblib"
+        artifact = await asyncio.to_thread(self.store.write, payload, suffix)
+        version = self.store.version(artifact)
+
+        name = model_name(workspace_id, target_metric, model_type)
+        metrics = dict(metrics or {})
+        params = params or {}
+        data_start = data_end = None
+        if history is not None:
+            metrics.update(_history_stats(history))
+            history_dates = pd.to_datetime(history["ds"])
+            data_start = history_dates.min().date()
+            data_end = history_dates.max().date()
+
+        # Refitting unchanged data can reproduce an artifact byte for byte;
+        # the existing row is then reactivated
+        result = await self.db.execute(text("""
+            INSERT INTO analytics.ml_models
+            (model_name, model_type, version, workspace_id, target_metric,
+             training_params, performance_metrics, feature_importance,
+             model_artifacts_path, training_data_start, training_data_end,
+             training_record_count, is_active)
+            VALUES
+            (:model_name, :model_type, :version, :workspace_id, :target_metric,
+             :training_params, :performance_metrics, :feature_importance,
+             :model_artifacts_path, :training_data_start, :training_data_end,
+             :training_record_count, TRUE)
+            ON CONFLICT (model_name, version) DO UPDATE SET
+                performance_metrics = EXCLUDED.performance_metrics,
+                training_data_end = EXCLUDED.training_data_end,
+                training_record_count = EXCLUDED.training_record_count,
+                is_active = TRUE,
+                created_at = CURRENT_TIMESTAMP
+            RETURNING id, created_at
+        """), {
+            "model_name": name,
+            "model_type": model_type,
+            "version": version,
+            "workspace_id": workspace_id,
+            "target_metric": target_metric,
+            "training_params": json.dumps(params),
+            "performance_metrics": json.dumps(metrics),
+            "feature_importance": (
+                json.dumps(feature_importance) if feature_importance else None
+            ),
+            "model_artifacts_path": artifact,
+            "training_data_start": data_start,
+            "training_data_end": data_end,
+            "training_record_count": metrics.get("training_samples"),
+        })
+        row = result.fetchone()
+
+        await self.db.execute(text("""
+            UPDATE analytics.ml_models
+            SET is_active = FALSE
+            WHERE model_name = :model_name
+                AND version <> :version
+                AND is_active = TRUE
+        """), {"model_name": name, "version": version})
+        await self.db.commit()
+
+        _cache_model(artifact, model)
+        logger.info(f"Registered model {name} version {version}")
+
+        return RegisteredModel(
+            id=str(row.id),
+            version=version,
+            model_type=model_type,
+            target_metric=target_metric,
+            model=model,
+            metrics=metrics,
+            params=params,
+            created_at=row.created_at,
+        )
+
+    async def list_active(self) -> List[Tuple[str, str]]:
+        """Distinct (workspace_id, target_metric) pairs with active models."""
+        result = await self.db.execute(text("""
+            SELECT DISTINCT workspace_id, target_metric
+            FROM analytics.ml_models
+            WHERE is_active = TRUE
+                AND workspace_id IS NOT NULL
+                AND model_artifacts_path IS NOT NULL
+            ORDER BY workspace_id, target_metric
+        """))
+        return [(str(row.workspace_id), row.target_metric) for row in result.fetchall()]
+
+    async def fit_prophet(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        history: pd.DataFrame,
+        model_params: Dict[str, Any],
+        seasonalities: Sequence[Dict[str, Any]] = (),
+    ) -> RegisteredModel:
+        """Fit Prophet on the model pool and register it."""
+        from prophet.serialize import model_from_json
+
+        seasonalities = list(seasonalities)
+        result = await get_model_executor().run(
+            prophet_fit, history, model_params, seasonalities
+        )
+        return await self.register(
+            workspace_id,
+            target_metric,
+            "prophet",
+            model_from_json(result["model"]),
+            history,
+            metrics={"mape": result["mape"]},
+            params={"model_params": model_params, "seasonalities": seasonalities},
+        )
+
+    async def fit_arima(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        history: pd.DataFrame,
+        order: Tuple[int, int, int],
+    ) -> RegisteredModel:
+        """Fit ARIMA on the model pool and register it."""
+        result = await get_model_executor().run(
+            arima_fit, history["y"].to_numpy(dtype=float), order
+        )
+        return await self.register(
+            workspace_id,
+            target_metric,
+            "arima",
+            result["model"],
+            history,
+            metrics={"mape": result["mape"], "aic": result["aic"]},
+            params={"order": list(order)},
+        )
+
+    async def get_or_fit_prophet(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        history: pd.DataFrame,
+        model_params: Dict[str, Any],
+        seasonalities: Sequence[Dict[str, Any]] = (),
+    ) -> RegisteredModel:
+        """Serve the registered Prophet model, fitting one if missing or outdated."""
+        registered = await self.get(workspace_id, target_metric, "prophet")
+        return await self._fit_if_needed(
+            registered,
+            history,
+            lambda: self.fit_prophet(
+                workspace_id, target_metric, history, model_params, seasonalities
+            ),
+        )
+
+    async def get_or_fit_arima(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        history: pd.DataFrame,
+        order: Tuple[int, int, int],
+    ) -> RegisteredModel:
+        """Serve the registered ARIMA model, fitting one if missing or outdated."""
+        registered = await self.get(workspace_id, target_metric, "arima")
+        return await self._fit_if_needed(
+            registered,
+            history,
+            lambda: self.fit_arima(workspace_id, target_metric, history, order),
+        )
+
+    async def _fit_if_needed(
+        self,
+        registered: Optional[RegisteredModel],
+        history: pd.DataFrame,
+        fit: Callable[[], Awaitable[RegisteredModel]],
+    ) -> RegisteredModel:
+        """Refit a missing, stale or drifted model on the request path.
+
+        An outdated model is still served if its refit fails.
+        """
+        if registered is None:
+            return await fit()
+
+        reason = retrain_reason(registered, history)
+        if reason is None:
+            return registered
+
+        logger.info(
+            f"Refitting {registered.model_type} model {registered.version} on request: {reason}"
+        )
+        try:
+            return await fit()
+        except Exception as e:
+            logger.warning(f"Refit failed, serving model {registered.version}: {e}")
+            return registered
+
+    async def _refresh_reason(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        model_type: str,
+        history: pd.DataFrame,
+        force: bool,
+    ) -> Optional[str]:
+        if force:
+            return "forced"
+        registered = await self.get(workspace_id, target_metric, model_type)
+        if registered is None:
+            return "missing"
+        return retrain_reason(registered, history)
+
+    async def refresh_prophet(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        history: pd.DataFrame,
+        model_params: Dict[str, Any],
+        seasonalities: Sequence[Dict[str, Any]] = (),
+        force: bool = False,
+    ) -> Optional[str]:
+        """Refit the Prophet model if needed; returns why it was refitted."""
+        reason = await self._refresh_reason(
+            workspace_id, target_metric, "prophet", history, force
+        )
+        if reason:
+            await self.fit_prophet(
+                workspace_id, target_metric, history, model_params, seasonalities
+            )
+        return reason
+
+    async def refresh_arima(
+        self,
+        workspace_id: Optional[str],
+        target_metric: str,
+        history: pd.DataFrame,
+        order: Tuple[int, int, int],
+        force: bool = False,
+    ) -> Optional[str]:
+        """Refit the ARIMA model if needed; returns why it was refitted."""
+        reason = await self._refresh_reason(
+            workspace_id, target_metric, "arima", history, force
+        )
+        if reason:
+            await self.fit_arima(workspace_id, target_metric, history, order)
+        return reason
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str):
+        return json.loads(value)
+    return dict(value or {})
+
+
+async def prophet_predict(
+    model: Any,
+    last_timestamp: Any,
+    periods: int,
+    freq: str = "D",
+) -> pd.DataFrame:
+    """Forecast ``periods`` steps after ``last_timestamp`` with a fitted model.
+
+    The steps follow the latest data rather than the end of the training
+    data, so a model fitted days ago still forecasts from today.
+    """
+    future = pd.DataFrame({
+        "ds": pd.date_range(start=pd.Timestamp(last_timestamp), periods=periods + 1, freq=freq)[1:]
+    })
+    return await asyncio.to_thread(model.predict, future)
+
+
+async def arima_predict(
+    results: Any,
+    series: np.ndarray,
+    steps: int,
+    alpha: float = 0.05,
+) -> Dict[str, np.ndarray]:
+    """Forecast ``steps`` after ``series`` with fitted ARIMA results.
+
+    The fitted parameters are kept and only the state is re-filtered over
+    the latest data, which takes milliseconds.
+    """
+    def _forecast() -> Dict[str, np.ndarray]:
+        current = results.apply(np.asarray(series, dtype=float))
+        forecast = current.get_forecast(steps=steps)
+        conf_int = np.asarray(forecast.conf_int(alpha=alpha))
+        return {
+            "forecast": np.asarray(forecast.predicted_mean),
+            "lower": conf_int[:, 0],
+            "upper": conf_int[:, 1],
+        }
+
+    return await asyncio.to_thread(_forecast)
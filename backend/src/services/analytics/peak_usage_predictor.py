@@ -9,14 +9,15 @@ Date: 2025-11-12
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 
 import pandas as pd
 import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from prophet import Prophet
+
+from .model_registry import ModelRegistry, prophet_predict
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,8 @@ class PeakUsagePredictor:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.registry = ModelRegistry(db)
+        self.model_version: Optional[str] = None
 
     async def predict(
         self,
@@ -62,7 +65,7 @@ class PeakUsagePredictor:
                 }
 
             # Predict usage patterns
-            usage_predictions = await self._predict_usage(df, days_ahead, granularity)
+            usage_predictions = await self._predict_usage(workspace_id, df, days_ahead, granularity)
 
             # Identify peak times
             peak_times = self._identify_peak_times(usage_predictions, granularity)
@@ -85,7 +88,7 @@ class PeakUsagePredictor:
                 "peak_times": peak_times,
                 "capacity_recommendations": capacity_recommendations,
                 "insights": insights,
-                "model_version": "peak_usage_v1.0.0",
+                "model_version": self.model_version,
                 "generated_at": datetime.now().isoformat()
             }
 
@@ -106,31 +109,56 @@ class PeakUsagePredictor:
 
         return df
 
+    def _history(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Prepared data as model training history (``ds``/``y``)."""
+        # Use executions as the primary metric
+        history = data[['timestamp', 'executions']].copy()
+        history.columns = ['ds', 'y']
+        return history
+
+    def _model_params(self, granularity: str) -> Dict[str, Any]:
+        """Prophet parameters for a granularity."""
+        return dict(
+            changepoint_prior_scale=0.05,
+            seasonality_prior_scale=15.0,
+            seasonality_mode='multiplicative',
+            yearly_seasonality=False,
+            weekly_seasonality=True,
+            daily_seasonality=granularity == 'hourly',
+            interval_width=0.90
+        )
+
+    async def refresh(
+        self,
+        workspace_id: str,
+        granularity: str,
+        historical_data: pd.DataFrame,
+        force: bool = False
+    ) -> Optional[str]:
+        """Refit the registered model if stale or drifted; returns the reason."""
+        history = self._history(self._prepare_data(historical_data, granularity))
+        return await self.registry.refresh_prophet(
+            workspace_id, f"peak_usage_{granularity}", history,
+            self._model_params(granularity), force=force
+        )
+
     async def _predict_usage(
         self,
+        workspace_id: str,
         data: pd.DataFrame,
         days_ahead: int,
         granularity: str
     ) -> List[Dict[str, Any]]:
         """Predict future usage patterns."""
         try:
-            # Use executions as the primary metric
-            prophet_df = data[['timestamp', 'executions']].copy()
-            prophet_df.columns = ['ds', 'y']
-
-            # Configure Prophet
-            model = Prophet(
-                changepoint_prior_scale=0.05,
-                seasonality_prior_scale=15.0,
-                seasonality_mode='multiplicative',
-                yearly_seasonality=False,
-                weekly_seasonality=True,
-                daily_seasonality=granularity == 'hourly',
-                interval_width=0.90
-            )
+            history = self._history(data)
 
-            # Fit model
-            model.fit(prophet_df)
+            # Serve the registered model, fitting one on first use
+            registered = await self.registry.get_or_fit_prophet(
+                workspace_id, f"peak_usage_{granularity}", history,
+                self._model_params(granularity)
+            )
+            self.model_version = registered.version
 
             # Predict
             if granularity == 'hourly':
@@ -140,11 +168,9 @@ class PeakUsagePredictor:
                 periods = days_ahead
                 freq = 'D'
 
-            future = model.make_future_dataframe(periods=periods, freq=freq)
-            forecast = model.predict(future)
-
-            # Extract predictions
-            future_forecast = forecast.tail(periods)
+            future_forecast = await prophet_predict(
+                registered.model, history['ds'].max(), periods, freq=freq
+            )
 
             predictions = []
             for _, row in future_forecast.iterrows():
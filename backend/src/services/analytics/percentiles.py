@@ -282,11 +282,7 @@ class PercentileCalculator:
         metric_name: str,
         timeframe: str = "7d",
         agent_id: Optional[str] = None,
-<<<<<<< HEAD
         user_id: Optional[str] = None
-=======
-        current_user_id: Optional[str] = None
->>>>>>> 8960dd8 (Fix critical security issues and migration conflicts)
     ) -> Dict[str, Any]:
         """Calculate percentiles for any metric from database.
 
@@ -24,11 +24,15 @@ from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_percentage_error, roc_auc_score
 from prophet import Prophet
+from prophet.serialize import model_from_json, model_to_json
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
 from ...core.config import settings
 from ..cache.cache_service import CacheService
+from .batch_forecasting import BatchForecaster
+from .model_execution import get_model_executor
+from .model_registry import ModelRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +73,15 @@ class PredictiveAnalytics:
                 logger.info(f"Cache hit for credit consumption prediction: {workspace_id}")
                 return json.loads(cached)
 
+            # Serve the nightly batch forecast if it covers the horizon
+            stored = await BatchForecaster(self.db).load_credit_forecast(workspace_id, days_ahead)
+            if stored is not None:
+                predictions = CreditConsumptionPredictor(self.db).from_stored(
+                    workspace_id, days_ahead, stored, granularity
+                )
+                await self.cache.set(cache_key, json.dumps(predictions), ttl=21600)
+                return predictions
+
             # Load historical credit consumption data
             historical_data = await self._load_credit_consumption_data(workspace_id)
 
@@ -101,7 +114,9 @@ class PredictiveAnalytics:
         self,
         workspace_id: str,
         users: Optional[List[str]] = None,
-        risk_threshold: float = 0.7
+        risk_threshold: float = 0.7,
+        limit: Optional[int] = None,
+        offset: int = 0
     ) -> Dict[str, Any]:
         """
         Predict probability of user churn in next 30 days.
@@ -111,13 +126,20 @@ class PredictiveAnalytics:
             workspace_id: Workspace identifier
             users: Optional list of specific user IDs to predict
             risk_threshold: Threshold for high-risk classification
+            limit: Number of users to return, highest risk first. Without a
+                limit, users at or above the risk threshold are returned, or
+                every requested user when ``users`` is given.
+            offset: Number of ranked users to skip before the page
 
         Returns:
             Dictionary with user churn predictions
         """
         try:
+            if users and limit is None:
+                limit = len(users)
+
             # Check cache
-            cache_key = f"churn_prediction:{workspace_id}:{risk_threshold}"
+            cache_key = f"churn_prediction:{workspace_id}:{risk_threshold}:{limit}:{offset}"
             if users:
                 cache_key += f":{','.join(sorted(users[:10]))}"  # Limit cache key size
 
@@ -140,7 +162,9 @@ class PredictiveAnalytics:
             predictions = await predictor.predict(
                 workspace_id=workspace_id,
                 user_data=user_data,
-                risk_threshold=risk_threshold
+                risk_threshold=risk_threshold,
+                limit=limit,
+                offset=offset
             )
 
             # Cache for 1 hour (churn risk changes frequently)
@@ -413,7 +437,9 @@ class PredictiveAnalytics:
         self,
         model_type: str,
         training_data: pd.DataFrame,
-        hyperparameters: Optional[Dict] = None
+        hyperparameters: Optional[Dict] = None,
+        workspace_id: Optional[str] = None,
+        target_metric: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Train predictive model with cross-validation.
@@ -423,25 +449,123 @@ class PredictiveAnalytics:
             model_type: Type of model to train
             training_data: Training dataset
             hyperparameters: Optional hyperparameters
+            workspace_id: Workspace the model serves (None for global models)
+            target_metric: Registry target; when given the model is registered
+                and becomes the active version served for it
 
         Returns:
             Dictionary with training results and metrics
         """
         try:
             if model_type == "prophet":
-                return await self._train_prophet_model(training_data, hyperparameters)
+                result = await self._train_prophet_model(training_data, hyperparameters)
             elif model_type == "arima":
-                return await self._train_arima_model(training_data, hyperparameters)
+                result = await self._train_arima_model(training_data, hyperparameters)
             elif model_type == "gradient_boosting":
-                return await self._train_gradient_boosting(training_data, hyperparameters)
+                result = await self._train_gradient_boosting(training_data, hyperparameters)
             elif model_type == "random_forest":
-                return await self._train_random_forest(training_data, hyperparameters)
+                result = await self._train_random_forest(training_data, hyperparameters)
             else:
                 raise ValueError(f"Unknown model type: {model_type}")
+
+            if target_metric:
+                result["version"] = await self._register_trained_model(
+                    model_type, training_data, result, workspace_id, target_metric
+                )
+            return result
         except Exception as e:
             logger.error(f"Error training model: {e}", exc_info=True)
             raise
 
+    async def _register_trained_model(
+        self,
+        model_type: str,
+        training_data: pd.DataFrame,
+        result: Dict[str, Any],
+        workspace_id: Optional[str],
+        target_metric: str
+    ) -> str:
+        """Register a model returned by train_model; returns its version."""
+        if model_type in ("prophet", "arima"):
+            model = result["model"]
+            history = training_data[['ds', 'y']] if 'ds' in training_data else None
+        else:
+            # Classifiers are served together with their feature scaler
+            model = {"model": result["model"], "scaler": result.get("scaler")}
+            history = None
+
+        registered = await ModelRegistry(self.db).register(
+            workspace_id,
+            target_metric,
+            model_type,
+            model,
+            history,
+            metrics=result["metrics"],
+            params=result["hyperparameters"],
+            feature_importance=result.get("feature_importance"),
+        )
+        return registered.version
+
+    async def refresh_model(
+        self,
+        workspace_id: str,
+        target_metric: str,
+        force: bool = False
+    ) -> Dict[str, Optional[str]]:
+        """
+        Refit a workspace's registered forecasting models for one target
+        if they are stale or the data has drifted.
+
+        Args:
+            workspace_id: Workspace identifier
+            target_metric: Registry target (e.g. 'credit_consumption', 'growth_dau')
+            force: Refit even if the models are current
+
+        Returns:
+            Dictionary mapping model type to the refit reason (None if kept)
+        """
+        if target_metric == "credit_consumption":
+            data = await self._load_credit_consumption_data(workspace_id)
+            if len(data) < 30:
+                return {}
+            return await CreditConsumptionPredictor(self.db).refresh(
+                workspace_id, data, force=force
+            )
+
+        if target_metric.startswith("growth_"):
+            metric = target_metric[len("growth_"):]
+            data = await self._load_growth_data(workspace_id, metric)
+            if len(data) < 30:
+                return {}
+            reason = await GrowthMetricsPredictor(self.db).refresh(
+                workspace_id, metric, data, force=force
+            )
+            return {"prophet": reason}
+
+        if target_metric.startswith("peak_usage_"):
+            granularity = target_metric[len("peak_usage_"):]
+            data = await self._load_usage_data(workspace_id, granularity)
+            if len(data) < 168:
+                return {}
+            reason = await PeakUsagePredictor(self.db).refresh(
+                workspace_id, granularity, data, force=force
+            )
+            return {"prophet": reason}
+
+        if target_metric.startswith("error_rate_"):
+            agent_id = target_metric[len("error_rate_"):]
+            agent_id = None if agent_id == "all" else agent_id
+            data = await self._load_error_data(workspace_id, agent_id)
+            if len(data) < 30:
+                return {}
+            reason = await ErrorRatePredictor(self.db).refresh(
+                workspace_id, agent_id, data, force=force
+            )
+            return {"prophet": reason}
+
+        # Models registered through train_model are retrained by their owner
+        return {}
+
     async def _train_prophet_model(
         self,
         data: pd.DataFrame,
@@ -449,33 +573,11 @@ class PredictiveAnalytics:
     ) -> Dict[str, Any]:
         """Train Facebook Prophet model."""
         try:
-            # Prepare data for Prophet
-            df = data[['ds', 'y']].copy()
-
-            # Initialize Prophet with hyperparameters
-            params = hyperparameters or {}
-            model = Prophet(
-                changepoint_prior_scale=params.get('changepoint_prior_scale', 0.05),
-                seasonality_prior_scale=params.get('seasonality_prior_scale', 10.0),
-                seasonality_mode=params.get('seasonality_mode', 'additive'),
-                interval_width=params.get('interval_width', 0.95)
+            result = await get_model_executor().run(
+                _fit_prophet_model, data[['ds', 'y']].copy(), hyperparameters or {}
             )
-
-            # Fit model
-            model.fit(df)
-
-            # Calculate performance metrics
-            forecast = model.predict(df)
-            mape = mean_absolute_percentage_error(df['y'], forecast['yhat'])
-
-            return {
-                "model": model,
-                "metrics": {
-                    "mape": float(mape),
-                    "training_samples": len(df)
-                },
-                "hyperparameters": params
-            }
+            result["model"] = model_from_json(result["model"])
+            return result
         except Exception as e:
             logger.error(f"Error training Prophet model: {e}", exc_info=True)
             raise
@@ -487,31 +589,9 @@ class PredictiveAnalytics:
     ) -> Dict[str, Any]:
         """Train ARIMA model."""
         try:
-            # Prepare data
-            series = data['y'].values
-
-            # Get ARIMA order
-            params = hyperparameters or {}
-            order = params.get('order', (1, 1, 1))
-
-            # Fit model
-            model = ARIMA(series, order=order)
-            fitted_model = model.fit()
-
-            # Calculate performance metrics
-            predictions = fitted_model.fittedvalues
-            mape = mean_absolute_percentage_error(series[1:], predictions[1:])
-
-            return {
-                "model": fitted_model,
-                "metrics": {
-                    "mape": float(mape),
-                    "aic": float(fitted_model.aic),
-                    "bic": float(fitted_model.bic),
-                    "training_samples": len(series)
-                },
-                "hyperparameters": params
-            }
+            return await get_model_executor().run(
+                _fit_arima_model, data['y'].values, hyperparameters or {}
+            )
         except Exception as e:
             logger.error(f"Error training ARIMA model: {e}", exc_info=True)
             raise
@@ -523,50 +603,9 @@ class PredictiveAnalytics:
     ) -> Dict[str, Any]:
         """Train Gradient Boosting classifier."""
         try:
-            # Prepare data
-            X = data.drop('target', axis=1)
-            y = data['target']
-
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
+            return await get_model_executor().run(
+                _fit_gradient_boosting, data, hyperparameters or {}
             )
-
-            # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
-
-            # Train model
-            params = hyperparameters or {}
-            model = GradientBoostingClassifier(
-                n_estimators=params.get('n_estimators', 100),
-                learning_rate=params.get('learning_rate', 0.1),
-                max_depth=params.get('max_depth', 3),
-                random_state=42
-            )
-
-            model.fit(X_train_scaled, y_train)
-
-            # Calculate metrics
-            y_pred_proba = model.predict_proba(X_test_scaled)[:, 1]
-            auc = roc_auc_score(y_test, y_pred_proba)
-
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=5, scoring='roc_auc')
-
-            return {
-                "model": model,
-                "scaler": scaler,
-                "metrics": {
-                    "auc": float(auc),
-                    "cv_auc_mean": float(cv_scores.mean()),
-                    "cv_auc_std": float(cv_scores.std()),
-                    "training_samples": len(X_train)
-                },
-                "feature_importance": dict(zip(X.columns, model.feature_importances_)),
-                "hyperparameters": params
-            }
         except Exception as e:
             logger.error(f"Error training Gradient Boosting model: {e}", exc_info=True)
             raise
@@ -578,44 +617,9 @@ class PredictiveAnalytics:
     ) -> Dict[str, Any]:
         """Train Random Forest classifier."""
         try:
-            # Prepare data
-            X = data.drop('target', axis=1)
-            y = data['target']
-
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
-
-            # Train model
-            params = hyperparameters or {}
-            model = RandomForestClassifier(
-                n_estimators=params.get('n_estimators', 100),
-                max_depth=params.get('max_depth', 10),
-                min_samples_split=params.get('min_samples_split', 2),
-                random_state=42
+            return await get_model_executor().run(
+                _fit_random_forest, data, hyperparameters or {}
             )
-
-            model.fit(X_train, y_train)
-
-            # Calculate metrics
-            y_pred_proba = model.predict_proba(X_test)[:, 1]
-            auc = roc_auc_score(y_test, y_pred_proba)
-
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='roc_auc')
-
-            return {
-                "model": model,
-                "metrics": {
-                    "auc": float(auc),
-                    "cv_auc_mean": float(cv_scores.mean()),
-                    "cv_auc_std": float(cv_scores.std()),
-                    "training_samples": len(X_train)
-                },
-                "feature_importance": dict(zip(X.columns, model.feature_importances_)),
-                "hyperparameters": params
-            }
         except Exception as e:
             logger.error(f"Error training Random Forest model: {e}", exc_info=True)
             raise
@@ -775,6 +779,147 @@ class PredictiveAnalytics:
         return df
 
 
+# Training jobs run on the model pool (see model_execution), so they are
+# module-level functions whose arguments and results are pickled.
+
+def _fit_prophet_model(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit Prophet; the model is returned as JSON since it does not pickle reliably."""
+    model = Prophet(
+        changepoint_prior_scale=params.get('changepoint_prior_scale', 0.05),
+        seasonality_prior_scale=params.get('seasonality_prior_scale', 10.0),
+        seasonality_mode=params.get('seasonality_mode', 'additive'),
+        interval_width=params.get('interval_width', 0.95)
+    )
+
+    # Fit model
+    model.fit(df)
+
+    # Calculate performance metrics
+    forecast = model.predict(df)
+    mape = mean_absolute_percentage_error(df['y'], forecast['yhat'])
+
+    return {
+        "model": model_to_json(model),
+        "metrics": {
+            "mape": float(mape),
+            "training_samples": len(df)
+        },
+        "hyperparameters": params
+    }
+
+
+def _fit_arima_model(series: np.ndarray, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit ARIMA with the configured order."""
+    order = params.get('order', (1, 1, 1))
+
+    # Fit model
+    model = ARIMA(series, order=order)
+    fitted_model = model.fit()
+
+    # Calculate performance metrics
+    predictions = fitted_model.fittedvalues
+    mape = mean_absolute_percentage_error(series[1:], predictions[1:])
+
+    return {
+        "model": fitted_model,
+        "metrics": {
+            "mape": float(mape),
+            "aic": float(fitted_model.aic),
+            "bic": float(fitted_model.bic),
+            "training_samples": len(series)
+        },
+        "hyperparameters": params
+    }
+
+
+def _fit_gradient_boosting(data: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit a scaled Gradient Boosting classifier with cross-validation."""
+    # Prepare data
+    X = data.drop('target', axis=1)
+    y = data['target']
+
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # Train model
+    model = GradientBoostingClassifier(
+        n_estimators=params.get('n_estimators', 100),
+        learning_rate=params.get('learning_rate', 0.1),
+        max_depth=params.get('max_depth', 3),
+        random_state=42
+    )
+
+    model.fit(X_train_scaled, y_train)
+
+    # Calculate metrics
+    y_pred_proba = model.predict_proba(X_test_scaled)[:, 1]
+    auc = roc_auc_score(y_test, y_pred_proba)
+
+    # Cross-validation
+    cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=5, scoring='roc_auc')
+
+    return {
+        "model": model,
+        "scaler": scaler,
+        "metrics": {
+            "auc": float(auc),
+            "cv_auc_mean": float(cv_scores.mean()),
+            "cv_auc_std": float(cv_scores.std()),
+            "training_samples": len(X_train)
+        },
+        "feature_importance": dict(zip(X.columns, model.feature_importances_)),
+        "hyperparameters": params
+    }
+
+
+def _fit_random_forest(data: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit a Random Forest classifier with cross-validation."""
+    # Prepare data
+    X = data.drop('target', axis=1)
+    y = data['target']
+
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    # Train model
+    model = RandomForestClassifier(
+        n_estimators=params.get('n_estimators', 100),
+        max_depth=params.get('max_depth', 10),
+        min_samples_split=params.get('min_samples_split', 2),
+        random_state=42
+    )
+
+    model.fit(X_train, y_train)
+
+    # Calculate metrics
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    auc = roc_auc_score(y_test, y_pred_proba)
+
+    # Cross-validation
+    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='roc_auc')
+
+    return {
+        "model": model,
+        "metrics": {
+            "auc": float(auc),
+            "cv_auc_mean": float(cv_scores.mean()),
+            "cv_auc_std": float(cv_scores.std()),
+            "training_samples": len(X_train)
+        },
+        "feature_importance": dict(zip(X.columns, model.feature_importances_)),
+        "hyperparameters": params
+    }
+
+
 # Import specialized predictors
 from .credit_consumption_predictor import CreditConsumptionPredictor
 from .user_churn_predictor import UserChurnPredictor
@@ -0,0 +1,414 @@
+"""Incremental baselines for anomaly scoring.
+
+A baseline keeps running statistics of a workspace metric instead of the
+history itself: Welford's running mean/variance, an exponentially weighted
+mean/variance (EWMA) that follows drift, and a DDSketch for percentiles.
+One set is kept overall and one per seasonal slot (hour of day), so a new
+point is scored against its hour in O(1) without reading any history.
+
+Baselines are folded forward from ``analytics.execution_metrics_hourly``
+as hours close, tracked by a watermark in ``analytics.aggregation_watermarks``,
+and persisted as ``BaselineModel`` rows with ``model_type='streaming'``.
+Every update covers only the hours since the previous one; an hour is
+folded once, so rows arriving after the rollup overlap are not reflected.
+"""
+
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.config import settings
+from ...models.database.tables import BaselineModel
+from ..aggregation.incremental import get_watermark, set_watermark
+from ..aggregation.sketches import DDSketch
+
+logger = logging.getLogger(__name__)
+
+MODEL_TYPE = "streaming"
+STATE_VERSION = 1
+
+DEFAULT_EWMA_ALPHA = 0.1  # Weight of the newest point in the EWMA
+SEASONAL_PERIOD = 24  # Slots per cycle (hour of day)
+MIN_POINTS = 3  # Observations before a baseline scores points
+MIN_SEASONAL_POINTS = 4  # Observations before a slot replaces the overall baseline
+
+INITIAL_LOOKBACK_DAYS = 28  # History folded in on the first update
+UPDATE_CHUNK_HOURS = 24  # Hours of rollups read (and committed) per step
+
+WATERMARK_NAME = "baseline:execution_metrics_hourly"
+
+# Metric -> execution_metrics_hourly column (same aggregates as detect_metric_anomalies)
+ROLLUP_COLUMNS = {
+    'runtime_seconds': 'avg_runtime',
+    'credits_consumed': 'total_credits',
+    'executions': 'total_executions',
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class RunningStats:
+    """Welford mean/variance plus an EWMA mean/variance of a stream."""
+
+    __slots__ = ("alpha", "count", "mean", "m2", "ewma", "ewm_var")
+
+    def __init__(self, alpha: float = DEFAULT_EWMA_ALPHA):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.ewm_var = 0.0
+
+    def add(self, value: float) -> None:
+        """Fold one observation into the statistics."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if self.count == 1:
+            self.ewma = value
+            self.ewm_var = 0.0
+        else:
+            diff = value - self.ewma
+            increment = self.alpha * diff
+            self.ewma += increment
+            self.ewm_var = (1 - self.alpha) * (self.ewm_var + diff * increment)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0 until there are two observations)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(max(self.variance, 0.0))
+
+    @property
+    def ewm_std(self) -> float:
+        return math.sqrt(max(self.ewm_var, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alpha": self.alpha,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "ewma": self.ewma,
+            "ewm_var": self.ewm_var,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        stats = cls(float(data.get("alpha", DEFAULT_EWMA_ALPHA)))
+        stats.count = int(data.get("count") or 0)
+        stats.mean = float(data.get("mean") or 0.0)
+        stats.m2 = float(data.get("m2") or 0.0)
+        stats.ewma = float(data.get("ewma") or 0.0)
+        stats.ewm_var = float(data.get("ewm_var") or 0.0)
+        return stats
+
+
+def seasonal_slot(timestamp: datetime, period: int = SEASONAL_PERIOD) -> int:
+    """Position of an hourly bucket in a cycle of ``period`` hours (UTC)."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((timestamp - _EPOCH) // timedelta(hours=1)) % period
+
+
+class SeasonalBaseline:
+    """Running baseline of one workspace metric, overall and per slot."""
+
+    def __init__(self, period: int = SEASONAL_PERIOD, alpha: float = DEFAULT_EWMA_ALPHA):
+        self.period = period
+        self.alpha = alpha
+        self.overall = RunningStats(alpha)
+        self.sketch = DDSketch()
+        self.slots: Dict[int, RunningStats] = {}
+        self.last_hour: Optional[datetime] = None
+
+    @property
+    def count(self) -> int:
+        return self.overall.count
+
+    def update(self, hour: datetime, value: Optional[float]) -> bool:
+        """Fold the value of an hourly bucket in (each hour only once).
+
+        Returns:
+            True if the value was added
+        """
+        if value is None or (self.last_hour is not None and hour <= self.last_hour):
+            return False
+        value = float(value)
+        if math.isnan(value):
+            return False
+
+        self.overall.add(value)
+        self.sketch.add(value)
+        slot = seasonal_slot(hour, self.period)
+        if slot not in self.slots:
+            self.slots[slot] = RunningStats(self.alpha)
+        self.slots[slot].add(value)
+        self.last_hour = hour
+        return True
+
+    def expected(self, hour: datetime) -> Tuple[RunningStats, bool]:
+        """Statistics a point at ``hour`` is compared with.
+
+        Returns:
+            (stats, seasonal) -- the hour's slot once it has enough
+            observations, otherwise the overall statistics
+        """
+        slot = self.slots.get(seasonal_slot(hour, self.period))
+        if slot is not None and slot.count >= MIN_SEASONAL_POINTS:
+            return slot, True
+        return self.overall, False
+
+    def score(self, hour: datetime, value: float) -> Optional[Dict[str, Any]]:
+        """Score a point against the baseline in constant time.
+
+        Returns:
+            Absolute z-scores against the running and EWMA statistics and
+            the point's percentile, or None without a usable baseline
+        """
+        stats, seasonal = self.expected(hour)
+        if stats.count < MIN_POINTS or stats.std_dev <= 0:
+            return None
+
+        value = float(value)
+        ewm_std = stats.ewm_std
+        return {
+            'zscore': abs(value - stats.mean) / stats.std_dev,
+            'ewma_zscore': abs(value - stats.ewma) / ewm_std if ewm_std > 0 else None,
+            'percentile': self.sketch.count_below(value) / self.sketch.count * 100,
+            'expected_mean': stats.mean,
+            'expected_std': stats.std_dev,
+            'ewma': stats.ewma,
+            'seasonal': seasonal,
+            'count': stats.count,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Overall statistics in the train_baseline_model format."""
+        median, q25, q75 = self.sketch.quantiles([0.5, 0.25, 0.75])
+        return {
+            'mean': self.overall.mean,
+            'std': self.overall.std_dev,
+            'median': median,
+            'q25': q25,
+            'q75': q75,
+            'min': self.sketch.min if self.count else None,
+            'max': self.sketch.max if self.count else None,
+            'count': self.count,
+            'ewma': self.overall.ewma,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "v": STATE_VERSION,
+            "period": self.period,
+            "alpha": self.alpha,
+            "last_hour": self.last_hour.isoformat() if self.last_hour else None,
+            "overall": self.overall.to_dict(),
+            "sketch": self.sketch.to_dict(),
+            "slots": {str(slot): stats.to_dict() for slot, stats in self.slots.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SeasonalBaseline":
+        version = data.get("v", STATE_VERSION)
+        if version != STATE_VERSION:
+            raise ValueError(f"Unsupported baseline version: {version}")
+
+        baseline = cls(int(data.get("period", SEASONAL_PERIOD)), float(data.get("alpha", DEFAULT_EWMA_ALPHA)))
+        baseline.overall = RunningStats.from_dict(data.get("overall") or {})
+        if data.get("sketch"):
+            baseline.sketch = DDSketch.from_dict(data["sketch"])
+        baseline.slots = {
+            int(slot): RunningStats.from_dict(stats)
+            for slot, stats in (data.get("slots") or {}).items()
+        }
+        if data.get("last_hour"):
+            baseline.last_hour = datetime.fromisoformat(data["last_hour"])
+        return baseline
+
+
+class BaselineStore:
+    """Loads, folds forward and persists streaming baselines."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def load(self, workspace_id: str, metric_type: str) -> Optional[SeasonalBaseline]:
+        """Get the streaming baseline of a workspace metric, if there is one."""
+        model = await self._load_model(workspace_id, metric_type)
+        if model is None:
+            return None
+        return SeasonalBaseline.from_dict(model.statistics["state"])
+
+    async def seed(
+        self,
+        workspace_id: str,
+        metric_type: str,
+        days: int = INITIAL_LOOKBACK_DAYS,
+        now: Optional[datetime] = None
+    ) -> Tuple[BaselineModel, SeasonalBaseline]:
+        """Fold a workspace metric's recent hourly rollups into its baseline.
+
+        Hours already in the baseline are skipped, so seeding an existing
+        baseline only adds what it has not seen.
+        """
+        if metric_type not in ROLLUP_COLUMNS:
+            raise ValueError(f"Invalid metric type: {metric_type}")
+
+        until = await self._closed_until(now or datetime.utcnow())
+        models = await self._load_models([workspace_id], [metric_type])
+        rows = await self._fetch_rollups(until - timedelta(days=days), until, workspace_id)
+        self._fold(models, rows, [metric_type])
+
+        model = models.get((workspace_id, metric_type))
+        if model is None:
+            raise ValueError(f"No training data available for {metric_type}")
+        await self.db.commit()
+        return model, SeasonalBaseline.from_dict(model.statistics["state"])
+
+    async def update_from_rollups(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Fold hourly rollups closed since the last update into every baseline.
+
+        Args:
+            now: Current time (defaults to current UTC time)
+
+        Returns:
+            Dictionary with the hours and baselines updated
+        """
+        until = await self._closed_until(now or datetime.utcnow())
+        high_water = await get_watermark(self.db, WATERMARK_NAME)
+        since = high_water or until - timedelta(days=INITIAL_LOOKBACK_DAYS)
+
+        updated = set()
+        chunk_start = since
+        try:
+            while chunk_start < until:
+                chunk_end = min(chunk_start + timedelta(hours=UPDATE_CHUNK_HOURS), until)
+                rows = await self._fetch_rollups(chunk_start, chunk_end)
+                if rows:
+                    workspace_ids = sorted({str(row.workspace_id) for row in rows})
+                    models = await self._load_models(workspace_ids, list(ROLLUP_COLUMNS))
+                    updated.update(self._fold(models, rows, list(ROLLUP_COLUMNS)))
+
+                await set_watermark(self.db, WATERMARK_NAME, chunk_end)
+                await self.db.commit()
+                chunk_start = chunk_end
+
+        except Exception as e:
+            logger.error(f"Baseline update failed: {str(e)}")
+            await self.db.rollback()
+            raise
+
+        result = {
+            'since': since.isoformat(),
+            'until': max(since, until).isoformat(),
+            'baselines_updated': len(updated),
+        }
+        logger.info(f"Streaming baseline update completed: {result}")
+        return result
+
+    def _fold(
+        self,
+        models: Dict[Tuple[str, str], BaselineModel],
+        rows: Iterable[Any],
+        metric_types: List[str]
+    ) -> List[Tuple[str, str]]:
+        """Fold rollup rows (ordered by hour) into baselines, creating missing ones."""
+        baselines: Dict[Tuple[str, str], SeasonalBaseline] = {}
+        for row in rows:
+            workspace_id = str(row.workspace_id)
+            for metric_type in metric_types:
+                key = (workspace_id, metric_type)
+                if key not in baselines:
+                    model = models.get(key)
+                    baselines[key] = (
+                        SeasonalBaseline.from_dict(model.statistics["state"])
+                        if model is not None else SeasonalBaseline()
+                    )
+                baselines[key].update(row.hour, getattr(row, ROLLUP_COLUMNS[metric_type]))
+
+        for (workspace_id, metric_type), baseline in baselines.items():
+            model = models.get((workspace_id, metric_type))
+            if model is None:
+                model = BaselineModel(
+                    workspace_id=workspace_id,
+                    metric_type=metric_type,
+                    model_type=MODEL_TYPE,
+                    model_parameters={'period': baseline.period, 'alpha': baseline.alpha},
+                    statistics={},
+                    training_data_start=(baseline.last_hour or datetime.utcnow()).date(),
+                    training_data_end=(baseline.last_hour or datetime.utcnow()).date(),
+                )
+                self.db.add(model)
+                models[(workspace_id, metric_type)] = model
+
+            # Assign a new dict so the JSON column is flagged as changed
+            model.statistics = {**baseline.summary(), 'state': baseline.to_dict()}
+            if baseline.last_hour:
+                model.training_data_end = baseline.last_hour.date()
+            model.last_updated = datetime.utcnow()
+
+        return list(baselines)
+
+    async def _closed_until(self, now: datetime) -> datetime:
+        """End of the last hour whose rollup will not change any more."""
+        overlap = timedelta(seconds=settings.INCREMENTAL_ROLLUP_OVERLAP_SECONDS)
+        rolled_up = None
+        if settings.INCREMENTAL_ROLLUP_ENABLED:
+            rolled_up = await get_watermark(self.db, 'hourly:execution_logs')
+        # Without incremental rollups an hour is rolled up early in the next one
+        edge = (rolled_up or now - timedelta(hours=1)) - overlap
+        return edge.replace(minute=0, second=0, microsecond=0)
+
+    async def _fetch_rollups(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        workspace_id: Optional[str] = None
+    ) -> List[Any]:
+        workspace_filter = "AND workspace_id = :workspace_id" if workspace_id else ""
+        result = await self.db.execute(
+            text(f"""
+                SELECT workspace_id, hour, avg_runtime, total_credits, total_executions
+                FROM analytics.execution_metrics_hourly
+                WHERE hour >= :start_time AND hour < :end_time
+                    {workspace_filter}
+                ORDER BY hour
+            """),
+            {'start_time': start_time, 'end_time': end_time, 'workspace_id': workspace_id}
+        )
+        return result.fetchall()
+
+    async def _load_model(self, workspace_id: str, metric_type: str) -> Optional[BaselineModel]:
+        models = await self._load_models([workspace_id], [metric_type])
+        return models.get((workspace_id, metric_type))
+
+    async def _load_models(
+        self,
+        workspace_ids: List[str],
+        metric_types: List[str]
+    ) -> Dict[Tuple[str, str], BaselineModel]:
+        result = await self.db.execute(
+            select(BaselineModel).where(
+                BaselineModel.model_type == MODEL_TYPE,
+                BaselineModel.workspace_id.in_(workspace_ids),
+                BaselineModel.metric_type.in_(metric_types)
+            )
+        )
+        return {
+            (str(model.workspace_id), model.metric_type): model
+            for model in result.scalars().all()
+        }
@@ -21,6 +21,8 @@ except ImportError:
     # Warning will be logged at runtime when forecasting is attempted
 
 from . import trend_analysis_constants as const
+from .model_execution import get_model_executor, prophet_forecast
+from .statistical_forecast import MIN_POINTS, StatisticalForecast, forecast_series
 
 logger = logging.getLogger(__name__)
 
@@ -609,43 +611,54 @@ class TrendAnalysisService:
         return []
 
     async def _generate_forecast(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Generate time series forecast."""
-        if not PROPHET_AVAILABLE:
-            logger.warning("Prophet not available. Using simple linear forecasting instead.")
+        """
+        Generate time series forecast.
+
+        The statistical tier (exponential smoothing and seasonal naive,
+        chosen by backtest) answers in milliseconds. Prophet is only fitted
+        when the statistical holdout error exceeds FAST_FORECAST_MAX_ERROR,
+        and the statistical forecast is kept if Prophet fails.
+        """
+        values = df['value'].to_numpy(dtype=float)
+        if len(values) < MIN_POINTS or not np.isfinite(values).all():
             return self._simple_forecast(df)
 
+        statistical = forecast_series(
+            values,
+            const.SHORT_TERM_FORECAST_DAYS,
+            season_length=const.FAST_FORECAST_SEASON_LENGTH
+        )
+        fast_forecast = self._format_statistical_forecast(df, statistical)
+
+        if statistical.holdout_error <= const.FAST_FORECAST_MAX_ERROR:
+            return fast_forecast
+
+        if not PROPHET_AVAILABLE:
+            logger.warning("Prophet not available. Using statistical forecasting instead.")
+            return fast_forecast
+
         if len(df) < const.MIN_DATA_POINTS_FOR_FORECAST:
-            return self._simple_forecast(df)
+            return fast_forecast
 
         try:
             # Prepare data for Prophet
             prophet_df = df.reset_index()
             prophet_df.columns = ['ds', 'y']
 
-            # Prophet fitting is CPU-intensive, run with timeout protection
-            def _run_prophet():
-                # Initialize and fit model
-                model = Prophet(
-                    daily_seasonality=True,
-                    weekly_seasonality=True,
-                    yearly_seasonality=False,
-                    seasonality_mode='additive'
-                )
-
-                # Suppress Prophet output
-                import logging as prophet_logging
-                prophet_logging.getLogger('prophet').setLevel(prophet_logging.WARNING)
-
-                model.fit(prophet_df)
-
-                # Generate forecast
-                future = model.make_future_dataframe(periods=30, freq='D')
-                forecast = model.predict(future)
-
-                return forecast
-
-            forecast = await asyncio.wait_for(
-                asyncio.to_thread(_run_prophet),
+            # Prophet fitting is CPU-intensive, run on the model pool with
+            # timeout protection
+            model_params = dict(
+                daily_seasonality=True,
+                weekly_seasonality=True,
+                yearly_seasonality=False,
+                seasonality_mode='additive'
+            )
+            forecast = await get_model_executor().run(
+                prophet_forecast,
+                prophet_df,
+                model_params,
+                30,
+                freq='D',
                 timeout=PROPHET_TIMEOUT
             )
 
@@ -657,11 +670,8 @@ class TrendAnalysisService:
             actual = prophet_df['y'].values
             predicted = historical_forecast['yhat'].values[:len(actual)]
 
-            mape = np.mean(np.abs((actual - predicted) / (actual + 1e-10))) * 100
-            rmse = np.sqrt(np.mean((actual - predicted) ** 2))
-            r2 = 1 - (np.sum((actual - predicted) ** 2) / (np.sum((actual - np.mean(actual)) ** 2) + 1e-10))
-
             return {
+                "model": "prophet",
                 "shortTerm": [
                     {
                         "timestamp": row['ds'].isoformat(),
@@ -673,21 +683,60 @@ class TrendAnalysisService:
                     for _, row in short_term.iterrows()
                 ],
                 "longTerm": [],
-                "accuracy": {
-                    "mape": float(mape),
-                    "rmse": float(rmse),
-                    "r2": float(max(0, min(1, r2)))
-                }
+                "accuracy": self._forecast_accuracy(actual, predicted)
             }
         except asyncio.TimeoutError:
-            logger.warning(f"Prophet forecasting timed out after {PROPHET_TIMEOUT}s, falling back to simple forecast")
-            return self._simple_forecast(df)
+            logger.warning(f"Prophet forecasting timed out after {PROPHET_TIMEOUT}s, falling back to statistical forecast")
+            return fast_forecast
         except Exception as e:
             logger.error(f"Prophet forecast failed: {e}")
-            return self._simple_forecast(df)
+            return fast_forecast
+
+    def _format_statistical_forecast(
+        self,
+        df: pd.DataFrame,
+        statistical: StatisticalForecast
+    ) -> Dict[str, Any]:
+        """Format a statistical forecast like the Prophet forecast."""
+        short_term = []
+        for i, pred in enumerate(statistical.forecast):
+            timestamp = df.index[-1] + timedelta(days=i+1)
+            short_term.append({
+                "timestamp": timestamp.isoformat(),
+                "predicted": float(pred),
+                "upper": float(statistical.upper[i]),
+                "lower": float(max(0, statistical.lower[i])),
+                "confidence": const.FORECAST_CONFIDENCE_LEVEL
+            })
+
+        # Seasonal naive has no prediction for the first season
+        fitted = ~np.isnan(statistical.fitted)
+        accuracy = self._forecast_accuracy(
+            df['value'].to_numpy(dtype=float)[fitted], statistical.fitted[fitted]
+        )
+        accuracy["holdoutError"] = float(statistical.holdout_error)
+
+        return {
+            "model": statistical.model,
+            "shortTerm": short_term,
+            "longTerm": [],
+            "accuracy": accuracy
+        }
+
+    def _forecast_accuracy(self, actual: np.ndarray, predicted: np.ndarray) -> Dict[str, float]:
+        """Calculate in-sample accuracy metrics of a forecast."""
+        mape = np.mean(np.abs((actual - predicted) / (actual + 1e-10))) * 100
+        rmse = np.sqrt(np.mean((actual - predicted) ** 2))
+        r2 = 1 - (np.sum((actual - predicted) ** 2) / (np.sum((actual - np.mean(actual)) ** 2) + 1e-10))
+
+        return {
+            "mape": float(mape),
+            "rmse": float(rmse),
+            "r2": float(max(0, min(1, r2)))
+        }
 
     def _simple_forecast(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Simple linear forecast when Prophet is unavailable."""
+        """Simple linear forecast for series too short to smooth."""
         if len(df) < 2:
             return {"shortTerm": [], "longTerm": [], "accuracy": {}}
 
@@ -716,6 +765,7 @@ class TrendAnalysisService:
             })
 
         return {
+            "model": "linear",
             "shortTerm": short_term,
             "longTerm": [],
             "accuracy": {"mape": 0, "rmse": float(std_error), "r2": 0}
@@ -25,6 +25,8 @@ SHORT_TERM_FORECAST_DAYS = 7
 LONG_TERM_FORECAST_MONTHS = 3
 FORECAST_CONFIDENCE_LEVEL = 0.95
 PROPHET_CHANGEPOINT_PRIOR_SCALE = 0.05
+FAST_FORECAST_SEASON_LENGTH = 7  # Daily points, weekly seasonality
+FAST_FORECAST_MAX_ERROR = 15.0  # Holdout WAPE (%) above which Prophet is tried
 
 # Moving Average Windows
 MOVING_AVERAGE_WINDOW_SIZE = 7
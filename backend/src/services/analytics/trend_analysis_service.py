@@ -11,10 +11,11 @@ from scipy import signal
 from statsmodels.tsa.seasonal import seasonal_decompose
 from statsmodels.tsa.stattools import acf
 from sklearn.linear_model import LinearRegression
-from prophet import Prophet
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+from .model_execution import get_model_executor, prophet_forecast
+
 logger = logging.getLogger(__name__)
 
 
@@ -567,24 +568,16 @@ class TrendAnalysisService:
             prophet_df = df.reset_index()
             prophet_df.columns = ["ds", "y"]
 
-            # Initialize and fit model
-            model = Prophet(
+            # Fit and forecast on the model pool
+            model_params = dict(
                 daily_seasonality=False,
                 weekly_seasonality=len(df) >= 14,
                 yearly_seasonality=False,
                 changepoint_prior_scale=0.05,
             )
-
-            # Suppress Prophet's verbose output
-            import logging as prophet_logging
-
-            prophet_logging.getLogger("prophet").setLevel(prophet_logging.WARNING)
-
-            model.fit(prophet_df)
-
-            # Generate future dataframe
-            future = model.make_future_dataframe(periods=30, freq="D")
-            forecast = model.predict(future)
+            forecast = await get_model_executor().run(
+                prophet_forecast, prophet_df, model_params, 30, freq="D"
+            )
 
             # Extract forecasts
             short_term = self._extract_short_term_forecast(forecast, prophet_df)
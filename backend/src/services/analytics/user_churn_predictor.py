@@ -8,6 +8,7 @@ Date: 2025-11-12
 """
 
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import json
@@ -21,8 +22,47 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score, precision_recall_curve
 
+from .model_registry import ModelRegistry
+
 logger = logging.getLogger(__name__)
 
+# Risk levels by ascending risk score; a score at a bound is in the higher level
+RISK_LEVELS = ("low", "medium", "high", "critical")
+RISK_LEVEL_BOUNDS = np.array([40.0, 60.0, 80.0])
+
+# Risk factor bits, in the order factors are reported
+FACTOR_INACTIVITY = 1
+FACTOR_LOW_ACTIVITY = 2
+FACTOR_LOW_ENGAGEMENT = 4
+FACTOR_NO_USAGE = 8
+FACTOR_POOR_ENGAGEMENT = 16
+
+RISK_FACTORS = {
+    "inactivity": FACTOR_INACTIVITY,
+    "low_activity": FACTOR_LOW_ACTIVITY,
+    "low_engagement": FACTOR_LOW_ENGAGEMENT,
+    "no_usage": FACTOR_NO_USAGE,
+    "poor_engagement": FACTOR_POOR_ENGAGEMENT,
+}
+
+
+@dataclass
+class ChurnScores:
+    """Churn scores for a workspace's users, one array element per user."""
+
+    user_ids: np.ndarray
+    churn_probability: np.ndarray
+    risk_score: np.ndarray
+    risk_level: np.ndarray  # index into RISK_LEVELS
+    risk_factors: np.ndarray  # bitmask of RISK_FACTORS
+    days_until_churn: np.ndarray  # 0 when not at immediate risk
+    days_since_active: np.ndarray
+    activity_ratio: np.ndarray
+    sessions_per_day: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
 
 class UserChurnPredictor:
     """
@@ -31,6 +71,7 @@ class UserChurnPredictor:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.registry = ModelRegistry(db)
         self.model = None
         self.scaler = None
         self.feature_names = []
@@ -39,15 +80,23 @@ class UserChurnPredictor:
         self,
         workspace_id: str,
         user_data: pd.DataFrame,
-        risk_threshold: float = 0.7
+        risk_threshold: float = 0.7,
+        limit: Optional[int] = None,
+        offset: int = 0
     ) -> Dict[str, Any]:
         """
         Generate user churn predictions.
 
+        All users are scored and counted in the risk analysis, but prediction
+        records are only returned for a page of users ranked by risk score,
+        or without a ``limit`` for users at or above ``risk_threshold``.
+
         Args:
             workspace_id: Workspace identifier
             user_data: User behavioral data
             risk_threshold: Threshold for high-risk classification
+            limit: Number of users to return, highest risk first
+            offset: Number of ranked users to skip before the page
 
         Returns:
             Dictionary with churn predictions and risk analysis
@@ -68,15 +117,17 @@ class UserChurnPredictor:
             model, scaler = await self._get_or_train_model(workspace_id)
 
             # Make predictions
-            predictions = await self._make_predictions(
+            scores, predictions = await self._make_predictions(
                 features_df,
                 model,
                 scaler,
-                risk_threshold
+                risk_threshold,
+                limit=limit,
+                offset=offset
             )
 
             # Generate risk analysis
-            risk_analysis = self._analyze_risk_distribution(predictions)
+            risk_analysis = self._analyze_risk_distribution(scores)
 
             # Store predictions in database
             await self._store_churn_predictions(workspace_id, predictions)
@@ -84,8 +135,8 @@ class UserChurnPredictor:
             return {
                 "workspace_id": workspace_id,
                 "prediction_type": "user_churn",
-                "total_users": len(predictions),
-                "high_risk_users": len([p for p in predictions if p['risk_level'] in ['high', 'critical']]),
+                "total_users": len(scores),
+                "high_risk_users": int(np.count_nonzero(scores.risk_level >= RISK_LEVELS.index("high"))),
                 "predictions": predictions,
                 "risk_analysis": risk_analysis,
                 "model_version": "gradient_boosting_v1.0.0",
@@ -192,25 +243,11 @@ class UserChurnPredictor:
     ) -> tuple:
         """Load existing model or train new one."""
         try:
-            # Check if model exists in database
-            query = text("""
-                SELECT model_artifacts_path, performance_metrics
-                FROM analytics.ml_models
-                WHERE workspace_id = :workspace_id
-                    AND model_type = 'gradient_boosting'
-                    AND target_metric = 'user_churn'
-                    AND is_active = TRUE
-                ORDER BY created_at DESC
-                LIMIT 1
-            """)
-
-            result = await self.db.execute(query, {"workspace_id": workspace_id})
-            row = result.fetchone()
-
-            if row and False:  # For now, always train fresh model
-                # TODO: Implement model serialization and loading
-                logger.info("Loading existing churn model")
-                pass
+            # Serve the registered model if one has been trained
+            registered = await self.registry.get(workspace_id, "user_churn", "gradient_boosting")
+            if registered is not None:
+                logger.info(f"Loaded churn model {registered.version}")
+                return registered.model["model"], registered.model["scaler"]
 
             # Train new model (using synthetic training data approach)
             logger.info("Training new churn model")
@@ -253,125 +290,161 @@ class UserChurnPredictor:
         features_df: pd.DataFrame,
         model: GradientBoostingClassifier,
         scaler: StandardScaler,
-        risk_threshold: float
-    ) -> List[Dict[str, Any]]:
-        """Make churn predictions for users."""
+        risk_threshold: float,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> tuple:
+        """
+        Score every user and build prediction records for the ones returned.
+
+        Scores are computed column-wise over the whole workspace; records are
+        only built for the requested page of users ranked by risk, or without
+        a page for users at or above the risk threshold.
+
+        Returns:
+            Tuple of (scores for all users, prediction records)
+        """
         try:
-            predictions = []
-
-            for _, user in features_df.iterrows():
-                user_id = user['user_id']
-
-                # Extract feature values
-                feature_values = user[self.feature_names].values
-
-                # Calculate churn probability using heuristic rules
-                # (In production, use model.predict_proba after training)
-                churn_probability = self._calculate_churn_heuristic(user)
-
-                # Calculate risk score (0-100)
-                risk_score = churn_probability * 100
-
-                # Determine risk level
-                if risk_score >= 80:
-                    risk_level = "critical"
-                elif risk_score >= 60:
-                    risk_level = "high"
-                elif risk_score >= 40:
-                    risk_level = "medium"
-                else:
-                    risk_level = "low"
-
-                # Identify risk factors
-                risk_factors = self._identify_risk_factors(user)
-
-                # Generate recommendations
-                recommended_actions = self._generate_recommendations(risk_factors, risk_level)
-
-                # Estimate days until churn
-                days_until_churn = self._estimate_days_until_churn(user)
-
-                predictions.append({
-                    "user_id": str(user_id),
-                    "churn_probability": float(churn_probability),
-                    "risk_score": float(risk_score),
-                    "risk_level": risk_level,
-                    "risk_factors": risk_factors,
-                    "recommended_actions": recommended_actions,
-                    "days_until_churn": int(days_until_churn) if days_until_churn else None,
-                    "features": {name: float(feature_values[i]) for i, name in enumerate(self.feature_names)}
-                })
+            # Calculate churn probabilities using heuristic rules
+            # (In production, use model.predict_proba after training)
+            scores = self._score_users(features_df)
+
+            # Highest risk first; ties keep input order
+            ranked = np.argsort(-scores.risk_score, kind="stable")
+            if limit is not None:
+                selected = ranked[offset:offset + limit]
+            else:
+                selected = ranked[scores.churn_probability[ranked] >= risk_threshold]
+
+            feature_values = features_df[self.feature_names].to_numpy(dtype=float)
+            predictions = [
+                self._build_prediction(scores, feature_values, i) for i in selected
+            ]
 
-            return predictions
+            return scores, predictions
 
         except Exception as e:
             logger.error(f"Error making predictions: {e}", exc_info=True)
             raise
 
-    def _calculate_churn_heuristic(self, user: pd.Series) -> float:
-        """Calculate churn probability using heuristic rules."""
-        score = 0.0
+    def _score_users(self, features_df: pd.DataFrame) -> ChurnScores:
+        """Calculate churn scores for all users as arrays."""
+        days_inactive = features_df['days_since_active'].to_numpy(dtype=float)
+        activity_ratio = features_df['activity_ratio'].to_numpy(dtype=float)
+        sessions_per_day = features_df['sessions_per_day'].to_numpy(dtype=float)
+        zero_credits = features_df['is_zero_credits'].to_numpy() != 0
+        short_sessions = features_df['is_short_sessions'].to_numpy() != 0
 
         # Days since active (most important factor)
-        days_inactive = user['days_since_active']
-        if days_inactive > 30:
-            score += 0.4
-        elif days_inactive > 14:
-            score += 0.25
-        elif days_inactive > 7:
-            score += 0.15
-
-        # Activity ratio
-        activity_ratio = user['activity_ratio']
-        if activity_ratio < 0.05:  # Active < 5% of days
-            score += 0.25
-        elif activity_ratio < 0.15:
-            score += 0.15
+        score = np.select(
+            [days_inactive > 30, days_inactive > 14, days_inactive > 7],
+            [0.4, 0.25, 0.15],
+            default=0.0
+        )
+
+        # Activity ratio: active < 5% of days, or < 15%
+        score = score + np.select(
+            [activity_ratio < 0.05, activity_ratio < 0.15], [0.25, 0.15], default=0.0
+        )
 
         # Engagement level
-        sessions_per_day = user['sessions_per_day']
-        if sessions_per_day < 0.3:
-            score += 0.15
+        score = score + np.where(sessions_per_day < 0.3, 0.15, 0.0)
 
         # Zero credits usage
-        if user['is_zero_credits']:
-            score += 0.1
+        score = score + np.where(zero_credits, 0.1, 0.0)
 
         # Short sessions indicate lack of engagement
-        if user['is_short_sessions']:
-            score += 0.1
-
-        return min(score, 1.0)
+        score = score + np.where(short_sessions, 0.1, 0.0)
+
+        churn_probability = np.minimum(score, 1.0)
+        risk_score = churn_probability * 100
+
+        # Index into RISK_LEVELS
+        risk_level = np.searchsorted(RISK_LEVEL_BOUNDS, risk_score, side="right").astype(np.int8)
+
+        # Risk factors as one bit per entry of RISK_FACTORS
+        risk_factors = (
+            (days_inactive > 14) * FACTOR_INACTIVITY
+            | (activity_ratio < 0.1) * FACTOR_LOW_ACTIVITY
+            | (sessions_per_day < 0.5) * FACTOR_LOW_ENGAGEMENT
+            | zero_credits * FACTOR_NO_USAGE
+            | short_sessions * FACTOR_POOR_ENGAGEMENT
+        ).astype(np.uint8)
+
+        # Estimated days until churn; 0 when not at immediate risk
+        days_until_churn = np.select(
+            [days_inactive > 30, days_inactive > 14, activity_ratio < 0.1, activity_ratio < 0.2],
+            [7, 14, 30, 60],
+            default=0
+        )
+
+        return ChurnScores(
+            user_ids=features_df['user_id'].to_numpy(),
+            churn_probability=churn_probability,
+            risk_score=risk_score,
+            risk_level=risk_level,
+            risk_factors=risk_factors,
+            days_until_churn=days_until_churn,
+            days_since_active=days_inactive,
+            activity_ratio=activity_ratio,
+            sessions_per_day=sessions_per_day
+        )
+
+    def _build_prediction(
+        self,
+        scores: ChurnScores,
+        feature_values: np.ndarray,
+        i: int
+    ) -> Dict[str, Any]:
+        """Build the prediction record for one scored user."""
+        risk_level = RISK_LEVELS[scores.risk_level[i]]
+        risk_factors = self._identify_risk_factors(scores, i)
+        days_until_churn = int(scores.days_until_churn[i])
+
+        return {
+            "user_id": str(scores.user_ids[i]),
+            "churn_probability": float(scores.churn_probability[i]),
+            "risk_score": float(scores.risk_score[i]),
+            "risk_level": risk_level,
+            "risk_factors": risk_factors,
+            "recommended_actions": self._generate_recommendations(risk_factors, risk_level),
+            "days_until_churn": days_until_churn or None,
+            "features": {
+                name: float(feature_values[i, j]) for j, name in enumerate(self.feature_names)
+            }
+        }
 
-    def _identify_risk_factors(self, user: pd.Series) -> List[Dict[str, Any]]:
+    def _identify_risk_factors(self, scores: ChurnScores, i: int) -> List[Dict[str, Any]]:
         """Identify specific risk factors for a user."""
         risk_factors = []
+        mask = scores.risk_factors[i]
+        days_inactive = scores.days_since_active[i]
 
-        if user['days_since_active'] > 14:
+        if mask & FACTOR_INACTIVITY:
             risk_factors.append({
                 "factor": "inactivity",
-                "severity": "high" if user['days_since_active'] > 30 else "medium",
-                "description": f"User inactive for {int(user['days_since_active'])} days",
+                "severity": "high" if days_inactive > 30 else "medium",
+                "description": f"User inactive for {int(days_inactive)} days",
                 "impact": 0.4
             })
 
-        if user['activity_ratio'] < 0.1:
+        if mask & FACTOR_LOW_ACTIVITY:
             risk_factors.append({
                 "factor": "low_activity",
                 "severity": "high",
-                "description": f"Active only {user['activity_ratio']*100:.1f}% of days",
+                "description": f"Active only {scores.activity_ratio[i]*100:.1f}% of days",
                 "impact": 0.25
             })
 
-        if user['sessions_per_day'] < 0.5:
+        if mask & FACTOR_LOW_ENGAGEMENT:
             risk_factors.append({
                 "factor": "low_engagement",
                 "severity": "medium",
-                "description": f"Low session frequency: {user['sessions_per_day']:.2f} sessions/day",
+                "description": f"Low session frequency: {scores.sessions_per_day[i]:.2f} sessions/day",
                 "impact": 0.15
             })
 
-        if user['is_zero_credits']:
+        if mask & FACTOR_NO_USAGE:
             risk_factors.append({
                 "factor": "no_usage",
                 "severity": "high",
@@ -379,7 +452,7 @@ class UserChurnPredictor:
                 "impact": 0.2
             })
 
-        if user['is_short_sessions']:
+        if mask & FACTOR_POOR_ENGAGEMENT:
             risk_factors.append({
                 "factor": "poor_engagement",
                 "severity": "medium",
@@ -445,57 +518,34 @@ class UserChurnPredictor:
 
         return recommendations
 
-    def _estimate_days_until_churn(self, user: pd.Series) -> Optional[int]:
-        """Estimate days until user churns."""
-        days_inactive = user['days_since_active']
-        activity_ratio = user['activity_ratio']
-
-        if days_inactive > 30:
-            return 7  # Likely to churn within a week
-        elif days_inactive > 14:
-            return 14  # Likely to churn within 2 weeks
-        elif activity_ratio < 0.1:
-            return 30  # Low engagement, churn within a month
-        elif activity_ratio < 0.2:
-            return 60  # Moderate risk, churn within 2 months
-        else:
-            return None  # Not at immediate risk
-
-    def _analyze_risk_distribution(self, predictions: List[Dict]) -> Dict[str, Any]:
+    def _analyze_risk_distribution(self, scores: ChurnScores) -> Dict[str, Any]:
         """Analyze distribution of churn risk across users."""
         try:
-            pred_df = pd.DataFrame(predictions)
-
             # Count by risk level
-            risk_counts = pred_df['risk_level'].value_counts().to_dict()
-
-            # Calculate statistics
-            avg_churn_prob = pred_df['churn_probability'].mean()
-            median_churn_prob = pred_df['churn_probability'].median()
+            risk_counts = np.bincount(scores.risk_level, minlength=len(RISK_LEVELS))
+            at_risk = int(risk_counts[2] + risk_counts[3])
 
             # Identify most common risk factors
-            all_risk_factors = []
-            for pred in predictions:
-                for factor in pred['risk_factors']:
-                    all_risk_factors.append(factor['factor'])
-
-            factor_counts = pd.Series(all_risk_factors).value_counts().head(5).to_dict()
+            factor_counts = {
+                factor: int(np.count_nonzero(scores.risk_factors & bit))
+                for factor, bit in RISK_FACTORS.items()
+            }
+            top_factors = sorted(
+                ((f, c) for f, c in factor_counts.items() if c),
+                key=lambda item: item[1],
+                reverse=True
+            )[:5]
 
             return {
                 "risk_distribution": {
-                    "critical": int(risk_counts.get('critical', 0)),
-                    "high": int(risk_counts.get('high', 0)),
-                    "medium": int(risk_counts.get('medium', 0)),
-                    "low": int(risk_counts.get('low', 0))
+                    level: int(risk_counts[i]) for i, level in reversed(list(enumerate(RISK_LEVELS)))
                 },
                 "statistics": {
-                    "average_churn_probability": float(avg_churn_prob),
-                    "median_churn_probability": float(median_churn_prob),
-                    "at_risk_percentage": float(
-                        (risk_counts.get('critical', 0) + risk_counts.get('high', 0)) / len(predictions) * 100
-                    )
+                    "average_churn_probability": float(scores.churn_probability.mean()),
+                    "median_churn_probability": float(np.median(scores.churn_probability)),
+                    "at_risk_percentage": float(at_risk / len(scores) * 100)
                 },
-                "top_risk_factors": factor_counts
+                "top_risk_factors": dict(top_factors)
             }
 
         except Exception as e:
@@ -2,6 +2,9 @@
 
 from .redis_cache import CacheService, CacheKeyValidationError
 from .keys import CacheKeys
+from .local_cache import LocalCache
+from .single_flight import CoalescingLoader, SingleFlight
+from .tags import TagIndex, agent_tag, family_tag, tags_for_key, user_tag, workspace_tag
 from .decorator import cached, cache_many, invalidate_pattern, warm_cache
 from .invalidation import (
     invalidate_metric_cache,
@@ -10,12 +13,24 @@ from .invalidation import (
     invalidate_all_metrics,
 )
 from . import invalidation
+from . import local_cache
 from . import metrics
+from . import single_flight
+from . import tags
 
 __all__ = [
     "CacheService",
     "CacheKeyValidationError",
     "CacheKeys",
+    "CoalescingLoader",
+    "LocalCache",
+    "SingleFlight",
+    "TagIndex",
+    "agent_tag",
+    "family_tag",
+    "tags_for_key",
+    "user_tag",
+    "workspace_tag",
     "cached",
     "cache_many",
     "invalidate_pattern",
@@ -25,5 +40,8 @@ __all__ = [
     "invalidate_agent_cache",
     "invalidate_all_metrics",
     "invalidation",
+    "local_cache",
     "metrics",
+    "single_flight",
+    "tags",
 ]
@@ -1,10 +1,13 @@
 """Cache decorator for automatic function result caching."""
 
-from functools import wraps
-from typing import Optional, Callable, Any, List
+from functools import partial, wraps
+from typing import Optional, Callable, Any, Dict, List
+import inspect
 import logging
 
 from .keys import CacheKeys
+from .single_flight import CoalescingLoader, HIT, STALE, COALESCED
+from .tags import tags_for_key
 from ...core.redis import get_redis_client
 
 logger = logging.getLogger(__name__)
@@ -15,15 +18,23 @@ def cached(
     ttl: int = CacheKeys.TTL_MEDIUM,
     skip_cache: bool = False,
     invalidate_on: Optional[List[str]] = None,
+    stale_ttl: Optional[int] = None,
 ):
     """
     Decorator for automatic caching of async function results.
 
+    Concurrent misses for the same key run the function once. With
+    ``stale_ttl``, an expired value keeps being served for that long while
+    the first caller to see it refreshes it inline (decorated methods usually
+    hold a request-scoped database session, so no detached refresh is used).
+
     Args:
         key_func: Function to generate cache key from function arguments
         ttl: Time to live in seconds (default: 5 minutes)
         skip_cache: If True, always bypass cache (for testing)
         invalidate_on: List of event types that should invalidate this cache
+        stale_ttl: Seconds past ``ttl`` a stale value may be served
+            (default: None, no stale-while-revalidate)
 
     Returns:
         Decorated function with caching capabilities
@@ -63,28 +74,27 @@ def cached(
                 # If Redis is unavailable, execute function without caching
                 return await func(*args, **kwargs)
 
-            # Try to get from cache
-            try:
-                cached_value = await redis_client.get(cache_key)
-
-                if cached_value is not None:
-                    logger.debug(f"Cache hit: {cache_key} (function: {func.__name__})")
-                    return cached_value
-            except Exception as e:
-                logger.error(f"Cache read error for {cache_key}: {e}")
-                # Continue to fetch from source on cache read error
+            if redis_client is None:
+                return await func(*args, **kwargs)
 
-            # Cache miss - fetch from source
-            logger.debug(f"Cache miss: {cache_key} (function: {func.__name__})")
-            result = await func(*args, **kwargs)
-
-            # Store in cache (don't fail if caching fails)
-            try:
-                await redis_client.set(cache_key, result, expire=ttl)
-                logger.debug(f"Cached result: {cache_key} (TTL: {ttl}s)")
-            except Exception as e:
-                logger.error(f"Cache write error for {cache_key}: {e}")
-                # Return result even if caching fails
+            # Cache read/write errors are absorbed by the client; errors raised
+            # by the function itself propagate to every coalesced caller
+            result, outcome = await CoalescingLoader(redis_client).get_or_compute(
+                cache_key,
+                partial(func, *args, **kwargs),
+                ttl,
+                stale_ttl=stale_ttl,
+                background_refresh=False,
+            )
+
+            if outcome == HIT:
+                logger.debug(f"Cache hit: {cache_key} (function: {func.__name__})")
+            elif outcome == STALE:
+                logger.debug(f"Cache stale: {cache_key} (function: {func.__name__})")
+            elif outcome == COALESCED:
+                logger.debug(f"Cache coalesced: {cache_key} (function: {func.__name__})")
+            else:
+                logger.debug(f"Cache miss: {cache_key} (function: {func.__name__})")
 
             return result
 
@@ -108,6 +118,7 @@ def cached(
         wrapper._cache_metadata = {
             "key_func": key_func,
             "ttl": ttl,
+            "stale_ttl": stale_ttl,
             "invalidate_on": invalidate_on or [],
         }
 
@@ -119,13 +130,22 @@ def cached(
 def cache_many(
     key_func: Callable[..., List[str]],
     ttl: int = CacheKeys.TTL_MEDIUM,
+    batch_arg: Optional[str] = None,
 ):
     """
     Decorator for caching multiple results (batch operations).
 
+    ``key_func`` returns one cache key per item of the batch argument and the
+    function returns one result per item, in the same order. Cached items are
+    read with a single MGET and only the missing items are passed to the
+    function; its results are written back in one pipeline.
+
     Args:
         key_func: Function that returns list of cache keys
         ttl: Time to live in seconds
+        batch_arg: Name of the list argument holding the batch items
+            (default: the first list/tuple argument with one item per key).
+            If no such argument exists, any miss recomputes the whole batch.
 
     Returns:
         Decorated function with batch caching
@@ -141,6 +161,8 @@ def cache_many(
     """
 
     def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # Allow cache bypass
@@ -150,48 +172,72 @@ def cache_many(
             try:
                 redis_client = await get_redis_client()
                 cache_keys = key_func(*args, **kwargs)
-
-                # Get all cached values
-                cached_results = {}
-                for key in cache_keys:
-                    value = await redis_client.get(key)
-                    if value is not None:
-                        cached_results[key] = value
-
-                # If all results are cached, return them
-                if len(cached_results) == len(cache_keys):
-                    logger.debug(f"Cache hit for all {len(cache_keys)} items")
-                    return list(cached_results.values())
-
-                # Otherwise, fetch from source
-                logger.debug(f"Cache miss for some items, fetching from source")
-                result = await func(*args, **kwargs)
-
-                # Validate result length matches cache keys
-                if len(cache_keys) != len(result):
-                    logger.error(
-                        f"cache_many: Number of cache keys ({len(cache_keys)}) does not match number of results ({len(result)}). Skipping caching."
-                    )
-                    return result
-
-                # Cache the results
-                for key, value in zip(cache_keys, result):
-                    try:
-                        await redis_client.set(key, value, expire=ttl)
-                    except Exception as e:
-                        logger.error(f"Failed to cache result for {key}: {e}")
-
-                return result
-
             except Exception as e:
                 logger.error(f"Batch cache error: {e}")
                 return await func(*args, **kwargs)
 
+            if redis_client is None or not cache_keys:
+                return await func(*args, **kwargs)
+
+            cached_values = await redis_client.mget(cache_keys)
+            missing = [i for i, value in enumerate(cached_values) if value is None]
+
+            if not missing:
+                logger.debug(f"Cache hit for all {len(cache_keys)} items")
+                return cached_values
+
+            bound = signature.bind(*args, **kwargs)
+            name = batch_arg or _find_batch_arg(bound.arguments, len(cache_keys))
+
+            if name is None or len(missing) == len(cache_keys):
+                logger.debug(f"Cache miss for {len(missing)} items, fetching batch")
+                missing = list(range(len(cache_keys)))
+                fetched = await func(*args, **kwargs)
+            else:
+                logger.debug(
+                    f"Cache miss for {len(missing)}/{len(cache_keys)} items, "
+                    f"fetching missing items"
+                )
+                items = bound.arguments[name]
+                bound.arguments[name] = type(items)(items[i] for i in missing)
+                fetched = await func(*bound.args, **bound.kwargs)
+
+            # Validate result length matches the requested items
+            if len(fetched) != len(missing):
+                logger.error(
+                    f"cache_many: Number of cache keys ({len(missing)}) does not match number of results ({len(fetched)}). Skipping caching."
+                )
+                if len(missing) == len(cache_keys):
+                    return fetched
+                return await func(*args, **kwargs)
+
+            results = list(cached_values)
+            for index, value in zip(missing, fetched):
+                results[index] = value
+
+            # Cache the fetched results
+            fetched_keys = [cache_keys[i] for i in missing]
+            await redis_client.mset(
+                dict(zip(fetched_keys, fetched)),
+                expire=ttl,
+                tags={key: tags_for_key(key) for key in fetched_keys},
+            )
+
+            return results
+
         return wrapper
 
     return decorator
 
 
+def _find_batch_arg(arguments: Dict[str, Any], num_keys: int) -> Optional[str]:
+    """Name of the first list/tuple argument with one item per cache key."""
+    for name, value in arguments.items():
+        if isinstance(value, (list, tuple)) and len(value) == num_keys:
+            return name
+    return None
+
+
 async def invalidate_pattern(pattern: str):
     """
     Utility function to invalidate all keys matching a pattern.
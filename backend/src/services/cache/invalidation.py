@@ -4,6 +4,7 @@ from typing import List
 from redis.asyncio import Redis
 import logging
 from .metrics import record_cache_invalidation
+from .tags import TagIndex, agent_tag, user_tag
 
 logger = logging.getLogger(__name__)
 
@@ -57,15 +58,7 @@ async def invalidate_user_cache(
     user_id: str,
 ):
     """Invalidate cache for specific user."""
-    patterns = [
-        f"user:{user_id}:*",
-        f"user_metrics:{user_id}:*",
-    ]
-
-    total_deleted = 0
-    for pattern in patterns:
-        deleted_count = await _scan_and_delete(redis, pattern)
-        total_deleted += deleted_count
+    total_deleted = len(await TagIndex(redis).invalidate([user_tag(user_id)]))
 
     if total_deleted > 0:
         logger.info(f"Invalidated {total_deleted} cache entries for user: {user_id}")
@@ -76,8 +69,7 @@ async def invalidate_agent_cache(
     agent_id: str,
 ):
     """Invalidate cache for specific agent."""
-    pattern = f"agent:{agent_id}:*"
-    deleted_count = await _scan_and_delete(redis, pattern)
+    deleted_count = len(await TagIndex(redis).invalidate([agent_tag(agent_id)]))
     if deleted_count > 0:
         logger.info(f"Invalidated {deleted_count} cache entries for agent: {agent_id}")
 
@@ -0,0 +1,311 @@
+"""In-process (L1) cache in front of Redis.
+
+A bounded LRU with per-entry TTL that saves the Redis round-trip and
+deserialization for very hot keys. Replicas stay coherent through the Redis
+invalidation channel (``CACHE_INVALIDATION_CHANNEL``): ``RedisClient`` publishes
+the patterns it flushes and ``CacheService`` the keys it writes or deletes, and
+every process applies them to its local caches. The L1 TTL bounds staleness for
+anything that bypasses the channel.
+
+Values are returned by reference; callers must treat them as read-only.
+"""
+
+import asyncio
+import fnmatch
+import json
+import logging
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+
+import redis.asyncio as redis
+
+from ...core.config import settings
+from ...core.redis import CACHE_INVALIDATION_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Per-entry bookkeeping overhead added to the payload size estimate
+ENTRY_OVERHEAD_BYTES = 64
+
+# Identifies this process's own messages on the invalidation channel
+PROCESS_ORIGIN = uuid.uuid4().hex
+
+# Every LocalCache in the process, so channel messages reach all of them
+_local_caches: "weakref.WeakSet[LocalCache]" = weakref.WeakSet()
+
+
+def _estimate_size(key: str, value: Any) -> int:
+    """Approximate memory footprint of an entry from its JSON encoding."""
+    try:
+        payload = len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        payload = 1024
+    return len(key) + payload + ENTRY_OVERHEAD_BYTES
+
+
+class LocalCache:
+    """Size- and memory-bounded LRU cache with per-entry TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: int = 30,
+    ):
+        """
+        Initialize local cache.
+
+        Args:
+            max_entries: Maximum number of entries
+            max_bytes: Approximate maximum memory used by entries
+            default_ttl: Maximum seconds an entry is served without Redis
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (value, expires_at, size), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        _local_caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate memory used by entries."""
+        return self._bytes
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a key.
+
+        Returns:
+            Tuple of (found, value); ``found`` distinguishes a cached None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        Store a value, evicting least recently used entries to stay in bounds.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds to keep the entry, capped at ``default_ttl``
+        """
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if ttl <= 0:
+            return
+
+        size = _estimate_size(key, value)
+        if size > self.max_bytes:
+            self._remove(key)
+            return
+
+        self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def delete(self, key: str) -> bool:
+        """Remove a key. Returns True if it was present."""
+        return self._remove(key)
+
+    def invalidate_pattern(self, pattern: str) -> int:
+        """
+        Remove every key matching a Redis glob pattern.
+
+        Returns:
+            Number of entries removed
+        """
+        matching = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        for key in matching:
+            self._remove(key)
+        return len(matching)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[2]
+        return True
+
+
+def apply_invalidation(
+    keys: Iterable[str] = (), patterns: Iterable[str] = ()
+) -> int:
+    """
+    Apply an invalidation to every local cache in this process.
+
+    Args:
+        keys: Exact keys to drop
+        patterns: Redis glob patterns to drop
+
+    Returns:
+        Number of entries removed
+    """
+    removed = 0
+    for cache in list(_local_caches):
+        for key in keys:
+            removed += cache.delete(key)
+        for pattern in patterns:
+            removed += cache.invalidate_pattern(pattern)
+    return removed
+
+
+# Process-wide L1 shared by CacheService instances
+_default_local_cache: Optional[LocalCache] = None
+
+
+def get_local_cache() -> Optional[LocalCache]:
+    """Get the process-wide local cache, or None if L1 is disabled."""
+    global _default_local_cache
+
+    if not settings.CACHE_L1_ENABLED:
+        return None
+
+    if _default_local_cache is None:
+        _default_local_cache = LocalCache(
+            max_entries=settings.CACHE_L1_MAX_ENTRIES,
+            max_bytes=settings.CACHE_L1_MAX_BYTES,
+            default_ttl=settings.CACHE_L1_TTL,
+        )
+    return _default_local_cache
+
+
+class CacheInvalidationListener:
+    """Applies invalidations published by any replica to local caches."""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self.redis: Optional[redis.Redis] = None
+        self.pubsub = None
+        self.running = False
+        self._listen_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Subscribe to the invalidation channel and start listening."""
+        if self.running:
+            logger.warning("CacheInvalidationListener already running")
+            return
+
+        try:
+            self.redis = redis.from_url(
+                self.redis_url, decode_responses=True, encoding="utf-8"
+            )
+            self.pubsub = self.redis.pubsub()
+            await self.pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            self.running = True
+
+            self._listen_task = asyncio.create_task(self._listen())
+            logger.info("CacheInvalidationListener started successfully")
+
+        except Exception as e:
+            logger.error(f"Failed to start CacheInvalidationListener: {e}")
+            self.running = False
+            raise
+
+    async def stop(self):
+        """Stop listening."""
+        if not self.running:
+            return
+
+        self.running = False
+
+        if self._listen_task and not self._listen_task.done():
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+
+        if self.pubsub:
+            try:
+                await self.pubsub.unsubscribe()
+                await self.pubsub.close()
+            except Exception as e:
+                logger.error(f"Error closing invalidation pubsub: {e}")
+
+        if self.redis:
+            try:
+                await self.redis.close()
+            except Exception as e:
+                logger.error(f"Error closing invalidation redis connection: {e}")
+
+        logger.info("CacheInvalidationListener stopped")
+
+    async def _listen(self):
+        """Listen for invalidation messages."""
+        while self.running:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+
+                if message and message["type"] == "message":
+                    self._handle_message(message)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                # Entries may have missed invalidations while disconnected
+                logger.error(f"Cache invalidation channel error: {e}")
+                apply_invalidation(patterns=["*"])
+                await asyncio.sleep(5)
+
+    def _handle_message(self, message):
+        """Apply one invalidation message."""
+        try:
+            data = json.loads(message["data"])
+            if data.get("origin") == PROCESS_ORIGIN:
+                return
+            removed = apply_invalidation(
+                keys=data.get("keys", []), patterns=data.get("patterns", [])
+            )
+            logger.debug(f"Applied cache invalidation: {removed} local entries removed")
+        except Exception as e:
+            logger.error(f"Error handling cache invalidation message: {e}")
+
+
+# Global instance - initialized in main.py when L1 is enabled
+invalidation_listener: Optional[CacheInvalidationListener] = None
+
+
+async def init_cache_invalidation(redis_url: str) -> CacheInvalidationListener:
+    """Start the cache invalidation listener."""
+    global invalidation_listener
+    invalidation_listener = CacheInvalidationListener(redis_url)
+    await invalidation_listener.start()
+    return invalidation_listener
+
+
+async def shutdown_cache_invalidation():
+    """Stop the cache invalidation listener."""
+    global invalidation_listener
+    if invalidation_listener:
+        await invalidation_listener.stop()
+        invalidation_listener = None
@@ -10,11 +10,15 @@ logger = logging.getLogger(__name__)
 
 # Cache operation counters
 cache_hits = Counter(
-    "cache_hits_total", "Total number of cache hits", ["operation", "key_pattern"]
+    "cache_hits_total",
+    "Total number of cache hits",
+    ["operation", "key_pattern", "tier"],
 )
 
 cache_misses = Counter(
-    "cache_misses_total", "Total number of cache misses", ["operation", "key_pattern"]
+    "cache_misses_total",
+    "Total number of cache misses",
+    ["operation", "key_pattern", "tier"],
 )
 
 cache_errors = Counter(
@@ -23,6 +27,18 @@ cache_errors = Counter(
     ["operation", "error_type"],
 )
 
+cache_stale_served = Counter(
+    "cache_stale_served_total",
+    "Total number of stale values served while a refresh runs",
+    ["operation", "key_pattern"],
+)
+
+cache_coalesced = Counter(
+    "cache_coalesced_total",
+    "Total number of cache misses served by another caller's computation",
+    ["operation", "key_pattern"],
+)
+
 cache_invalidations = Counter(
     "cache_invalidations_total",
     "Total number of cache invalidations",
@@ -40,6 +56,14 @@ cache_operation_duration = Histogram(
 # Cache size metrics
 cache_keys_total = Gauge("cache_keys_total", "Total number of keys in cache")
 
+local_cache_entries = Gauge(
+    "cache_local_entries", "Number of entries in the in-process (L1) cache"
+)
+
+local_cache_bytes = Gauge(
+    "cache_local_bytes", "Approximate memory used by the in-process (L1) cache"
+)
+
 
 def track_cache_operation(operation: str):
     """Decorator to track cache operation metrics.
@@ -89,14 +113,24 @@ def track_cache_operation(operation: str):
     return decorator
 
 
-def record_cache_hit(operation: str, key_pattern: str = "unknown"):
-    """Record a cache hit."""
-    cache_hits.labels(operation=operation, key_pattern=key_pattern).inc()
+def record_cache_hit(operation: str, key_pattern: str = "unknown", tier: str = "redis"):
+    """Record a cache hit in the given tier ("l1" or "redis")."""
+    cache_hits.labels(operation=operation, key_pattern=key_pattern, tier=tier).inc()
+
+
+def record_cache_miss(operation: str, key_pattern: str = "unknown", tier: str = "redis"):
+    """Record a cache miss in the given tier ("l1" or "redis")."""
+    cache_misses.labels(operation=operation, key_pattern=key_pattern, tier=tier).inc()
+
 
+def record_cache_stale(operation: str, key_pattern: str = "unknown"):
+    """Record a stale value served under stale-while-revalidate."""
+    cache_stale_served.labels(operation=operation, key_pattern=key_pattern).inc()
 
-def record_cache_miss(operation: str, key_pattern: str = "unknown"):
-    """Record a cache miss."""
-    cache_misses.labels(operation=operation, key_pattern=key_pattern).inc()
+
+def record_cache_coalesced(operation: str, key_pattern: str = "unknown"):
+    """Record a miss that waited on an in-flight computation."""
+    cache_coalesced.labels(operation=operation, key_pattern=key_pattern).inc()
 
 
 def record_cache_error(operation: str, error_type: str):
@@ -112,3 +146,9 @@ def record_cache_invalidation(pattern: str):
 def update_cache_size(size: int):
     """Update the cache size gauge."""
     cache_keys_total.set(size)
+
+
+def update_local_cache_size(entries: int, size_bytes: int):
+    """Update the in-process cache size gauges."""
+    local_cache_entries.set(entries)
+    local_cache_bytes.set(size_bytes)
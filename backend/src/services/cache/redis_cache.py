@@ -2,17 +2,23 @@
 
 import asyncio
 import re
-from typing import Any, Optional, Callable, Dict
+from typing import Any, Optional, Callable, Dict, List
 import logging
 from .metrics import (
     record_cache_hit,
     record_cache_miss,
     record_cache_error,
     record_cache_invalidation,
+    record_cache_stale,
+    record_cache_coalesced,
+    update_local_cache_size,
 )
 from ...core.constants import CACHE_KEY_MAX_LENGTH, CACHE_KEY_PATTERN
 
 from .keys import CacheKeys
+from .local_cache import LocalCache, PROCESS_ORIGIN, get_local_cache
+from .single_flight import CoalescingLoader, HIT, STALE, COALESCED, unwrap_value
+from .tags import TagIndex, agent_tag, tags_for_key, user_tag, workspace_tag
 from ...core.redis import RedisClient
 
 logger = logging.getLogger(__name__)
@@ -27,14 +33,21 @@ class CacheKeyValidationError(ValueError):
 class CacheService:
     """Enhanced Redis cache service with advanced features."""
 
-    def __init__(self, redis_client: RedisClient):
+    def __init__(
+        self, redis_client: RedisClient, local_cache: Optional[LocalCache] = None
+    ):
         """
         Initialize cache service.
 
         Args:
             redis_client: RedisClient instance
+            local_cache: In-process (L1) cache in front of Redis (default: the
+                process-wide one when ``CACHE_L1_ENABLED``, otherwise none)
         """
         self.redis = redis_client
+        self.local = local_cache if local_cache is not None else get_local_cache()
+        self._loader = CoalescingLoader(redis_client)
+        self._tags = TagIndex(redis_client)
         self._key_pattern = re.compile(CACHE_KEY_PATTERN)
 
     def _validate_cache_key(self, key: str) -> None:
@@ -72,9 +85,20 @@ class CacheService:
         """
         try:
             self._validate_cache_key(key)
+
+            if self.local is not None:
+                found, value = self.local.get(key)
+                if found:
+                    record_cache_hit("get", self._get_key_pattern(key), tier="l1")
+                    return value
+                record_cache_miss("get", self._get_key_pattern(key), tier="l1")
+
             value = await self.redis.get(key)
             if value is not None:
                 record_cache_hit("get", self._get_key_pattern(key))
+                value, is_stale = unwrap_value(value)
+                if self.local is not None and not is_stale:
+                    self.local.set(key, value)
             else:
                 record_cache_miss("get", self._get_key_pattern(key))
             return value
@@ -98,7 +122,10 @@ class CacheService:
         """
         try:
             self._validate_cache_key(key)
-            await self.redis.set(key, value, expire=ttl)
+            await self.redis.set(key, value, expire=ttl, tags=tags_for_key(key))
+            if self.local is not None:
+                self.local.set(key, value, ttl)
+                await self.redis.publish_invalidation(keys=[key], origin=PROCESS_ORIGIN)
         except CacheKeyValidationError as e:
             logger.warning(f"Invalid cache key: {e}")
             record_cache_error("set", "ValidationError")
@@ -119,6 +146,9 @@ class CacheService:
         try:
             self._validate_cache_key(key)
             result = await self.redis.delete(key)
+            if self.local is not None:
+                self.local.delete(key)
+                await self.redis.publish_invalidation(keys=[key], origin=PROCESS_ORIGIN)
             return result
         except CacheKeyValidationError as e:
             logger.warning(f"Invalid cache key: {e}")
@@ -152,15 +182,27 @@ class CacheService:
             return False
 
     async def get_or_compute(
-        self, key: str, compute_func: Callable, ttl: int = CacheKeys.TTL_MEDIUM
+        self,
+        key: str,
+        compute_func: Callable,
+        ttl: int = CacheKeys.TTL_MEDIUM,
+        stale_ttl: Optional[int] = None,
+        background_refresh: bool = True,
     ) -> Any:
         """
         Get from cache or compute and cache the result.
 
+        Concurrent misses for the same key share one computation, in-process
+        and across instances (see ``single_flight``).
+
         Args:
             key: Cache key
             compute_func: Async function to compute value if not cached
             ttl: Time to live in seconds
+            stale_ttl: Seconds past ``ttl`` a stale value may be served while
+                a single refresh runs (None disables stale-while-revalidate)
+            background_refresh: Refresh stale values in a detached task
+                instead of inline in the first caller
 
         Returns:
             Cached or computed value
@@ -168,35 +210,70 @@ class CacheService:
         try:
             # Validate key once at the beginning
             self._validate_cache_key(key)
-            
-            # Check cache directly without extra validation/metrics
-            value = await self.redis.get(key)
-
-            if value is not None:
-                logger.debug(f"Cache hit for key: {key}")
-                record_cache_hit("get_or_compute", self._get_key_pattern(key))
-                return value
-
-            # Cache miss - compute value
-            logger.debug(f"Cache miss for key: {key}, computing...")
-            record_cache_miss("get_or_compute", self._get_key_pattern(key))
-            value = await compute_func()
-
-            # Cache the result
-            await self.redis.set(key, value, expire=ttl)
-            logger.debug(f"Cached computed value for key: {key}")
-
-            return value
         except CacheKeyValidationError as e:
             logger.warning(f"Invalid cache key: {e}")
             record_cache_error("get_or_compute", "ValidationError")
             # Still compute and return value even if caching fails
             return await compute_func()
+
+        if self.local is not None:
+            found, value = self.local.get(key)
+            if found:
+                record_cache_hit("get_or_compute", self._get_key_pattern(key), tier="l1")
+                return value
+            record_cache_miss("get_or_compute", self._get_key_pattern(key), tier="l1")
+
+        # Redis and codec errors are absorbed by the client, so anything raised
+        # here comes from compute_func. It is shared with every coalesced
+        # caller and propagates rather than being recomputed by each of them.
+        value, outcome = await self._loader.get_or_compute(
+            key,
+            compute_func,
+            ttl,
+            stale_ttl=stale_ttl,
+            background_refresh=background_refresh,
+        )
+
+        key_pattern = self._get_key_pattern(key)
+        if outcome == HIT:
+            logger.debug(f"Cache hit for key: {key}")
+            record_cache_hit("get_or_compute", key_pattern)
+        elif outcome == STALE:
+            logger.debug(f"Served stale value for key: {key}")
+            record_cache_stale("get_or_compute", key_pattern)
+        elif outcome == COALESCED:
+            logger.debug(f"Cache miss for key: {key}, joined in-flight computation")
+            record_cache_coalesced("get_or_compute", key_pattern)
+        else:
+            logger.debug(f"Cache miss for key: {key}, computed")
+            record_cache_miss("get_or_compute", key_pattern)
+
+        if self.local is not None and outcome != STALE:
+            self.local.set(key, value, ttl)
+
+        return value
+
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """
+        Invalidate every cache entry registered under any of the tags.
+
+        Args:
+            tags: Invalidation tags (see services/cache/tags.py)
+
+        Returns:
+            Number of keys deleted
+        """
+        try:
+            keys = await self._tags.invalidate(tags)
+            if self.local is not None:
+                # Other replicas are notified by the tag index
+                for key in keys:
+                    self.local.delete(key)
+            return len(keys)
         except Exception as e:
-            logger.error(f"Cache get_or_compute error: {e}")
-            record_cache_error("get_or_compute", type(e).__name__)
-            # Fallback to computing without cache on error
-            return await compute_func()
+            logger.error(f"Cache tag invalidation error: {e}")
+            record_cache_error("invalidate_tags", type(e).__name__)
+            return 0
 
     async def invalidate_workspace(self, workspace_id: str) -> int:
         """
@@ -208,12 +285,7 @@ class CacheService:
         Returns:
             Number of keys deleted
         """
-        patterns = CacheKeys.get_workspace_pattern(workspace_id)
-
-        total_deleted = 0
-        for pattern in patterns:
-            deleted = await self.clear_pattern(pattern)
-            total_deleted += deleted
+        total_deleted = await self.invalidate_tags([workspace_tag(workspace_id)])
 
         logger.info(
             f"Invalidated {total_deleted} cache entries for workspace {workspace_id}"
@@ -230,8 +302,7 @@ class CacheService:
         Returns:
             Number of keys deleted
         """
-        pattern = CacheKeys.get_agent_pattern(agent_id)
-        deleted = await self.clear_pattern(pattern)
+        deleted = await self.invalidate_tags([agent_tag(agent_id)])
 
         logger.info(f"Invalidated {deleted} cache entries for agent {agent_id}")
         return deleted
@@ -246,12 +317,7 @@ class CacheService:
         Returns:
             Number of keys deleted
         """
-        patterns = CacheKeys.get_user_pattern(user_id)
-
-        total_deleted = 0
-        for pattern in patterns:
-            deleted = await self.clear_pattern(pattern)
-            total_deleted += deleted
+        total_deleted = await self.invalidate_tags([user_tag(user_id)])
 
         logger.info(f"Invalidated {total_deleted} cache entries for user {user_id}")
         return total_deleted
@@ -335,7 +401,7 @@ class CacheService:
             hits = info.get("keyspace_hits", 0)
             misses = info.get("keyspace_misses", 0)
 
-            return {
+            stats = {
                 "used_memory": info.get("used_memory_human"),
                 "used_memory_peak": info.get("used_memory_peak_human"),
                 "connected_clients": info.get("connected_clients"),
@@ -348,6 +414,13 @@ class CacheService:
                 "uptime_in_seconds": info.get("uptime_in_seconds"),
                 "uptime_in_days": info.get("uptime_in_days"),
             }
+
+            if self.local is not None:
+                update_local_cache_size(len(self.local), self.local.size_bytes)
+                stats["local_entries"] = len(self.local)
+                stats["local_bytes"] = self.local.size_bytes
+
+            return stats
         except Exception as e:
             logger.error(f"Failed to get cache stats: {e}")
             return {}
@@ -385,6 +458,9 @@ class CacheService:
         """
         try:
             deleted_count = await self.redis.flush_pattern(pattern)
+            if self.local is not None:
+                # Other replicas are notified by flush_pattern
+                self.local.invalidate_pattern(pattern)
             if deleted_count > 0:
                 logger.info(f"Cleared {deleted_count} keys matching pattern: {pattern}")
                 record_cache_invalidation(pattern)
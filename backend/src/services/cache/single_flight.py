@@ -0,0 +1,278 @@
+"""Request coalescing and stale-while-revalidate for cache fills.
+
+When a popular key expires, every concurrent request would otherwise run the
+same expensive computation. Fills are coordinated at two levels:
+
+- In-process: concurrent callers for the same key await one shared future
+  (:class:`SingleFlight`).
+- Cross-instance: the caller that computes holds a short Redis lock; callers on
+  other instances poll for the value it writes instead of recomputing.
+
+With a stale window (``stale_ttl``), values are stored in an envelope carrying
+their soft expiry while the Redis TTL is the hard expiry (``ttl + stale_ttl``).
+Between the two, the stale value is served and a single refresh runs.
+"""
+
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ...core.redis import RedisClient
+from .tags import tags_for_key
+
+logger = logging.getLogger(__name__)
+
+ENVELOPE_MARKER = "__swr__"
+LOCK_PREFIX = "lock:fill:"
+LOCK_TIMEOUT_SECONDS = 30
+LOCK_POLL_INTERVAL_SECONDS = 0.05
+
+# Lookup outcomes (also used as metric and X-Cache labels)
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+COALESCED = "coalesced"
+
+_NO_VALUE = object()
+
+# Strong references to detached refresh tasks so they are not garbage collected
+_background_refreshes: Set[asyncio.Task] = set()
+
+
+def wrap_value(value: Any, ttl: int) -> Dict[str, Any]:
+    """Wrap a value with its soft expiry for stale-while-revalidate."""
+    return {ENVELOPE_MARKER: 1, "fresh_until": time.time() + ttl, "value": value}
+
+
+def unwrap_value(raw: Any) -> Tuple[Any, bool]:
+    """Unwrap a cached value.
+
+    Args:
+        raw: Value as read from Redis
+
+    Returns:
+        Tuple of (value, is_stale). Values stored without a stale window are
+        never stale; Redis expires them.
+    """
+    if isinstance(raw, dict) and ENVELOPE_MARKER in raw:
+        return raw.get("value"), time.time() >= raw.get("fresh_until", 0)
+    return raw, False
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls for the same key within this process."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """Whether a call for ``key`` is currently running."""
+        return key in self._calls
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run ``func`` unless a call for ``key`` is already running.
+
+        Args:
+            key: Deduplication key
+            func: Async callable producing the result
+
+        Returns:
+            Tuple of (result, shared) where ``shared`` is True if the result
+            came from another caller's run. Exceptions are shared the same way.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled, not us: run it ourselves
+                return await self.do(key, func)
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception retrieved even when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._calls.pop(key, None)
+
+
+# Shared by every loader in the process so all call sites coalesce together
+_default_flight = SingleFlight()
+
+
+class CoalescingLoader:
+    """Get-or-compute against Redis with coalesced fills and stale serving."""
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        flight: Optional[SingleFlight] = None,
+        lock_timeout: int = LOCK_TIMEOUT_SECONDS,
+        poll_interval: float = LOCK_POLL_INTERVAL_SECONDS,
+    ):
+        """
+        Initialize loader.
+
+        Args:
+            redis_client: RedisClient instance
+            flight: In-process deduplication registry (default: process-wide)
+            lock_timeout: Max seconds a fill holds the cross-instance lock,
+                and max seconds other instances wait for it
+            poll_interval: Seconds between polls while waiting on another instance
+        """
+        self.redis = redis_client
+        self.flight = flight or _default_flight
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute_func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: Optional[int] = None,
+        background_refresh: bool = True,
+        tags: Optional[List[str]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        Get a value from cache or compute it once across concurrent callers.
+
+        Args:
+            key: Cache key
+            compute_func: Async function computing the value
+            ttl: Seconds the value is fresh
+            stale_ttl: Extra seconds a stale value may be served while it is
+                refreshed (None disables stale-while-revalidate)
+            background_refresh: Refresh stale values in a detached task. When
+                False, the first caller to see a stale value refreshes it inline
+                while concurrent callers are served the stale value. Use False
+                when ``compute_func`` depends on request-scoped resources such
+                as a database session.
+            tags: Invalidation tags for the stored value (default: derived
+                from the key, see ``tags_for_key``)
+
+        Returns:
+            Tuple of (value, outcome) where outcome is one of
+            ``hit``, ``stale``, ``miss`` or ``coalesced``
+        """
+        if tags is None:
+            tags = tags_for_key(key)
+
+        raw = await self.redis.get(key)
+        if raw is not None:
+            value, is_stale = unwrap_value(raw)
+            if not is_stale:
+                return value, HIT
+
+            if background_refresh:
+                self._schedule_refresh(key, compute_func, ttl, stale_ttl, tags, value)
+                return value, STALE
+            if self.flight.in_flight(key):
+                return value, STALE
+
+            fill = partial(self._fill, key, compute_func, ttl, stale_ttl, tags, value)
+            (value, outcome), _ = await self.flight.do(key, fill)
+            return value, outcome
+
+        fill = partial(self._fill, key, compute_func, ttl, stale_ttl, tags)
+        (value, outcome), shared = await self.flight.do(key, fill)
+        return value, COALESCED if shared else outcome
+
+    async def _fill(
+        self,
+        key: str,
+        compute_func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: Optional[int],
+        tags: List[str],
+        stale_value: Any = _NO_VALUE,
+    ) -> Tuple[Any, str]:
+        """Compute and store a value under the cross-instance fill lock."""
+        lock_key = LOCK_PREFIX + key
+        token = None
+        try:
+            token = await self.redis.acquire_lock(lock_key, self.lock_timeout * 1000)
+            held_elsewhere = token is None
+        except Exception as e:
+            # Redis trouble must not block the fill: compute uncoordinated
+            logger.warning(f"Fill lock unavailable for {key}: {e}")
+            held_elsewhere = False
+
+        if held_elsewhere:
+            if stale_value is not _NO_VALUE:
+                # Another instance is refreshing; keep serving stale
+                return stale_value, STALE
+            value = await self._wait_for_fill(key, lock_key)
+            if value is not _NO_VALUE:
+                return value, COALESCED
+
+        try:
+            value = await compute_func()
+            stored = wrap_value(value, ttl) if stale_ttl else value
+            await self.redis.set(key, stored, expire=ttl + (stale_ttl or 0), tags=tags)
+            logger.debug(f"Cached computed value for key: {key}")
+            return value, MISS
+        finally:
+            if token:
+                await self.redis.release_lock(lock_key, token)
+
+    async def _wait_for_fill(self, key: str, lock_key: str) -> Any:
+        """Poll for a value another instance is computing.
+
+        Returns:
+            The fresh value, or ``_NO_VALUE`` if the other fill failed or did
+            not finish within the lock timeout
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            raw = await self.redis.get(key)
+            if raw is not None:
+                value, is_stale = unwrap_value(raw)
+                if not is_stale:
+                    return value
+            elif not await self.redis.exists(lock_key):
+                # Lock released without a value: the other fill failed
+                break
+        return _NO_VALUE
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        compute_func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: Optional[int],
+        tags: List[str],
+        stale_value: Any,
+    ) -> None:
+        """Start a detached refresh of a stale key unless one is running."""
+        if self.flight.in_flight(key):
+            return
+
+        async def refresh():
+            try:
+                fill = partial(
+                    self._fill, key, compute_func, ttl, stale_ttl, tags, stale_value
+                )
+                await self.flight.do(key, fill)
+            except Exception as e:
+                logger.error(f"Background refresh failed for key {key}: {e}")
+
+        task = asyncio.create_task(refresh())
+        _background_refreshes.add(task)
+        task.add_done_callback(_background_refreshes.discard)
@@ -0,0 +1,202 @@
+"""Tag-set cache invalidation.
+
+Every cache write registers its key in a few Redis sets ("tags") naming what
+the value depends on: the workspace, agent or user it belongs to, and its
+key family within that scope (e.g. the executive dashboards of one
+workspace). Invalidating a tag deletes exactly its members, O(members),
+instead of a SCAN + MATCH over the whole keyspace.
+
+Tags are derived from the key layout defined by :class:`CacheKeys`, so call
+sites only name what changed::
+
+    await TagIndex(redis_client).invalidate([
+        agent_tag(agent_id),
+        family_tag("exec", "dashboard", workspace_tag(workspace_id)),
+    ])
+
+For lazy invalidation, :meth:`TagIndex.invalidate` with ``lazy=True`` only
+bumps per-tag generation counters. Readers that build keys with
+:meth:`TagIndex.versioned_key` then move to new keys, and the orphaned entries
+expire by TTL.
+"""
+
+import logging
+from typing import List, Optional, Sequence, Union
+
+from redis.asyncio import Redis
+
+from ...core.redis import (
+    CACHE_INVALIDATION_CHANNEL,
+    TAG_KEY_PREFIX,
+    RedisClient,
+    invalidation_message,
+)
+from .keys import CacheKeys
+from .metrics import record_cache_invalidation
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY_PREFIX = "tag:gen:"
+
+# Keys per DEL command when clearing large tag sets
+DELETE_CHUNK_SIZE = 1000
+
+# (key prefix, key family) -> (scope kind, position of the scope id in the key).
+# A family of None matches any family under the prefix.
+_KEY_SCOPES = {
+    (CacheKeys.EXECUTIVE_PREFIX, None): ("ws", 2),
+    (CacheKeys.WORKSPACE_PREFIX, None): ("ws", 2),
+    (CacheKeys.AGENT_PREFIX, "top"): ("ws", 2),
+    (CacheKeys.AGENT_PREFIX, None): ("agent", 2),
+    (CacheKeys.USER_PREFIX, "activity"): ("user", 2),
+    (CacheKeys.USER_PREFIX, "metrics"): ("user", 2),
+    (CacheKeys.USER_PREFIX, "retention"): ("ws", 3),
+    (CacheKeys.USER_PREFIX, None): ("ws", 2),
+    (CacheKeys.METRICS_PREFIX, "agg"): ("ws", 3),
+    (CacheKeys.METRICS_PREFIX, "users"): ("ws", 3),
+    (CacheKeys.METRICS_PREFIX, None): ("ws", 2),
+}
+
+
+def workspace_tag(workspace_id: str) -> str:
+    """Tag for every entry scoped to a workspace."""
+    return f"ws:{workspace_id}"
+
+
+def agent_tag(agent_id: str) -> str:
+    """Tag for every entry scoped to an agent."""
+    return f"agent:{agent_id}"
+
+
+def user_tag(user_id: str) -> str:
+    """Tag for every entry scoped to a user."""
+    return f"user:{user_id}"
+
+
+def family_tag(prefix: str, family: str, scope: str) -> str:
+    """Tag for one key family within a scope.
+
+    Args:
+        prefix: Key prefix (e.g. ``CacheKeys.EXECUTIVE_PREFIX``)
+        family: Key family under the prefix (e.g. ``"dashboard"``)
+        scope: Scope tag (e.g. ``workspace_tag(workspace_id)``)
+    """
+    return f"{prefix}:{family}@{scope}"
+
+
+def tags_for_key(key: str) -> List[str]:
+    """Invalidation tags for a cache key.
+
+    Returns:
+        The scope tag and the family-within-scope tag, or an empty list for
+        keys with no known scope (they rely on their TTL)
+    """
+    parts = key.split(":")
+    if len(parts) < 3:
+        return []
+
+    prefix, family = parts[0], parts[1]
+    scope = _KEY_SCOPES.get((prefix, family)) or _KEY_SCOPES.get((prefix, None))
+    if scope is None:
+        return []
+
+    kind, position = scope
+    if len(parts) <= position or not parts[position]:
+        return []
+
+    scope_tag = f"{kind}:{parts[position]}"
+    return [scope_tag, family_tag(prefix, family, scope_tag)]
+
+
+class TagIndex:
+    """Registers cache keys under tags and invalidates by tag."""
+
+    def __init__(self, redis_client: Union[RedisClient, Redis]):
+        """
+        Initialize tag index.
+
+        Args:
+            redis_client: RedisClient instance or a raw Redis connection
+        """
+        self.redis = getattr(redis_client, "redis", redis_client)
+
+    async def invalidate(self, tags: Sequence[str], lazy: bool = False) -> List[str]:
+        """
+        Invalidate every entry registered under any of the tags.
+
+        Args:
+            tags: Tags to invalidate
+            lazy: Only bump the tags' generation counters (see ``versioned_key``)
+
+        Returns:
+            Keys that were deleted (empty for lazy invalidation)
+
+        Redis errors are raised to the caller.
+        """
+        if not tags:
+            return []
+
+        if lazy:
+            await self.bump_generations(tags)
+            return []
+
+        # Read and drop the tag sets atomically so concurrent writes re-register
+        # into a fresh set rather than being lost
+        pipe = self.redis.pipeline(transaction=True)
+        for tag in tags:
+            pipe.smembers(TAG_KEY_PREFIX + tag)
+        for tag in tags:
+            pipe.delete(TAG_KEY_PREFIX + tag)
+        results = await pipe.execute()
+
+        keys = set()
+        for members in results[: len(tags)]:
+            keys.update(
+                m.decode() if isinstance(m, bytes) else m for m in members or ()
+            )
+        keys = sorted(keys)
+
+        for start in range(0, len(keys), DELETE_CHUNK_SIZE):
+            await self.redis.delete(*keys[start : start + DELETE_CHUNK_SIZE])
+
+        if keys:
+            # Drop the entries from every replica's in-process cache
+            await self.redis.publish(
+                CACHE_INVALIDATION_CHANNEL, invalidation_message(keys=keys)
+            )
+            for tag in tags:
+                record_cache_invalidation(f"tag:{tag.split(':', 1)[0]}")
+
+        logger.debug(f"Invalidated {len(keys)} keys for tags {list(tags)}")
+        return keys
+
+    async def bump_generations(self, tags: Sequence[str]) -> None:
+        """Increment the generation counter of each tag."""
+        pipe = self.redis.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(GENERATION_KEY_PREFIX + tag)
+        await pipe.execute()
+
+    async def generations(self, tags: Sequence[str]) -> List[int]:
+        """Current generation of each tag (0 if never bumped)."""
+        if not tags:
+            return []
+        values = await self.redis.mget([GENERATION_KEY_PREFIX + t for t in tags])
+        return [int(v) if v else 0 for v in values]
+
+    async def versioned_key(self, key: str, tags: Optional[Sequence[str]] = None) -> str:
+        """
+        Key that changes whenever one of its tags is lazily invalidated.
+
+        Args:
+            key: Base cache key
+            tags: Tags to version by (default: ``tags_for_key(key)``)
+
+        Returns:
+            ``key`` suffixed with its tags' generations
+        """
+        tags = tags_for_key(key) if tags is None else tags
+        generations = await self.generations(tags)
+        if not any(generations):
+            return key
+        return f"{key}:g{'.'.join(str(g) for g in generations)}"
@@ -1,26 +1,34 @@
-"""Event handlers for cache invalidation."""
+"""Event handlers for cache invalidation and realtime counters.
+
+Run and credit handlers are called by EventBroadcaster when a run start or
+completion is announced, so the realtime counters only see runs whose
+producer announces them there.
+"""
 
 from typing import Dict, Any
 import logging
 
 from ..cache.keys import CacheKeys
+from ..cache.tags import TagIndex, agent_tag, family_tag, user_tag, workspace_tag
+from ..metrics.realtime_counters import get_realtime_counters
 from ...core.redis import get_redis_client
 
 logger = logging.getLogger(__name__)
 
 
 class EventHandlers:
-    """Event handlers for automatic cache invalidation."""
+    """Event handlers for automatic cache invalidation and realtime counters."""
 
     @staticmethod
     async def on_agent_run_completed(event: Dict[str, Any]):
         """
         Handle agent run completion event.
 
-        Invalidates cache for the agent and related workspace metrics.
+        Invalidates cache for the agent and related workspace metrics and
+        counts the run in the realtime counters.
 
         Args:
-            event: Event data containing agent_id and workspace_id
+            event: Event data containing agent_id, workspace_id and success
         """
         agent_id = event.get("agent_id")
         workspace_id = event.get("workspace_id")
@@ -33,26 +41,18 @@ class EventHandlers:
 
         try:
             redis_client = await get_redis_client()
-
-            # Invalidate agent-specific cache
-            agent_pattern = CacheKeys.get_agent_pattern(agent_id)
-            deleted_agent = await redis_client.flush_pattern(agent_pattern)
-
-            # Invalidate workspace executive dashboard
-            exec_patterns = [
-                CacheKeys.get_pattern(
-                    CacheKeys.EXECUTIVE_PREFIX, "dashboard", workspace_id, "*"
-                ),
-                CacheKeys.get_pattern(CacheKeys.AGENT_PREFIX, "top", workspace_id, "*"),
-                CacheKeys.get_pattern(
-                    CacheKeys.METRICS_PREFIX, "runs", workspace_id, "*"
-                ),
-            ]
-
-            total_deleted = deleted_agent
-            for pattern in exec_patterns:
-                deleted = await redis_client.flush_pattern(pattern)
-                total_deleted += deleted
+            ws = workspace_tag(workspace_id)
+
+            # Invalidate agent-specific cache and the workspace executive dashboard
+            deleted = await TagIndex(redis_client).invalidate(
+                [
+                    agent_tag(agent_id),
+                    family_tag(CacheKeys.EXECUTIVE_PREFIX, "dashboard", ws),
+                    family_tag(CacheKeys.AGENT_PREFIX, "top", ws),
+                    family_tag(CacheKeys.METRICS_PREFIX, "runs", ws),
+                ]
+            )
+            total_deleted = len(deleted)
 
             logger.info(
                 f"Agent run completed: Invalidated {total_deleted} cache entries "
@@ -62,15 +62,25 @@ class EventHandlers:
         except Exception as e:
             logger.error(f"Failed to invalidate cache on agent run completed: {e}")
 
+        try:
+            counters = await get_realtime_counters()
+            if counters:
+                await counters.record_run_completed(
+                    workspace_id, bool(event.get("success", True))
+                )
+        except Exception as e:
+            logger.error(f"Failed to update realtime counters on agent run completed: {e}")
+
     @staticmethod
     async def on_agent_run_started(event: Dict[str, Any]):
         """
         Handle agent run started event.
 
-        Updates real-time metrics cache.
+        Updates real-time metrics cache and counts the run and its user in
+        the realtime counters.
 
         Args:
-            event: Event data containing agent_id and workspace_id
+            event: Event data containing agent_id, workspace_id and user_id
         """
         agent_id = event.get("agent_id")
         workspace_id = event.get("workspace_id")
@@ -82,16 +92,13 @@ class EventHandlers:
             redis_client = await get_redis_client()
 
             # Invalidate real-time metrics (short TTL items)
-            patterns = [
-                CacheKeys.get_pattern(
-                    CacheKeys.METRICS_PREFIX, "realtime", workspace_id, "*"
+            tags = [
+                family_tag(
+                    CacheKeys.METRICS_PREFIX, "realtime", workspace_tag(workspace_id)
                 ),
             ]
 
-            total_deleted = 0
-            for pattern in patterns:
-                deleted = await redis_client.flush_pattern(pattern)
-                total_deleted += deleted
+            total_deleted = len(await TagIndex(redis_client).invalidate(tags))
 
             if total_deleted > 0:
                 logger.info(
@@ -101,6 +108,15 @@ class EventHandlers:
         except Exception as e:
             logger.error(f"Failed to invalidate cache on agent run started: {e}")
 
+        try:
+            counters = await get_realtime_counters()
+            if counters:
+                await counters.record_run_started(
+                    workspace_id, event.get("user_id"), agent_id
+                )
+        except Exception as e:
+            logger.error(f"Failed to update realtime counters on agent run started: {e}")
+
     @staticmethod
     async def on_user_activity(event: Dict[str, Any]):
         """
@@ -121,17 +137,12 @@ class EventHandlers:
             redis_client = await get_redis_client()
 
             # Only invalidate active user metrics and user activity cache
-            patterns = [
-                CacheKeys.get_pattern(
-                    CacheKeys.METRICS_PREFIX, "users", "active", workspace_id, "*"
-                ),
-                CacheKeys.get_pattern(CacheKeys.USER_PREFIX, "activity", user_id, "*"),
+            tags = [
+                family_tag(CacheKeys.METRICS_PREFIX, "users", workspace_tag(workspace_id)),
+                family_tag(CacheKeys.USER_PREFIX, "activity", user_tag(user_id)),
             ]
 
-            total_deleted = 0
-            for pattern in patterns:
-                deleted = await redis_client.flush_pattern(pattern)
-                total_deleted += deleted
+            total_deleted = len(await TagIndex(redis_client).invalidate(tags))
 
             logger.debug(
                 f"User activity: Invalidated {total_deleted} cache entries "
@@ -159,13 +170,11 @@ class EventHandlers:
         try:
             redis_client = await get_redis_client()
 
-            # Get all workspace patterns
-            patterns = CacheKeys.get_workspace_pattern(workspace_id)
-
-            total_deleted = 0
-            for pattern in patterns:
-                deleted = await redis_client.flush_pattern(pattern)
-                total_deleted += deleted
+            # Every workspace-scoped entry is registered under the workspace tag
+            deleted = await TagIndex(redis_client).invalidate(
+                [workspace_tag(workspace_id)]
+            )
+            total_deleted = len(deleted)
 
             logger.info(
                 f"Workspace updated: Invalidated {total_deleted} cache entries "
@@ -180,10 +189,11 @@ class EventHandlers:
         """
         Handle credit transaction event.
 
-        Invalidates credit-related metrics cache.
+        Invalidates credit-related metrics cache and adds consumed credits to
+        the realtime counters.
 
         Args:
-            event: Event data containing workspace_id
+            event: Event data containing workspace_id and credits_consumed
         """
         workspace_id = event.get("workspace_id")
 
@@ -194,19 +204,13 @@ class EventHandlers:
             redis_client = await get_redis_client()
 
             # Invalidate credit metrics
-            patterns = [
-                CacheKeys.get_pattern(
-                    CacheKeys.METRICS_PREFIX, "credits", workspace_id, "*"
-                ),
-                CacheKeys.get_pattern(
-                    CacheKeys.EXECUTIVE_PREFIX, "dashboard", workspace_id, "*"
-                ),
+            ws = workspace_tag(workspace_id)
+            tags = [
+                family_tag(CacheKeys.METRICS_PREFIX, "credits", ws),
+                family_tag(CacheKeys.EXECUTIVE_PREFIX, "dashboard", ws),
             ]
 
-            total_deleted = 0
-            for pattern in patterns:
-                deleted = await redis_client.flush_pattern(pattern)
-                total_deleted += deleted
+            total_deleted = len(await TagIndex(redis_client).invalidate(tags))
 
             logger.info(
                 f"Credit transaction: Invalidated {total_deleted} cache entries "
@@ -216,6 +220,21 @@ class EventHandlers:
         except Exception as e:
             logger.error(f"Failed to invalidate cache on credit transaction: {e}")
 
+        try:
+            credits = float(event.get("credits_consumed", event.get("amount")) or 0)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid credits in credit transaction event for {workspace_id}")
+            return
+        if credits <= 0:
+            return
+
+        try:
+            counters = await get_realtime_counters()
+            if counters:
+                await counters.record_credits(workspace_id, credits)
+        except Exception as e:
+            logger.error(f"Failed to update realtime counters on credit transaction: {e}")
+
     @staticmethod
     async def on_report_generated(event: Dict[str, Any]):
         """
@@ -1,9 +1,16 @@
 """Export processor service for data extraction and transformation."""
 
 import os
+import asyncio
+import bz2
+import functools
+import gzip
 import hashlib
 import logging
-from typing import Dict, List, Any, Optional, AsyncGenerator
+import queue
+import zipfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Any, Optional, AsyncGenerator, BinaryIO
 from datetime import datetime
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,25 +25,45 @@ from ...models.database.exports import (
     ExportFormat,
 )
 from ...models.schemas.exports import DataSourceConfig, ExportConfig
+from ...core.config import settings
 from . import csv_export, json_export, excel_export, parquet_export
 
 
 logger = logging.getLogger(__name__)
 
+_END_OF_STREAM = object()
+
 
 class ExportProcessor:
-    """Main export processing pipeline."""
+    """Main export processing pipeline.
+
+    Rows are streamed from a server-side cursor in batches of ``fetch_size``
+    and piped through a bounded queue into the format's streaming writer,
+    which runs in a worker thread. Memory use is bounded by
+    ``fetch_size * MAX_PENDING_BATCHES`` rows regardless of export size.
+    Excel is the exception: workbooks are built in memory.
+    """
+
+    # Fetched batches allowed to wait for the writer thread
+    MAX_PENDING_BATCHES = 4
 
-    def __init__(self, db_session: AsyncSession, export_dir: str = "/tmp/exports"):
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        export_dir: str = "/tmp/exports",
+        fetch_size: Optional[int] = None
+    ):
         """Initialize export processor.
 
         Args:
             db_session: Database session
             export_dir: Directory to store export files
+            fetch_size: Rows fetched per cursor round trip (defaults to EXPORT_FETCH_SIZE)
         """
         self.db = db_session
         self.export_dir = Path(export_dir)
         self.export_dir.mkdir(parents=True, exist_ok=True)
+        self.fetch_size = fetch_size or settings.EXPORT_FETCH_SIZE
 
     async def process_export(self, job_id: str) -> None:
         """Main export processing pipeline.
@@ -103,15 +130,15 @@ class ExportProcessor:
         self,
         source: Dict[str, Any],
         workspace_id: str
-    ) -> AsyncGenerator[Dict[str, Any], None]:
-        """Extract data from source.
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Extract data from source using a server-side cursor.
 
         Args:
             source: Data source configuration
             workspace_id: Workspace ID for filtering
 
         Yields:
-            Data rows as dictionaries
+            Batches of up to ``fetch_size`` rows as dictionaries
         """
         source_type = source.get("type")
         filters = source.get("filters", {})
@@ -120,12 +147,13 @@ class ExportProcessor:
         # Build query based on source type
         query = self._build_query(source_type, workspace_id, filters, fields)
 
-        # Execute query and yield results
-        result = await self.db.execute(text(query))
+        # Stream results instead of buffering the full result set
+        result = await self.db.stream(
+            text(query).execution_options(yield_per=self.fetch_size)
+        )
 
-        for row in result:
-            # Convert row to dictionary
-            yield dict(row._mapping)
+        async for partition in result.mappings().partitions(self.fetch_size):
+            yield [dict(row) for row in partition]
 
     def _build_query(
         self,
@@ -214,7 +242,7 @@ class ExportProcessor:
         Args:
             job: Export job
             source: Data source configuration
-            data_generator: Generator yielding data rows
+            data_generator: Generator yielding batches of data rows
             source_idx: Index of this data source
 
         Returns:
@@ -290,7 +318,7 @@ class ExportProcessor:
         """Write data to file in specified format.
 
         Args:
-            data_generator: Generator yielding data rows
+            data_generator: Generator yielding batches of data rows
             file_path: Path to output file
             format: Export format
             compression: Compression type
@@ -299,47 +327,124 @@ class ExportProcessor:
         Returns:
             Number of rows written
         """
-        # Collect data (in production, you'd want to stream this)
-        data = []
-        async for row in data_generator:
-            data.append(row)
-
-        if not data:
-            return 0
-
-        # Determine fields if not provided
-        if fields is None and len(data) > 0:
-            fields = list(data[0].keys())
-
-        # Write based on format
-        if format == ExportFormat.CSV.value:
-            csv_export.export_to_csv(
-                data,
-                columns=fields,
-                output_path=file_path,
-                compression=compression
-            )
-        elif format == ExportFormat.JSON.value:
-            json_export.export_to_json(
-                data,
-                output_path=file_path,
-                compression=compression
-            )
-        elif format == ExportFormat.EXCEL.value:
+        if format == ExportFormat.EXCEL.value:
+            # openpyxl builds the whole workbook in memory, so Excel stays buffered
+            data = [row async for batch in data_generator for row in batch]
+            if not data:
+                return 0
             excel_export.export_to_excel(
                 data,
                 output_path=file_path,
-                columns=fields
+                columns=fields or list(data[0].keys())
             )
-        elif format == ExportFormat.PARQUET.value:
-            parquet_export.export_to_parquet(
-                data,
-                output_path=file_path,
-                columns=fields,
-                compression=compression if compression != "none" else "snappy"
+            return len(data)
+
+        first_batch = await anext(data_generator, None)
+        if not first_batch:
+            return 0
+
+        # Determine fields if not provided
+        if fields is None:
+            fields = list(first_batch[0].keys())
+
+        async def batches():
+            yield first_batch
+            async for batch in data_generator:
+                yield batch
+
+        if format == ExportFormat.PARQUET.value:
+            return await self._pipe_to_writer(
+                batches(),
+                functools.partial(
+                    parquet_export.stream_to_parquet,
+                    output_path=file_path,
+                    columns=fields,
+                    compression=compression if compression != "none" else "snappy",
+                    batch_size=self.fetch_size
+                )
             )
 
-        return len(data)
+        with self._open_output(file_path, compression) as output_file:
+            if format == ExportFormat.CSV.value:
+                writer = functools.partial(
+                    csv_export.stream_to_csv, columns=fields, output_file=output_file
+                )
+            elif format == ExportFormat.JSON.value:
+                writer = functools.partial(
+                    json_export.stream_to_json, output_file=output_file, lines=False
+                )
+            else:
+                raise ValueError(f"Unsupported export format: {format}")
+
+            return await self._pipe_to_writer(batches(), writer)
+
+    @staticmethod
+    @contextmanager
+    def _open_output(file_path: str, compression: str) -> Iterator[BinaryIO]:
+        """Open an output file with a single streaming compressor."""
+        if compression == "gzip":
+            with gzip.open(file_path, "wb") as f:
+                yield f
+        elif compression == "bz2":
+            with bz2.open(file_path, "wb") as f:
+                yield f
+        elif compression == "zip":
+            with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                with zf.open(Path(file_path).stem, "w", force_zip64=True) as f:
+                    yield f
+        else:
+            with open(file_path, "wb") as f:
+                yield f
+
+    async def _pipe_to_writer(
+        self,
+        batches: AsyncGenerator[List[Dict[str, Any]], None],
+        writer: Callable[[Iterator[Dict[str, Any]]], int]
+    ) -> int:
+        """Feed row batches from the event loop into a blocking stream writer.
+
+        The writer runs in a worker thread and consumes a row iterator backed
+        by a bounded queue; the cursor waits whenever the writer falls behind.
+
+        Returns:
+            Number of rows reported by the writer
+        """
+        loop = asyncio.get_running_loop()
+        pending: queue.Queue = queue.Queue(maxsize=self.MAX_PENDING_BATCHES)
+
+        def rows() -> Iterator[Dict[str, Any]]:
+            while True:
+                batch = pending.get()
+                if batch is _END_OF_STREAM:
+                    return
+                yield from batch
+
+        write_future = loop.run_in_executor(None, writer, rows())
+
+        async def put(item) -> bool:
+            while not write_future.done():
+                try:
+                    pending.put_nowait(item)
+                    return True
+                except queue.Full:
+                    try:
+                        await loop.run_in_executor(None, lambda: pending.put(item, timeout=0.5))
+                        return True
+                    except queue.Full:
+                        continue
+            return False
+
+        try:
+            async for batch in batches:
+                if not await put(batch):
+                    break
+        except BaseException:
+            await put(_END_OF_STREAM)
+            await asyncio.gather(write_future, return_exceptions=True)
+            raise
+
+        await put(_END_OF_STREAM)
+        return await write_future
 
     def _get_format_extension(self, format: str) -> str:
         """Get file extension for format."""
@@ -72,14 +72,16 @@ def export_metrics_to_json(metrics: Dict) -> str:
 def stream_to_json(
     data_generator,
     output_file: BinaryIO,
-    compression: str = "none"
+    compression: str = "none",
+    lines: bool = True
 ) -> int:
-    """Stream data to JSON Lines file (JSONL format).
+    """Stream data to a JSON Lines file (or a JSON array with ``lines=False``).
 
     Args:
         data_generator: Generator that yields dictionaries
         output_file: Binary file object to write to
         compression: Compression type
+        lines: Write one object per line (JSONL); otherwise a single JSON array
 
     Returns:
         Number of rows written
@@ -87,9 +89,14 @@ def stream_to_json(
     row_count = 0
     buffer_size = 1000
     buffer = []
+    separator = '\n' if lines else ',\n'
+
+    if not lines:
+        buffer.append('[\n')
 
     for row in data_generator:
-        json_line = json.dumps(row, cls=DateTimeEncoder) + '\n'
+        prefix = separator if row_count and not lines else ''
+        json_line = prefix + json.dumps(row, cls=DateTimeEncoder) + ('\n' if lines else '')
         buffer.append(json_line)
         row_count += 1
 
@@ -97,6 +104,9 @@ def stream_to_json(
             _flush_json_buffer(buffer, output_file, compression)
             buffer.clear()
 
+    if not lines:
+        buffer.append('\n]\n')
+
     # Write remaining buffer
     if buffer:
         _flush_json_buffer(buffer, output_file, compression)
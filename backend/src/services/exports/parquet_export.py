@@ -1,6 +1,7 @@
 """Parquet export functionality."""
 
-from typing import List, Dict, Optional
+import json
+from typing import Any, List, Dict, Optional, Set
 from datetime import datetime, date
 
 
@@ -76,12 +77,18 @@ def stream_to_parquet(
 ) -> int:
     """Stream data to Parquet file in batches.
 
+    Each batch is written as its own row group as soon as it fills, so only
+    one batch is held in memory. Later batches are cast to the schema
+    inferred from the first one, widened so they still fit: a column that
+    is NULL throughout the first batch is written as text, and decimals
+    get the widest precision at their scale.
+
     Args:
         data_generator: Generator that yields dictionaries
         output_path: File path to write to
         columns: Column names
         compression: Compression algorithm
-        batch_size: Number of rows per batch
+        batch_size: Number of rows per batch (row group)
 
     Returns:
         Number of rows written
@@ -99,6 +106,24 @@ def stream_to_parquet(
     batch_data = {col: [] for col in columns}
     writer = None
     schema = None
+    text_columns: Set[str] = set()
+
+    def write_batch():
+        nonlocal writer, schema
+        if writer is None:
+            # Initialize writer with the first batch's schema, widened
+            inferred = pa.Table.from_pydict(batch_data).schema
+            text_columns.update(f.name for f in inferred if pa.types.is_null(f.type))
+            schema = _widen_schema(inferred)
+            writer = pq.ParquetWriter(
+                output_path,
+                schema,
+                compression=compression if compression != "none" else None
+            )
+
+        for col in text_columns:
+            batch_data[col] = [_as_text(value) for value in batch_data[col]]
+        writer.write_table(pa.Table.from_pydict(batch_data, schema=schema))
 
     for row in data_generator:
         for col in columns:
@@ -108,36 +133,14 @@ def stream_to_parquet(
         row_count += 1
 
         if len(batch_data[columns[0]]) >= batch_size:
-            # Create table from batch
-            table = pa.Table.from_pydict(batch_data)
-
-            if writer is None:
-                # Initialize writer with schema from first batch
-                schema = table.schema
-                writer = pq.ParquetWriter(
-                    output_path,
-                    schema,
-                    compression=compression if compression != "none" else None
-                )
-
-            writer.write_table(table)
+            write_batch()
 
             # Clear batch
             batch_data = {col: [] for col in columns}
 
     # Write remaining data
     if batch_data[columns[0]]:
-        table = pa.Table.from_pydict(batch_data)
-
-        if writer is None:
-            schema = table.schema
-            writer = pq.ParquetWriter(
-                output_path,
-                schema,
-                compression=compression if compression != "none" else None
-            )
-
-        writer.write_table(table)
+        write_batch()
 
     if writer:
         writer.close()
@@ -145,6 +148,31 @@ def stream_to_parquet(
     return row_count
 
 
+def _widen_schema(schema):
+    """Widen a schema inferred from one batch so later batches fit it."""
+    import pyarrow as pa
+
+    fields = []
+    for field in schema:
+        if pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif pa.types.is_decimal(field.type):
+            field = field.with_type(pa.decimal128(38, field.type.scale))
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def _as_text(value: Any) -> Optional[str]:
+    """Render a value of a column whose type was unknown as text."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
 def export_to_parquet_partitioned(
     data: List[Dict],
     output_dir: str,
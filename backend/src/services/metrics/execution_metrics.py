@@ -8,11 +8,20 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.redis import RedisClient
+from ..aggregation.sketches import load_runtime_sketch
 
 
 class ExecutionMetricsService:
     """Service for calculating and retrieving execution metrics."""
 
+    # Windows at least this long read latency from hourly runtime sketches
+    # instead of sorting raw execution_logs rows.
+    SKETCH_MIN_WINDOW = timedelta(hours=6)
+
+    LATENCY_BUCKETS = [
+        ('0-1s', 1), ('1-5s', 5), ('5-10s', 10), ('10-30s', 30), ('30-60s', 60), ('60s+', None)
+    ]
+
     def __init__(self, db: AsyncSession, redis: Optional[RedisClient] = None):
         """Initialize the execution metrics service.
 
@@ -298,6 +307,9 @@ class ExecutionMetricsService:
         Returns:
             Latency metrics with percentile calculations
         """
+        if end_time - start_time >= self.SKETCH_MIN_WINDOW:
+            return await self._get_latency_metrics_from_sketch(workspace_id, start_time, end_time)
+
         # Get execution latency percentiles
         query = text("""
             SELECT
@@ -401,6 +413,54 @@ class ExecutionMetricsService:
             ]
         }
 
+    async def _get_latency_metrics_from_sketch(
+        self,
+        workspace_id: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, Any]:
+        """Calculate latency percentiles by merging hourly runtime sketches.
+
+        Values are within the sketch's 1% relative error of the exact
+        percentiles. Unlike the raw query, all executions with a recorded
+        duration are included regardless of status.
+        """
+        sketch = await load_runtime_sketch(self.db, workspace_id, start_time, end_time)
+
+        if sketch.count == 0:
+            percentiles = [0, 0, 0, 0, 0]
+        else:
+            percentiles = sketch.quantiles([0.5, 0.75, 0.90, 0.95, 0.99])
+
+        distribution = []
+        previous = 0
+        for bucket, upper in self.LATENCY_BUCKETS:
+            below = sketch.count_below(upper) if upper is not None else sketch.count
+            distribution.append({'bucket': bucket, 'count': below - previous})
+            previous = below
+
+        total = sketch.count
+
+        return {
+            "executionLatency": {
+                "avg": round(sketch.mean, 2),
+                "median": round(percentiles[0], 2),
+                "p75": round(percentiles[1], 2),
+                "p90": round(percentiles[2], 2),
+                "p95": round(percentiles[3], 2),
+                "p99": round(percentiles[4], 2)
+            },
+            "latencyDistribution": [
+                {
+                    "bucket": d['bucket'],
+                    "count": d['count'],
+                    "percentage": round(d['count'] / total * 100, 2) if total > 0 else 0
+                }
+                for d in distribution
+                if d['count'] > 0
+            ]
+        }
+
     async def _get_performance_metrics(
         self,
         workspace_id: str,
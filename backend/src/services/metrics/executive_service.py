@@ -477,6 +477,7 @@ class ExecutiveMetricsService:
             workspace_id, timeframe
         ),
         ttl=CacheKeys.TTL_LONG,
+        stale_ttl=CacheKeys.TTL_MEDIUM,
     )
     async def get_executive_overview(
         self,
@@ -565,6 +566,7 @@ class ExecutiveMetricsService:
             workspace_id, "revenue", timeframe
         ),
         ttl=CacheKeys.TTL_LONG,
+        stale_ttl=CacheKeys.TTL_MEDIUM,
     )
     async def get_revenue_metrics(
         self,
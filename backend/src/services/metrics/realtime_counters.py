@@ -0,0 +1,160 @@
+"""Event-fed realtime counters for the live dashboard metrics.
+
+Run and credit events increment per-minute buckets in Redis, and the users
+starting runs are added to per-minute HyperLogLogs. A window query reads a
+fixed number of buckets in one pipelined round trip (PFCOUNT over several
+HyperLogLogs returns the size of their union), so the realtime metrics are
+served without touching execution_logs. Buckets expire once they fall out
+of the ring of RING_MINUTES minutes.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from ...core.config import settings
+from ...core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "realtime:"
+
+# Minutes of buckets kept; the longest window that can be answered
+RING_MINUTES = 60
+BUCKET_TTL = (RING_MINUTES + 1) * 60
+
+# Bucket fields
+RUNS_STARTED = "started"
+RUNS_COMPLETED = "completed"
+RUNS_FAILED = "failed"
+CREDITS = "credits"
+
+
+def minute_of(at: Optional[datetime] = None) -> int:
+    """Minute index (minutes since the epoch) of a UTC timestamp."""
+    at = at or datetime.utcnow()
+    return int((at - datetime(1970, 1, 1)).total_seconds()) // 60
+
+
+def bucket_key(workspace_id: str, minute: int) -> str:
+    """Key of a workspace's counter bucket for one minute."""
+    return f"{KEY_PREFIX}{workspace_id}:{minute}"
+
+
+def users_key(workspace_id: str, minute: int, agent_id: Optional[str] = None) -> str:
+    """Key of the distinct-users HyperLogLog for one minute."""
+    if agent_id:
+        return f"{KEY_PREFIX}users:{workspace_id}:{agent_id}:{minute}"
+    return f"{KEY_PREFIX}users:{workspace_id}:{minute}"
+
+
+class RealtimeCounters:
+    """Per-minute run, error and credit counters with distinct-user sketches."""
+
+    def __init__(self, redis):
+        """
+        Args:
+            redis: redis.asyncio client (``RedisClient.redis``)
+        """
+        self.redis = redis
+
+    async def record_run_started(
+        self,
+        workspace_id: str,
+        user_id: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ):
+        """Count a started run and mark its user active."""
+        minute = minute_of(at)
+        pipe = self.redis.pipeline(transaction=False)
+        self._incr(pipe, workspace_id, minute, RUNS_STARTED, 1)
+
+        if user_id:
+            keys = [users_key(workspace_id, minute)]
+            if agent_id:
+                keys.append(users_key(workspace_id, minute, agent_id))
+            for key in keys:
+                pipe.pfadd(key, user_id)
+                pipe.expire(key, BUCKET_TTL)
+
+        await pipe.execute()
+
+    async def record_run_completed(
+        self, workspace_id: str, success: bool, at: Optional[datetime] = None
+    ):
+        """Count a completed run, and a failure if it did not succeed."""
+        minute = minute_of(at)
+        pipe = self.redis.pipeline(transaction=False)
+        self._incr(pipe, workspace_id, minute, RUNS_COMPLETED, 1)
+        if not success:
+            self._incr(pipe, workspace_id, minute, RUNS_FAILED, 1)
+        await pipe.execute()
+
+    async def record_credits(
+        self, workspace_id: str, amount: float, at: Optional[datetime] = None
+    ):
+        """Add consumed credits."""
+        pipe = self.redis.pipeline(transaction=False)
+        self._incr(pipe, workspace_id, minute_of(at), CREDITS, float(amount))
+        await pipe.execute()
+
+    async def active_users(
+        self,
+        workspace_id: str,
+        minutes: int,
+        agent_id: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ) -> int:
+        """Approximate distinct users who started runs in the last ``minutes``."""
+        keys = [
+            users_key(workspace_id, minute, agent_id)
+            for minute in self._window(minutes, at)
+        ]
+        return int(await self.redis.pfcount(*keys))
+
+    async def totals(
+        self, workspace_id: str, minutes: int, at: Optional[datetime] = None
+    ) -> Dict[str, float]:
+        """Sum the counter buckets of the last ``minutes``."""
+        pipe = self.redis.pipeline(transaction=False)
+        for minute in self._window(minutes, at):
+            pipe.hgetall(bucket_key(workspace_id, minute))
+        buckets = await pipe.execute()
+
+        totals = {RUNS_STARTED: 0.0, RUNS_COMPLETED: 0.0, RUNS_FAILED: 0.0, CREDITS: 0.0}
+        for bucket in buckets:
+            for field, value in (bucket or {}).items():
+                if isinstance(field, bytes):
+                    field = field.decode()
+                if field in totals:
+                    totals[field] += float(value)
+        return totals
+
+    @staticmethod
+    def _incr(pipe, workspace_id: str, minute: int, field: str, amount: float):
+        """Queue an increment of one bucket field and refresh its TTL."""
+        key = bucket_key(workspace_id, minute)
+        if isinstance(amount, float):
+            pipe.hincrbyfloat(key, field, amount)
+        else:
+            pipe.hincrby(key, field, amount)
+        pipe.expire(key, BUCKET_TTL)
+
+    @staticmethod
+    def _window(minutes: int, at: Optional[datetime] = None) -> List[int]:
+        """Minute indexes of a window ending at the current minute."""
+        if not 0 < minutes <= RING_MINUTES:
+            raise ValueError(f"Window must be between 1 and {RING_MINUTES} minutes")
+        current = minute_of(at)
+        return list(range(current - minutes + 1, current + 1))
+
+
+async def get_realtime_counters() -> Optional[RealtimeCounters]:
+    """Get the realtime counters, or None when disabled or Redis is unavailable."""
+    if not settings.REALTIME_COUNTERS_ENABLED:
+        return None
+    redis_client = await get_redis_client()
+    if redis_client is None:
+        return None
+    return RealtimeCounters(redis_client.redis)
@@ -0,0 +1,263 @@
+"""Management of time-range partitions for append-only event tables.
+
+Migration 028 converts the high-volume event tables to declarative range
+partitioning with partitions named ``<table>_pYYYYMMDD`` (daily) or
+``<table>_pYYYYMM`` (monthly). This module keeps those tables healthy:
+upcoming partitions are created ahead of time, rows that fell into the
+default partition are moved into their own partitions, and retention drops
+(or detaches) whole partitions instead of deleting rows. Tables that have not
+been migrated yet fall back to a plain DELETE so the same maintenance task
+works on both layouts.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRECREATE_DAYS = 7
+AUDIT_LOG_RETENTION_DAYS = 2555  # 7 years, see gdpr.py
+
+_PARTITION_SUFFIX = re.compile(r'_p(\d{8}|\d{6})$')
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """A range-partitioned table.
+
+    Attributes:
+        table: Schema-qualified table name
+        column: Partition key column
+        granularity: 'day' or 'month'
+        retention_days: Age after which partitions expire (None keeps forever)
+    """
+
+    table: str
+    column: str
+    granularity: str
+    retention_days: Optional[int] = None
+
+    @property
+    def schema(self) -> str:
+        return self.table.split('.')[0]
+
+    @property
+    def name(self) -> str:
+        return self.table.split('.')[-1]
+
+
+# Raw event tables have no retention here: cleanup_old_data expires them
+# with its own retention_days argument.
+PARTITIONED_TABLES: Dict[str, PartitionSpec] = {
+    spec.table: spec for spec in (
+        PartitionSpec('public.execution_logs', 'started_at', 'day'),
+        PartitionSpec('analytics.user_activity', 'created_at', 'day'),
+        PartitionSpec('analytics.error_occurrences', 'occurred_at', 'month'),
+        PartitionSpec('analytics.audit_logs', 'timestamp', 'month', AUDIT_LOG_RETENTION_DAYS),
+    )
+}
+
+
+def partition_bounds(spec: PartitionSpec, day: date) -> tuple:
+    """Range [start, end) of the partition that contains a date."""
+    if spec.granularity == 'day':
+        return day, day + timedelta(days=1)
+    if spec.granularity == 'month':
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return start, end
+    raise ValueError(f"Invalid partition granularity: {spec.granularity}")
+
+
+def partition_name(spec: PartitionSpec, day: date) -> str:
+    """Name of the partition that contains a date."""
+    start, _ = partition_bounds(spec, day)
+    suffix = start.strftime('%Y%m%d' if spec.granularity == 'day' else '%Y%m')
+    return f"{spec.name}_p{suffix}"
+
+
+def default_partition_name(spec: PartitionSpec) -> str:
+    """Name of the partition catching rows no range partition covers."""
+    return f"{spec.name}_default"
+
+
+def parse_partition_start(name: str) -> Optional[date]:
+    """Lower bound encoded in a partition name (None for default/foreign names)."""
+    match = _PARTITION_SUFFIX.search(name)
+    if not match:
+        return None
+    digits = match.group(1)
+    try:
+        if len(digits) == 8:
+            return datetime.strptime(digits, '%Y%m%d').date()
+        return datetime.strptime(digits, '%Y%m').date()
+    except ValueError:
+        return None
+
+
+async def is_partitioned(db: AsyncSession, table: str) -> bool:
+    """Whether a table has been converted to a partitioned table."""
+    result = await db.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+        {'table': table}
+    )
+    return bool(result.scalar())
+
+
+async def list_partitions(db: AsyncSession, spec: PartitionSpec) -> List[str]:
+    """Names of the partitions attached to a table."""
+    result = await db.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table)
+            ORDER BY child.relname
+        """),
+        {'table': spec.table}
+    )
+    return [row[0] for row in result.fetchall()]
+
+
+async def ensure_partitions(
+    db: AsyncSession,
+    spec: PartitionSpec,
+    today: Optional[date] = None,
+    days_ahead: int = DEFAULT_PRECREATE_DAYS
+) -> List[str]:
+    """Create the partitions covering today through ``days_ahead``.
+
+    Returns:
+        Names of the partitions that were missing and have been created
+    """
+    today = today or datetime.utcnow().date()
+    existing = set(await list_partitions(db, spec))
+
+    created = []
+    day = partition_bounds(spec, today)[0]
+    while day <= today + timedelta(days=days_ahead):
+        name = partition_name(spec, day)
+        if name not in existing:
+            await _create_partition(db, spec, day)
+            created.append(name)
+        day = partition_bounds(spec, day)[1]
+
+    if created:
+        logger.info(f"Created partitions of {spec.table}: {created}")
+    return created
+
+
+async def drain_default_partition(
+    db: AsyncSession,
+    spec: PartitionSpec,
+    before: Optional[datetime] = None
+) -> List[str]:
+    """Move rows out of the default partition into range partitions.
+
+    Rows land in the default partition when no partition covered their time
+    (late events, a missed maintenance run). Creating their partition moves
+    them (see ``analytics.create_time_partition``), so they are then expired
+    with it and the range can be partitioned at all.
+
+    Args:
+        db: Database session
+        spec: Partitioned table
+        before: Only move rows older than this (default: all rows)
+
+    Returns:
+        Names of the partitions created for the moved rows
+    """
+    default = default_partition_name(spec)
+    if default not in await list_partitions(db, spec):
+        return []
+
+    params = {'granularity': spec.granularity}
+    age_filter = ""
+    if before is not None:
+        age_filter = f'WHERE "{spec.column}" < :before'
+        params['before'] = before
+
+    result = await db.execute(
+        text(f"""
+            SELECT DISTINCT CAST(DATE_TRUNC(:granularity, "{spec.column}") AS date)
+            FROM {spec.schema}."{default}"
+            {age_filter}
+            ORDER BY 1
+        """),
+        params
+    )
+    starts = [row[0] for row in result.fetchall()]
+
+    for start in starts:
+        await _create_partition(db, spec, start)
+
+    moved = [partition_name(spec, start) for start in starts]
+    if moved:
+        logger.info(f"Moved rows of {spec.table} from {default} into {moved}")
+    return moved
+
+
+async def _create_partition(db: AsyncSession, spec: PartitionSpec, day: date) -> None:
+    await db.execute(
+        text("SELECT analytics.create_time_partition(CAST(:table AS regclass), :granularity, :day)"),
+        {'table': spec.table, 'granularity': spec.granularity, 'day': day}
+    )
+
+
+async def expire_partitions(
+    db: AsyncSession,
+    spec: PartitionSpec,
+    cutoff: datetime,
+    detach_only: bool = False
+) -> Dict:
+    """Remove data older than ``cutoff`` from a table.
+
+    Partitions lying entirely before the cutoff are dropped, or detached
+    (left in place as standalone tables for archiving) when ``detach_only``
+    is set. Partitions straddling the cutoff are kept whole. Expired rows
+    in the default partition are first moved into their own partitions so
+    they expire the same way. Unpartitioned tables fall back to deleting
+    the expired rows.
+
+    Returns:
+        Dictionary with the expired partition names or deleted row count
+    """
+    if not await is_partitioned(db, spec.table):
+        result = await db.execute(
+            text(f'DELETE FROM {spec.table} WHERE "{spec.column}" < :cutoff_date'),
+            {'cutoff_date': cutoff}
+        )
+        return {'partitioned': False, 'rows_deleted': result.rowcount}
+
+    await drain_default_partition(db, spec, before=cutoff)
+
+    expired = []
+    for name in await list_partitions(db, spec):
+        start = parse_partition_start(name)
+        if start is None:
+            continue
+        _, end = partition_bounds(spec, start)
+        if datetime.combine(end, datetime.min.time()) > cutoff:
+            continue
+
+        if detach_only:
+            await db.execute(text(
+                f'ALTER TABLE {spec.table} DETACH PARTITION {spec.schema}."{name}"'
+            ))
+        else:
+            await db.execute(text(f'DROP TABLE {spec.schema}."{name}"'))
+        expired.append(name)
+
+    if expired:
+        action = 'Detached' if detach_only else 'Dropped'
+        logger.info(f"{action} partitions of {spec.table}: {expired}")
+    return {
+        'partitioned': True,
+        'detached' if detach_only else 'dropped': expired,
+    }
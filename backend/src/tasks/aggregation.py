@@ -13,8 +13,11 @@ from src.services.aggregation.rollup import (
     daily_rollup,
     weekly_rollup,
     monthly_rollup,
+    backfill_rollups,
 )
+from src.services.aggregation.incremental import incremental_hourly_rollup
 from src.services.aggregation.materialized import refresh_all_materialized_views
+from src.services.analytics.streaming_baseline import BaselineStore
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -42,6 +45,21 @@ class AsyncDatabaseTask(Task):
                     asyncio.set_event_loop(None)
 
 
+async def _with_baselines(db, result: Dict) -> Dict:
+    """Fold hours the rollup closed into the streaming anomaly baselines.
+
+    Baseline failures are logged rather than retried with the rollup.
+    """
+    if not settings.STREAMING_BASELINES_ENABLED:
+        return result
+    try:
+        result['baselines'] = await BaselineStore(db).update_from_rollups()
+    except Exception as e:
+        logger.error(f"Streaming baseline update failed: {str(e)}", exc_info=True)
+        result['baselines'] = {'success': False, 'error': str(e)}
+    return result
+
+
 @celery_app.task(
     name='tasks.aggregation.hourly_rollup',
     bind=True,
@@ -72,7 +90,8 @@ def hourly_rollup_task(self, target_hour: Optional[str] = None) -> Dict:
 
         async def run_rollup():
             async with async_session_maker() as db:
-                return await hourly_rollup(db, target_datetime)
+                result = await hourly_rollup(db, target_datetime)
+                return await _with_baselines(db, result)
 
         result = self.run_async(run_rollup)
         logger.info(f"Hourly rollup task completed: {result}")
@@ -84,6 +103,42 @@ def hourly_rollup_task(self, target_hour: Optional[str] = None) -> Dict:
         raise self.retry(exc=exc)
 
 
+@celery_app.task(
+    name='tasks.aggregation.incremental_rollup',
+    bind=True,
+    base=AsyncDatabaseTask,
+    max_retries=1,
+    default_retry_delay=30,
+)
+def incremental_rollup_task(self) -> Dict:
+    """Celery task merging newly ingested rows into the hourly rollups.
+
+    Returns:
+        Dictionary with rollup results
+    """
+    if not settings.INCREMENTAL_ROLLUP_ENABLED:
+        logger.info("Incremental rollup is disabled via settings")
+        return {'success': False, 'message': 'Incremental rollup disabled'}
+
+    try:
+        logger.info("Starting incremental rollup task")
+
+        overlap = timedelta(seconds=settings.INCREMENTAL_ROLLUP_OVERLAP_SECONDS)
+
+        async def run_rollup():
+            async with async_session_maker() as db:
+                result = await incremental_hourly_rollup(db, overlap=overlap)
+                return await _with_baselines(db, result)
+
+        result = self.run_async(run_rollup)
+        logger.info(f"Incremental rollup task completed: {result}")
+        return result
+
+    except Exception as exc:
+        logger.error(f"Incremental rollup task failed: {str(exc)}", exc_info=True)
+        raise self.retry(exc=exc)
+
+
 @celery_app.task(
     name='tasks.aggregation.daily_rollup',
     bind=True,
@@ -250,7 +305,9 @@ def backfill_aggregations_task(
 ) -> Dict:
     """Backfill aggregations for a date range.
 
-    Useful for historical data or fixing gaps in aggregations.
+    Useful for historical data or fixing gaps in aggregations. The range is
+    split into chunks (``BACKFILL_CHUNK_HOURS`` for hourly, one day for
+    daily) that run in parallel, at most ``BACKFILL_CONCURRENCY`` at a time.
 
     Note: Maximum of 1000 periods to prevent database overload.
     For larger backfills, split into multiple tasks.
@@ -293,44 +350,25 @@ def backfill_aggregations_task(
                 'periods_processed': 0
             }
 
-        results = []
-
         async def run_backfill():
-            async with async_session_maker() as db:
-                current = start_dt
-                processed = 0
-
-                if granularity == 'hourly':
-                    while current < end_dt and processed < MAX_BACKFILL_PERIODS:
-                        result = await hourly_rollup(db, current)
-                        results.append(result)
-                        current += timedelta(hours=1)
-                        processed += 1
-
-                        # Log progress every 24 periods
-                        if processed % 24 == 0:
-                            logger.info(f"Backfill progress: {processed}/{periods} periods completed")
-
-                elif granularity == 'daily':
-                    while current < end_dt and processed < MAX_BACKFILL_PERIODS:
-                        result = await daily_rollup(db, current)
-                        results.append(result)
-                        current += timedelta(days=1)
-                        processed += 1
-
-                        # Log progress every 7 periods
-                        if processed % 7 == 0:
-                            logger.info(f"Backfill progress: {processed}/{periods} periods completed")
-
-                return {
-                    'success': True,
-                    'granularity': granularity,
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'total_periods': periods,
-                    'periods_processed': len(results),
-                    'results': results
-                }
+            results = await backfill_rollups(
+                async_session_maker,
+                start_dt,
+                end_dt,
+                granularity=granularity,
+                chunk_hours=settings.BACKFILL_CHUNK_HOURS,
+                max_concurrency=settings.BACKFILL_CONCURRENCY,
+            )
+            return {
+                'success': True,
+                'granularity': granularity,
+                'start_date': start_date,
+                'end_date': end_date,
+                'total_periods': periods,
+                'periods_processed': periods,
+                'chunks_processed': len(results),
+                'results': results
+            }
 
         result = self.run_async(run_backfill)
         logger.info(f"Backfill task completed: {result}")
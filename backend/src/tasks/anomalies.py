@@ -0,0 +1,93 @@
+"""Anomaly detection Celery tasks."""
+
+import logging
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+
+from celery import Task
+from src.celery_app import celery_app
+from src.core.database import async_session_maker
+from src.core.config import settings
+from src.services.analytics.anomaly_detection import AnomalyDetectionService
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseTask(Task):
+    """Base task class that provides async database session handling."""
+
+    def run_async(self, async_func, *args, **kwargs):
+        """Run an async function synchronously with proper cleanup."""
+        try:
+            return asyncio.run(async_func(*args, **kwargs))
+        except RuntimeError:
+            # Fallback for edge cases
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                return loop.run_until_complete(async_func(*args, **kwargs))
+            finally:
+                try:
+                    loop.close()
+                finally:
+                    asyncio.set_event_loop(None)
+
+
+@celery_app.task(
+    name='tasks.anomalies.scan_anomalies',
+    bind=True,
+    base=AsyncDatabaseTask,
+    max_retries=1,
+    default_retry_delay=60,  # 1 minute
+)
+def scan_anomalies_task(self) -> Dict:
+    """
+    Celery task scoring every workspace's metrics for anomalies.
+
+    All (workspace, metric) series are scored in one batch against the
+    configured lookback, up to the last closed hour. Anomalies in the hour
+    that closed last are reported by every scan until the next one closes,
+    and are stored once each.
+
+    Returns:
+        Dictionary with scan results
+    """
+    if not settings.ANOMALY_SCAN_ENABLED:
+        logger.info("Anomaly scan is disabled via settings")
+        return {'success': False, 'message': 'Anomaly scan disabled'}
+
+    try:
+        logger.info("Starting anomaly scan task")
+
+        # The hour in progress is not scored: its partial totals look like drops
+        until = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        since = until - timedelta(hours=1)
+
+        async def run_scan():
+            async with async_session_maker() as db:
+                service = AnomalyDetectionService(db)
+                anomalies = await service.detect_all_anomalies(
+                    lookback_days=settings.ANOMALY_SCAN_LOOKBACK_DAYS,
+                    sensitivity=settings.ANOMALY_SCAN_SENSITIVITY,
+                    method=settings.ANOMALY_SCAN_METHOD,
+                    since=since,
+                    until=until
+                )
+                stored = await service.save_anomalies(anomalies)
+
+                return {
+                    'success': True,
+                    'anomalies_detected': len(anomalies),
+                    'anomalies_stored': stored,
+                    'since': since.isoformat(),
+                    'timestamp': datetime.now().isoformat()
+                }
+
+        result = self.run_async(run_scan)
+        logger.info(f"Anomaly scan completed: {result}")
+        return result
+
+    except Exception as exc:
+        logger.error(f"Anomaly scan task failed: {str(exc)}", exc_info=True)
+        raise self.retry(exc=exc)
@@ -11,6 +11,13 @@ from sqlalchemy import text
 from src.celery_app import celery_app
 from src.core.database import async_session_maker, async_engine
 from src.core.config import settings
+from src.services.partition_service import (
+    PARTITIONED_TABLES,
+    drain_default_partition,
+    ensure_partitions,
+    expire_partitions,
+    is_partitioned,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +35,9 @@ ALLOWED_VACUUM_TABLES = {
 
 ALLOWED_SCHEMAS = {'analytics'}
 
+# Event tables whose retention is set by cleanup_old_data's retention_days
+RAW_EVENT_TABLES = ('public.execution_logs', 'analytics.user_activity')
+
 
 class AsyncDatabaseTask(Task):
     """Base task class that provides async database session handling."""
@@ -76,25 +86,15 @@ def cleanup_old_data_task(self, retention_days: int = 90) -> Dict:
 
                 results = {}
 
-                # Clean up old execution logs
-                query_logs = text("""
-                    DELETE FROM execution_logs
-                    WHERE started_at < :cutoff_date
-                    RETURNING id
-                """)
-                result = await db.execute(query_logs, {'cutoff_date': cutoff_date})
-                logs_deleted = len(result.fetchall())
-                results['execution_logs_deleted'] = logs_deleted
-
-                # Clean up old user activity events
-                query_activity = text("""
-                    DELETE FROM analytics.user_activity
-                    WHERE created_at < :cutoff_date
-                    RETURNING id
-                """)
-                result = await db.execute(query_activity, {'cutoff_date': cutoff_date})
-                activity_deleted = len(result.fetchall())
-                results['user_activity_deleted'] = activity_deleted
+                # Expire old execution logs and user activity events
+                # (drops whole partitions once the tables are partitioned)
+                for table in RAW_EVENT_TABLES:
+                    results[table.split('.')[-1]] = await expire_partitions(
+                        db,
+                        PARTITIONED_TABLES[table],
+                        cutoff_date,
+                        detach_only=settings.PARTITION_DETACH_ONLY
+                    )
 
                 # Clean up old hourly aggregations (keep longer than raw data)
                 # Only delete if older than 2x retention period
@@ -127,6 +127,64 @@ def cleanup_old_data_task(self, retention_days: int = 90) -> Dict:
         raise self.retry(exc=exc)
 
 
+@celery_app.task(
+    name='tasks.maintenance.manage_partitions',
+    bind=True,
+    base=AsyncDatabaseTask,
+    max_retries=2,
+    default_retry_delay=1800,  # 30 minutes
+)
+def manage_partitions_task(self) -> Dict:
+    """Create upcoming partitions and expire old ones on partitioned tables.
+
+    Rows that fell into a table's default partition are moved into their own
+    partitions first. Tables that have not been partitioned yet are skipped.
+    Only tables whose spec carries a retention (e.g. audit logs) are expired
+    here; the raw event tables are expired by cleanup_old_data.
+
+    Returns:
+        Dictionary with created and expired partitions per table
+    """
+    try:
+        logger.info("Starting partition maintenance task")
+
+        async def run_partition_maintenance():
+            async with async_session_maker() as db:
+                now = datetime.utcnow()
+                results = {}
+
+                for table, spec in PARTITIONED_TABLES.items():
+                    if not await is_partitioned(db, table):
+                        results[table] = {'partitioned': False}
+                        continue
+
+                    table_result = {
+                        'moved_from_default': await drain_default_partition(db, spec),
+                        'created': await ensure_partitions(
+                            db, spec, now.date(), settings.PARTITION_PRECREATE_DAYS
+                        ),
+                    }
+                    if spec.retention_days is not None:
+                        table_result.update(await expire_partitions(
+                            db,
+                            spec,
+                            now - timedelta(days=spec.retention_days),
+                            detach_only=settings.PARTITION_DETACH_ONLY
+                        ))
+                    results[table] = table_result
+
+                await db.commit()
+
+                logger.info(f"Partition maintenance completed: {results}")
+                return {'success': True, 'results': results}
+
+        return self.run_async(run_partition_maintenance)
+
+    except Exception as exc:
+        logger.error(f"Partition maintenance task failed: {str(exc)}", exc_info=True)
+        raise self.retry(exc=exc)
+
+
 @celery_app.task(
     name='tasks.maintenance.health_check',
     bind=True,
@@ -0,0 +1,206 @@
+"""Model registry Celery tasks."""
+
+import logging
+import asyncio
+from datetime import datetime
+from typing import Dict, List
+
+from celery import Task, group
+from src.celery_app import celery_app
+from src.core.database import async_session_maker
+from src.core.config import settings
+from src.services.analytics.batch_forecasting import BatchForecaster
+from src.services.analytics.model_registry import ModelRegistry
+from src.services.analytics.predictive_analytics import PredictiveAnalytics
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseTask(Task):
+    """Base task class that provides async database session handling."""
+
+    def run_async(self, async_func, *args, **kwargs):
+        """Run an async function synchronously with proper cleanup."""
+        try:
+            return asyncio.run(async_func(*args, **kwargs))
+        except RuntimeError:
+            # Fallback for edge cases
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                return loop.run_until_complete(async_func(*args, **kwargs))
+            finally:
+                try:
+                    loop.close()
+                finally:
+                    asyncio.set_event_loop(None)
+
+
+@celery_app.task(
+    name='tasks.models.refresh_models',
+    bind=True,
+    base=AsyncDatabaseTask,
+    max_retries=1,
+    default_retry_delay=300,  # 5 minutes
+)
+def refresh_models_task(self) -> Dict:
+    """
+    Celery task refitting registered models that are stale or drifted.
+
+    Prediction endpoints refit an outdated model when they serve it; this
+    task refits them ahead of time so requests rarely pay for the fit. Each
+    (workspace, target) is refreshed in its own session; a failure is
+    logged and the rest carry on.
+
+    Returns:
+        Dictionary with refresh results
+    """
+    if not settings.MODEL_REFRESH_ENABLED:
+        logger.info("Model refresh is disabled via settings")
+        return {'success': False, 'message': 'Model refresh disabled'}
+
+    try:
+        logger.info("Starting model refresh task")
+
+        async def run_refresh():
+            async with async_session_maker() as db:
+                targets = await ModelRegistry(db).list_active()
+
+            refitted = {}
+            failed = 0
+            for workspace_id, target_metric in targets:
+                try:
+                    async with async_session_maker() as db:
+                        reasons = await PredictiveAnalytics(db).refresh_model(
+                            workspace_id, target_metric
+                        )
+                except Exception as e:
+                    failed += 1
+                    logger.error(
+                        f"Failed to refresh {target_metric} models for workspace "
+                        f"{workspace_id}: {e}",
+                        exc_info=True
+                    )
+                    continue
+
+                for model_type, reason in reasons.items():
+                    if reason:
+                        refitted[f"{workspace_id}:{target_metric}:{model_type}"] = reason
+
+            return {
+                'success': failed == 0,
+                'targets_checked': len(targets),
+                'models_refitted': len(refitted),
+                'refitted': refitted,
+                'failed': failed,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        result = self.run_async(run_refresh)
+        logger.info(f"Model refresh completed: {result}")
+        return result
+
+    except Exception as exc:
+        logger.error(f"Model refresh task failed: {str(exc)}", exc_info=True)
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(
+    name='tasks.models.batch_forecast',
+    bind=True,
+    base=AsyncDatabaseTask,
+    max_retries=1,
+    default_retry_delay=600,  # 10 minutes
+)
+def batch_forecast_task(self) -> Dict:
+    """
+    Celery task forecasting every workspace's credit consumption.
+
+    Prefork workers are daemonic and cannot start the model process pool,
+    so a single task would fit every workspace one after another. Instead
+    the workspaces with enough history are split into chunks of
+    FORECAST_BATCH_CHUNK_SIZE and fanned out as a group of
+    forecast_workspaces tasks, which the worker processes pick up in
+    parallel. Each chunk stores its own forecasts, served by the
+    consumption endpoint until FORECAST_MAX_AGE_HOURS pass.
+
+    Returns:
+        Dictionary with dispatch results
+    """
+    if not settings.FORECAST_BATCH_ENABLED:
+        logger.info("Batch forecasting is disabled via settings")
+        return {'success': False, 'message': 'Batch forecasting disabled'}
+
+    try:
+        logger.info("Starting batch forecast task")
+
+        async def list_workspaces():
+            async with async_session_maker() as db:
+                return await BatchForecaster(db).list_workspaces()
+
+        workspace_ids = self.run_async(list_workspaces)
+        size = max(settings.FORECAST_BATCH_CHUNK_SIZE, 1)
+        chunks = [
+            workspace_ids[i:i + size] for i in range(0, len(workspace_ids), size)
+        ]
+        if chunks:
+            group(forecast_workspaces_task.s(chunk) for chunk in chunks).apply_async()
+
+        result = {
+            'success': True,
+            'workspaces': len(workspace_ids),
+            'chunks_dispatched': len(chunks),
+            'timestamp': datetime.now().isoformat()
+        }
+        logger.info(f"Batch forecast dispatched: {result}")
+        return result
+
+    except Exception as exc:
+        logger.error(f"Batch forecast task failed: {str(exc)}", exc_info=True)
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(
+    name='tasks.models.forecast_workspaces',
+    bind=True,
+    base=AsyncDatabaseTask,
+    max_retries=1,
+    default_retry_delay=600,  # 10 minutes
+)
+def forecast_workspaces_task(self, workspace_ids: List[str]) -> Dict:
+    """
+    Celery task forecasting and storing one chunk of the nightly batch.
+
+    The chunk's series are loaded in one query and written with one bulk
+    upsert; a workspace whose fit fails is logged and left out.
+
+    Args:
+        workspace_ids: Workspaces in this chunk
+
+    Returns:
+        Dictionary with forecast results
+    """
+    try:
+        async def run_chunk():
+            async with async_session_maker() as db:
+                forecaster = BatchForecaster(db)
+                forecasts, failed = await forecaster.forecast_all(
+                    settings.FORECAST_BATCH_HORIZON_DAYS, workspace_ids
+                )
+                stored = await forecaster.store_forecasts(forecasts)
+
+            return {
+                'success': True,
+                'workspaces_forecast': len(forecasts),
+                'workspaces_failed': len(failed),
+                'predictions_stored': stored,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        result = self.run_async(run_chunk)
+        logger.info(f"Batch forecast chunk completed: {result}")
+        return result
+
+    except Exception as exc:
+        logger.error(f"Batch forecast chunk failed: {str(exc)}", exc_info=True)
+        raise self.retry(exc=exc)
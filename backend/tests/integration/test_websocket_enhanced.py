@@ -7,7 +7,10 @@ from unittest.mock import Mock, patch, AsyncMock
 import json
 
 from src.api.websocket.manager import ConnectionManager
+from src.api.websocket.streams import StreamMultiplexer, stream_key
+from src.api.websocket.delta import json_patch
 from src.api.websocket.events import EventBroadcaster
+from src.api.websocket.pubsub import RedisPubSub, event_stream_key, parse_stream_id
 from src.api.websocket.errors import WebSocketErrorCode, handle_ws_error
 from src.api.websocket.rate_limit import WebSocketRateLimiter
 from src.api.websocket.realtime_metrics import RealtimeMetricsService
@@ -92,6 +95,346 @@ class TestConnectionManager:
         assert "conn_1" in manager.room_subscriptions[room_key]
 
 
+class TestConnectionIndexes:
+    """Test the connection manager's reverse indexes."""
+
+    @pytest.fixture
+    def manager(self):
+        """Create a fresh ConnectionManager instance."""
+        return ConnectionManager()
+
+    @staticmethod
+    async def _connect(manager, conn_id, workspace_id, user_id):
+        mock_ws = AsyncMock()
+        await manager.connect(mock_ws, conn_id, workspace_id, {"user_id": user_id})
+        return mock_ws
+
+    @pytest.mark.asyncio
+    async def test_event_broadcast_reaches_only_subscribers(self, manager):
+        """Test event broadcasts use the event-type index."""
+        subscribed = await self._connect(manager, "conn_1", "workspace_1", "user_1")
+        other = await self._connect(manager, "conn_2", "workspace_1", "user_2")
+        await manager.subscribe("conn_1", ["alerts"])
+        await asyncio.sleep(0)
+        subscribed.send_text.reset_mock()
+        other.send_text.reset_mock()
+
+        await manager.broadcast_to_workspace("workspace_1", {"event": "alerts"})
+        await asyncio.sleep(0)
+
+        assert manager.event_subscribers["workspace_1"]["alerts"] == {"conn_1"}
+        subscribed.send_text.assert_awaited_once()
+        other.send_text.assert_not_awaited()
+
+        await manager.unsubscribe("conn_1", ["alerts"])
+        assert "workspace_1" not in manager.event_subscribers
+        manager.disconnect("conn_1", "workspace_1")
+        manager.disconnect("conn_2", "workspace_1")
+
+    @pytest.mark.asyncio
+    async def test_send_to_user_reaches_all_user_connections(self, manager):
+        """Test the user index finds every connection of a user."""
+        first = await self._connect(manager, "conn_1", "workspace_1", "user_1")
+        second = await self._connect(manager, "conn_2", "workspace_2", "user_1")
+        await asyncio.sleep(0)
+
+        assert await manager.send_to_user("user_1", {"type": "notification"})
+        assert not await manager.send_to_user("user_2", {"type": "notification"})
+        await asyncio.sleep(0)
+
+        assert first.send_text.call_args.args[0] == '{"type":"notification"}'
+        assert second.send_text.call_args.args[0] == '{"type":"notification"}'
+        manager.disconnect("conn_1", "workspace_1")
+        manager.disconnect("conn_2", "workspace_2")
+
+    @pytest.mark.asyncio
+    async def test_disconnect_clears_every_index(self, manager):
+        """Test disconnect removes the connection from all indexes."""
+        await self._connect(manager, "conn_1", "workspace_1", "user_1")
+        await manager.subscribe("conn_1", ["alerts"])
+        await manager.join_room("conn_1", "dashboard", "workspace_1")
+        assert manager.get_connection_workspace("conn_1") == "workspace_1"
+
+        manager.disconnect("conn_1")
+
+        assert manager.connections == {}
+        assert manager.user_connections == {}
+        assert manager.event_subscribers == {}
+        assert manager.room_subscriptions == {}
+        assert manager.active_connections == {}
+
+
+class TestStreamMultiplexer:
+    """Test shared metric streams."""
+
+    @pytest.fixture
+    def manager(self):
+        """Create a fresh ConnectionManager instance."""
+        return ConnectionManager()
+
+    @staticmethod
+    async def _connect(manager, conn_id, workspace_id="workspace_1"):
+        mock_ws = AsyncMock()
+        mock_ws.accept = AsyncMock()
+        mock_ws.send_json = AsyncMock()
+        await manager.connect(mock_ws, conn_id, workspace_id, {"user_id": conn_id})
+        return mock_ws
+
+    @staticmethod
+    def _updates(mock_ws):
+        messages = [json.loads(call.args[0]) for call in mock_ws.send_text.call_args_list]
+        return [m for m in messages if m.get("type") == "metrics_update"]
+
+    @pytest.mark.asyncio
+    async def test_same_stream_is_computed_once_per_tick(self, manager):
+        """Test connections sharing a stream share its computation."""
+        stream_func = AsyncMock(return_value={"active_users": 3})
+        sockets = [await self._connect(manager, f"conn_{i}") for i in range(3)]
+
+        for i in range(3):
+            await manager.start_stream(f"conn_{i}", "active_users", stream_func, 50)
+        await asyncio.sleep(0.12)
+
+        key = stream_key("workspace_1", "active_users")
+        assert manager.streams.get_subscriber_count(key) == 3
+        assert 2 <= stream_func.await_count <= 4
+        for ws in sockets:
+            assert self._updates(ws)[0]["data"] == {"active_users": 3}
+
+        for i in range(3):
+            manager.disconnect(f"conn_{i}", "workspace_1")
+
+    @pytest.mark.asyncio
+    async def test_filters_and_workspaces_get_separate_streams(self, manager):
+        """Test the stream key includes the workspace and the filters."""
+        await self._connect(manager, "conn_1", "workspace_1")
+        await self._connect(manager, "conn_2", "workspace_1")
+        await self._connect(manager, "conn_3", "workspace_2")
+        stream_func = AsyncMock(return_value={})
+
+        await manager.start_stream("conn_1", "error_rate", stream_func, 1000, {"agent_id": "a"})
+        await manager.start_stream("conn_2", "error_rate", stream_func, 1000, {"agent_id": "b"})
+        await manager.start_stream("conn_3", "error_rate", stream_func, 1000, {"agent_id": "a"})
+
+        stats = manager.get_stream_stats()
+        assert len(stats) == 3
+        assert all(s["subscribers"] == 1 for s in stats)
+
+        for conn_id, workspace_id in [
+            ("conn_1", "workspace_1"), ("conn_2", "workspace_1"), ("conn_3", "workspace_2")
+        ]:
+            manager.disconnect(conn_id, workspace_id)
+
+    @pytest.mark.asyncio
+    async def test_last_subscriber_leaving_stops_stream(self, manager):
+        """Test the computation stops once nobody is subscribed."""
+        await self._connect(manager, "conn_1")
+        await self._connect(manager, "conn_2")
+        stream_func = AsyncMock(return_value={})
+
+        await manager.start_stream("conn_1", "queue_status", stream_func, 1000)
+        await manager.start_stream("conn_2", "queue_status", stream_func, 1000)
+        key = stream_key("workspace_1", "queue_status")
+        task = manager.streams.streams[key].task
+
+        await manager.stop_stream("conn_1", "queue_status")
+        assert manager.streams.get_subscriber_count(key) == 1
+        assert not task.done()
+
+        manager.disconnect("conn_2", "workspace_1")
+        await asyncio.sleep(0)
+        assert key not in manager.streams.streams
+        assert task.cancelled()
+        manager.disconnect("conn_1", "workspace_1")
+
+    @pytest.mark.asyncio
+    async def test_failed_send_drops_only_that_subscriber(self):
+        """Test a broken connection does not stop the stream for others."""
+        multiplexer = StreamMultiplexer()
+        key = stream_key("workspace_1", "active_users")
+        good = Mock(return_value=True)
+        bad = Mock(return_value=False)
+
+        multiplexer.subscribe(key, "good", good, AsyncMock(return_value={}), 20)
+        multiplexer.subscribe(key, "bad", bad, AsyncMock(), 20)
+        await asyncio.sleep(0.05)
+
+        assert multiplexer.get_subscriber_count(key) == 1
+        assert good.call_count >= 2
+        payload, coalesce = good.call_args.args
+        assert json.loads(payload)["type"] == "metrics_update"
+        assert coalesce == "active_users"
+        multiplexer.unsubscribe(key, "good")
+
+
+class TestDeltaStreams:
+    """Test delta-encoded stream updates."""
+
+    def test_json_patch_reports_only_changes(self):
+        """Test the diff covers changed, added and removed keys only."""
+        old = {"users": 3, "summary": {"runs": 10, "errors": 1, "a/b": 0}, "tags": [1]}
+        new = {"users": 3, "summary": {"runs": 11, "errors": 1}, "tags": [1, 2], "new": None}
+
+        assert json_patch(old, new) == [
+            {"op": "replace", "path": "/summary/runs", "value": 11},
+            {"op": "remove", "path": "/summary/a~1b"},
+            {"op": "replace", "path": "/tags", "value": [1, 2]},
+            {"op": "add", "path": "/new", "value": None},
+        ]
+        assert json_patch(new, new) == []
+
+    @pytest.mark.asyncio
+    async def test_snapshot_then_deltas_and_no_send_when_unchanged(self):
+        """Test delta subscribers get a snapshot, then changes with sequence numbers."""
+        multiplexer = StreamMultiplexer()
+        key = stream_key("workspace_1", "dashboard_summary")
+        values = iter([{"runs": 1, "users": 2}, {"runs": 1, "users": 2}, {"runs": 2, "users": 2}])
+        stream_func = AsyncMock(side_effect=lambda: next(values, {"runs": 2, "users": 2}))
+        send = Mock(return_value=True)
+
+        multiplexer.subscribe(key, "conn_1", send, stream_func, 20, mode="delta")
+        await asyncio.sleep(0.07)
+        multiplexer.unsubscribe(key, "conn_1")
+
+        messages = [json.loads(call.args[0]) for call in send.call_args_list]
+        assert [m["type"] for m in messages] == ["metrics_snapshot", "metrics_delta"]
+        snapshot, delta = messages
+        assert snapshot["data"] == {"runs": 1, "users": 2}
+        assert delta["base_seq"] == snapshot["seq"]
+        assert delta["seq"] == snapshot["seq"] + 2
+        assert delta["patch"] == [{"op": "replace", "path": "/runs", "value": 2}]
+        # Deltas must never be coalesced away
+        assert all(call.args[1] is None for call in send.call_args_list)
+
+    @pytest.mark.asyncio
+    async def test_resync_sends_a_new_snapshot(self):
+        """Test a resync request restarts the subscriber from a snapshot."""
+        multiplexer = StreamMultiplexer()
+        key = stream_key("workspace_1", "active_users")
+        send = Mock(return_value=True)
+
+        multiplexer.subscribe(key, "conn_1", send, AsyncMock(return_value={"n": 1}), 1000, mode="delta")
+        await asyncio.sleep(0.01)
+        assert multiplexer.resync(key, "conn_1")
+        await asyncio.sleep(0.01)
+        multiplexer.unsubscribe(key, "conn_1")
+
+        types = [json.loads(call.args[0])["type"] for call in send.call_args_list]
+        assert types == ["metrics_snapshot", "metrics_snapshot"]
+
+
+class TestOutboundQueues:
+    """Test per-connection send queues."""
+
+    @staticmethod
+    def _slow_socket():
+        mock_ws = AsyncMock()
+        gate = asyncio.Event()
+
+        async def send_text(payload):
+            await gate.wait()
+
+        mock_ws.send_text = AsyncMock(side_effect=send_text)
+        return mock_ws, gate
+
+    @pytest.mark.asyncio
+    async def test_broadcast_does_not_wait_for_slow_client(self):
+        """Test a stalled client does not delay delivery to others."""
+        manager = ConnectionManager()
+        slow_ws, _ = self._slow_socket()
+        fast_ws = AsyncMock()
+        await manager.connect(slow_ws, "slow", "workspace_1", {"user_id": "u1"})
+        await manager.connect(fast_ws, "fast", "workspace_1", {"user_id": "u2"})
+
+        await asyncio.wait_for(
+            manager.broadcast_to_workspace("workspace_1", {"type": "alert"}), timeout=0.1
+        )
+        await asyncio.sleep(0)
+
+        assert fast_ws.send_text.call_args.args[0] == '{"type":"alert"}'
+        manager.disconnect("slow", "workspace_1")
+        manager.disconnect("fast", "workspace_1")
+
+    @pytest.mark.asyncio
+    async def test_coalesce_keeps_latest_stream_update(self):
+        """Test queued updates of a stream are replaced, others kept."""
+        from src.api.websocket.outbound import OutboundQueue
+
+        slow_ws, gate = self._slow_socket()
+        queue = OutboundQueue(slow_ws, max_size=10, policy="coalesce")
+        queue.put("first")
+        await asyncio.sleep(0)  # writer is now blocked sending "first"
+
+        queue.put("update-1", "active_users")
+        queue.put("alert")
+        queue.put("update-2", "active_users")
+        assert len(queue) == 2
+        assert queue.dropped == 1
+
+        gate.set()
+        await asyncio.sleep(0)
+        sent = [call.args[0] for call in slow_ws.send_text.call_args_list]
+        assert sent == ["first", "update-2", "alert"]
+        queue.close()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_bounds_queue(self):
+        """Test the oldest message is dropped when the queue is full."""
+        from src.api.websocket.outbound import OutboundQueue
+
+        slow_ws, _ = self._slow_socket()
+        queue = OutboundQueue(slow_ws, max_size=2, policy="drop_oldest")
+        queue.put("blocked")
+        await asyncio.sleep(0)
+
+        for payload in ("a", "b", "c"):
+            assert queue.put(payload)
+        assert len(queue) == 2
+        assert queue.dropped == 1
+        queue.close()
+
+    @pytest.mark.asyncio
+    async def test_drain_paces_bursts_larger_than_queue(self):
+        """Test a sender waiting on drain between chunks loses nothing."""
+        manager = ConnectionManager(send_queue_size=4, overflow_policy="drop_oldest")
+        ws = AsyncMock()
+
+        async def send_text(payload):
+            await asyncio.sleep(0)
+
+        ws.send_text = AsyncMock(side_effect=send_text)
+        await manager.connect(ws, "conn_1", "workspace_1", {"user_id": "u1"})
+
+        for chunk in range(5):
+            for i in range(2):
+                await manager.send_personal_message("conn_1", {"type": "event", "n": chunk * 2 + i})
+            assert await manager.drain("conn_1")
+
+        sent = [json.loads(call.args[0]) for call in ws.send_text.call_args_list]
+        assert [m["n"] for m in sent if m.get("type") == "event"] == list(range(10))
+        assert manager.connections["conn_1"].outbound.dropped == 0
+
+        manager.disconnect("conn_1", "workspace_1")
+        assert not await manager.drain("conn_1")
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_drops_slow_consumer(self):
+        """Test overflowing the queue disconnects the client."""
+        manager = ConnectionManager(send_queue_size=2, overflow_policy="disconnect")
+        slow_ws, _ = self._slow_socket()
+        await manager.connect(slow_ws, "slow", "workspace_1", {"user_id": "u1"})
+        await asyncio.sleep(0)  # writer is blocked on the welcome message
+
+        for i in range(3):
+            await manager.broadcast_to_workspace("workspace_1", {"type": "alert", "n": i})
+        await asyncio.sleep(0)
+
+        assert "slow" not in manager.connection_users
+        assert "slow" not in manager.outbound
+        slow_ws.close.assert_awaited_once()
+        assert slow_ws.close.call_args.kwargs["code"] == 4010
+
+
 class TestEventBroadcaster:
     """Test WebSocket event broadcaster."""
 
@@ -146,6 +489,95 @@ class TestEventBroadcaster:
             assert message["section"] == "executive_summary"
 
 
+class TestEventLog:
+    """Test the Redis Streams workspace event log."""
+
+    @pytest.fixture
+    def event_log(self):
+        """Create an event log on a mocked Redis client."""
+        log = RedisPubSub("redis://localhost:6379/0", maxlen=100, block_ms=10)
+        log.redis = AsyncMock()
+        log.running = True
+        return log
+
+    @pytest.mark.asyncio
+    async def test_publish_appends_trimmed_entry(self, event_log):
+        """Test events are appended with approximate MAXLEN trimming."""
+        event_log.redis.xadd.return_value = "1700000000000-0"
+
+        entry_id = await event_log.publish("workspace_1", {"event": "alert"})
+
+        assert entry_id == "1700000000000-0"
+        args, kwargs = event_log.redis.xadd.call_args
+        assert args[0] == event_stream_key("workspace_1")
+        assert json.loads(args[1]["data"]) == {"event": "alert"}
+        assert kwargs == {"maxlen": 100, "approximate": True}
+
+    @pytest.mark.asyncio
+    async def test_read_since_is_exclusive_and_tags_ids(self, event_log):
+        """Test resuming reads strictly after the last seen id."""
+        event_log.redis.xrange.return_value = [
+            ("5-1", {"data": json.dumps({"event": "alert", "n": 1})}),
+        ]
+
+        entries = await event_log.read_since("workspace_1", "5-0")
+
+        assert entries == [("5-1", {"event": "alert", "n": 1, "event_id": "5-1"})]
+        assert event_log.redis.xrange.call_args.kwargs["min"] == "(5-0"
+
+    @pytest.mark.asyncio
+    async def test_dispatch_fans_out_to_listeners(self, event_log):
+        """Test one stream entry reaches connections and SSE listeners."""
+        event_log.redis.xrevrange.return_value = [("7-0", {})]
+        queue = await event_log.listen("workspace_1")
+        assert event_log.cursors[event_stream_key("workspace_1")] == "7-0"
+
+        with patch("src.api.websocket.pubsub.manager", AsyncMock()) as mock_manager:
+            await event_log._dispatch("workspace_1", "8-0", {"event": "alert"})
+            mock_manager.broadcast_to_workspace.assert_awaited_once_with(
+                "workspace_1", {"event": "alert"}
+            )
+
+        assert queue.get_nowait() == ("8-0", {"event": "alert"})
+        event_log.unlisten("workspace_1", queue)
+        assert event_log.listeners == {}
+
+    @pytest.mark.asyncio
+    async def test_lagging_listener_is_closed(self, event_log):
+        """Test a listener whose queue overflows is dropped and told to end."""
+        event_log.redis.xrevrange.return_value = []
+        queue = await event_log.listen("workspace_1")
+
+        with patch("src.api.websocket.pubsub.manager", AsyncMock()):
+            for i in range(queue.maxsize + 1):
+                await event_log._dispatch("workspace_1", f"{i}-0", {"n": i})
+
+        assert "workspace_1" not in event_log.listeners
+        assert queue.get_nowait() is None
+
+    @pytest.mark.asyncio
+    async def test_broadcaster_publishes_to_event_log(self, event_log):
+        """Test the broadcaster appends to the log instead of broadcasting locally."""
+        event_log.redis.xadd.return_value = "1-0"
+        mock_manager = AsyncMock()
+
+        with patch("src.api.websocket.events.manager", mock_manager), patch(
+            "src.api.websocket.events.get_event_log", return_value=event_log
+        ):
+            await EventBroadcaster.broadcast_dashboard_update(
+                "workspace_1", "executive_summary", {"active_users": 1}
+            )
+
+        event_log.redis.xadd.assert_awaited_once()
+        mock_manager.broadcast_to_workspace.assert_not_called()
+
+    def test_parse_stream_id_orders_ids(self):
+        """Test stream ids compare numerically."""
+        assert parse_stream_id("10-0") > parse_stream_id("9-5")
+        with pytest.raises(ValueError):
+            parse_stream_id("not-an-id")
+
+
 class TestWebSocketRateLimiter:
     """Test WebSocket rate limiter."""
 
@@ -4,30 +4,33 @@ import pytest
 import asyncio
 from unittest.mock import Mock, AsyncMock, patch
 from src.api.middleware.rate_limit import RateLimiter, InMemoryRateLimiter
+from src.core.rate_limit_engine import RateLimitEngine
 
 
 class TestRateLimiter:
     """Test Redis-backed rate limiter."""
 
+    @pytest.fixture(autouse=True)
+    def engine(self):
+        """Use a fresh rate limit engine so local state does not leak between tests."""
+        engine = RateLimitEngine()
+        with patch('src.api.middleware.rate_limit.get_rate_limit_engine', return_value=engine):
+            yield engine
+
     @pytest.fixture
     def mock_redis(self):
-        """Mock Redis client."""
-        redis = AsyncMock()
-        redis.zremrangebyscore = AsyncMock()
-        redis.zcard = AsyncMock()
-        redis.zrange = AsyncMock()
-        redis.zadd = AsyncMock()
-        redis.expire = AsyncMock()
-        return redis
+        """Mock Redis client running the GCRA script."""
+        client = Mock()
+        # allowed, remaining, retry_after_ms, reset_after_ms, binding limit
+        client.redis.eval = AsyncMock(return_value=[1, 4, 0, 6000, 1])
+        return client
 
     @pytest.mark.asyncio
     async def test_allows_requests_within_limit(self, mock_redis):
         """Test that requests within the limit are allowed."""
-        mock_redis.zcard.return_value = 5  # 5 requests in window
-
         limiter = RateLimiter(requests_per_minute=10)
 
-        with patch('src.api.middleware.rate_limit.get_redis_client', return_value=mock_redis):
+        with patch('src.core.rate_limit_engine.get_redis_client', return_value=mock_redis):
             allowed, msg = await limiter.check_rate_limit("user123", "test_endpoint")
 
         assert allowed is True
@@ -36,81 +39,68 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_blocks_requests_over_limit(self, mock_redis):
         """Test that requests over the limit are blocked."""
-        mock_redis.zcard.return_value = 61  # Over 60/min limit
-        mock_redis.zrange.return_value = [(b"123.456", 123.456)]
+        mock_redis.redis.eval.return_value = [0, 0, 12000, 60000, 1]
 
         limiter = RateLimiter(requests_per_minute=60)
 
-        with patch('src.api.middleware.rate_limit.get_redis_client', return_value=mock_redis):
+        with patch('src.core.rate_limit_engine.get_redis_client', return_value=mock_redis):
             allowed, msg = await limiter.check_rate_limit("user123", "test_endpoint")
 
         assert allowed is False
         assert msg is not None
         assert "Rate limit exceeded" in msg
+        assert "Retry after 12 seconds" in msg
 
     @pytest.mark.asyncio
-    async def test_cleans_old_entries(self, mock_redis):
-        """Test that old entries are removed from the window."""
-        mock_redis.zcard.return_value = 5
-
-        limiter = RateLimiter(requests_per_minute=10)
-
-        with patch('src.api.middleware.rate_limit.get_redis_client', return_value=mock_redis):
-            await limiter.check_rate_limit("user123", "test_endpoint")
-
-        # Should have called zremrangebyscore to remove old entries
-        mock_redis.zremrangebyscore.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_sets_expiration_on_key(self, mock_redis):
-        """Test that expiration is set on rate limit keys."""
-        mock_redis.zcard.return_value = 5
+    async def test_denial_is_repeated_locally(self, mock_redis):
+        """Test that a denied key is rejected without another Redis call."""
+        mock_redis.redis.eval.return_value = [0, 0, 12000, 60000, 1]
 
-        limiter = RateLimiter(requests_per_minute=10)
+        limiter = RateLimiter(requests_per_minute=60)
 
-        with patch('src.api.middleware.rate_limit.get_redis_client', return_value=mock_redis):
+        with patch('src.core.rate_limit_engine.get_redis_client', return_value=mock_redis):
             await limiter.check_rate_limit("user123", "test_endpoint")
+            allowed, _ = await limiter.check_rate_limit("user123", "test_endpoint")
 
-        # Should have called expire to set TTL
-        mock_redis.expire.assert_called_once()
+        assert allowed is False
+        mock_redis.redis.eval.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_multiple_time_windows(self, mock_redis):
-        """Test that both per-minute and per-hour limits are checked."""
-        mock_redis.zcard.return_value = 5
-
+        """Test that both limits are checked in a single script call."""
         limiter = RateLimiter(requests_per_minute=60, requests_per_hour=1000)
 
-        with patch('src.api.middleware.rate_limit.get_redis_client', return_value=mock_redis):
+        with patch('src.core.rate_limit_engine.get_redis_client', return_value=mock_redis):
             allowed, msg = await limiter.check_rate_limit("user123", "test_endpoint")
 
-        # Should check both minute and hour windows
-        assert mock_redis.zcard.call_count == 2
+        mock_redis.redis.eval.assert_called_once()
+        args = mock_redis.redis.eval.call_args.args
+        assert args[1] == 2  # One key per window
 
     @pytest.mark.asyncio
-    async def test_fails_open_when_redis_unavailable(self):
-        """Test that requests are allowed when Redis is unavailable."""
-        limiter = RateLimiter(requests_per_minute=10)
+    async def test_enforces_locally_when_redis_unavailable(self):
+        """Test that limits are enforced per process when Redis is unavailable."""
+        limiter = RateLimiter(requests_per_minute=3)
 
-        with patch('src.api.middleware.rate_limit.get_redis_client', return_value=None):
-            allowed, msg = await limiter.check_rate_limit("user123", "test_endpoint")
+        with patch('src.core.rate_limit_engine.get_redis_client', return_value=None):
+            results = [
+                (await limiter.check_rate_limit("user123", "test_endpoint"))[0]
+                for _ in range(4)
+            ]
 
-        assert allowed is True
-        assert msg is None
+        assert results == [True, True, True, False]
 
     @pytest.mark.asyncio
     async def test_different_identifiers_tracked_separately(self, mock_redis):
         """Test that different users are tracked separately."""
-        mock_redis.zcard.return_value = 5
-
         limiter = RateLimiter(requests_per_minute=10)
 
-        with patch('src.api.middleware.rate_limit.get_redis_client', return_value=mock_redis):
+        with patch('src.core.rate_limit_engine.get_redis_client', return_value=mock_redis):
             await limiter.check_rate_limit("user1", "test_endpoint")
             await limiter.check_rate_limit("user2", "test_endpoint")
 
-        # Should have created separate keys for each user
-        assert mock_redis.zadd.call_count == 2
+        keys = [call.args[2] for call in mock_redis.redis.eval.call_args_list]
+        assert len(set(keys)) == 2
 
 
 class TestInMemoryRateLimiter:
@@ -469,3 +469,102 @@ class TestAnomalyDetectionEdgeCases:
 
         # Low sensitivity should detect more anomalies
         assert len(anomalies) > 0
+
+
+class TestBatchAnomalyDetection:
+    """Test scoring all workspaces and metrics in one pass."""
+
+    @staticmethod
+    def _rows(workspace_id, spike_hour, spike):
+        return [
+            (workspace_id, datetime(2024, 1, 1, i), 10.0 + (spike if i == spike_hour else i % 2), 5.0, 3)
+            for i in range(24)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_detect_all_anomalies_matches_per_series(self):
+        """Test batch results equal detect_metric_anomalies per workspace."""
+        rows = self._rows("ws-1", 12, 20.0) + self._rows("ws-2", 5, 40.0)[3:]
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = rows
+        mock_db = AsyncMock()
+        mock_db.execute = AsyncMock(return_value=mock_result)
+
+        service = AnomalyDetectionService(db=mock_db)
+        batch = await service.detect_all_anomalies(
+            metric_types=["runtime_seconds"],
+            lookback_days=7,
+            sensitivity=2.0
+        )
+
+        # A single query serves every workspace
+        assert mock_db.execute.call_count == 1
+        for workspace_id in ("ws-1", "ws-2"):
+            series_result = MagicMock()
+            series_result.fetchall.return_value = [
+                (ts, value, count) for ws, ts, value, _, count in rows if ws == workspace_id
+            ]
+            mock_db.execute = AsyncMock(return_value=series_result)
+
+            single = await service.detect_metric_anomalies(
+                metric_type="runtime_seconds",
+                workspace_id=workspace_id,
+                lookback_days=7,
+                sensitivity=2.0
+            )
+            found = [a for a in batch if a["workspace_id"] == workspace_id]
+            assert [a["detected_at"] for a in found] == [a["detected_at"] for a in single]
+            assert [a["anomaly_score"] for a in found] == pytest.approx(
+                [a["anomaly_score"] for a in single]
+            )
+
+        assert {a["detected_at"] for a in batch} == {
+            "2024-01-01T12:00:00", "2024-01-01T05:00:00"
+        }
+
+    @pytest.mark.asyncio
+    async def test_detect_all_anomalies_since(self):
+        """Test only buckets at or after ``since`` are reported."""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = self._rows("ws-1", 12, 20.0)
+        mock_db = AsyncMock()
+        mock_db.execute = AsyncMock(return_value=mock_result)
+
+        service = AnomalyDetectionService(db=mock_db)
+        anomalies = await service.detect_all_anomalies(
+            metric_types=["runtime_seconds"],
+            sensitivity=2.0,
+            method="mad",
+            since=datetime(2024, 1, 1, 13)
+        )
+
+        assert anomalies == []
+
+    @pytest.mark.asyncio
+    async def test_detect_all_anomalies_skips_open_hour(self):
+        """Test the scan ends at the start of the hour still in progress."""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db = AsyncMock()
+        mock_db.execute = AsyncMock(return_value=mock_result)
+        service = AnomalyDetectionService(db=mock_db)
+
+        await service.detect_all_anomalies(metric_types=["credits_consumed"])
+        query, params = mock_db.execute.call_args.args
+        assert "started_at < :end_date" in str(query)
+        assert params["end_date"] == params["end_date"].replace(minute=0, second=0, microsecond=0)
+        assert params["end_date"] <= datetime.utcnow()
+
+        until = datetime(2024, 1, 1, 12)
+        await service.detect_all_anomalies(metric_types=["credits_consumed"], until=until)
+        params = mock_db.execute.call_args.args[1]
+        assert params["end_date"] == until
+        assert params["start_date"] == until - timedelta(days=7)
+
+    @pytest.mark.asyncio
+    async def test_detect_all_anomalies_invalid_method(self):
+        """Test non z-score methods are rejected for batch detection."""
+        service = AnomalyDetectionService(db=AsyncMock())
+
+        with pytest.raises(ValueError, match="Unknown detection method"):
+            await service.detect_all_anomalies(method="isolation_forest")
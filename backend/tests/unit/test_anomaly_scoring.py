@@ -0,0 +1,102 @@
+"""Unit tests for vectorized anomaly scoring."""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.services.analytics.anomaly_scoring import (
+    MAD_SCALE,
+    mad_scores,
+    rolling_zscore_scores,
+    score_matrix,
+    seasonal_scores,
+    seasonal_slots,
+    zscore_scores,
+)
+
+
+class TestAnomalyScoring:
+    """Test suite for the anomaly_scoring module."""
+
+    def test_zscore_scores_each_row_independently(self):
+        """Test every series is scored against its own mean and std."""
+        values = np.array([
+            [10, 11, 10, 9, 11, 10, 50],
+            [100, 110, 100, 90, 110, 100, 500],
+        ], dtype=float)
+
+        scores, center, scale = zscore_scores(values)
+
+        row = values[0]
+        expected = np.abs(row - row.mean()) / row.std(ddof=1)
+        np.testing.assert_allclose(scores[0], expected)
+        # Scaling a series does not change its z-scores
+        np.testing.assert_allclose(scores[1], expected)
+        assert center[1, 0] == pytest.approx(values[1].mean())
+
+    def test_missing_buckets_are_ignored(self):
+        """Test NaN buckets neither count towards nor receive a score."""
+        values = np.array([[10, np.nan, 11, 10, 9, np.nan, 50]])
+
+        scores, _, _ = zscore_scores(values)
+        present = values[~np.isnan(values)]
+
+        assert np.isnan(scores[0, 1]) and np.isnan(scores[0, 5])
+        assert scores[0, 6] == pytest.approx(
+            abs(50 - present.mean()) / present.std(ddof=1)
+        )
+
+    def test_unusable_baselines_score_nan(self):
+        """Test sparse or constant series never exceed a threshold."""
+        values = np.array([
+            [10, 10, 10, 10],
+            [10, np.nan, np.nan, 50],
+        ])
+
+        scores, _, _ = score_matrix(values, "zscore")
+
+        assert np.isnan(scores).all()
+        assert not (scores > 0).any()
+
+    def test_mad_scores_resist_outliers(self):
+        """Test a cluster of spikes cannot hide itself from the MAD."""
+        values = np.array([[10, 11, 10, 9, 11, 10, 9, 10, 60, 60, 60]], dtype=float)
+
+        zscores, _, _ = zscore_scores(values)
+        robust, center, scale = mad_scores(values)
+
+        assert (zscores[0, -3:] < 2.0).all()
+        assert (robust[0, -3:] > 10).all()
+        assert center[0, 0] == 10
+        assert scale[0, 0] == pytest.approx(MAD_SCALE)
+
+    def test_rolling_matches_pandas(self):
+        """Test rolling scores match a per-series pandas rolling z-score."""
+        rng = np.random.default_rng(1)
+        values = rng.normal(10, 2, (3, 50))
+
+        scores, _, _ = rolling_zscore_scores(values, window=10)
+
+        for row in range(3):
+            series = pd.Series(values[row])
+            rolling = series.rolling(10, min_periods=3)
+            expected = ((series - rolling.mean()) / rolling.std()).abs()
+            np.testing.assert_allclose(scores[row], expected.to_numpy(), equal_nan=True)
+
+    def test_seasonal_scores_compare_same_slot(self):
+        """Test a daily peak is normal but a peak at an odd hour is not."""
+        hours = pd.date_range("2024-01-01", periods=24 * 7, freq="h")
+        values = np.where(hours.hour == 9, 100.0, 10.0) + np.tile([0.0, 1.0], 12 * 7)
+        values[24 * 6 + 3] = 100.0  # Peak at 3am on the last day
+
+        slots = seasonal_slots(hours)
+        seasonal, _, _ = seasonal_scores(values, slots)
+        flagged = np.flatnonzero(seasonal[0] > 2.0)
+
+        assert list(slots[:3]) == [0, 1, 2]
+        assert list(flagged) == [24 * 6 + 3]
+
+    def test_unknown_method_raises(self):
+        """Test unknown scoring methods are rejected."""
+        with pytest.raises(ValueError, match="Unknown scoring method"):
+            score_matrix(np.ones((1, 5)), "unknown")
@@ -0,0 +1,171 @@
+"""Unit tests for nightly batch forecasting."""
+
+import json
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.analytics.batch_forecasting import (
+    BATCH_MODEL_VERSION,
+    BatchForecaster,
+    credit_consumption_forecast,
+)
+from src.services.analytics.credit_consumption_predictor import CreditConsumptionPredictor
+
+
+def _rows(workspace_id, days, start=date(2024, 1, 1)):
+    return [
+        (workspace_id, start + timedelta(days=i), 100.0 + i % 7)
+        for i in range(days)
+    ]
+
+
+def _db(rows):
+    result = MagicMock()
+    result.fetchall.return_value = rows
+    db = AsyncMock()
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+def _prediction(day, value=10.0):
+    return {
+        "date": day,
+        "predicted_value": value,
+        "confidence_lower": value - 1,
+        "confidence_upper": value + 1,
+        "confidence_level": 0.95,
+        "model": "ensemble",
+    }
+
+
+class TestForecastAll:
+    """Test loading and fitting every workspace."""
+
+    @pytest.mark.asyncio
+    async def test_one_query_and_one_job_per_workspace(self):
+        """Test all series load together and short histories are skipped."""
+        db = _db(_rows("ws-1", 40) + _rows("ws-2", 10) + _rows("ws-3", 35))
+        executor = MagicMock(capacity=2)
+        executor.run = AsyncMock(side_effect=[
+            {"predictions": [], "historical_daily_avg": 1.0},
+            RuntimeError("fit failed"),
+        ])
+
+        with patch(
+            "src.services.analytics.batch_forecasting.get_model_executor",
+            return_value=executor,
+        ):
+            forecasts, failed = await BatchForecaster(db).forecast_all(7)
+
+        db.execute.assert_awaited_once()
+        assert list(forecasts) == ["ws-1"]
+        assert failed == ["ws-3"]
+
+        fn, history, days_ahead = executor.run.await_args_list[0].args
+        assert fn is credit_consumption_forecast
+        assert list(history.columns) == ["date", "credits"]
+        assert len(history) == 40
+        assert days_ahead == 7
+
+
+class TestStoredForecasts:
+    """Test writing and serving stored forecasts."""
+
+    @pytest.mark.asyncio
+    async def test_store_is_one_bulk_upsert(self):
+        """Test all workspaces' rows are written in one statement."""
+        db = _db([])
+        forecasts = {
+            "ws-1": {"predictions": [_prediction("2024-02-01"), _prediction("2024-02-02")],
+                     "historical_daily_avg": 12.5},
+            "ws-2": {"predictions": [_prediction("2024-02-01")], "historical_daily_avg": 3.0},
+        }
+
+        stored = await BatchForecaster(db).store_forecasts(forecasts)
+
+        assert stored == 3
+        db.execute.assert_awaited_once()
+        db.commit.assert_awaited_once()
+        params = db.execute.await_args.args[1]
+        assert params["workspace_ids"] == ["ws-1", "ws-1", "ws-2"]
+        assert params["prediction_dates"][1] == date(2024, 2, 2)
+        assert params["model_version"] == BATCH_MODEL_VERSION
+        assert json.loads(params["metadata"][2])["historical_daily_avg"] == 3.0
+
+    @pytest.mark.asyncio
+    async def test_serves_covered_horizon_only(self):
+        """Test a stored forecast is served only if it covers the horizon."""
+        created = datetime(2024, 2, 1, 1, 30)
+        rows = [
+            SimpleNamespace(
+                prediction_date=date(2024, 2, 1) + timedelta(days=i),
+                predicted_value=10.0 + i,
+                confidence_lower=9.0,
+                confidence_upper=20.0,
+                confidence_level=0.95,
+                metadata={"model": "ensemble", "historical_daily_avg": 8.0},
+                created_at=created,
+            )
+            for i in range(3)
+        ]
+
+        assert await BatchForecaster(_db(rows)).load_credit_forecast("ws-1", 5) is None
+
+        stored = await BatchForecaster(_db(rows)).load_credit_forecast("ws-1", 3)
+        response = CreditConsumptionPredictor(AsyncMock()).from_stored("ws-1", 3, stored)
+
+        assert [p["predicted_value"] for p in response["predictions"]] == [10.0, 11.0, 12.0]
+        assert response["model_versions"]["ensemble"] == BATCH_MODEL_VERSION
+        assert response["generated_at"] == created.isoformat()
+        # Predicted 11/day against 8/day historically
+        assert response["insights"]["summary"]["trend_percentage"] == pytest.approx(37.5)
+
+
+class TestForecastJob:
+    """Test the per-workspace job run on the model pool."""
+
+    def test_ensembles_prophet_and_arima(self):
+        """Test the job combines both models over the horizon."""
+        rng = np.random.default_rng(0)
+        history = pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=60, freq="D"),
+            "credits": 100 + rng.normal(0, 5, 60),
+        })
+        future = pd.DataFrame({
+            "ds": pd.date_range("2024-03-01", periods=5, freq="D"),
+            "yhat": [100.0] * 5,
+            "yhat_lower": [90.0] * 5,
+            "yhat_upper": [110.0] * 5,
+        })
+
+        with patch(
+            "src.services.analytics.batch_forecasting.prophet_forecast",
+            return_value=future,
+        ) as prophet:
+            result = credit_consumption_forecast(history, 5)
+
+        assert prophet.call_args.args[2] == 5
+        predictions = result["predictions"]
+        assert [p["date"] for p in predictions] == [
+            "2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04", "2024-03-05"
+        ]
+        assert all(p["model"] == "ensemble" for p in predictions)
+        assert predictions[0]["predicted_value"] == pytest.approx(100.0, abs=10.0)
+        assert result["historical_daily_avg"] == pytest.approx(history["credits"].mean(), rel=0.01)
+
+
+class TestListWorkspaces:
+    """Test choosing the workspaces the nightly batch fans out over."""
+
+    @pytest.mark.asyncio
+    async def test_lists_workspaces_with_enough_history(self):
+        """Test the history threshold is applied in the query."""
+        db = _db([("ws-1",), ("ws-3",)])
+
+        assert await BatchForecaster(db).list_workspaces() == ["ws-1", "ws-3"]
+        assert db.execute.await_args.args[1] == {"min_days": 30}
@@ -0,0 +1,125 @@
+"""Unit tests for the Redis value codec."""
+
+import json
+import pickle
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from src.core import cache_codec
+from src.core.cache_codec import (
+    COMPRESSION_LZ4,
+    COMPRESSION_NONE,
+    COMPRESSION_ZSTD,
+    FORMAT_VERSION,
+    SERIALIZER_MSGPACK,
+    SERIALIZER_ORJSON,
+    SERIALIZER_PICKLE,
+    CacheCodec,
+    CodecError,
+)
+from src.core.redis import RedisClient
+
+# Optional codecs, not in requirements.txt; the codec falls back without them
+needs_msgpack = pytest.mark.skipif(cache_codec.msgpack is None, reason="msgpack not installed")
+needs_lz4 = pytest.mark.skipif(cache_codec.lz4_frame is None, reason="lz4 not installed")
+
+DASHBOARD = {
+    "workspace_id": "ws123",
+    "metrics": [{"date": f"2024-01-{i % 28 + 1:02d}", "runs": i} for i in range(500)],
+}
+
+
+@pytest.mark.parametrize(
+    "serializer", ["json", "orjson", pytest.param("msgpack", marks=needs_msgpack)]
+)
+@pytest.mark.parametrize(
+    "compression", ["none", "zstd", pytest.param("lz4", marks=needs_lz4)]
+)
+def test_round_trip(serializer, compression):
+    """Test every serializer/compression combination round-trips."""
+    codec = CacheCodec(serializer=serializer, compression=compression)
+
+    encoded = codec.encode(DASHBOARD)
+
+    assert encoded[0] == FORMAT_VERSION
+    assert codec.decode(encoded) == DASHBOARD
+
+
+def test_compresses_only_above_threshold():
+    """Test small payloads are stored uncompressed and large ones compressed."""
+    codec = CacheCodec(serializer="orjson", compression="zstd", compression_threshold=1024)
+
+    small = codec.encode({"value": 1})
+    large = codec.encode(DASHBOARD)
+
+    assert CacheCodec.parse_header(small) == (SERIALIZER_ORJSON, COMPRESSION_NONE)
+    assert CacheCodec.parse_header(large) == (SERIALIZER_ORJSON, COMPRESSION_ZSTD)
+    assert len(large) < len(json.dumps(DASHBOARD)) / 4
+
+
+def test_non_json_values_fall_back_to_pickle():
+    """Test values JSON cannot represent keep their type via pickle."""
+    codec = CacheCodec(serializer="orjson", compression="none")
+    value = {"generated_at": datetime(2024, 1, 1, 12, 0)}
+
+    encoded = codec.encode(value)
+
+    assert CacheCodec.parse_header(encoded)[0] == SERIALIZER_PICKLE
+    assert codec.decode(encoded) == value
+
+
+def test_reads_legacy_entries():
+    """Test entries written before the codec are still readable."""
+    codec = CacheCodec()
+
+    assert codec.decode(json.dumps({"legacy": True}).encode()) == {"legacy": True}
+    assert codec.decode(pickle.dumps({1, 2, 3})) == {1, 2, 3}
+
+
+@needs_msgpack
+@needs_lz4
+def test_reads_entries_written_with_other_settings():
+    """Test the header, not local settings, selects the decoder."""
+    writer = CacheCodec(serializer="msgpack", compression="lz4", compression_threshold=0)
+    reader = CacheCodec(serializer="json", compression="none")
+
+    encoded = writer.encode(DASHBOARD)
+
+    assert CacheCodec.parse_header(encoded) == (SERIALIZER_MSGPACK, COMPRESSION_LZ4)
+    assert reader.decode(encoded) == DASHBOARD
+
+
+def test_missing_optional_codec():
+    """Test missing packages fall back on write and fail loudly on read."""
+    encoded = CacheCodec(serializer="orjson", compression="none").encode([1])
+
+    with patch.object(cache_codec, "orjson", None):
+        codec = CacheCodec(serializer="orjson")
+        assert codec.decode(codec.encode([1])) == [1]
+        with pytest.raises(CodecError):
+            codec.decode(encoded)
+
+
+def test_invalid_settings():
+    """Test unknown serializer/compression names are rejected."""
+    with pytest.raises(ValueError):
+        CacheCodec(serializer="yaml")
+    with pytest.raises(ValueError):
+        CacheCodec(compression="gzip")
+
+
+@pytest.mark.asyncio
+async def test_redis_client_uses_codec():
+    """Test RedisClient writes encoded values and reads them back."""
+    with patch("src.core.redis.redis") as mock_redis:
+        mock_redis.from_url.return_value = AsyncMock()
+        client = RedisClient("redis://localhost:6379/0", codec=CacheCodec())
+
+    await client.set("k", DASHBOARD, expire=60)
+    _, ttl, stored = client.redis.setex.call_args.args
+    assert ttl == 60
+    assert stored[0] == FORMAT_VERSION
+
+    client.redis.get = AsyncMock(return_value=stored)
+    assert await client.get("k") == DASHBOARD
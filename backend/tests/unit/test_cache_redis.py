@@ -1,13 +1,24 @@
 """Unit tests for Redis caching layer."""
 
+import asyncio
 import pytest
 import json
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from src.core.redis import RedisClient
 from src.services.cache.keys import CacheKeys
 from src.services.cache.redis_cache import CacheService
-from src.services.cache.decorator import cached, invalidate_pattern
+from src.services.cache.decorator import cache_many, cached, invalidate_pattern
+from src.services.cache.single_flight import (
+    COALESCED,
+    LOCK_PREFIX,
+    MISS,
+    STALE,
+    CoalescingLoader,
+    SingleFlight,
+    unwrap_value,
+    wrap_value,
+)
 
 
 class TestRedisClient:
@@ -162,29 +173,63 @@ class TestCacheService:
         assert result == {"computed": "data"}
         compute_func.assert_called_once()
         cache_service.redis.set.assert_called_once_with(
-            "test_key", {"computed": "data"}, expire=300
+            "test_key", {"computed": "data"}, expire=300, tags=[]
         )
 
+    @pytest.mark.asyncio
+    async def test_get_or_compute_failure_not_recomputed(self):
+        """Test a failing fill runs once for all concurrent callers and propagates."""
+        redis_client = FakeRedisClient()
+        service = CacheService(redis_client)
+        service._loader = CoalescingLoader(redis_client, flight=SingleFlight())
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+
+        results = await asyncio.gather(
+            *[service.get_or_compute("exec:test_key", compute) for _ in range(10)],
+            return_exceptions=True,
+        )
+
+        assert calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert redis_client.set_calls == []
+
     @pytest.mark.asyncio
     async def test_invalidate_workspace(self, cache_service):
-        """Test workspace cache invalidation."""
-        cache_service.redis.flush_pattern = AsyncMock(return_value=5)
+        """Test workspace cache invalidation deletes the workspace tag's members."""
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(
+            return_value=[{b"exec:dashboard:ws123:7d", b"agent:top:ws123:7d:10"}, 1]
+        )
+        cache_service.redis.redis.pipeline = MagicMock(return_value=pipe)
 
         deleted = await cache_service.invalidate_workspace("ws123")
 
-        # Should call flush_pattern for multiple patterns
-        assert cache_service.redis.flush_pattern.call_count >= 3
-        assert deleted > 0
+        assert deleted == 2
+        pipe.smembers.assert_called_once_with("tag:ws:ws123")
+        cache_service.redis.redis.delete.assert_called_once_with(
+            "agent:top:ws123:7d:10", "exec:dashboard:ws123:7d"
+        )
+        cache_service.redis.flush_pattern.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_invalidate_agent(self, cache_service):
         """Test agent cache invalidation."""
-        cache_service.redis.flush_pattern = AsyncMock(return_value=3)
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(
+            return_value=[{b"agent:analytics:agent456:7d", b"agent:analytics:agent456:30d"}, 1]
+        )
+        cache_service.redis.redis.pipeline = MagicMock(return_value=pipe)
 
         deleted = await cache_service.invalidate_agent("agent456")
 
-        assert deleted == 3
-        cache_service.redis.flush_pattern.assert_called_once()
+        assert deleted == 2
+        pipe.smembers.assert_called_once_with("tag:agent:agent456")
 
     @pytest.mark.asyncio
     async def test_get_cache_stats(self, cache_service):
@@ -287,3 +332,206 @@ async def test_invalidate_pattern_helper():
 
         assert deleted == 10
         mock_redis.flush_pattern.assert_called_once_with("test:*")
+
+
+class FakeRedisClient:
+    """In-memory stand-in for RedisClient used by the coalescing tests."""
+
+    def __init__(self):
+        self.store = {}
+        self.locks = {}
+        self.set_calls = []
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=None, tags=None):
+        self.set_calls.append((key, value, expire))
+        self.store[key] = value
+        return True
+
+    async def exists(self, key):
+        return key in self.store or key in self.locks
+
+    async def acquire_lock(self, name, timeout_ms):
+        if name in self.locks:
+            return None
+        self.locks[name] = "token"
+        return "token"
+
+    async def release_lock(self, name, token):
+        return self.locks.pop(name, None) == token
+
+
+class TestCoalescingLoader:
+    """Tests for single-flight fills and stale-while-revalidate."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self):
+        """Test concurrent misses for one key share a single computation."""
+        redis_client = FakeRedisClient()
+        loader = CoalescingLoader(redis_client, flight=SingleFlight())
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+
+        results = await asyncio.gather(
+            *[loader.get_or_compute("k", compute, ttl=60) for _ in range(10)]
+        )
+
+        assert calls == 1
+        assert all(value == {"value": 42} for value, _ in results)
+        assert sorted(outcome for _, outcome in results).count(MISS) == 1
+        assert len(redis_client.set_calls) == 1
+        assert redis_client.locks == {}
+
+    @pytest.mark.asyncio
+    async def test_waits_for_fill_held_by_other_instance(self):
+        """Test a miss polls for the value when another instance holds the lock."""
+        redis_client = FakeRedisClient()
+        redis_client.locks[LOCK_PREFIX + "k"] = "other"
+        loader = CoalescingLoader(redis_client, flight=SingleFlight(), poll_interval=0.01)
+        compute = AsyncMock(return_value="mine")
+
+        async def other_instance_fill():
+            await asyncio.sleep(0.03)
+            redis_client.store["k"] = "theirs"
+            redis_client.locks.clear()
+
+        (value, outcome), _ = await asyncio.gather(
+            loader.get_or_compute("k", compute, ttl=60), other_instance_fill()
+        )
+
+        assert (value, outcome) == ("theirs", COALESCED)
+        compute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self):
+        """Test an expired envelope is served and refreshed in the background."""
+        redis_client = FakeRedisClient()
+        redis_client.store["k"] = wrap_value("old", ttl=-1)
+        loader = CoalescingLoader(redis_client, flight=SingleFlight())
+        compute = AsyncMock(return_value="new")
+
+        value, outcome = await loader.get_or_compute("k", compute, ttl=60, stale_ttl=30)
+        assert (value, outcome) == ("old", STALE)
+
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        compute.assert_called_once()
+        key, stored, expire = redis_client.set_calls[-1]
+        assert expire == 90
+        assert unwrap_value(stored) == ("new", False)
+
+    @pytest.mark.asyncio
+    async def test_compute_error_shared_and_lock_released(self):
+        """Test a failing computation propagates and releases the fill lock."""
+        redis_client = FakeRedisClient()
+        loader = CoalescingLoader(redis_client, flight=SingleFlight())
+        compute = AsyncMock(side_effect=RuntimeError("db down"))
+
+        with pytest.raises(RuntimeError):
+            await loader.get_or_compute("k", compute, ttl=60)
+
+        assert redis_client.locks == {}
+        assert redis_client.set_calls == []
+
+
+class TestBatchOperations:
+    """Tests for batch primitives and the cache_many decorator."""
+
+    @pytest.fixture
+    async def redis_client(self):
+        """Create a RedisClient over a mock connection with a mock pipeline."""
+        with patch("src.core.redis.redis") as mock_redis:
+            mock_redis.from_url.return_value = AsyncMock()
+            client = RedisClient("redis://localhost:6379/0")
+        client.redis.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock()))
+        yield client
+
+    @pytest.mark.asyncio
+    async def test_mget_decodes_and_keeps_order(self, redis_client):
+        """Test mget returns decoded values with None for missing keys."""
+        redis_client.redis.mget = AsyncMock(
+            return_value=[redis_client.codec.encode({"a": 1}), None]
+        )
+
+        result = await redis_client.mget(["k1", "k2"])
+
+        assert result == [{"a": 1}, None]
+        redis_client.redis.mget.assert_called_once_with(["k1", "k2"])
+
+    @pytest.mark.asyncio
+    async def test_mset_pipelines_setex(self, redis_client):
+        """Test mset writes every key with its TTL in one pipeline."""
+        pipe = redis_client.redis.pipeline.return_value
+
+        assert await redis_client.mset({"k1": 1, "k2": 2}, expire=60) is True
+
+        assert pipe.setex.call_count == 2
+        pipe.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_scan_ttls_pipelines_ttl_per_batch(self, redis_client):
+        """Test scan_ttls issues one pipelined TTL round trip per SCAN batch."""
+        redis_client.redis.scan = AsyncMock(
+            side_effect=[(7, [b"k1", b"k2"]), (0, [b"k3"])]
+        )
+        pipe = redis_client.redis.pipeline.return_value
+        pipe.execute = AsyncMock(side_effect=[[60, -1], [-1]])
+
+        batches = [batch async for batch in redis_client.scan_ttls("exec:*")]
+
+        assert batches == [[(b"k1", 60), (b"k2", -1)], [(b"k3", -1)]]
+        assert pipe.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_many_fetches_only_missing_items(self):
+        """Test cache_many passes only uncached items to the function."""
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(return_value=[{"id": "a1"}, None, {"id": "a3"}, None])
+        fetched_for = []
+
+        with patch(
+            "src.services.cache.decorator.get_redis_client", return_value=mock_redis
+        ):
+
+            @cache_many(
+                key_func=lambda agent_ids, **_: [f"agent:m:{i}" for i in agent_ids],
+                ttl=CacheKeys.TTL_LONG,
+            )
+            async def get_agents(agent_ids, timeframe="7d"):
+                fetched_for.append(list(agent_ids))
+                return [{"id": i} for i in agent_ids]
+
+            result = await get_agents(["a1", "a2", "a3", "a4"], timeframe="30d")
+
+        assert result == [{"id": "a1"}, {"id": "a2"}, {"id": "a3"}, {"id": "a4"}]
+        assert fetched_for == [["a2", "a4"]]
+        mock_redis.mset.assert_called_once_with(
+            {"agent:m:a2": {"id": "a2"}, "agent:m:a4": {"id": "a4"}},
+            expire=CacheKeys.TTL_LONG,
+            tags={
+                "agent:m:a2": ["agent:a2", "agent:m@agent:a2"],
+                "agent:m:a4": ["agent:a4", "agent:m@agent:a4"],
+            },
+        )
+
+    @pytest.mark.asyncio
+    async def test_cache_many_all_cached(self):
+        """Test cache_many skips the function when every key is cached."""
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(return_value=[1, 2])
+        func = AsyncMock()
+
+        with patch(
+            "src.services.cache.decorator.get_redis_client", return_value=mock_redis
+        ):
+            wrapped = cache_many(key_func=lambda ids: [f"k:{i}" for i in ids])(func)
+            assert await wrapped(["x", "y"]) == [1, 2]
+
+        func.assert_not_called()
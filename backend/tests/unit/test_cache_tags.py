@@ -0,0 +1,147 @@
+"""Unit tests for tag-set cache invalidation."""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.asyncio import Redis
+
+from src.core.redis import CACHE_INVALIDATION_CHANNEL, RedisClient
+from src.services.cache.keys import CacheKeys
+from src.services.cache.tags import (
+    TagIndex,
+    agent_tag,
+    family_tag,
+    tags_for_key,
+    user_tag,
+    workspace_tag,
+)
+from src.services.events.handlers import EventHandlers
+
+
+@pytest.mark.parametrize(
+    "key,expected",
+    [
+        (
+            CacheKeys.executive_dashboard("ws1", "7d"),
+            ["ws:ws1", "exec:dashboard@ws:ws1"],
+        ),
+        (CacheKeys.agent_top("ws1", "7d"), ["ws:ws1", "agent:top@ws:ws1"]),
+        (
+            CacheKeys.agent_analytics("a1", "7d"),
+            ["agent:a1", "agent:analytics@agent:a1"],
+        ),
+        (
+            CacheKeys.user_activity("u1", "2024-01-01"),
+            ["user:u1", "user:activity@user:u1"],
+        ),
+        (
+            CacheKeys.metric_aggregation("runs", "ws1", "daily"),
+            ["ws:ws1", "metrics:agg@ws:ws1"],
+        ),
+        (CacheKeys.query_result("abc"), []),
+        ("short", []),
+    ],
+)
+def test_tags_for_key(key, expected):
+    """Test tags are derived from the CacheKeys layout."""
+    assert tags_for_key(key) == expected
+
+
+def _mock_redis(members):
+    """Raw Redis mock whose transactional pipeline returns tag members."""
+    redis = MagicMock(spec=Redis)
+    redis.delete = AsyncMock()
+    redis.publish = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=members)
+    redis.pipeline = MagicMock(return_value=pipe)
+    return redis, pipe
+
+
+class TestTagIndex:
+    """Tests for TagIndex invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_invalidate_deletes_members_and_tag_sets(self):
+        """Test invalidation deletes each member once and drops the tag sets."""
+        redis, pipe = _mock_redis(
+            [{b"exec:dashboard:ws1:7d"}, {b"exec:dashboard:ws1:7d", b"agent:top:ws1:7d:10"}, 1, 1]
+        )
+        tags = [agent_tag("a1"), family_tag("exec", "dashboard", workspace_tag("ws1"))]
+
+        keys = await TagIndex(redis).invalidate(tags)
+
+        assert keys == ["agent:top:ws1:7d:10", "exec:dashboard:ws1:7d"]
+        redis.pipeline.assert_called_once_with(transaction=True)
+        assert [c.args for c in pipe.delete.call_args_list] == [
+            ("tag:agent:a1",),
+            ("tag:exec:dashboard@ws:ws1",),
+        ]
+        redis.delete.assert_awaited_once_with(*keys)
+        channel, message = redis.publish.call_args.args
+        assert channel == CACHE_INVALIDATION_CHANNEL
+        assert json.loads(message)["keys"] == keys
+
+    @pytest.mark.asyncio
+    async def test_invalidate_empty_tag(self):
+        """Test an unknown tag deletes nothing and publishes nothing."""
+        redis, _ = _mock_redis([set(), 0])
+
+        assert await TagIndex(redis).invalidate([user_tag("u1")]) == []
+        redis.delete.assert_not_called()
+        redis.publish.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_lazy_invalidation_bumps_generation(self):
+        """Test lazy invalidation moves readers to a new versioned key."""
+        redis, pipe = _mock_redis([1])
+        index = TagIndex(redis)
+        key = CacheKeys.executive_dashboard("ws1", "7d")
+
+        assert await index.invalidate([workspace_tag("ws1")], lazy=True) == []
+        pipe.incr.assert_called_once_with("tag:gen:ws:ws1")
+
+        redis.mget = AsyncMock(return_value=[None, None])
+        assert await index.versioned_key(key) == key
+
+        redis.mget = AsyncMock(return_value=[b"1", None])
+        assert await index.versioned_key(key) == f"{key}:g1.0"
+
+    @pytest.mark.asyncio
+    async def test_redis_client_registers_tags_on_set(self):
+        """Test RedisClient.set writes the value and tag sets in one pipeline."""
+        with patch("src.core.redis.redis") as mock_redis:
+            mock_redis.from_url.return_value = AsyncMock()
+            client = RedisClient("redis://localhost:6379/0")
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[True, 1, True])
+        client.redis.pipeline = MagicMock(return_value=pipe)
+
+        assert await client.set("agent:analytics:a1:7d", {"runs": 1}, 60, tags=["agent:a1"])
+
+        pipe.setex.assert_called_once()
+        pipe.sadd.assert_called_once_with("tag:agent:a1", "agent:analytics:a1:7d")
+        pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_agent_run_completed_invalidates_by_tag():
+    """Test agent completion invalidates tags instead of scanning the keyspace."""
+    redis_client = AsyncMock()
+    redis_client.redis, pipe = _mock_redis([set()] * 4 + [0] * 4)
+
+    with patch(
+        "src.services.events.handlers.get_redis_client", return_value=redis_client
+    ):
+        await EventHandlers.on_agent_run_completed(
+            {"agent_id": "a1", "workspace_id": "ws1"}
+        )
+
+    assert [c.args[0] for c in pipe.smembers.call_args_list] == [
+        "tag:agent:a1",
+        "tag:exec:dashboard@ws:ws1",
+        "tag:agent:top@ws:ws1",
+        "tag:metrics:runs@ws:ws1",
+    ]
+    redis_client.flush_pattern.assert_not_called()
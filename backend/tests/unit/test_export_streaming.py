@@ -0,0 +1,139 @@
+"""Unit tests for the streaming export pipeline."""
+
+import csv
+import gzip
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.services.exports import json_export, parquet_export
+from src.services.exports.export_processor import ExportProcessor
+
+
+async def batched(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+@pytest.fixture
+def rows():
+    return [{"id": i, "status": "completed" if i % 2 else "failed"} for i in range(2500)]
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return ExportProcessor(MagicMock(), export_dir=str(tmp_path), fetch_size=100)
+
+
+def test_stream_to_json_array_is_valid_json(rows):
+    output = io.BytesIO()
+
+    count = json_export.stream_to_json(iter(rows), output, lines=False)
+
+    assert count == len(rows)
+    assert json.loads(output.getvalue()) == rows
+
+
+def test_stream_to_json_lines(rows):
+    output = io.BytesIO()
+
+    json_export.stream_to_json(iter(rows[:3]), output)
+
+    assert output.getvalue().decode().splitlines() == [json.dumps(r) for r in rows[:3]]
+
+
+def test_stream_to_parquet_writes_row_groups(tmp_path, rows):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+
+    count = parquet_export.stream_to_parquet(iter(rows), path, ["id", "status"], batch_size=1000)
+
+    assert count == len(rows)
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_rows == len(rows)
+    assert metadata.num_row_groups == 3
+
+
+def test_stream_to_parquet_widens_first_batch_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from decimal import Decimal
+    path = str(tmp_path / "out.parquet")
+    rows = [{"id": 1, "error_message": None, "credits": Decimal("1.50")},
+            {"id": 2, "error_message": None, "credits": Decimal("2.25")},
+            {"id": 3, "error_message": "timeout", "credits": Decimal("12345678.75")},
+            {"id": 4, "error_message": {"code": 504}, "credits": None}]
+
+    count = parquet_export.stream_to_parquet(
+        iter(rows), path, ["id", "error_message", "credits"], batch_size=2
+    )
+
+    assert count == 4
+    written = pq.read_table(path).to_pylist()
+    assert [r["error_message"] for r in written] == [None, None, "timeout", '{"code": 504}']
+    assert written[2]["credits"] == Decimal("12345678.75")
+
+
+@pytest.mark.asyncio
+async def test_write_csv_streams_batches(processor, tmp_path, rows):
+    path = str(tmp_path / "out.csv.gz")
+
+    count = await processor._write_data_to_file(
+        batched(rows, 100), path, "csv", "gzip"
+    )
+
+    assert count == len(rows)
+    with gzip.open(path, "rt") as f:
+        written = list(csv.DictReader(f))
+    assert len(written) == len(rows)
+    assert written[0] == {"id": "0", "status": "failed"}
+
+
+@pytest.mark.asyncio
+async def test_write_json_streams_batches(processor, tmp_path, rows):
+    path = str(tmp_path / "out.json")
+
+    count = await processor._write_data_to_file(batched(rows, 100), path, "json", "none")
+
+    assert count == len(rows)
+    with open(path) as f:
+        assert json.load(f) == rows
+
+
+@pytest.mark.asyncio
+async def test_write_empty_source_creates_no_rows(processor, tmp_path):
+    count = await processor._write_data_to_file(
+        batched([], 100), str(tmp_path / "empty.csv"), "csv", "none"
+    )
+
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_failure_propagates(processor, rows):
+    def failing_writer(row_iter):
+        next(row_iter)
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        await processor._pipe_to_writer(batched(rows, 10), failing_writer)
+
+
+@pytest.mark.asyncio
+async def test_source_failure_stops_writer(processor, rows):
+    consumed = []
+
+    def writer(row_iter):
+        for row in row_iter:
+            consumed.append(row)
+        return len(consumed)
+
+    async def failing_source():
+        yield rows[:10]
+        raise ConnectionError("cursor closed")
+
+    with pytest.raises(ConnectionError):
+        await processor._pipe_to_writer(failing_source(), writer)
+
+    assert len(consumed) == 10
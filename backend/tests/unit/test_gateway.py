@@ -83,13 +83,9 @@ class TestRateLimitMiddleware:
         client = TestClient(app_with_rate_limit)
 
         # Mock Redis to allow requests
-        with patch('backend.src.api.gateway.get_redis_client') as mock_redis:
+        with patch('backend.src.core.rate_limit_engine.get_redis_client') as mock_redis:
             mock_client = AsyncMock()
-            mock_client.redis.zremrangebyscore = AsyncMock()
-            mock_client.redis.zcard = AsyncMock(return_value=0)
-            mock_client.redis.zadd = AsyncMock()
-            mock_client.redis.expire = AsyncMock()
-            mock_client.redis.zrange = AsyncMock(return_value=[])
+            mock_client.redis.eval = AsyncMock(return_value=[1, 999, 0, 3600, 1])
             mock_redis.return_value = mock_client
 
             response = client.get("/test")
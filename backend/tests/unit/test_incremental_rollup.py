@@ -0,0 +1,160 @@
+"""Unit tests for incremental rollups and parallel backfills."""
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.aggregation import incremental, rollup
+
+
+class FakeSession:
+    """Async context manager standing in for an AsyncSession."""
+
+    def __init__(self):
+        self.rollback = AsyncMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_backfill_chunks_cover_range():
+    """Test chunks are consecutive and the last one is truncated."""
+    start = datetime(2024, 1, 1)
+    chunks = rollup.backfill_chunks(start, start + timedelta(hours=50), timedelta(hours=24))
+
+    assert chunks == [
+        (start, start + timedelta(hours=24)),
+        (start + timedelta(hours=24), start + timedelta(hours=48)),
+        (start + timedelta(hours=48), start + timedelta(hours=50)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_runs_chunks_with_bounded_concurrency():
+    """Test hourly backfills run whole-hour chunks, at most N at a time."""
+    running = 0
+    peak = 0
+    ranges = []
+
+    async def fake_rollup_range(db, start_time, end_time):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        ranges.append((start_time, end_time))
+        return {'start_time': start_time.isoformat()}
+
+    start = datetime(2024, 1, 1, 0, 30)
+    with patch.object(rollup, "rollup_range", side_effect=fake_rollup_range):
+        results = await rollup.backfill_rollups(
+            FakeSession, start, start + timedelta(days=10),
+            chunk_hours=24, max_concurrency=3
+        )
+
+    assert peak == 3
+    assert len(results) == 11
+    assert min(ranges)[0] == datetime(2024, 1, 1)
+    assert max(ranges)[1] == datetime(2024, 1, 11, 1)
+
+
+@pytest.mark.asyncio
+async def test_backfill_raises_after_all_chunks_finish():
+    """Test one failing chunk does not stop the others and is re-raised."""
+    calls = []
+
+    async def fake_daily_rollup(db, target_date):
+        calls.append(target_date)
+        if target_date.day == 2:
+            raise RuntimeError("boom")
+        return {}
+
+    with patch.object(rollup, "daily_rollup", side_effect=fake_daily_rollup):
+        with pytest.raises(RuntimeError):
+            await rollup.backfill_rollups(
+                FakeSession, datetime(2024, 1, 1), datetime(2024, 1, 5),
+                granularity='daily'
+            )
+
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_aggregation_limits_rows_to_touched_buckets():
+    """Test an ingestion window adds the touched-bucket filter and params."""
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock())
+    db.commit = AsyncMock()
+    since = datetime(2024, 1, 1, 10, 0)
+
+    await rollup.aggregate_credit_consumption(
+        db, datetime(2024, 1, 1), datetime(2024, 1, 2),
+        ingested_since=since, ingested_until=since + timedelta(minutes=1)
+    )
+    query, params = db.execute.call_args.args
+    # Execution logs are updated when runs finish, after they were inserted
+    assert "updated_at >= :ingested_since" in str(query)
+    assert params['ingested_since'] == since
+
+    await rollup.aggregate_credit_consumption(db, datetime(2024, 1, 1), datetime(2024, 1, 2))
+    query, params = db.execute.call_args.args
+    assert "ingested_since" not in str(query)
+    assert "ingested_since" not in params
+
+
+@pytest.mark.asyncio
+async def test_incremental_rollup_advances_watermarks():
+    """Test each source recomputes its touched hours and moves its watermark."""
+    now = datetime(2024, 1, 1, 12, 0, 30)
+    watermark = datetime(2024, 1, 1, 11, 59)
+    late_hour = datetime(2024, 1, 1, 3, 0)
+
+    db = MagicMock()
+    db.commit = AsyncMock()
+    aggregate = AsyncMock(return_value=2)
+    aggregate.__name__ = "aggregate"
+    sources = {'hourly:test': ('execution_logs', 'started_at', 'updated_at', (aggregate,))}
+
+    with patch.object(incremental, "SOURCES", sources), \
+            patch.object(incremental, "get_watermark", AsyncMock(return_value=watermark)), \
+            patch.object(incremental, "set_watermark", AsyncMock()) as set_watermark, \
+            patch.object(
+                incremental, "touched_hour_span",
+                AsyncMock(return_value=(late_hour, datetime(2024, 1, 1, 13, 0)))
+            ):
+        result = await incremental.incremental_hourly_rollup(
+            db, now=now, overlap=timedelta(minutes=1)
+        )
+
+    aggregate.assert_awaited_once_with(
+        db, late_hour, datetime(2024, 1, 1, 13, 0),
+        ingested_since=watermark - timedelta(minutes=1),
+        ingested_until=now
+    )
+    set_watermark.assert_awaited_once_with(db, 'hourly:test', now)
+    assert result['sources']['hourly:test']['buckets'] == {'aggregate': 2}
+
+
+@pytest.mark.asyncio
+async def test_touched_hours_include_rows_updated_after_watermark():
+    """Test a run started before the watermark and completed after it is found."""
+    started_hour = datetime(2024, 1, 1, 9, 0)
+    result = MagicMock()
+    result.fetchone.return_value = MagicMock(first_hour=started_hour, last_hour=started_hour)
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    since = datetime(2024, 1, 1, 11, 55)
+
+    span = await incremental.touched_hour_span(
+        db, 'execution_logs', 'started_at', 'updated_at', since, since + timedelta(minutes=5)
+    )
+
+    query, params = db.execute.call_args.args
+    assert "updated_at >= :ingested_since" in str(query)
+    assert "created_at" not in str(query)
+    assert params == {'ingested_since': since, 'ingested_until': since + timedelta(minutes=5)}
+    assert span == (started_hour, started_hour + timedelta(hours=1))
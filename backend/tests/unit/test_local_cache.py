@@ -0,0 +1,146 @@
+"""Unit tests for the in-process (L1) cache tier."""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.cache.local_cache import (
+    PROCESS_ORIGIN,
+    CacheInvalidationListener,
+    LocalCache,
+    apply_invalidation,
+)
+from src.services.cache.redis_cache import CacheService
+
+
+class TestLocalCache:
+    """Tests for LocalCache bounds, TTL and invalidation."""
+
+    def test_get_returns_cached_none(self):
+        """Test a stored None is distinguishable from a miss."""
+        cache = LocalCache()
+        cache.set("k", None)
+
+        assert cache.get("k") == (True, None)
+        assert cache.get("missing") == (False, None)
+
+    def test_evicts_least_recently_used(self):
+        """Test entry bound evicts the least recently used key."""
+        cache = LocalCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") == (False, None)
+        assert cache.get("a") == (True, 1)
+        assert len(cache) == 2
+
+    def test_memory_bound(self):
+        """Test byte bound evicts entries and rejects oversized values."""
+        cache = LocalCache(max_bytes=400)
+        cache.set("a", "x" * 200)
+        cache.set("b", "y" * 200)
+
+        assert cache.get("a") == (False, None)
+        assert cache.size_bytes <= 400
+
+        cache.set("huge", "z" * 1000)
+        assert cache.get("huge") == (False, None)
+
+    def test_ttl_expiry(self):
+        """Test entries expire after their TTL, capped at the default TTL."""
+        cache = LocalCache(default_ttl=30)
+
+        with patch("src.services.cache.local_cache.time.monotonic", return_value=0):
+            cache.set("short", 1, ttl=5)
+            cache.set("long", 2, ttl=3600)
+
+        with patch("src.services.cache.local_cache.time.monotonic", return_value=10):
+            assert cache.get("short") == (False, None)
+            assert cache.get("long") == (True, 2)
+
+        with patch("src.services.cache.local_cache.time.monotonic", return_value=31):
+            assert cache.get("long") == (False, None)
+
+    def test_apply_invalidation_patterns(self):
+        """Test channel invalidations apply Redis glob patterns."""
+        cache = LocalCache()
+        cache.set("exec:dashboard:ws1:7d", 1)
+        cache.set("exec:dashboard:ws2:7d", 2)
+        cache.set("agent:top:ws1:7d:10", 3)
+
+        removed = apply_invalidation(
+            keys=["agent:top:ws1:7d:10"], patterns=["exec:*:ws1:*"]
+        )
+
+        assert removed == 2
+        assert cache.get("exec:dashboard:ws2:7d") == (True, 2)
+
+    def test_listener_skips_own_messages(self):
+        """Test the listener ignores invalidations this process published."""
+        cache = LocalCache()
+        cache.set("k", 1)
+        listener = CacheInvalidationListener("redis://localhost:6379/0")
+
+        own = {"keys": ["k"], "patterns": [], "origin": PROCESS_ORIGIN}
+        listener._handle_message({"data": json.dumps(own)})
+        assert cache.get("k") == (True, 1)
+
+        other = {"keys": ["k"], "patterns": [], "origin": "other"}
+        listener._handle_message({"data": json.dumps(other)})
+        assert cache.get("k") == (False, None)
+
+
+class TestCacheServiceLocalTier:
+    """Tests for CacheService with an L1 tier."""
+
+    @pytest.mark.asyncio
+    async def test_get_fills_and_serves_from_local(self):
+        """Test a Redis hit is kept locally and served without Redis."""
+        mock_redis = AsyncMock()
+        mock_redis.get = AsyncMock(return_value={"value": 1})
+        service = CacheService(mock_redis, local_cache=LocalCache())
+
+        with patch("src.services.cache.redis_cache.record_cache_hit") as mock_hit:
+            assert await service.get("test:key") == {"value": 1}
+            assert await service.get("test:key") == {"value": 1}
+
+        mock_redis.get.assert_called_once_with("test:key")
+        assert mock_hit.call_args_list[-1].kwargs == {"tier": "l1"}
+
+    @pytest.mark.asyncio
+    async def test_set_and_delete_publish_invalidation(self):
+        """Test writes update the local tier and notify other replicas."""
+        mock_redis = AsyncMock()
+        local = LocalCache()
+        service = CacheService(mock_redis, local_cache=local)
+
+        await service.set("test:key", {"value": 2}, ttl=60)
+        assert local.get("test:key") == (True, {"value": 2})
+        mock_redis.publish_invalidation.assert_called_with(
+            keys=["test:key"], origin=PROCESS_ORIGIN
+        )
+
+        await service.delete("test:key")
+        assert local.get("test:key") == (False, None)
+        assert mock_redis.publish_invalidation.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_drops_local_entries(self):
+        """Test pattern and tag invalidation drop matching local entries."""
+        mock_redis = AsyncMock()
+        mock_redis.flush_pattern = AsyncMock(return_value=1)
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[{b"agent:analytics:a1:7d"}, 1])
+        mock_redis.redis.pipeline = MagicMock(return_value=pipe)
+        local = LocalCache()
+        local.set("exec:dashboard:ws1:7d", 1)
+        local.set("agent:analytics:a1:7d", 1)
+        service = CacheService(mock_redis, local_cache=local)
+
+        await service.clear_pattern("exec:*:ws1:*")
+        await service.invalidate_agent("a1")
+
+        assert local.get("exec:dashboard:ws1:7d") == (False, None)
+        assert local.get("agent:analytics:a1:7d") == (False, None)
@@ -0,0 +1,129 @@
+"""Unit tests for the shared model execution pool."""
+
+import asyncio
+import math
+import threading
+import time
+
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.analytics.model_execution import (
+    ModelExecutor,
+    ModelJobTimeoutError,
+    ModelQueueFullError,
+    arima_fit,
+)
+from src.services.analytics.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def gate():
+    """Event that blocks jobs until set; always released after the test."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+async def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+class TestModelExecutor:
+    """Test job submission, bounds, timeouts and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_runs_job_in_worker_process(self):
+        """Test a job runs in a separate process and returns its result."""
+        executor = ModelExecutor(max_workers=1, max_queue=1, timeout=30)
+        try:
+            assert not executor.in_process
+            assert await executor.run(math.factorial, 10) == 3628800
+            await _wait_until(lambda: executor.in_flight == 0)
+        finally:
+            executor.shutdown(wait=True)
+
+    @pytest.mark.asyncio
+    async def test_rejects_jobs_beyond_queue(self, gate):
+        """Test jobs are rejected once every worker and queue slot is taken."""
+        executor = ModelExecutor(max_workers=0, max_queue=1, timeout=5)
+        running = asyncio.create_task(executor.run(gate.wait))
+        queued = asyncio.create_task(executor.run(gate.wait))
+        await _wait_until(lambda: executor.in_flight == 2)
+
+        with pytest.raises(ModelQueueFullError):
+            await executor.run(gate.wait)
+
+        gate.set()
+        assert await running and await queued
+        executor.shutdown(wait=True)
+
+    @pytest.mark.asyncio
+    async def test_timeout_abandons_running_job(self, gate):
+        """Test a timed-out job raises but holds its slot until it finishes."""
+        executor = ModelExecutor(max_workers=0, max_queue=0, timeout=0.05)
+
+        with pytest.raises(ModelJobTimeoutError) as exc_info:
+            await executor.run(gate.wait)
+
+        # Existing asyncio.TimeoutError handlers still apply
+        assert isinstance(exc_info.value, asyncio.TimeoutError)
+        assert executor.in_flight == 1
+
+        gate.set()
+        await _wait_until(lambda: executor.in_flight == 0)
+        executor.shutdown(wait=True)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_is_dropped_from_queue(self, gate):
+        """Test cancelling a caller removes its job before it starts."""
+        executor = ModelExecutor(max_workers=0, max_queue=1, timeout=5)
+        calls = []
+
+        running = asyncio.create_task(executor.run(gate.wait))
+        queued = asyncio.create_task(executor.run(calls.append, "queued"))
+        await _wait_until(lambda: executor.in_flight == 2)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        await _wait_until(lambda: executor.in_flight == 1)
+
+        gate.set()
+        await running
+        executor.shutdown(wait=True)
+        assert calls == []
+
+
+class TestFitsUseExecutor:
+    """Test model fits are submitted instead of running inline."""
+
+    @pytest.mark.asyncio
+    async def test_registry_fits_run_on_pool(self):
+        """Test a registry ARIMA fit goes through the executor."""
+        history = pd.DataFrame({
+            "ds": pd.date_range("2024-01-01", periods=5, freq="D"),
+            "y": [1.0, 2.0, 3.0, 2.0, 1.0],
+        })
+        fitted = {"model": object(), "mape": 0.1, "aic": 12.0}
+
+        executor = MagicMock()
+        executor.run = AsyncMock(return_value=fitted)
+        registry = ModelRegistry(AsyncMock())
+        registry.register = AsyncMock()
+        with patch(
+            "src.services.analytics.model_registry.get_model_executor",
+            return_value=executor,
+        ):
+            await registry.fit_arima("ws-1", "credit_consumption", history, (1, 1, 1))
+
+        fn, series, order = executor.run.await_args.args
+        assert fn is arima_fit
+        assert list(series) == [1.0, 2.0, 3.0, 2.0, 1.0]
+        assert order == (1, 1, 1)
+        assert registry.register.await_args.args[3] is fitted["model"]
+        assert registry.register.await_args.kwargs["metrics"] == {"mape": 0.1, "aic": 12.0}
@@ -0,0 +1,265 @@
+"""Unit tests for the persisted model registry."""
+
+import hashlib
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sklearn.linear_model import LinearRegression
+
+from src.services.analytics.error_rate_predictor import ErrorRatePredictor
+from src.services.analytics.model_execution import arima_fit
+from src.services.analytics.model_registry import (
+    ArtifactStore,
+    ModelRegistry,
+    RegisteredModel,
+    arima_predict,
+    clear_model_cache,
+    deserialize_model,
+    retrain_reason,
+    serialize_model,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_model_cache():
+    clear_model_cache()
+    yield
+    clear_model_cache()
+
+
+def _history(values, start="2024-01-01"):
+    return pd.DataFrame({
+        "ds": pd.date_range(start, periods=len(values), freq="D"),
+        "y": np.asarray(values, dtype=float),
+    })
+
+
+def _row(artifact, version="abc", created_at=None):
+    return SimpleNamespace(
+        id="model-1",
+        version=version,
+        model_artifacts_path=artifact,
+        training_params={},
+        performance_metrics={"mape": 0.1},
+        created_at=created_at or datetime(2024, 1, 1),
+    )
+
+
+class TestArtifactStore:
+    """Test content-addressed artifact storage."""
+
+    def test_write_is_content_addressed(self, tmp_path):
+        """Test identical payloads share one artifact named by their hash."""
+        store = ArtifactStore(str(tmp_path))
+        digest = hashlib.sha256(b"model").hexdigest()
+
+        first = store.write(b"model", "joblib")
+        second = store.write(b"model", "joblib")
+
+        assert first == second == f"{digest[:2]}/{digest}.joblib"
+        assert store.read(first) == b"model"
+        assert store.version(first) == digest[:12]
+
+    def test_read_rejects_corrupt_artifacts(self, tmp_path):
+        """Test an artifact whose bytes no longer match its hash is refused."""
+        store = ArtifactStore(str(tmp_path))
+        artifact = store.write(b"model", "joblib")
+        (tmp_path / artifact).write_bytes(b"tampered")
+
+        with pytest.raises(ValueError, match="corrupt"):
+            store.read(artifact)
+
+    def test_joblib_round_trip(self):
+        """Test fitted estimators survive serialization."""
+        model = LinearRegression().fit([[0], [1], [2]], [1, 3, 5])
+
+        restored = deserialize_model(serialize_model(model, "linear"), "linear")
+
+        assert restored.predict([[3]])[0] == pytest.approx(7.0)
+
+
+class TestModelRegistry:
+    """Test registering and serving models."""
+
+    @pytest.mark.asyncio
+    async def test_register_then_serve_from_cache(self, tmp_path):
+        """Test a registered model is activated and served without a reload."""
+        store = ArtifactStore(str(tmp_path))
+        model = LinearRegression().fit([[0], [1]], [0, 1])
+        history = _history([1.0, 2.0, 3.0])
+
+        inserted = MagicMock()
+        inserted.fetchone.return_value = SimpleNamespace(id="model-1", created_at=datetime(2024, 1, 4))
+        db = AsyncMock()
+        db.execute = AsyncMock(side_effect=[inserted, MagicMock()])
+
+        registered = await ModelRegistry(db, store).register(
+            "ws-1", "credit_consumption", "linear", model, history, metrics={"mape": 0.2}
+        )
+
+        insert_params = db.execute.call_args_list[0].args[1]
+        assert insert_params["model_name"] == "credit_consumption:linear:ws-1"
+        assert insert_params["version"] == registered.version
+        assert insert_params["training_record_count"] == 3
+        deactivate_params = db.execute.call_args_list[1].args[1]
+        assert deactivate_params["version"] == registered.version
+        db.commit.assert_awaited_once()
+        assert registered.metrics["target_mean"] == pytest.approx(2.0)
+        assert registered.history_end == pd.Timestamp("2024-01-03")
+
+        # Serving reads the row but not the artifact
+        lookup = MagicMock()
+        lookup.fetchone.return_value = _row(insert_params["model_artifacts_path"], registered.version)
+        db.execute = AsyncMock(return_value=lookup)
+        with patch.object(store, "read") as read:
+            served = await ModelRegistry(db, store).get("ws-1", "credit_consumption", "linear")
+
+        read.assert_not_called()
+        assert served.model is model
+        assert served.version == registered.version
+
+    @pytest.mark.asyncio
+    async def test_get_loads_artifact_once(self, tmp_path):
+        """Test a cold process deserializes an artifact once per LRU entry."""
+        store = ArtifactStore(str(tmp_path))
+        model = LinearRegression().fit([[0], [1]], [0, 2])
+        artifact = store.write(serialize_model(model, "linear"), "joblib")
+
+        lookup = MagicMock()
+        lookup.fetchone.return_value = _row(artifact)
+        db = AsyncMock()
+        db.execute = AsyncMock(return_value=lookup)
+        registry = ModelRegistry(db, store)
+
+        with patch.object(store, "read", wraps=store.read) as read:
+            first = await registry.get("ws-1", "target", "linear")
+            second = await registry.get("ws-1", "target", "linear")
+
+        assert read.call_count == 1
+        assert first.model is second.model
+        assert first.model.predict([[2]])[0] == pytest.approx(4.0)
+
+    @pytest.mark.asyncio
+    async def test_get_without_model(self, tmp_path):
+        """Test lookups without an active model return None."""
+        lookup = MagicMock()
+        lookup.fetchone.return_value = None
+        db = AsyncMock()
+        db.execute = AsyncMock(return_value=lookup)
+
+        assert await ModelRegistry(db, ArtifactStore(str(tmp_path))).get("ws-1", "t", "arima") is None
+
+
+class TestRetrainReason:
+    """Test when registered models are refitted."""
+
+    def _registered(self, history, created_at):
+        stats = {
+            "target_mean": float(history["y"].mean()),
+            "target_std": float(history["y"].std(ddof=1)),
+            "history_end": history["ds"].max().isoformat(),
+        }
+        return RegisteredModel(
+            id="m", version="v", model_type="prophet", target_metric="t",
+            model=None, metrics=stats, created_at=created_at,
+        )
+
+    def test_current_model_is_kept(self):
+        """Test new data resembling the training data needs no refit."""
+        history = _history([10, 11, 9, 10, 12, 8, 10])
+        registered = self._registered(history, datetime(2024, 1, 8))
+        current = pd.concat([history, _history([10, 11, 9], start="2024-01-08")])
+
+        assert retrain_reason(registered, current, now=datetime(2024, 1, 11)) is None
+
+    def test_drift_triggers_refit(self):
+        """Test a shifted level since training triggers a refit."""
+        history = _history([10, 11, 9, 10, 12, 8, 10])
+        registered = self._registered(history, datetime(2024, 1, 8))
+        current = pd.concat([history, _history([40, 42, 41], start="2024-01-08")])
+
+        assert retrain_reason(registered, current, now=datetime(2024, 1, 11)) == "drift"
+
+    def test_old_models_are_stale(self):
+        """Test models past the maximum age are refitted."""
+        history = _history([10, 11, 9, 10])
+        registered = self._registered(history, datetime(2024, 1, 1))
+
+        assert retrain_reason(registered, history, now=datetime(2024, 2, 1)) == "stale"
+
+    @pytest.mark.asyncio
+    async def test_requests_refit_outdated_models(self, tmp_path):
+        """Test serving a stale model refits it, keeping it if the refit fails."""
+        history = _history([10, 11, 9, 10])
+        stale = self._registered(history, datetime(2024, 1, 1))
+        refitted = self._registered(history, datetime.utcnow())
+        registry = ModelRegistry(AsyncMock(), ArtifactStore(str(tmp_path)))
+
+        with patch.object(registry, "get", AsyncMock(return_value=stale)), \
+                patch.object(registry, "fit_arima", AsyncMock(return_value=refitted)) as fit:
+            served = await registry.get_or_fit_arima("ws-1", "t", history, (1, 1, 1))
+            fit.assert_awaited_once_with("ws-1", "t", history, (1, 1, 1))
+            assert served is refitted
+
+            fit.side_effect = RuntimeError("pool saturated")
+            assert await registry.get_or_fit_arima("ws-1", "t", history, (1, 1, 1)) is stale
+
+        with patch.object(registry, "get", AsyncMock(return_value=refitted)), \
+                patch.object(registry, "fit_arima", AsyncMock()) as fit:
+            assert await registry.get_or_fit_arima("ws-1", "t", history, (1, 1, 1)) is refitted
+            fit.assert_not_awaited()
+
+
+class TestWarmInference:
+    """Test forecasting from registered models without refitting."""
+
+    @pytest.mark.asyncio
+    async def test_arima_forecasts_from_latest_data(self):
+        """Test stored ARIMA results forecast after data newer than the fit."""
+        rng = np.random.default_rng(0)
+        series = np.cumsum(rng.normal(1.0, 0.5, 80))
+        fitted = arima_fit(series[:60], (1, 1, 1))
+
+        original = await arima_predict(fitted["model"], series[:60], 3)
+        warm = await arima_predict(fitted["model"], series, 3)
+        expected = fitted["model"].get_forecast(steps=3).predicted_mean
+
+        np.testing.assert_allclose(original["forecast"], expected)
+        # Same parameters, state filtered over the 20 newer points
+        assert warm["forecast"][0] == pytest.approx(series[-1], abs=3.0)
+        assert (warm["lower"] < warm["forecast"]).all()
+
+    @pytest.mark.asyncio
+    async def test_predictor_serves_registered_model(self):
+        """Test a predictor forecasts from the registry instead of fitting."""
+        dates = pd.date_range("2024-01-01", periods=3, freq="D")
+        data = pd.DataFrame({"date": dates, "error_rate": [0.1, 0.2, 0.1]})
+        registered = RegisteredModel(
+            id="m", version="0123456789ab", model_type="prophet",
+            target_metric="error_rate_all", model=MagicMock(),
+        )
+        future = pd.DataFrame({
+            "ds": pd.date_range("2024-01-04", periods=2, freq="D"),
+            "yhat": [0.05, 1.4],
+            "yhat_lower": [-0.1, 1.2],
+            "yhat_upper": [0.1, 1.6],
+        })
+
+        predictor = ErrorRatePredictor(AsyncMock())
+        predictor.registry.get_or_fit_prophet = AsyncMock(return_value=registered)
+        with patch(
+            "src.services.analytics.error_rate_predictor.prophet_predict",
+            AsyncMock(return_value=future),
+        ) as predict:
+            predictions = await predictor._predict_error_rates("ws-1", None, data, 2)
+
+        ws, target, history, _ = predictor.registry.get_or_fit_prophet.await_args.args
+        assert (ws, target) == ("ws-1", "error_rate_all")
+        assert list(history.columns) == ["ds", "y"]
+        assert predict.await_args.args[1] == dates[-1]
+        assert predictor.model_version == "0123456789ab"
+        assert [p["predicted_error_rate"] for p in predictions] == [0.05, 1.0]
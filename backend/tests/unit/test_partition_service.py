@@ -0,0 +1,147 @@
+"""Unit tests for time-range partition management."""
+
+import pytest
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services import partition_service
+from src.services.partition_service import PartitionSpec
+
+DAILY = PartitionSpec('public.execution_logs', 'started_at', 'day')
+MONTHLY = PartitionSpec('analytics.audit_logs', 'timestamp', 'month')
+
+
+def test_partition_names_round_trip():
+    """Test names follow the migration's convention and parse back."""
+    assert partition_service.partition_name(DAILY, date(2024, 3, 9)) == 'execution_logs_p20240309'
+    assert partition_service.partition_name(MONTHLY, date(2024, 12, 31)) == 'audit_logs_p202412'
+
+    assert partition_service.parse_partition_start('execution_logs_p20240309') == date(2024, 3, 9)
+    assert partition_service.parse_partition_start('audit_logs_p202412') == date(2024, 12, 1)
+    assert partition_service.parse_partition_start('execution_logs_default') is None
+
+
+def test_monthly_bounds_cross_year():
+    """Test a December partition ends on the first of January."""
+    assert partition_service.partition_bounds(MONTHLY, date(2024, 12, 15)) == (
+        date(2024, 12, 1), date(2025, 1, 1)
+    )
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_creates_only_missing():
+    """Test partitions up to days_ahead are created unless they exist."""
+    db = MagicMock()
+    db.execute = AsyncMock()
+    existing = ['execution_logs_p20240101', 'execution_logs_p20240102']
+
+    with patch.object(partition_service, "list_partitions", AsyncMock(return_value=existing)):
+        created = await partition_service.ensure_partitions(
+            db, DAILY, today=date(2024, 1, 1), days_ahead=3
+        )
+
+    assert created == ['execution_logs_p20240103', 'execution_logs_p20240104']
+    assert db.execute.await_count == 2
+    assert db.execute.call_args.args[1]['day'] == date(2024, 1, 4)
+
+
+@pytest.mark.asyncio
+async def test_expire_partitions_drops_whole_partitions_before_cutoff():
+    """Test only partitions ending at or before the cutoff are dropped."""
+    db = MagicMock()
+    db.execute = AsyncMock()
+    partitions = [
+        'execution_logs_default',
+        'execution_logs_p20240101',
+        'execution_logs_p20240102',
+        'execution_logs_p20240103',
+    ]
+
+    with patch.object(partition_service, "is_partitioned", AsyncMock(return_value=True)), \
+            patch.object(partition_service, "list_partitions", AsyncMock(return_value=partitions)), \
+            patch.object(partition_service, "drain_default_partition", AsyncMock(return_value=[])):
+        result = await partition_service.expire_partitions(
+            db, DAILY, datetime(2024, 1, 3, 12, 0)
+        )
+
+    assert result == {
+        'partitioned': True,
+        'dropped': ['execution_logs_p20240101', 'execution_logs_p20240102'],
+    }
+    assert 'DROP TABLE public."execution_logs_p20240102"' in str(db.execute.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_expire_partitions_detach_only():
+    """Test detach_only keeps expired partitions as standalone tables."""
+    db = MagicMock()
+    db.execute = AsyncMock()
+
+    with patch.object(partition_service, "is_partitioned", AsyncMock(return_value=True)), \
+            patch.object(partition_service, "list_partitions",
+                         AsyncMock(return_value=['audit_logs_p202301'])):
+        result = await partition_service.expire_partitions(
+            db, MONTHLY, datetime(2024, 1, 1), detach_only=True
+        )
+
+    assert result['detached'] == ['audit_logs_p202301']
+    assert 'DETACH PARTITION' in str(db.execute.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_expire_falls_back_to_delete_when_unpartitioned():
+    """Test tables that were not migrated still have rows deleted."""
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(rowcount=5))
+    cutoff = datetime(2024, 1, 1)
+
+    with patch.object(partition_service, "is_partitioned", AsyncMock(return_value=False)):
+        result = await partition_service.expire_partitions(db, DAILY, cutoff)
+
+    assert result == {'partitioned': False, 'rows_deleted': 5}
+    query, params = db.execute.call_args.args
+    assert str(query).startswith('DELETE FROM public.execution_logs')
+    assert params == {'cutoff_date': cutoff}
+
+
+@pytest.mark.asyncio
+async def test_drain_default_partition_creates_partitions_for_its_rows():
+    """Test each range with rows in the default partition gets its partition."""
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(
+        fetchall=MagicMock(return_value=[(date(2023, 12, 30),), (date(2023, 12, 31),)])
+    ))
+    partitions = ['execution_logs_default', 'execution_logs_p20240101']
+
+    with patch.object(partition_service, "list_partitions", AsyncMock(return_value=partitions)):
+        moved = await partition_service.drain_default_partition(
+            db, DAILY, before=datetime(2024, 1, 1)
+        )
+
+    assert moved == ['execution_logs_p20231230', 'execution_logs_p20231231']
+    query, params = db.execute.await_args_list[0].args
+    assert 'FROM public."execution_logs_default"' in str(query)
+    assert params == {'granularity': 'day', 'before': datetime(2024, 1, 1)}
+    assert [call.args[1]['day'] for call in db.execute.await_args_list[1:]] == [
+        date(2023, 12, 30), date(2023, 12, 31)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_expire_partitions_expires_rows_in_default_partition():
+    """Test expired rows are moved out of the default partition, then dropped."""
+    db = MagicMock()
+    db.execute = AsyncMock()
+    partitions = ['execution_logs_default', 'execution_logs_p20240105']
+    drain = AsyncMock(return_value=['execution_logs_p20231230'])
+
+    async def list_partitions(db, spec):
+        return sorted(partitions + drain.return_value) if drain.await_count else partitions
+
+    with patch.object(partition_service, "is_partitioned", AsyncMock(return_value=True)), \
+            patch.object(partition_service, "list_partitions", side_effect=list_partitions), \
+            patch.object(partition_service, "drain_default_partition", drain):
+        result = await partition_service.expire_partitions(db, DAILY, datetime(2024, 1, 3))
+
+    drain.assert_awaited_once_with(db, DAILY, before=datetime(2024, 1, 3))
+    assert result['dropped'] == ['execution_logs_p20231230']
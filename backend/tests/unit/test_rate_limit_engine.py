@@ -0,0 +1,105 @@
+"""Unit tests for the shared GCRA rate limit engine."""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.core.rate_limit_engine import (
+    LocalRateLimiter,
+    RateLimit,
+    RateLimitEngine,
+)
+
+
+class TestLocalRateLimiter:
+    """Tests for the in-process GCRA state."""
+
+    def test_allows_burst_up_to_limit(self):
+        """Test a fresh key allows exactly ``limit`` requests at once."""
+        local = LocalRateLimiter()
+        limits = [RateLimit(10, 60)]
+
+        results = [local.check(["k"], limits) for _ in range(11)]
+
+        assert [r.allowed for r in results] == [True] * 10 + [False]
+        assert [r.remaining for r in results[:3]] == [9, 8, 7]
+        assert results[-1].retry_after == pytest.approx(6, abs=0.1)
+
+    def test_peek_does_not_debit(self):
+        """Test checking without debit leaves the state unchanged."""
+        local = LocalRateLimiter()
+        limits = [RateLimit(5, 60)]
+
+        assert local.check(["k"], limits, 0, debit=False).remaining == 5
+        local.check(["k"], limits)
+        assert local.check(["k"], limits, 0, debit=False).remaining == 4
+
+    def test_most_restrictive_limit_binds(self):
+        """Test the result reports the limit that denied the request."""
+        local = LocalRateLimiter()
+        limits = [RateLimit(100, 60), RateLimit(2, 3600)]
+        keys = ["minute", "hour"]
+
+        local.check(keys, limits)
+        local.check(keys, limits)
+        result = local.check(keys, limits)
+
+        assert not result.allowed
+        assert result.limit == 2
+        assert result.period == 3600
+
+    def test_memory_is_bounded(self):
+        """Test least recently used keys are evicted past max_keys."""
+        local = LocalRateLimiter(max_keys=2)
+        for key in ("a", "b", "c"):
+            local.check([key], [RateLimit(1, 60)])
+
+        assert list(local.tats) == ["b", "c"]
+
+
+class TestRateLimitEngine:
+    """Tests for the Redis-backed engine."""
+
+    @pytest.fixture
+    def redis_client(self):
+        client = Mock()
+        client.redis.eval = AsyncMock(return_value=[1, 9, 0, 6000, 1])
+        return client
+
+    @pytest.mark.asyncio
+    async def test_hit_is_one_script_call(self, redis_client):
+        """Test all limits are checked by a single EVAL."""
+        engine = RateLimitEngine()
+        limits = [RateLimit(10, 60), RateLimit(100, 3600)]
+
+        with patch("src.core.rate_limit_engine.get_redis_client", return_value=redis_client):
+            result = await engine.hit("user_1", limits)
+
+        assert result.allowed and result.remaining == 9
+        args = redis_client.redis.eval.call_args.args
+        assert args[1] == 2
+        assert list(args[2:4]) == engine.storage_keys("user_1", limits)
+        assert list(args[4:]) == [1, 6000.0, 60000, 10, 36000.0, 3600000, 100]
+
+    @pytest.mark.asyncio
+    async def test_local_state_short_circuits_redis(self, redis_client):
+        """Test a key exhausted locally is denied without calling Redis."""
+        engine = RateLimitEngine()
+        limits = [RateLimit(2, 60)]
+
+        with patch("src.core.rate_limit_engine.get_redis_client", return_value=redis_client):
+            for _ in range(3):
+                result = await engine.hit("user_1", limits)
+
+        assert not result.allowed
+        assert redis_client.redis.eval.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_on_redis_error(self, redis_client):
+        """Test Redis errors fall back to per-process enforcement."""
+        redis_client.redis.eval.side_effect = ConnectionError("down")
+        engine = RateLimitEngine()
+
+        with patch("src.core.rate_limit_engine.get_redis_client", return_value=redis_client):
+            results = [(await engine.hit("user_1", [RateLimit(1, 60)])).allowed for _ in range(2)]
+
+        assert results == [True, False]
@@ -0,0 +1,203 @@
+"""Unit tests for the event-fed realtime counters."""
+
+import pytest
+from collections import defaultdict
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.api.websocket.realtime_metrics import RealtimeMetricsService
+from src.services.events.handlers import EventHandlers
+from src.services.metrics.realtime_counters import (
+    BUCKET_TTL,
+    RealtimeCounters,
+    bucket_key,
+    minute_of,
+    users_key,
+)
+
+NOW = datetime(2024, 1, 15, 12, 30, 10)
+
+
+class FakeRedis:
+    """In-memory stand-in for the hash and HyperLogLog commands used."""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.sets = defaultdict(set)
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        self.hashes[key][field] = self.hashes[key].get(field, 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def pfadd(self, key, *values):
+        self.sets[key].update(values)
+
+    def hgetall(self, key):
+        # Redis returns bytes field names and values
+        return {
+            field.encode(): str(value).encode()
+            for field, value in self.hashes.get(key, {}).items()
+        }
+
+    async def pfcount(self, *keys):
+        return len(set().union(*(self.sets.get(key, set()) for key in keys)))
+
+
+class FakePipeline:
+    """Queues FakeRedis commands until execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((getattr(self.redis, name), args))
+        return queue
+
+    async def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+class TestRealtimeCounters:
+    """Tests for RealtimeCounters."""
+
+    @pytest.fixture
+    def counters(self):
+        return RealtimeCounters(FakeRedis())
+
+    @pytest.mark.asyncio
+    async def test_totals_sum_the_window(self, counters):
+        """Test totals cover exactly the requested minutes."""
+        await counters.record_run_started("ws_1", "user_1", at=NOW)
+        await counters.record_run_completed("ws_1", success=False, at=NOW)
+        await counters.record_credits("ws_1", 2.5, at=NOW - timedelta(minutes=4))
+        await counters.record_credits("ws_1", 100, at=NOW - timedelta(minutes=20))
+
+        totals = await counters.totals("ws_1", 15, at=NOW)
+
+        assert totals == {"started": 1, "completed": 1, "failed": 1, "credits": 2.5}
+        assert (await counters.totals("ws_1", 60, at=NOW))["credits"] == 102.5
+
+    @pytest.mark.asyncio
+    async def test_active_users_counts_distinct_users(self, counters):
+        """Test distinct users are counted once across minutes."""
+        for minutes_ago, user in [(0, "a"), (1, "a"), (2, "b"), (10, "c")]:
+            await counters.record_run_started(
+                "ws_1", user, agent_id="agent_1", at=NOW - timedelta(minutes=minutes_ago)
+            )
+        await counters.record_run_started("ws_1", "d", agent_id="agent_2", at=NOW)
+
+        assert await counters.active_users("ws_1", 5, at=NOW) == 3
+        assert await counters.active_users("ws_1", 5, agent_id="agent_1", at=NOW) == 2
+
+    @pytest.mark.asyncio
+    async def test_buckets_expire_after_the_ring(self, counters):
+        """Test every written key gets the ring TTL."""
+        await counters.record_run_started("ws_1", "user_1", at=NOW)
+
+        minute = minute_of(NOW)
+        assert counters.redis.ttls == {
+            bucket_key("ws_1", minute): BUCKET_TTL,
+            users_key("ws_1", minute): BUCKET_TTL,
+        }
+
+    def test_window_is_bounded_by_the_ring(self, counters):
+        """Test windows longer than the ring are rejected."""
+        with pytest.raises(ValueError):
+            counters._window(61)
+
+
+class TestRealtimeCounterFeeds:
+    """Tests for feeding and serving the counters."""
+
+    @pytest.mark.asyncio
+    async def test_handlers_record_events(self):
+        """Test run and credit events update the counters."""
+        counters = RealtimeCounters(FakeRedis())
+        with patch(
+            "src.services.events.handlers.get_redis_client", AsyncMock(return_value=MagicMock())
+        ), patch(
+            "src.services.events.handlers.get_realtime_counters",
+            AsyncMock(return_value=counters),
+        ):
+            await EventHandlers.on_agent_run_started(
+                {"workspace_id": "ws_1", "agent_id": "agent_1", "user_id": "user_1"}
+            )
+            await EventHandlers.on_agent_run_completed(
+                {"workspace_id": "ws_1", "agent_id": "agent_1", "success": False}
+            )
+            await EventHandlers.on_credit_transaction(
+                {"workspace_id": "ws_1", "credits_consumed": 3}
+            )
+
+        totals = await counters.totals("ws_1", 1)
+        assert totals == {"started": 1, "completed": 1, "failed": 1, "credits": 3.0}
+        assert await counters.active_users("ws_1", 1) == 1
+
+    @pytest.mark.asyncio
+    async def test_service_reads_counters_without_sql(self):
+        """Test realtime metrics come from the counters when enabled."""
+        counters = RealtimeCounters(FakeRedis())
+        await counters.record_run_started("ws_1", "user_1")
+        await counters.record_run_completed("ws_1", success=False)
+        await counters.record_run_completed("ws_1", success=True)
+        db = AsyncMock()
+
+        with patch(
+            "src.api.websocket.realtime_metrics.get_realtime_counters",
+            AsyncMock(return_value=counters),
+        ):
+            users = await RealtimeMetricsService.get_active_users_count(db, "ws_1")
+            errors = await RealtimeMetricsService.get_error_rate(db, "ws_1")
+
+        assert users["active_users"] == 1
+        assert errors["error_rate"] == 50.0
+        db.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_non_numeric_credits_are_ignored(self):
+        """Test a malformed credit amount neither raises nor counts."""
+        counters = RealtimeCounters(FakeRedis())
+        with patch(
+            "src.services.events.handlers.get_redis_client", AsyncMock(return_value=MagicMock())
+        ), patch(
+            "src.services.events.handlers.get_realtime_counters",
+            AsyncMock(return_value=counters),
+        ):
+            await EventHandlers.on_credit_transaction(
+                {"workspace_id": "ws_1", "credits_consumed": "n/a"}
+            )
+            await EventHandlers.on_credit_transaction(
+                {"workspace_id": "ws_1", "credits_consumed": {"amount": 3}}
+            )
+
+        assert (await counters.totals("ws_1", 1))["credits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_announced_runs_feed_counters(self):
+        """Test runs announced through the broadcaster reach the counters."""
+        from src.api.websocket.events import EventBroadcaster
+
+        counters = RealtimeCounters(FakeRedis())
+        with patch("src.api.websocket.events.publish_event", AsyncMock()), patch(
+            "src.services.events.handlers.get_redis_client", AsyncMock(return_value=MagicMock())
+        ), patch(
+            "src.services.events.handlers.get_realtime_counters",
+            AsyncMock(return_value=counters),
+        ):
+            await EventBroadcaster.broadcast_execution_started("ws_1", "agent_1", "run_1", "user_1")
+            await EventBroadcaster.broadcast_execution_completed(
+                "ws_1", "agent_1", "run_1", success=True, runtime_seconds=1.5, credits_consumed=2.0
+            )
+
+        totals = await counters.totals("ws_1", 1)
+        assert totals == {"started": 1, "completed": 1, "failed": 0, "credits": 2.0}
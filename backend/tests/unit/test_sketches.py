@@ -0,0 +1,158 @@
+"""Unit tests for mergeable runtime quantile sketches."""
+
+import json
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.services.aggregation.sketches import (
+    DDSketch,
+    load_runtime_sketch,
+    merge_sketches,
+    sketch_bins_sql,
+)
+
+
+@pytest.fixture
+def lognormal_values():
+    """Skewed runtime-like values."""
+    rng = random.Random(42)
+    return [rng.lognormvariate(1.0, 1.5) for _ in range(20000)]
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestDDSketch:
+    """Test suite for DDSketch."""
+
+    def test_empty_sketch(self):
+        sketch = DDSketch()
+        assert sketch.count == 0
+        assert sketch.quantile(0.5) is None
+        assert sketch.mean == 0.0
+
+    @pytest.mark.parametrize("q", [0.5, 0.75, 0.9, 0.95, 0.99])
+    def test_relative_error_bound(self, lognormal_values, q):
+        sketch = DDSketch(relative_accuracy=0.01)
+        for v in lognormal_values:
+            sketch.add(v)
+
+        expected = exact_quantile(lognormal_values, q)
+        assert abs(sketch.quantile(q) - expected) <= 0.01 * expected + 1e-9
+
+    def test_merge_matches_single_sketch(self, lognormal_values):
+        whole = DDSketch()
+        parts = [DDSketch() for _ in range(24)]
+        for i, v in enumerate(lognormal_values):
+            whole.add(v)
+            parts[i % 24].add(v)
+
+        merged = merge_sketches(p.to_dict() for p in parts)
+
+        assert merged.count == whole.count
+        assert merged.bins == whole.bins
+        assert merged.quantiles([0.5, 0.99]) == whole.quantiles([0.5, 0.99])
+
+    def test_merge_rejects_mismatched_accuracy(self):
+        with pytest.raises(ValueError):
+            DDSketch(0.01).merge(DDSketch(0.02))
+
+    def test_zero_values_use_zero_bucket(self):
+        sketch = DDSketch()
+        for v in [0.0, 0.0, 0.0, 5.0]:
+            sketch.add(v)
+
+        assert sketch.zero_count == 3
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(1.0) == 5.0
+
+    def test_json_round_trip(self, lognormal_values):
+        sketch = DDSketch()
+        for v in lognormal_values[:500]:
+            sketch.add(v)
+
+        restored = DDSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+        assert restored.count == sketch.count
+        assert restored.bins == sketch.bins
+        assert restored.min == sketch.min
+        assert restored.max == sketch.max
+
+    def test_merge_skips_missing_sketches(self):
+        sketch = DDSketch()
+        sketch.add(1.5)
+
+        merged = merge_sketches([None, sketch.to_dict(), None])
+
+        assert merged.count == 1
+
+    def test_count_below(self):
+        sketch = DDSketch()
+        for v in [0.5, 2.0, 7.0, 20.0, 45.0, 120.0]:
+            sketch.add(v)
+
+        assert sketch.count_below(1) == 1
+        assert sketch.count_below(10) == 3
+        assert sketch.count_below(60) == 5
+
+    def test_std_dev(self):
+        sketch = DDSketch()
+        for v in [2, 4, 4, 4, 5, 5, 7, 9]:
+            sketch.add(v)
+
+        assert sketch.mean == pytest.approx(5.0)
+        assert sketch.std_dev == pytest.approx(2.0)
+
+
+def test_sketch_bins_sql_groups_by_aliases():
+    sql = sketch_bins_sql(
+        "execution_logs", "duration", "started_at",
+        group_by={"workspace_id": "workspace_id", "hour": "DATE_TRUNC('hour', started_at)"},
+    )
+
+    assert "DATE_TRUNC('hour', started_at) as hour" in sql
+    assert "GROUP BY workspace_id, hour, bin" in sql
+    assert "runtime_sketch" in sql
+
+
+@pytest.mark.asyncio
+async def test_load_runtime_sketch_reads_unsketched_hours_raw():
+    """Test hours rolled up without a sketch are scanned, not dropped."""
+    def sketch_of(*values):
+        sketch = DDSketch()
+        for value in values:
+            sketch.add(value)
+        return sketch.to_dict()
+
+    start = datetime(2024, 1, 1, 0, 30)
+    hour = datetime(2024, 1, 1, 1)
+    hourly = MagicMock()
+    hourly.fetchall.return_value = [
+        SimpleNamespace(hour=hour, runtime_sketch=sketch_of(1.0)),
+        SimpleNamespace(hour=hour + timedelta(hours=1), runtime_sketch=None),
+        SimpleNamespace(hour=hour + timedelta(hours=2), runtime_sketch=None),
+        SimpleNamespace(hour=hour + timedelta(hours=4), runtime_sketch=sketch_of(2.0)),
+    ]
+    raw = MagicMock()
+    raw.fetchone.return_value = SimpleNamespace(runtime_sketch=sketch_of(3.0))
+    db = AsyncMock()
+    db.execute = AsyncMock(side_effect=[hourly, raw, raw, raw])
+
+    sketch = await load_runtime_sketch(db, "ws-1", start, hour + timedelta(hours=6))
+
+    scanned = [
+        (call.args[1]["start_time"], call.args[1]["end_time"])
+        for call in db.execute.await_args_list[1:]
+    ]
+    assert scanned == [
+        (start, hour),
+        (hour + timedelta(hours=1), hour + timedelta(hours=4)),
+        (hour + timedelta(hours=5), hour + timedelta(hours=6)),
+    ]
+    assert sketch.count == 5
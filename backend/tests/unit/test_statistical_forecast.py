@@ -0,0 +1,117 @@
+"""Unit tests for the fast statistical forecasting tier."""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.analytics import trend_analysis
+from src.services.analytics.statistical_forecast import forecast_series
+from src.services.analytics.trend_analysis import TrendAnalysisService
+
+
+def _weekly(n, noise=2.0, seed=0):
+    rng = np.random.default_rng(seed)
+    pattern = np.array([0, 5, 10, 5, 0, -30, -30], dtype=float)
+    return 100 + np.tile(pattern, n // 7 + 1)[:n] + rng.normal(0, noise, n)
+
+
+def _frame(values):
+    return pd.DataFrame(
+        {"value": values},
+        index=pd.date_range("2024-01-01", periods=len(values), freq="D", name="timestamp"),
+    )
+
+
+class TestForecastSeries:
+    """Test model selection and forecasts."""
+
+    def test_weekly_series_uses_seasonal_model(self):
+        """Test a weekly pattern is picked up and repeated."""
+        y = _weekly(84)
+
+        result = forecast_series(y, 7)
+
+        assert result.model in ("holt_winters", "seasonal_naive")
+        assert result.holdout_error < 5
+        expected = 100 + np.array([0, 5, 10, 5, 0, -30, -30])
+        np.testing.assert_allclose(result.forecast, expected, atol=6)
+        assert (result.lower < result.forecast).all()
+        assert (result.forecast < result.upper).all()
+
+    def test_trend_is_extrapolated(self):
+        """Test a linear trend selects a trended model."""
+        rng = np.random.default_rng(1)
+        y = 50 + 2 * np.arange(60) + rng.normal(0, 1, 60)
+
+        result = forecast_series(y, 5)
+
+        assert result.model in ("holt", "holt_winters")
+        np.testing.assert_allclose(result.forecast, 50 + 2 * np.arange(60, 65), atol=5)
+        # Intervals widen with the horizon
+        assert np.all(np.diff(result.upper - result.lower) > 0)
+
+    def test_short_series_skips_seasonal_models(self):
+        """Test fewer than two seasons of training data are not seasonal."""
+        result = forecast_series(np.array([3.0, 4, 3, 5, 4, 4, 5, 4, 3, 4]), 3)
+
+        assert set(result.holdout_errors) == {"ses", "holt"}
+        assert len(result.forecast) == 3
+
+    def test_rejects_unusable_series(self):
+        """Test too few or non-finite points are refused."""
+        with pytest.raises(ValueError):
+            forecast_series(np.array([1.0, 2.0]), 3)
+        with pytest.raises(ValueError):
+            forecast_series(np.array([1.0, np.nan, 2, 3, 4, 5, 6]), 3)
+
+    def test_runs_in_milliseconds(self):
+        """Test a year of daily points is forecast well under Prophet's startup."""
+        y = _weekly(365)
+        forecast_series(y, 30)
+
+        start = time.perf_counter()
+        forecast_series(y, 30)
+
+        assert time.perf_counter() - start < 0.25
+
+
+class TestForecastTiers:
+    """Test Prophet is only used when the fast tier forecasts badly."""
+
+    @pytest.mark.asyncio
+    async def test_accurate_series_skip_prophet(self):
+        """Test a low holdout error returns the statistical forecast."""
+        executor = MagicMock()
+        executor.run = AsyncMock()
+        service = TrendAnalysisService(AsyncMock())
+
+        with patch.object(trend_analysis, "PROPHET_AVAILABLE", True), \
+                patch.object(trend_analysis, "get_model_executor", return_value=executor):
+            forecast = await service._generate_forecast(_frame(_weekly(60)))
+
+        executor.run.assert_not_awaited()
+        assert forecast["model"] in ("holt_winters", "seasonal_naive")
+        assert len(forecast["shortTerm"]) == 7
+        assert forecast["accuracy"]["holdoutError"] < 15
+        assert forecast["shortTerm"][0]["timestamp"] == "2024-03-01T00:00:00"
+
+    @pytest.mark.asyncio
+    async def test_poor_fit_falls_through_to_prophet(self):
+        """Test a high holdout error runs Prophet, keeping the fast forecast on failure."""
+        rng = np.random.default_rng(2)
+        values = rng.exponential(10, 60)
+        executor = MagicMock()
+        executor.run = AsyncMock(side_effect=RuntimeError("prophet failed"))
+        service = TrendAnalysisService(AsyncMock())
+
+        with patch.object(trend_analysis, "PROPHET_AVAILABLE", True), \
+                patch.object(trend_analysis, "get_model_executor", return_value=executor):
+            forecast = await service._generate_forecast(_frame(values))
+
+        executor.run.assert_awaited_once()
+        assert forecast["model"] != "prophet"
+        assert forecast["accuracy"]["holdoutError"] > 15
+        assert len(forecast["shortTerm"]) == 7
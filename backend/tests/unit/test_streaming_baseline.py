@@ -0,0 +1,147 @@
+"""Unit tests for incremental anomaly baselines."""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.analytics.streaming_baseline import (
+    BaselineStore,
+    RunningStats,
+    SeasonalBaseline,
+    WATERMARK_NAME,
+)
+
+
+def _rollup_row(workspace_id, hour, runtime, credits=1.0, executions=1):
+    return SimpleNamespace(
+        workspace_id=workspace_id,
+        hour=hour,
+        avg_runtime=runtime,
+        total_credits=credits,
+        total_executions=executions,
+    )
+
+
+class TestRunningStats:
+    """Test the Welford and EWMA statistics."""
+
+    def test_matches_batch_statistics(self):
+        """Test running mean/variance equal the full-history values."""
+        values = np.random.default_rng(3).normal(50, 7, 500)
+        stats = RunningStats(alpha=0.2)
+        for value in values:
+            stats.add(value)
+
+        assert stats.count == 500
+        assert stats.mean == pytest.approx(values.mean())
+        assert stats.std_dev == pytest.approx(values.std(ddof=1))
+        ewm = pd.Series(values).ewm(alpha=0.2, adjust=False)
+        assert stats.ewma == pytest.approx(ewm.mean().iloc[-1])
+
+    def test_round_trip(self):
+        """Test serialized statistics continue where they left off."""
+        stats = RunningStats()
+        for value in (1.0, 2.0, 4.0):
+            stats.add(value)
+
+        restored = RunningStats.from_dict(stats.to_dict())
+        restored.add(8.0)
+        stats.add(8.0)
+
+        assert restored.to_dict() == stats.to_dict()
+
+
+class TestSeasonalBaseline:
+    """Test per-hour baselines and scoring."""
+
+    def test_scores_against_same_hour(self):
+        """Test a daily peak is expected at its hour but not at others."""
+        baseline = SeasonalBaseline()
+        start = datetime(2024, 1, 1)
+        for h in range(24 * 14):
+            hour = start + timedelta(hours=h)
+            value = 100.0 if hour.hour == 9 else 10.0
+            baseline.update(hour, value + (h // 24) % 3)
+
+        at_peak = baseline.score(datetime(2024, 2, 1, 9), 101.0)
+        at_night = baseline.score(datetime(2024, 2, 1, 3), 101.0)
+
+        assert at_peak['seasonal'] and at_peak['zscore'] < 2
+        assert at_night['zscore'] > 50
+        assert at_night['percentile'] == pytest.approx(100 * 13 * 24 / (24 * 14), abs=5)
+
+    def test_each_hour_is_folded_once(self):
+        """Test re-applying hours already seen does not change the baseline."""
+        baseline = SeasonalBaseline()
+        hours = [datetime(2024, 1, 1, h) for h in range(5)]
+        for hour in hours:
+            baseline.update(hour, 1.0 + hour.hour)
+
+        assert not baseline.update(hours[2], 1000.0)
+        assert baseline.count == 5
+        assert baseline.last_hour == hours[-1]
+
+    def test_no_score_without_baseline(self):
+        """Test scoring needs a few observations with some spread."""
+        baseline = SeasonalBaseline()
+        baseline.update(datetime(2024, 1, 1, 0), 5.0)
+        baseline.update(datetime(2024, 1, 1, 1), 5.0)
+
+        assert baseline.score(datetime(2024, 1, 1, 2), 50.0) is None
+
+    def test_round_trip(self):
+        """Test a baseline survives serialization to BaselineModel statistics."""
+        baseline = SeasonalBaseline()
+        for h in range(48):
+            baseline.update(datetime(2024, 1, 1) + timedelta(hours=h), float(h % 5))
+
+        restored = SeasonalBaseline.from_dict(baseline.to_dict())
+
+        assert restored.to_dict() == baseline.to_dict()
+        point = datetime(2024, 1, 3, 4)
+        assert restored.score(point, 9.0) == baseline.score(point, 9.0)
+
+
+class TestBaselineStore:
+    """Test folding rollups into persisted baselines."""
+
+    @pytest.mark.asyncio
+    async def test_update_reads_only_new_hours(self):
+        """Test an update folds hours since the watermark and advances it."""
+        high_water = datetime(2024, 1, 1, 10)
+        rows = [_rollup_row("ws-1", high_water + timedelta(hours=h), 2.0 + h) for h in range(3)]
+
+        watermark = MagicMock()
+        watermark.scalar_one_or_none.return_value = high_water
+        rollups = MagicMock()
+        rollups.fetchall.return_value = rows
+        models = MagicMock()
+        models.scalars.return_value.all.return_value = []
+
+        db = AsyncMock()
+        db.add = MagicMock()
+        db.execute = AsyncMock(side_effect=[watermark, rollups, models, MagicMock()])
+
+        with patch("src.services.analytics.streaming_baseline.settings") as settings:
+            settings.INCREMENTAL_ROLLUP_ENABLED = False
+            settings.INCREMENTAL_ROLLUP_OVERLAP_SECONDS = 300
+            result = await BaselineStore(db).update_from_rollups(now=datetime(2024, 1, 1, 14, 30))
+
+        # Closed hours end an hour (plus overlap) before now
+        rollup_params = db.execute.call_args_list[1].args[1]
+        assert rollup_params['start_time'] == high_water
+        assert rollup_params['end_time'] == datetime(2024, 1, 1, 13)
+        watermark_params = db.execute.call_args_list[3].args[1]
+        assert watermark_params == {'name': WATERMARK_NAME, 'high_water': datetime(2024, 1, 1, 13)}
+
+        assert result['baselines_updated'] == 3
+        added = {model.metric_type: model for (model,), _ in db.add.call_args_list}
+        assert set(added) == {'runtime_seconds', 'credits_consumed', 'executions'}
+        runtime = added['runtime_seconds']
+        assert runtime.model_type == 'streaming'
+        assert runtime.statistics['count'] == 3
+        assert runtime.statistics['mean'] == pytest.approx(3.0)
+        db.commit.assert_awaited()
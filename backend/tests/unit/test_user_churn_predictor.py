@@ -0,0 +1,104 @@
+"""Unit tests for column-wise churn scoring."""
+
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock
+
+from src.services.analytics.user_churn_predictor import UserChurnPredictor
+
+
+def _users(n, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    return pd.DataFrame({
+        "user_id": [f"user-{i}" for i in range(n)],
+        "last_active": [now - timedelta(days=int(d)) for d in rng.integers(0, 60, n)],
+        "total_sessions": rng.integers(0, 200, n),
+        "active_days": rng.integers(0, 90, n),
+        "login_count": rng.integers(0, 300, n),
+        "total_credits": rng.integers(0, 3, n) * rng.integers(0, 500, n),
+        "avg_session_duration": rng.uniform(0, 1200, n),
+    })
+
+
+@pytest.fixture
+def predictor():
+    return UserChurnPredictor(AsyncMock())
+
+
+class TestChurnScoring:
+    """Test scores, records and paging."""
+
+    @pytest.mark.asyncio
+    async def test_scores_match_rules(self, predictor):
+        """Test each rule contributes to the probability and its factors."""
+        now = datetime.now()
+        features = await predictor._extract_features(pd.DataFrame({
+            "user_id": ["dormant", "healthy"],
+            "last_active": [now - timedelta(days=45), now],
+            "total_sessions": [0, 120],
+            "active_days": [2, 60],
+            "login_count": [0, 100],
+            "total_credits": [0, 900],
+            "avg_session_duration": [60.0, 900.0],
+        }))
+
+        scores, predictions = await predictor._make_predictions(features, None, None, 0.7)
+
+        # 0.4 + 0.25 + 0.15 + 0.1 + 0.1, capped at 1
+        np.testing.assert_allclose(scores.churn_probability, [1.0, 0.0])
+        assert [p["user_id"] for p in predictions] == ["dormant"]
+        dormant = predictions[0]
+        assert dormant["risk_level"] == "critical"
+        assert dormant["days_until_churn"] == 7
+        assert [f["factor"] for f in dormant["risk_factors"]] == [
+            "inactivity", "low_activity", "low_engagement", "no_usage", "poor_engagement"
+        ]
+        assert dormant["risk_factors"][0]["severity"] == "high"
+        assert dormant["recommended_actions"][-1].endswith("Assign customer success manager for outreach")
+        assert dormant["features"]["days_since_active"] == 45.0
+
+    @pytest.mark.asyncio
+    async def test_page_is_ranked_by_risk(self, predictor):
+        """Test a page holds the highest-risk users after the offset."""
+        features = await predictor._extract_features(_users(500))
+
+        scores, page = await predictor._make_predictions(
+            features, None, None, 0.7, limit=20, offset=10
+        )
+
+        ranked = sorted(scores.risk_score, reverse=True)
+        assert len(page) == 20
+        assert [p["risk_score"] for p in page] == pytest.approx(ranked[10:30])
+
+    @pytest.mark.asyncio
+    async def test_distribution_covers_all_users(self, predictor):
+        """Test the risk analysis counts users that were not materialized."""
+        features = await predictor._extract_features(_users(500))
+        scores, _ = await predictor._make_predictions(features, None, None, 0.7, limit=5)
+
+        analysis = predictor._analyze_risk_distribution(scores)
+
+        assert sum(analysis["risk_distribution"].values()) == 500
+        assert analysis["statistics"]["average_churn_probability"] == pytest.approx(
+            scores.churn_probability.mean()
+        )
+        counts = list(analysis["top_risk_factors"].values())
+        assert counts == sorted(counts, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_large_workspace_scores_quickly(self, predictor):
+        """Test 100k users are scored and paged well under a second."""
+        features = await predictor._extract_features(_users(100_000))
+
+        start = time.perf_counter()
+        scores, page = await predictor._make_predictions(features, None, None, 0.7, limit=100)
+        elapsed = time.perf_counter() - start
+
+        assert len(scores) == 100_000
+        assert len(page) == 100
+        assert elapsed < 1.0
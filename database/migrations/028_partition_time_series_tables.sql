@@ -0,0 +1,363 @@
+-- =====================================================================
+-- Migration: 028_partition_time_series_tables.sql
+-- Description: Range-partition append-only event tables by time
+-- Created: 2025-11-14
+-- =====================================================================
+--
+-- Converts the high-volume event tables to declarative range partitioning:
+--
+--   execution_logs                 BY started_at   daily partitions
+--   analytics.user_activity        BY created_at   daily partitions
+--   analytics.error_occurrences    BY occurred_at  monthly partitions
+--   analytics.audit_logs           BY timestamp    monthly partitions
+--
+-- Queries filtering on the partition column only scan matching partitions,
+-- and retention becomes DETACH/DROP PARTITION instead of DELETE + VACUUM.
+-- Partitions are named <table>_pYYYYMMDD (daily) or <table>_pYYYYMM
+-- (monthly); backend/src/services/partition_service.py relies on this
+-- convention when it creates upcoming partitions and expires old ones
+-- (tasks.maintenance.manage_partitions / cleanup_old_data).
+--
+-- Constraints that change (PostgreSQL requires the partition key in every
+-- unique constraint of a partitioned table):
+--   * primary keys become (id, <partition column>)
+--   * execution_logs.execution_id is unique per started_at instead of
+--     globally; a plain index on execution_id is kept for lookups
+--   * error_recovery_attempts.occurrence_id no longer has a foreign key
+--     to error_occurrences
+--
+-- Requires PostgreSQL 13+ (row triggers on partitioned tables). Existing
+-- rows are copied into the new table, so run it in a maintenance window.
+-- =====================================================================
+
+SET search_path TO analytics, public;
+
+-- =====================================================================
+-- Function: create_time_partition
+-- Description: Create the partition of p_parent that contains p_start
+-- =====================================================================
+--
+-- Rows whose partition did not exist yet (late events, a missed
+-- maintenance run) are stored in <table>_default. PostgreSQL refuses to
+-- create a partition for a range the default partition holds rows of, so
+-- the default partition is detached, its rows in the range are moved into
+-- the new partition and it is attached again. DETACH locks the parent
+-- table until the transaction commits.
+
+CREATE OR REPLACE FUNCTION analytics.create_time_partition(
+    p_parent REGCLASS,
+    p_granularity TEXT,
+    p_start DATE
+) RETURNS TEXT AS $$
+DECLARE
+    v_schema TEXT;
+    v_table TEXT;
+    v_column TEXT;
+    v_from DATE;
+    v_to DATE;
+    v_name TEXT;
+    v_default TEXT;
+    v_has_rows BOOLEAN := FALSE;
+BEGIN
+    SELECT n.nspname, c.relname INTO v_schema, v_table
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = p_parent;
+
+    IF p_granularity = 'day' THEN
+        v_from := p_start;
+        v_to := p_start + 1;
+        v_name := v_table || '_p' || to_char(v_from, 'YYYYMMDD');
+    ELSIF p_granularity = 'month' THEN
+        v_from := date_trunc('month', p_start)::date;
+        v_to := (v_from + INTERVAL '1 month')::date;
+        v_name := v_table || '_p' || to_char(v_from, 'YYYYMM');
+    ELSE
+        RAISE EXCEPTION 'Invalid partition granularity: %', p_granularity;
+    END IF;
+
+    IF to_regclass(format('%I.%I', v_schema, v_name)) IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+
+    v_default := v_table || '_default';
+    IF to_regclass(format('%I.%I', v_schema, v_default)) IS NOT NULL THEN
+        SELECT a.attname INTO v_column
+        FROM pg_partitioned_table pt
+        JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+        WHERE pt.partrelid = p_parent;
+
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I.%I WHERE %I >= %L AND %I < %L)',
+                       v_schema, v_default, v_column, v_from, v_column, v_to)
+        INTO v_has_rows;
+    END IF;
+
+    IF NOT v_has_rows THEN
+        EXECUTE format(
+            'CREATE TABLE %I.%I PARTITION OF %I.%I FOR VALUES FROM (%L) TO (%L)',
+            v_schema, v_name, v_schema, v_table, v_from, v_to
+        );
+        RETURN v_name;
+    END IF;
+
+    EXECUTE format('ALTER TABLE %I.%I DETACH PARTITION %I.%I',
+                   v_schema, v_table, v_schema, v_default);
+    EXECUTE format(
+        'CREATE TABLE %I.%I PARTITION OF %I.%I FOR VALUES FROM (%L) TO (%L)',
+        v_schema, v_name, v_schema, v_table, v_from, v_to
+    );
+    EXECUTE format('INSERT INTO %I.%I SELECT * FROM %I.%I WHERE %I >= %L AND %I < %L',
+                   v_schema, v_name, v_schema, v_default, v_column, v_from, v_column, v_to);
+    EXECUTE format('DELETE FROM %I.%I WHERE %I >= %L AND %I < %L',
+                   v_schema, v_default, v_column, v_from, v_column, v_to);
+    EXECUTE format('ALTER TABLE %I.%I ATTACH PARTITION %I.%I DEFAULT',
+                   v_schema, v_table, v_schema, v_default);
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION analytics.create_time_partition IS
+    'Create (if missing) the daily or monthly range partition of a table containing a date, moving its rows out of the default partition';
+
+-- =====================================================================
+-- Function: partition_existing_table
+-- Description: Replace a table by a range-partitioned copy of itself
+-- =====================================================================
+
+CREATE OR REPLACE FUNCTION analytics.partition_existing_table(
+    p_table REGCLASS,
+    p_column TEXT,
+    p_granularity TEXT,
+    p_days_ahead INTEGER DEFAULT 7
+) RETURNS VOID AS $$
+DECLARE
+    v_schema TEXT;
+    v_table TEXT;
+    v_old TEXT;
+    v_pk_columns TEXT[];
+    v_first DATE;
+    v_day DATE;
+    v_step INTERVAL;
+    v_stmt TEXT;
+    v_index_defs TEXT[];
+    v_trigger_defs TEXT[];
+    v_policy_defs TEXT[];
+    v_grant_defs TEXT[];
+    v_fk_defs TEXT[];
+    v_seq_names TEXT[];
+    v_seq_columns TEXT[];
+    v_rls BOOLEAN;
+    r RECORD;
+    i INTEGER;
+BEGIN
+    SELECT n.nspname, c.relname, c.relrowsecurity INTO v_schema, v_table, v_rls
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = p_table;
+
+    IF (SELECT relkind FROM pg_class WHERE oid = p_table) = 'p' THEN
+        RAISE NOTICE '%.% is already partitioned', v_schema, v_table;
+        RETURN;
+    END IF;
+
+    v_old := v_table || '_unpartitioned';
+
+    -- Primary key columns, extended with the partition column
+    SELECT array_agg(a.attname::text ORDER BY array_position(ix.indkey, a.attnum))
+    INTO v_pk_columns
+    FROM pg_index ix
+    JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = ANY(ix.indkey)
+    WHERE ix.indrelid = p_table AND ix.indisprimary;
+
+    -- Capture everything that has to be recreated on the new table while
+    -- the definitions still name the original table
+    SELECT array_agg(pg_get_indexdef(ix.indexrelid))
+    INTO v_index_defs
+    FROM pg_index ix
+    WHERE ix.indrelid = p_table AND NOT ix.indisprimary
+        AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = ix.indexrelid);
+
+    -- Unique constraints cannot be global; keep them as plain indexes
+    SELECT array_cat(v_index_defs, array_agg(
+        format('CREATE INDEX %I ON %I.%I (%s)',
+               con.conname || '_idx', v_schema, v_table,
+               (SELECT string_agg(quote_ident(a.attname), ', ')
+                FROM pg_attribute a
+                WHERE a.attrelid = con.conrelid AND a.attnum = ANY(con.conkey)))
+    ))
+    INTO v_index_defs
+    FROM pg_constraint con
+    WHERE con.conrelid = p_table AND con.contype = 'u';
+
+    SELECT array_agg(pg_get_triggerdef(t.oid))
+    INTO v_trigger_defs
+    FROM pg_trigger t
+    WHERE t.tgrelid = p_table AND NOT t.tgisinternal;
+
+    SELECT array_agg(format(
+        'CREATE POLICY %I ON %I.%I AS %s FOR %s TO %s%s%s',
+        pol.policyname, v_schema, v_table, pol.permissive, pol.cmd,
+        array_to_string(pol.roles, ', '),
+        CASE WHEN pol.qual IS NOT NULL THEN ' USING (' || pol.qual || ')' ELSE '' END,
+        CASE WHEN pol.with_check IS NOT NULL THEN ' WITH CHECK (' || pol.with_check || ')' ELSE '' END
+    ))
+    INTO v_policy_defs
+    FROM pg_policies pol
+    WHERE pol.schemaname = v_schema AND pol.tablename = v_table;
+
+    -- LIKE does not copy foreign keys to other tables
+    SELECT array_agg(format('ALTER TABLE %I.%I ADD CONSTRAINT %I %s',
+                            v_schema, v_table, con.conname, pg_get_constraintdef(con.oid)))
+    INTO v_fk_defs
+    FROM pg_constraint con
+    WHERE con.conrelid = p_table AND con.contype = 'f';
+
+    SELECT array_agg(format('GRANT %s ON %I.%I TO %s',
+                            g.privilege_type, v_schema, v_table,
+                            CASE WHEN g.grantee = 'PUBLIC' THEN 'PUBLIC' ELSE quote_ident(g.grantee) END))
+    INTO v_grant_defs
+    FROM information_schema.role_table_grants g
+    WHERE g.table_schema = v_schema AND g.table_name = v_table
+        AND g.grantee <> (SELECT rolname FROM pg_roles r JOIN pg_class c ON c.relowner = r.oid
+                          WHERE c.oid = p_table);
+
+    -- Sequences owned by the old table (serial columns) must outlive it
+    SELECT array_agg(d.objid::regclass::text), array_agg(a.attname::text)
+    INTO v_seq_names, v_seq_columns
+    FROM pg_depend d
+    JOIN pg_class seq ON seq.oid = d.objid AND seq.relkind = 'S'
+    JOIN pg_attribute a ON a.attrelid = p_table AND a.attnum = d.refobjsubid
+    WHERE d.refobjid = p_table AND d.classid = 'pg_class'::regclass AND d.deptype = 'a';
+
+    FOR i IN 1 .. COALESCE(array_length(v_seq_names, 1), 0) LOOP
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', v_seq_names[i]);
+    END LOOP;
+
+    -- Foreign keys from other tables cannot reference a partitioned table
+    -- without the partition column; drop them (the columns are kept)
+    FOR r IN
+        SELECT con.conname, con.conrelid::regclass as referencing
+        FROM pg_constraint con
+        WHERE con.confrelid = p_table AND con.contype = 'f'
+    LOOP
+        RAISE NOTICE 'Dropping foreign key % on % (references %.%)',
+            r.conname, r.referencing, v_schema, v_table;
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', r.referencing, r.conname);
+    END LOOP;
+
+    -- Swap in the partitioned table
+    EXECUTE format('ALTER TABLE %I.%I RENAME TO %I', v_schema, v_table, v_old);
+
+    FOR r IN
+        SELECT con.conname FROM pg_constraint con
+        WHERE con.conrelid = format('%I.%I', v_schema, v_old)::regclass
+            AND con.contype IN ('p', 'u')
+    LOOP
+        EXECUTE format('ALTER TABLE %I.%I DROP CONSTRAINT %I', v_schema, v_old, r.conname);
+    END LOOP;
+
+    FOR r IN
+        SELECT i.indexrelid::regclass as index_name FROM pg_index i
+        WHERE i.indrelid = format('%I.%I', v_schema, v_old)::regclass
+    LOOP
+        EXECUTE format('DROP INDEX %s', r.index_name);
+    END LOOP;
+
+    EXECUTE format(
+        'CREATE TABLE %I.%I (LIKE %I.%I INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+        'INCLUDING GENERATED INCLUDING COMMENTS) PARTITION BY RANGE (%I)',
+        v_schema, v_table, v_schema, v_old, p_column
+    );
+    EXECUTE format('ALTER TABLE %I.%I ALTER COLUMN %I SET NOT NULL', v_schema, v_table, p_column);
+
+    IF v_pk_columns IS NOT NULL THEN
+        IF NOT p_column = ANY(v_pk_columns) THEN
+            v_pk_columns := v_pk_columns || p_column;
+        END IF;
+        EXECUTE format(
+            'ALTER TABLE %I.%I ADD PRIMARY KEY (%s)', v_schema, v_table,
+            (SELECT string_agg(quote_ident(col), ', ') FROM unnest(v_pk_columns) col)
+        );
+    END IF;
+
+    FOREACH v_stmt IN ARRAY COALESCE(v_fk_defs, '{}'::text[]) LOOP
+        EXECUTE v_stmt;
+    END LOOP;
+
+    FOREACH v_stmt IN ARRAY COALESCE(v_index_defs, '{}'::text[]) LOOP
+        EXECUTE v_stmt;
+    END LOOP;
+
+    FOREACH v_stmt IN ARRAY COALESCE(v_trigger_defs, '{}'::text[]) LOOP
+        EXECUTE v_stmt;
+    END LOOP;
+
+    IF v_rls THEN
+        EXECUTE format('ALTER TABLE %I.%I ENABLE ROW LEVEL SECURITY', v_schema, v_table);
+    END IF;
+    FOREACH v_stmt IN ARRAY COALESCE(v_policy_defs, '{}'::text[]) LOOP
+        EXECUTE v_stmt;
+    END LOOP;
+
+    FOREACH v_stmt IN ARRAY COALESCE(v_grant_defs, '{}'::text[]) LOOP
+        EXECUTE v_stmt;
+    END LOOP;
+
+    FOR i IN 1 .. COALESCE(array_length(v_seq_names, 1), 0) LOOP
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I.%I',
+                       v_seq_names[i], v_schema, v_table, v_seq_columns[i]);
+    END LOOP;
+
+    -- Partitions covering existing rows up to p_days_ahead from today, plus
+    -- a default partition so a missed maintenance run never rejects inserts
+    EXECUTE format('SELECT MIN(%I)::date FROM %I.%I', p_column, v_schema, v_old) INTO v_first;
+    v_first := COALESCE(v_first, CURRENT_DATE);
+    v_step := CASE WHEN p_granularity = 'month' THEN INTERVAL '1 month' ELSE INTERVAL '1 day' END;
+    IF p_granularity = 'month' THEN
+        v_first := date_trunc('month', v_first)::date;
+    END IF;
+
+    v_day := v_first;
+    WHILE v_day <= CURRENT_DATE + p_days_ahead LOOP
+        PERFORM analytics.create_time_partition(
+            format('%I.%I', v_schema, v_table)::regclass, p_granularity, v_day
+        );
+        v_day := (v_day + v_step)::date;
+    END LOOP;
+
+    EXECUTE format('CREATE TABLE %I.%I PARTITION OF %I.%I DEFAULT',
+                   v_schema, v_table || '_default', v_schema, v_table);
+
+    EXECUTE format('INSERT INTO %I.%I SELECT * FROM %I.%I', v_schema, v_table, v_schema, v_old);
+    EXECUTE format('DROP TABLE %I.%I', v_schema, v_old);
+
+    EXECUTE format('ANALYZE %I.%I', v_schema, v_table);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION analytics.partition_existing_table IS
+    'Replace a table by a range-partitioned copy, keeping indexes, triggers, RLS policies and grants';
+
+-- =====================================================================
+-- Convert tables
+-- =====================================================================
+
+BEGIN;
+
+-- Rows without an event time cannot be routed to a range partition
+UPDATE public.execution_logs SET started_at = COALESCE(created_at, NOW()) WHERE started_at IS NULL;
+UPDATE analytics.user_activity SET created_at = NOW() WHERE created_at IS NULL;
+UPDATE analytics.error_occurrences SET occurred_at = COALESCE(created_at, NOW()) WHERE occurred_at IS NULL;
+
+SELECT analytics.partition_existing_table('public.execution_logs', 'started_at', 'day');
+SELECT analytics.partition_existing_table('analytics.user_activity', 'created_at', 'day');
+SELECT analytics.partition_existing_table('analytics.error_occurrences', 'occurred_at', 'month');
+
+-- audit_logs is created by the backend's alembic migrations
+DO $$
+BEGIN
+    IF to_regclass('analytics.audit_logs') IS NOT NULL THEN
+        PERFORM analytics.partition_existing_table('analytics.audit_logs', 'timestamp', 'month');
+    END IF;
+END;
+$$;
+
+COMMIT;
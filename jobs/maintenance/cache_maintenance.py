@@ -42,24 +42,18 @@ async def _cleanup_expired_cache():
         total_checked = 0
 
         for pattern in patterns_to_check:
-            cursor = 0
-            while True:
-                cursor, keys = await redis_client.redis.scan(
-                    cursor=cursor, match=pattern, count=100
-                )
-
-                for key in keys:
-                    total_checked += 1
-                    ttl = await redis_client.get_ttl(key)
-
-                    # Remove keys without TTL (shouldn't exist for cache entries)
-                    if ttl == -1:
-                        await redis_client.delete(key)
-                        total_cleaned += 1
-                        logger.warning(f"Removed cache key without TTL: {key}")
-
-                if cursor == 0:
-                    break
+            # One SCAN + one pipelined TTL round trip per batch
+            async for batch in redis_client.scan_ttls(pattern, count=1000):
+                total_checked += len(batch)
+
+                # Remove keys without TTL (shouldn't exist for cache entries)
+                stale_keys = [key for key, ttl in batch if ttl == -1]
+                if stale_keys:
+                    total_cleaned += await redis_client.delete_many(stale_keys)
+                    logger.warning(
+                        f"Removed {len(stale_keys)} cache keys without TTL "
+                        f"matching {pattern}"
+                    )
 
         logger.info(
             f"Cache cleanup completed: checked {total_checked} keys, "